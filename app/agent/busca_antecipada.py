@@ -0,0 +1,101 @@
+# app/agent/busca_antecipada.py
+"""
+Busca antecipada (especulativa) no inventário enquanto o LLM gera a resposta.
+
+Sem ela, o turno é sequencial: o LLM responde, a resposta é interpretada e só então a
+busca começa. Aqui a busca com os filtros mais prováveis (os já confirmados, somados aos
+que o extrator por regras achou na fala atual) começa junto com a chamada ao LLM. Se o
+turno terminar pedindo a busca com os mesmos filtros, o resultado já está pronto (ou
+quase); se os filtros finais forem outros, a busca antecipada é descartada.
+
+Cada turno tem no máximo uma busca antecipada, e ela nunca é aproveitada em outro turno
+(os dados podem ter mudado e a conversa certamente mudou).
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.agent.extrator_regras import ResultadoExtracao
+from app.database.texto import dobrar_texto
+
+logger = logging.getLogger(__name__)
+
+Buscador = Callable[[Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]
+
+
+def chave_filtros(filtros: Dict[str, Any]) -> Tuple:
+    """Filtros comparáveis: ordem das chaves, acentos e maiúsculas/minúsculas não importam (como no servidor)."""
+    return tuple(sorted(
+        (campo, dobrar_texto(valor) if isinstance(valor, str) else valor)
+        for campo, valor in filtros.items() if valor is not None
+    ))
+
+
+def filtros_especulativos(filtros_atuais: Dict[str, Any], extracao: Optional[ResultadoExtracao]) -> Dict[str, Any]:
+    """Melhor palpite dos filtros ao fim do turno: os atuais, atualizados pelo que as regras acharam na fala."""
+    if extracao is None or extracao.conversacional:
+        return dict(filtros_atuais)
+    return {**filtros_atuais, **extracao.filtros}
+
+
+class BuscaAntecipada:
+    """Busca especulativa de um turno, com contadores de aproveitamento."""
+
+    def __init__(self, buscar: Buscador):
+        self._buscar = buscar
+        self._tarefa: Optional[asyncio.Task] = None
+        self._chave: Optional[Tuple] = None
+        self._inicio = 0.0
+        self.iniciadas = 0
+        self.aproveitadas = 0
+        self.descartadas = 0
+
+    def iniciar(self, filtros: Dict[str, Any]) -> None:
+        """Começa a busca em segundo plano (precisa de um event loop rodando). Sem filtros, não busca nada."""
+        self.descartar()
+        if not filtros:
+            return
+        self._chave = chave_filtros(filtros)
+        self._inicio = time.perf_counter()
+        self._tarefa = asyncio.ensure_future(self._buscar(dict(filtros)))
+        self.iniciadas += 1
+
+    def descartar(self) -> None:
+        """
+        Cancela a busca em andamento. Uma busca que roda numa thread (`asyncio.to_thread`)
+        termina mesmo assim: o buscador deve limitar o que pede, e não só contar com o cancelamento.
+        """
+        if self._tarefa is None:
+            return
+        if not self._tarefa.done():
+            self._tarefa.cancel()
+        elif not self._tarefa.cancelled():
+            self._tarefa.exception() # Falha de uma busca descartada não interessa a ninguém
+        self._tarefa, self._chave = None, None
+        self.descartadas += 1
+
+    async def obter(self, filtros: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Resultado da busca antecipada, se ela foi feita com `filtros`. Devolve None (e descarta
+        a busca) quando os filtros diferem ou a busca falhou: quem chamou deve buscar de novo,
+        o que também faz o erro de conexão aparecer no lugar de sempre.
+        """
+        if self._tarefa is None or self._chave != chave_filtros(filtros):
+            self.descartar()
+            return None
+        tarefa, self._tarefa, self._chave = self._tarefa, None, None
+        pronta = tarefa.done()
+        try:
+            resultados = await tarefa
+        except Exception as e:
+            logger.info("Busca antecipada falhou (%s); buscando de novo", e)
+            self.descartadas += 1
+            return None
+        self.aproveitadas += 1
+        logger.info(
+            "Busca antecipada aproveitada (%s; %.2f s desde o início) [%d de %d aproveitadas]",
+            "já estava pronta" if pronta else "terminou durante a espera",
+            time.perf_counter() - self._inicio, self.aproveitadas, self.iniciadas,
+        )
+        return resultados
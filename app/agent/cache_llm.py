@@ -0,0 +1,107 @@
+# app/agent/cache_llm.py
+"""
+Cache persistente das respostas do LLM.
+
+Cada turno no Ollama custa segundos de CPU, e aberturas como "olá" ou "quero um carro
+flex" se repetem entre sessões. As respostas ficam num arquivo SQLite, chaveadas por um
+hash de (modelo, opções, histórico normalizado). "Normalizado" quer dizer espaços
+colapsados e minúsculas: "Olá " e "olá" caem na mesma entrada.
+
+A evicção usa TTL (a partir da gravação) e limite de entradas (remove as menos usadas
+recentemente). Os contadores de acertos/faltas valem para o processo atual.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+
+def normalizar_mensagens(mensagens: List[Dict[str, str]]) -> List[List[str]]:
+    return [[m["role"], " ".join(m["content"].split()).lower()] for m in mensagens]
+
+
+def chave_resposta(modelo: str, opcoes: Optional[Mapping[str, Any]], mensagens: List[Dict[str, str]]) -> str:
+    bruto = json.dumps(
+        [modelo, dict(opcoes or {}), normalizar_mensagens(mensagens)],
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(bruto.encode()).hexdigest()
+
+
+class CacheRespostasLLM:
+    """Cache de respostas do LLM em SQLite, com TTL, limite de entradas e estatísticas."""
+
+    def __init__(self, arquivo: str, max_entradas: int, ttl_s: float):
+        self.arquivo = arquivo
+        self.max_entradas = max_entradas
+        self.ttl_s = ttl_s
+        self.acertos = 0
+        self.faltas = 0
+        self.remocoes = 0
+        self._trava = threading.Lock()
+        if arquivo != ":memory:":
+            Path(arquivo).parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(arquivo, check_same_thread=False, isolation_level=None)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            " chave TEXT PRIMARY KEY, resposta TEXT NOT NULL,"
+            " gravado_em REAL NOT NULL, usado_em REAL NOT NULL)"
+        )
+
+    def obter(self, chave: str) -> Optional[str]:
+        agora = time.time()
+        with self._trava:
+            linha = self._conexao.execute(
+                "SELECT resposta, gravado_em FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None or linha[1] + self.ttl_s < agora:
+                if linha is not None:
+                    self._conexao.execute("DELETE FROM respostas WHERE chave = ?", (chave,)) # Expirou pelo TTL
+                    self.remocoes += 1
+                self.faltas += 1
+                return None
+            self._conexao.execute("UPDATE respostas SET usado_em = ? WHERE chave = ?", (agora, chave))
+            self.acertos += 1
+            return linha[0]
+
+    def guardar(self, chave: str, resposta: str) -> None:
+        agora = time.time()
+        with self._trava:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas (chave, resposta, gravado_em, usado_em) VALUES (?, ?, ?, ?)",
+                (chave, resposta, agora, agora),
+            )
+            # Remove as menos usadas recentemente até caber no limite
+            excesso = self._conexao.execute(
+                "DELETE FROM respostas WHERE chave IN ("
+                " SELECT chave FROM respostas ORDER BY usado_em DESC LIMIT -1 OFFSET ?)",
+                (self.max_entradas,),
+            ).rowcount
+            self.remocoes += max(excesso, 0)
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._conexao.execute("DELETE FROM respostas")
+
+    def fechar(self) -> None:
+        with self._trava:
+            self._conexao.close()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._trava:
+            entradas = self._conexao.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+            consultas = self.acertos + self.faltas
+            return {
+                "arquivo": self.arquivo,
+                "entradas": entradas,
+                "max_entradas": self.max_entradas,
+                "ttl_s": self.ttl_s,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "remocoes": self.remocoes,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
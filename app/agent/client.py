@@ -0,0 +1,75 @@
+# app/agent/client.py
+"""
+Cliente do serviço do agente (run_agent_server.py), usado pelo terminal.
+
+Mantém uma `requests.Session` com conexões keep-alive e consome o stream NDJSON dos
+turnos: os trechos da resposta do LLM chegam como eventos assim que são gerados.
+"""
+import json
+import logging
+from typing import Any, Dict, Iterator
+
+import requests
+
+from app.core.config import AGENTE_API_BASE_URL, MCP_TIMEOUT_CONEXAO_S, AGENTE_TIMEOUT_LEITURA_S
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_SESSOES = "/agente/sessoes/"
+
+
+class SessaoNaoEncontrada(Exception):
+    """A sessão foi encerrada ou expirou no serviço: é preciso criar outra."""
+
+
+class ClienteAgente:
+    def __init__(
+        self,
+        base_url: str = AGENTE_API_BASE_URL,
+        timeout_conexao_s: float = MCP_TIMEOUT_CONEXAO_S,
+        timeout_leitura_s: float = AGENTE_TIMEOUT_LEITURA_S,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (timeout_conexao_s, timeout_leitura_s)
+        self.session = requests.Session()
+
+    def fechar(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "ClienteAgente":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+    def criar_sessao(self) -> str:
+        """
+        Raises:
+            requests.exceptions.ConnectionError: Se não conseguir se conectar ao serviço.
+        """
+        response = self.session.post(f"{self.base_url}{CAMINHO_SESSOES}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["sessao_id"]
+
+    def encerrar_sessao(self, sessao_id: str) -> None:
+        try:
+            self.session.delete(f"{self.base_url}{CAMINHO_SESSOES}{sessao_id}", timeout=self.timeout)
+        except requests.exceptions.RequestException as erro:
+            logger.debug("Falha ao encerrar a sessão %s: %s", sessao_id, erro)
+
+    def conversar(self, sessao_id: str, texto: str) -> Iterator[Dict[str, Any]]:
+        """
+        Envia a fala do usuário e itera sobre os eventos do turno ("trecho", "resultado", "erro").
+
+        Raises:
+            SessaoNaoEncontrada: Se a sessão não existe mais no serviço.
+            requests.exceptions.ConnectionError: Se não conseguir se conectar ao serviço.
+        """
+        endpoint = f"{self.base_url}{CAMINHO_SESSOES}{sessao_id}/mensagens/stream"
+        with self.session.post(endpoint, json={"texto": texto}, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 404:
+                raise SessaoNaoEncontrada(sessao_id)
+            response.raise_for_status()
+            for linha in response.iter_lines():
+                if linha:
+                    yield json.loads(linha)
@@ -0,0 +1,100 @@
+# app/agent/contexto.py
+"""
+Contexto da conversa enviado ao LLM, limitado por um orçamento de tokens.
+
+Mandar o histórico inteiro a cada turno faz o tempo de processamento do prompt crescer
+com a conversa. Aqui o contexto é sempre:
+
+1. o prompt de sistema (nunca descartado);
+2. uma mensagem de estado, quando turnos antigos já foram compactados: um resumo curto das
+   falas antigas do usuário e o último `FILTROS_COLETADOS` confirmado;
+3. os turnos mais recentes, na íntegra, até caber no orçamento.
+
+A contagem de tokens é uma estimativa por caracteres (não temos o tokenizador do modelo
+aqui); ela erra para cima de propósito, para não estourar o contexto do modelo.
+"""
+from typing import Any, Dict, List
+
+from app.core.config import AGENTE_ORCAMENTO_TOKENS
+
+# Português tokeniza em ~3.5-4 caracteres por token nos modelos que usamos; 3 deixa folga
+CARACTERES_POR_TOKEN = 3
+# Tamanho máximo de cada fala antiga do usuário dentro do resumo
+MAX_CARACTERES_POR_FALA_RESUMIDA = 120
+# Fração do orçamento que o resumo das falas antigas pode ocupar
+FRACAO_ORCAMENTO_RESUMO = 0.2
+
+
+def estimar_tokens(texto: str) -> int:
+    return len(texto) // CARACTERES_POR_TOKEN + 1
+
+
+def formatar_filtros(filtros: Dict[str, Any]) -> str:
+    """Filtros no mesmo formato da tag FILTROS_COLETADOS (ex: "marca=Fiat, transmissao_automatica=true")."""
+    if not filtros:
+        return "nenhum"
+    return ", ".join(
+        f"{chave}={str(valor).lower() if isinstance(valor, bool) else valor}" for chave, valor in filtros.items()
+    )
+
+
+class ContextoConversa:
+    """Histórico da conversa com orçamento de tokens (ver docstring do módulo)."""
+
+    def __init__(self, system_prompt: str, orcamento_tokens: int = AGENTE_ORCAMENTO_TOKENS):
+        self.system_prompt = system_prompt
+        self.orcamento_tokens = orcamento_tokens
+        self.filtros_confirmados: Dict[str, Any] = {}
+        self._turnos: List[Dict[str, str]] = [] # Mensagens mantidas na íntegra, da mais antiga para a mais nova
+        self._resumo: List[str] = []            # Falas antigas do usuário, encurtadas
+        self._turnos_compactados = 0
+
+    def adicionar(self, papel: str, conteudo: str) -> None:
+        self._turnos.append({"role": papel, "content": conteudo})
+
+    def descartar_ultima(self) -> None:
+        """Retira a última mensagem (turno que não chegou a ser respondido)."""
+        if self._turnos:
+            self._turnos.pop()
+
+    def confirmar_filtros(self, filtros: Dict[str, Any]) -> None:
+        """Registra o último estado de filtros confirmado pelo LLM (sobrevive à compactação)."""
+        self.filtros_confirmados = dict(filtros)
+
+    def _mensagem_de_estado(self) -> Dict[str, str]:
+        linhas = ["Contexto da conversa até aqui (turnos antigos resumidos):"]
+        if self._resumo:
+            linhas.append("O usuário disse antes: " + " | ".join(self._resumo))
+        linhas.append(f"Último estado confirmado: FILTROS_COLETADOS: {formatar_filtros(self.filtros_confirmados)}")
+        return {"role": "system", "content": "\n".join(linhas)}
+
+    def _compactar(self) -> None:
+        """Move turnos antigos para o resumo até o contexto caber no orçamento."""
+        # A fala mais recente (a que o LLM vai responder) nunca é compactada
+        while len(self._turnos) > 1 and self.tokens_estimados() > self.orcamento_tokens:
+            turno = self._turnos.pop(0)
+            self._turnos_compactados += 1
+            # Das respostas antigas do assistente só importam os filtros, já guardados à parte
+            if turno["role"] == "user":
+                fala = " ".join(turno["content"].split())
+                if len(fala) > MAX_CARACTERES_POR_FALA_RESUMIDA:
+                    fala = fala[:MAX_CARACTERES_POR_FALA_RESUMIDA - 3] + "..."
+                self._resumo.append(fala)
+            # O resumo também tem teto: as falas mais antigas saem primeiro
+            limite_resumo = self.orcamento_tokens * FRACAO_ORCAMENTO_RESUMO
+            while len(self._resumo) > 1 and sum(estimar_tokens(f) for f in self._resumo) > limite_resumo:
+                self._resumo.pop(0)
+
+    def _montar(self) -> List[Dict[str, str]]:
+        mensagens = [{"role": "system", "content": self.system_prompt}]
+        if self._turnos_compactados:
+            mensagens.append(self._mensagem_de_estado())
+        return mensagens + self._turnos
+
+    def tokens_estimados(self) -> int:
+        return sum(estimar_tokens(m["content"]) for m in self._montar())
+
+    def mensagens(self) -> List[Dict[str, str]]:
+        """Mensagens a enviar ao LLM neste turno, já dentro do orçamento (se possível)."""
+        self._compactar()
+        return self._montar()
@@ -0,0 +1,495 @@
+# app/agent/conversa.py
+"""
+Lógica da conversa do agente, independente de como o usuário fala com ele (terminal,
+HTTP, WebSocket): chamada ao LLM, interpretação dos filtros e o turno completo
+(`processar_turno`), que devolve um `ResultadoTurno` em vez de imprimir na tela.
+
+O estado de cada conversa fica numa `SessaoConversa`; quem guarda as sessões e limita as
+chamadas ao LLM é o serviço (app/agent/servico.py).
+"""
+import asyncio
+import json
+import logging
+import re # Para expressões regulares na extração de filtros
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Dict, Any, Optional
+
+from app.agent.busca_antecipada import BuscaAntecipada, filtros_especulativos
+from app.agent.cache_llm import CacheRespostasLLM, chave_resposta
+from app.agent.contexto import ContextoConversa, estimar_tokens, formatar_filtros
+from app.agent.extrator_regras import VocabularioInventario, extrair_filtros_por_regras
+from app.core.config import (
+    AGENTE_BUSCA_ANTECIPADA,
+    AGENTE_CACHE_LLM,
+    AGENTE_CACHE_LLM_ARQUIVO,
+    AGENTE_CACHE_LLM_MAX_ENTRADAS,
+    AGENTE_CACHE_LLM_TTL_S,
+    AGENTE_LIMIAR_CONFIANCA_REGRAS,
+    AGENTE_MAX_VEICULOS_EXIBIDOS,
+    AGENTE_QTD_PROXIMOS,
+    AGENTE_SUGERIR_PROXIMOS,
+)
+from app.core.metricas import registro
+from app.mcp.client import ( # Cliente MCP
+    buscar_proximos_mcp, consultar_veiculos_mcp, resumir_veiculos_mcp, obter_vocabulario_mcp,
+)
+import requests # Para tratar exceção de conexão do cliente MCP
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_MODEL = 'phi3:mini'
+# Options do Ollama (ex: {"temperature": 0.5} para respostas mais focadas). Fazem parte da chave do cache.
+OLLAMA_OPCOES: Dict[str, Any] = {}
+
+# Filtros conhecidos pelo nosso sistema/VeiculoFiltros.
+# Isso ajuda a guiar o LLM e nossa lógica de extração.
+FILTROS_CONHECIDOS = [
+    "marca", "modelo", "ano_producao_inicial_min", "ano_producao_inicial_max",
+    "ano_producao_final_especifico", "combustivel", "num_portas",
+    "transmissao_automatica", "potencia_cv_min", "potencia_cv_max"
+]
+
+# Etapas de um turno: "regras" (extrator), "llm", "parse" (filtros da resposta), "mcp"
+# (busca ou resumo) e "render" (resposta do serviço / exibição no terminal)
+DURACAO_ETAPA = registro.histograma(
+    "agente_etapa_duracao_segundos", "Duração de cada etapa dos turnos do agente.", ["etapa"]
+)
+
+@contextmanager
+def medir_etapa(etapa: str, tempos: Optional[Dict[str, float]] = None):
+    """Mede o bloco no histograma da etapa e, se `tempos` for dado, soma a duração nele (segundos)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        DURACAO_ETAPA.observar(duracao, etapa=etapa)
+        if tempos is not None:
+            tempos[etapa] = tempos.get(etapa, 0.0) + duracao
+
+_cache_llm: Optional[CacheRespostasLLM] = None
+
+def obter_cache_llm() -> Optional[CacheRespostasLLM]:
+    """Cache persistente das respostas do LLM (aberto no primeiro uso); None se AGENTE_CACHE_LLM=false."""
+    global _cache_llm
+    if _cache_llm is None and AGENTE_CACHE_LLM:
+        _cache_llm = CacheRespostasLLM(AGENTE_CACHE_LLM_ARQUIVO, AGENTE_CACHE_LLM_MAX_ENTRADAS, AGENTE_CACHE_LLM_TTL_S)
+    return _cache_llm
+
+def interagir_com_llm(
+    historico_conversa: List[Dict[str, str]], ao_receber_trecho: Optional[Callable[[str], None]] = None
+) -> Optional[str]:
+    """
+    Envia o histórico da conversa para o Ollama e retorna a resposta do assistente.
+    A resposta chega em streaming: cada trecho é repassado a `ao_receber_trecho` assim que
+    chega (para o usuário ver a resposta sendo escrita). Registra no log o tempo até o
+    primeiro token e o tempo total do turno.
+
+    Respostas já vistas para o mesmo histórico (e mesmo modelo/options) saem do cache
+    persistente sem chamar o Ollama; só respostas completas são guardadas.
+    """
+    inicio = time.perf_counter()
+    cache = obter_cache_llm()
+    chave = chave_resposta(OLLAMA_MODEL, OLLAMA_OPCOES, historico_conversa) if cache else None
+    if cache:
+        resposta = cache.obter(chave)
+        if resposta is not None:
+            if ao_receber_trecho:
+                ao_receber_trecho(resposta)
+            logger.info(
+                "Turno do LLM: resposta do cache em %.3f s (taxa de acerto %.0f%%)",
+                time.perf_counter() - inicio, cache.estatisticas()["taxa_acerto"] * 100,
+            )
+            return resposta
+
+    import ollama # Só no primeiro turno que chega ao LLM: o cliente pesa na inicialização
+
+    tempo_primeiro_token = None
+    trechos = []
+    try:
+        for parte in ollama.chat(
+            model=OLLAMA_MODEL,
+            messages=historico_conversa,
+            stream=True,
+            options=OLLAMA_OPCOES,
+        ):
+            trecho = parte['message']['content']
+            if not trecho:
+                continue
+            if tempo_primeiro_token is None:
+                tempo_primeiro_token = time.perf_counter() - inicio
+            trechos.append(trecho)
+            if ao_receber_trecho:
+                ao_receber_trecho(trecho)
+    except Exception as e:
+        # Quem chamou mostra o erro ao usuário (ResultadoTurno.erro); aqui fica o diagnóstico
+        logger.error(
+            "Falha ao consultar o Ollama: %s. Verifique se ele está rodando e o modelo foi baixado: `ollama pull %s`",
+            e, OLLAMA_MODEL,
+        )
+        return None
+
+    logger.info(
+        "Turno do LLM: primeiro token em %.2f s, total %.2f s (contexto: %d mensagens, ~%d tokens)",
+        tempo_primeiro_token if tempo_primeiro_token is not None else float("nan"),
+        time.perf_counter() - inicio,
+        len(historico_conversa),
+        sum(estimar_tokens(m["content"]) for m in historico_conversa),
+    )
+    resposta = "".join(trechos)
+    if cache and resposta:
+        cache.guardar(chave, resposta)
+    return resposta
+
+def parse_filtros_da_resposta_llm(texto_llm: str) -> Dict[str, Any]:
+    filtros_extraidos = {}
+    # Encontra TODAS as ocorrências da tag 'FILTROS_COLETADOS:' e seus conteúdos na mesma linha.
+    matches = list(re.finditer(r"FILTROS_COLETADOS:\s*([^\n]*)", texto_llm, re.IGNORECASE))
+
+    if not matches:
+        # print("ALFRED (INFO PARSER): Tag 'FILTROS_COLETADOS:' não encontrada na resposta do LLM.")
+        return {} # Retorna vazio se a tag não for encontrada
+
+    # Pega o conteúdo do ÚLTIMO match.
+    filtros_str = matches[-1].group(1).strip()
+    
+    if not filtros_str or filtros_str.lower() == "nenhum":
+        # print("ALFRED (INFO PARSER): LLM indicou 'nenhum' filtro ou string de filtros vazia na última tag.")
+        return {} 
+    
+    pares = filtros_str.split(',')
+    for par_raw in pares:
+        par = par_raw.strip()
+        if '=' not in par:
+            continue
+        
+        chave_bruta, valor_bruto = par.split('=', 1)
+        chave = chave_bruta.strip()
+        valor = valor_bruto.strip()
+
+        # Normaliza chaves com acentos que o LLM possa usar
+        if chave == "potência_cv_min": chave = "potencia_cv_min"
+        if chave == "potência_cv_max": chave = "potencia_cv_max"
+
+        placeholders_nulos = ['nenhum', 'n/a', 'na', 'null', 'qualquer', '']
+        if valor.lower() in placeholders_nulos:
+            continue
+
+        if chave not in FILTROS_CONHECIDOS:
+            continue
+
+        try:
+            if chave in ["ano_producao_inicial_min", "ano_producao_inicial_max", 
+                         "ano_producao_final_especifico", "num_portas", 
+                         "potencia_cv_min", "potencia_cv_max"]:
+                
+                # Extrai apenas os dígitos para garantir que seja um número.
+                # Isso removerá '>', '<', '.' de '1.8', etc.
+                # O prompt deve instruir o LLM a fornecer o número correto.
+                valor_numerico_str = re.sub(r"[^0-9]", "", valor)
+                if not valor_numerico_str: # Se não sobrar nenhum dígito
+                    print(f"ALFRED (AVISO PARSER): Valor '{valor}' não resultou em número válido para filtro '{chave}'. Ignorando.")
+                    continue
+                filtros_extraidos[chave] = int(valor_numerico_str)
+
+            elif chave == "transmissao_automatica":
+                if valor.lower() in ['true', 'sim', 'verdadeiro']:
+                    filtros_extraidos[chave] = True
+                elif valor.lower() in ['false', 'nao', 'não', 'falso']:
+                    filtros_extraidos[chave] = False
+                else:
+                    continue 
+            else: # marca, modelo, combustivel
+                # Remove qualquer texto após uma quebra de linha no valor do filtro
+                valor_limpo = valor.split('\n')[0].strip()
+                if not valor_limpo or valor_limpo.lower() in placeholders_nulos:
+                    continue
+                # Sem .capitalize(): o servidor já ignora acentos e maiúsculas/minúsculas
+                filtros_extraidos[chave] = valor_limpo
+        except ValueError:
+            # print(f"ALFRED (AVISO PARSER): Não foi possível processar o valor '{valor}' para o filtro '{chave}'. Ignorando.")
+            pass # Simplesmente não adiciona o filtro se a conversão/processamento falhar
+            
+    return filtros_extraidos
+
+# Campos mostrados pelo terminal (exibir_resultados): a busca pede só estes ao servidor MCP
+CAMPOS_EXIBIDOS = [
+    "marca", "modelo", "ano_producao_inicial", "ano_producao_final", "potencia_cv",
+    "combustivel", "num_portas", "transmissao_automatica", "porta_malas_litros",
+]
+
+# Perguntas de contagem ("quantos...?") são respondidas pelo resumo, sem listar veículos
+PALAVRAS_GATILHO_RESUMO = ["quantos", "quantas", "resumo", "resuma"]
+
+_vocabulario: Optional[VocabularioInventario] = None
+
+def obter_vocabulario() -> VocabularioInventario:
+    """
+    Marcas, modelos e combustíveis do inventário (via servidor MCP) para o extrator por regras.
+    Carregado uma vez por processo; enquanto o servidor MCP não responder, tenta de novo a cada chamada.
+    """
+    global _vocabulario
+    if _vocabulario is not None:
+        return _vocabulario
+    try:
+        valores = obter_vocabulario_mcp()
+    except requests.exceptions.ConnectionError:
+        valores = None
+    if not valores:
+        # Sem vocabulário o extrator ainda entende números, câmbio e combustível,
+        # mas frases com marca/modelo ficam com confiança baixa e vão para o LLM
+        logger.warning("Vocabulário do inventário indisponível; o extrator por regras dependerá mais do LLM.")
+        return VocabularioInventario.de_valores({})
+    _vocabulario = VocabularioInventario.de_valores(valores)
+    return _vocabulario
+
+SYSTEM_PROMPT = (
+    "Você é Alfred, um assistente virtual especialista em ajudar usuários a encontrar veículos "
+    "DENTRO DE UM INVENTÁRIO ESPECÍFICO da nossa concessionária. Você NÃO tem conhecimento sobre carros fora deste inventário. "
+    "Seu objetivo principal é coletar informações (filtros) do usuário para realizar uma busca nesse inventário. "
+    "Os ÚNICOS filtros válidos que você pode coletar e usar são: "
+    "marca (ex: Fiat), modelo (ex: Strada), ano_producao_inicial_min (ex: 2019), "
+    "ano_producao_inicial_max (ex: 2022), ano_producao_final_especifico (ex: 2021), "
+    "combustivel (valores comuns: Flex, Diesel, Gasolina, Etanol, Elétrico, Híbrido), num_portas (ex: 2, 4), "
+    "transmissao_automatica (boolean: true ou false), potencia_cv_min (ex: 70), potencia_cv_max (ex: 150). "
+
+    "Se o usuário mencionar 'X cilindradas de potencia' ou 'motor X.Y litros', você DEVE ESCLARECER que filtra por POTÊNCIA em CV (cavalos). Pergunte: 'Qual a potência mínima em CV que você gostaria?' ou 'Qual a potência máxima em CV?'. "
+    "NÃO use o valor de cilindradas ou litros diretamente como CV. Por exemplo, se o usuário disser 'mais de 150 de potencia' ou 'potencia acima de 150 CV', interprete isso como `potencia_cv_min=150` na sua lista de filtros. NÃO use símbolos como '>' ou '<' nos valores dos filtros. "
+
+    "INSTRUÇÃO CRÍTICA PARA FILTROS: Ao final de CADA UMA das suas respostas, forneça a tag `FILTROS_COLETADOS:` APENAS UMA VEZ. "
+    "Nesta tag, liste SOMENTE os filtros para os quais o USUÁRIO FORNECEU UM VALOR ESPECÍFICO E CONCRETO ou que você CONFIRMOU CLARAMENTE com ele nesta conversa ATUAL. "
+    "Se o usuário NÃO especificou um valor para um filtro (ex: não falou de marca, não falou de ano), NÃO inclua essa chave de filtro na lista `FILTROS_COLETADOS:`. NÃO preencha filtros com valores padrão, 'nenhum', 'n/a', ou 'qualquer', ou valores que o usuário não pediu (como anos aleatórios). "
+    "Exemplo CORRETO: Se o usuário apenas disse 'quero um carro flex com mais de 150cv', sua tag DEVE SER 'FILTROS_COLETADOS: combustivel=Flex, potencia_cv_min=150'. Não inclua `marca`, `ano`, etc., se não foram ditos. "
+    "Se NENHUM filtro foi fornecido ou confirmado pelo usuário ATÉ O MOMENTO, escreva 'FILTROS_COLETADOS: nenhum'. "
+    "A linha de FILTROS_COLETADOS deve ser a ÚLTIMA parte estruturada da sua resposta e não deve conter texto adicional depois dos filtros. "
+
+    "Se o usuário disser 'buscar', o sistema Python usará os filtros da sua última tag 'FILTROS_COLETADOS:'. Se esta tag indicar 'nenhum', peça por critérios antes de o sistema buscar."
+)
+
+# Palavras-chave explícitas de busca na fala do usuário
+PALAVRAS_GATILHO_BUSCA_USUARIO = ["buscar", "procure", "pesquise", "liste", "mostre", "encontre", "ache"]
+# Frases no início da fala do usuário que indicam busca
+FRASES_GATILHO_INICIO_USUARIO = [
+    "me traga", "me retorne", "quero ver", "gostaria de ver",
+    "quais carros você tem com", "tem algum carro com", "procuro por carros com"
+]
+# Frases do LLM que sugerem a busca
+PADRAO_SUGESTAO_DE_BUSCA_LLM = re.compile(
+    r"posso buscar|devo procurar|gostaria de ver as opções|realizar a busca|vamos ver o que encontro|posso prosseguir com a busca",
+    re.IGNORECASE,
+)
+
+# Chamada ao LLM usada pelo turno: (mensagens, ao_receber_trecho) -> resposta ou None
+ChamadaLLM = Callable[[List[Dict[str, str]], Optional[Callable[[str], None]]], Awaitable[Optional[str]]]
+
+async def chamar_llm_direto(
+    mensagens: List[Dict[str, str]], ao_receber_trecho: Optional[Callable[[str], None]] = None
+) -> Optional[str]:
+    """Chama o LLM numa thread, sem fila (o serviço usa a fila de app/agent/fila_llm.py)."""
+    return await asyncio.to_thread(interagir_com_llm, mensagens, ao_receber_trecho)
+
+async def buscar_veiculos_exibidos(filtros: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Busca no servidor MCP só os veículos e campos exibidos, fora do event loop. Cancelar a
+    tarefa não para a thread: é o limite que faz uma busca antecipada descartada custar no
+    máximo uma página, e não o resultado inteiro.
+    """
+    return await asyncio.to_thread(
+        consultar_veiculos_mcp, filtros, limite=AGENTE_MAX_VEICULOS_EXIBIDOS, campos=CAMPOS_EXIBIDOS
+    )
+
+async def buscar_proximos_exibidos(filtros: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Os veículos mais próximos dos filtros (busca por proximidade), só com os campos exibidos."""
+    proximos = await asyncio.to_thread(
+        buscar_proximos_mcp, filtros, limite=AGENTE_QTD_PROXIMOS, campos=CAMPOS_EXIBIDOS
+    )
+    return proximos or []
+
+@dataclass
+class SessaoConversa:
+    """Estado de uma conversa: contexto enviado ao LLM, filtros atuais e a busca antecipada do turno."""
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    contexto: ContextoConversa = field(default_factory=lambda: ContextoConversa(SYSTEM_PROMPT))
+    filtros: Dict[str, Any] = field(default_factory=dict)
+    turnos: int = 0
+    chamadas_llm_evitadas: int = 0
+    antecipada: BuscaAntecipada = field(default_factory=lambda: BuscaAntecipada(buscar_veiculos_exibidos), repr=False)
+    # Um turno por vez em cada sessão (turnos de sessões diferentes rodam em paralelo)
+    trava: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+@dataclass
+class ResultadoTurno:
+    """O que aconteceu num turno. Quem exibe (terminal, página web) decide como mostrar."""
+    resposta: Optional[str] = None      # Texto do LLM (None no caminho por regras)
+    filtros: Dict[str, Any] = field(default_factory=dict)
+    caminho: str = "llm"                # "regras" (LLM não consultado) ou "llm"
+    acao: Optional[str] = None          # "busca", "resumo" ou None (só conversa)
+    veiculos: Optional[List[Dict[str, Any]]] = None
+    aproximados: bool = False           # `veiculos` são os mais próximos, não atendem a todos os filtros
+    resumo: Optional[Dict[str, Any]] = None
+    mensagem: Optional[str] = None      # Fala extra do Alfred (ex: pedir filtros antes de buscar)
+    avisos: List[str] = field(default_factory=list) # Informações sobre o turno (o terminal mostra como INFO)
+    erro: Optional[str] = None
+
+async def _buscar(resultado: ResultadoTurno, filtros: Dict[str, Any], antecipados: Optional[List[Dict[str, Any]]] = None):
+    resultado.acao = "busca"
+    try:
+        resultado.veiculos = antecipados if antecipados is not None else await buscar_veiculos_exibidos(filtros)
+        if not resultado.veiculos and filtros and AGENTE_SUGERIR_PROXIMOS:
+            # Na mesma chamada, em vez de o usuário afrouxar os critérios turno a turno com o LLM
+            proximos = await buscar_proximos_exibidos(filtros)
+            if proximos:
+                resultado.veiculos, resultado.aproximados = proximos, True
+        elif len(resultado.veiculos) >= AGENTE_MAX_VEICULOS_EXIBIDOS:
+            resultado.avisos.append(
+                f"Mostrando os primeiros {AGENTE_MAX_VEICULOS_EXIBIDOS} veículos; refine os filtros para ver outros."
+            )
+    except requests.exceptions.ConnectionError:
+        resultado.erro = "Não consegui me conectar ao servidor de veículos para buscar. Verifique se ele está ativo."
+    except Exception as e:
+        resultado.erro = f"Ocorreu um erro inesperado durante a busca: {e}"
+
+async def _resumir(resultado: ResultadoTurno, filtros: Dict[str, Any]):
+    resultado.acao = "resumo"
+    try:
+        resultado.resumo = await asyncio.to_thread(resumir_veiculos_mcp, filtros)
+    except requests.exceptions.ConnectionError:
+        resultado.erro = "Não consegui me conectar ao servidor de veículos. Verifique se ele está ativo."
+    except Exception as e:
+        resultado.erro = f"Ocorreu um erro inesperado durante o resumo: {e}"
+
+def _pediu_resumo(entrada_usuario: str) -> bool:
+    return any(palavra in entrada_usuario.lower() for palavra in PALAVRAS_GATILHO_RESUMO)
+
+async def processar_turno(
+    sessao: SessaoConversa,
+    entrada_usuario: str,
+    chamar_llm: ChamadaLLM = chamar_llm_direto,
+    ao_receber_trecho: Optional[Callable[[str], None]] = None,
+) -> ResultadoTurno:
+    """
+    Processa uma fala do usuário: caminho rápido por regras ou LLM (com a busca antecipada
+    rodando enquanto ele responde), depois busca ou resumo quando o turno pede. Os trechos
+    da resposta do LLM são repassados a `ao_receber_trecho` (possivelmente de outra thread).
+
+    Exceções de `chamar_llm` (ex: fila cheia) são propagadas, e a fala é retirada do contexto.
+    O tempo de cada etapa vai para o histograma `agente_etapa_duracao_segundos` e para
+    uma linha de log JSON por turno.
+    """
+    tempos: Dict[str, float] = {}
+    inicio = time.perf_counter()
+    resultado = None
+    try:
+        resultado = await _processar_turno(sessao, entrada_usuario, chamar_llm, ao_receber_trecho, tempos)
+        return resultado
+    finally:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Tempos do turno: %s", json.dumps({
+                "sessao": sessao.id,
+                "turno": sessao.turnos,
+                "caminho": resultado.caminho if resultado else None,
+                "acao": resultado.acao if resultado else None,
+                "etapas_ms": {etapa: round(duracao * 1000, 2) for etapa, duracao in tempos.items()},
+                "total_ms": round((time.perf_counter() - inicio) * 1000, 2),
+            }, ensure_ascii=False))
+
+async def _processar_turno(
+    sessao: SessaoConversa,
+    entrada_usuario: str,
+    chamar_llm: ChamadaLLM,
+    ao_receber_trecho: Optional[Callable[[str], None]],
+    tempos: Dict[str, float],
+) -> ResultadoTurno:
+    async with sessao.trava:
+        sessao.antecipada.descartar() # A busca antecipada de um turno não serve para o seguinte
+        sessao.contexto.adicionar('user', entrada_usuario)
+        sessao.turnos += 1
+
+        # Caminho rápido: frases simples ("Toyota flex automático acima de 150 cv") são
+        # entendidas por regras, sem esperar o LLM. Conversa e frases ambíguas seguem para ele.
+        with medir_etapa("regras", tempos):
+            vocabulario = await asyncio.to_thread(obter_vocabulario)
+            extracao = extrair_filtros_por_regras(entrada_usuario, vocabulario)
+        if extracao.dispensa_llm(AGENTE_LIMIAR_CONFIANCA_REGRAS):
+            sessao.chamadas_llm_evitadas += 1
+            sessao.filtros = {**sessao.filtros, **extracao.filtros}
+            logger.info(
+                "Filtros por regras (confiança %.2f), LLM não consultado: %s [%d de %d turnos sem LLM]",
+                extracao.confianca, extracao.filtros, sessao.chamadas_llm_evitadas, sessao.turnos,
+            )
+            # O LLM vê este turno no próximo contexto, como se tivesse confirmado os filtros
+            sessao.contexto.adicionar('assistant', f"FILTROS_COLETADOS: {formatar_filtros(sessao.filtros)}")
+            sessao.contexto.confirmar_filtros(sessao.filtros)
+            resultado = ResultadoTurno(filtros=dict(sessao.filtros), caminho="regras")
+            with medir_etapa("mcp", tempos):
+                if _pediu_resumo(entrada_usuario):
+                    await _resumir(resultado, sessao.filtros)
+                else:
+                    await _buscar(resultado, sessao.filtros)
+            return resultado
+
+        # Enquanto o LLM responde, a busca com os filtros mais prováveis já começa
+        if AGENTE_BUSCA_ANTECIPADA:
+            sessao.antecipada.iniciar(filtros_especulativos(sessao.filtros, extracao))
+        try:
+            with medir_etapa("llm", tempos):
+                resposta_llm = await chamar_llm(sessao.contexto.mensagens(), ao_receber_trecho)
+        except BaseException:
+            sessao.antecipada.descartar()
+            sessao.contexto.descartar_ultima()
+            sessao.turnos -= 1
+            raise
+
+        if not resposta_llm: # Erro ao falar com o Ollama (já registrado por interagir_com_llm)
+            sessao.antecipada.descartar()
+            return ResultadoTurno(filtros=dict(sessao.filtros), erro="Desculpe, não consegui pensar agora. Tente de novo em instantes.")
+
+        sessao.contexto.adicionar('assistant', resposta_llm)
+        with medir_etapa("parse", tempos):
+            sessao.filtros = parse_filtros_da_resposta_llm(resposta_llm)
+        sessao.contexto.confirmar_filtros(sessao.filtros)
+        resultado = ResultadoTurno(resposta=resposta_llm, filtros=dict(sessao.filtros))
+        if sessao.filtros:
+            resultado.avisos.append(f"Filtros atuais (confirmados pelo LLM): {sessao.filtros}")
+        else:
+            resultado.avisos.append("Nenhum filtro ativo no momento (conforme LLM).")
+
+        entrada_usuario_lower = entrada_usuario.lower()
+        if _pediu_resumo(entrada_usuario):
+            sessao.antecipada.descartar()
+            with medir_etapa("mcp", tempos):
+                await _resumir(resultado, sessao.filtros)
+            return resultado
+
+        realizar_busca_agora = False
+        if any(palavra in entrada_usuario_lower for palavra in PALAVRAS_GATILHO_BUSCA_USUARIO):
+            realizar_busca_agora = True
+            resultado.avisos.append(f"Usuário solicitou busca com palavra-gatilho: '{entrada_usuario}'")
+        elif any(entrada_usuario_lower.startswith(frase) for frase in FRASES_GATILHO_INICIO_USUARIO):
+            realizar_busca_agora = True
+            resultado.avisos.append(f"Usuário solicitou busca com frase-gatilho: '{entrada_usuario}'")
+
+        # Se o usuário não pediu explicitamente para buscar, vemos se o LLM sugeriu a busca:
+        # com filtros já coletados, consideramos que é uma boa hora
+        if not realizar_busca_agora and PADRAO_SUGESTAO_DE_BUSCA_LLM.search(resposta_llm):
+            if sessao.filtros:
+                resultado.avisos.append("LLM sugeriu a busca e temos filtros.")
+                realizar_busca_agora = True
+            else:
+                resultado.avisos.append("LLM sugeriu busca, mas não há filtros claros para usar. Continuando a conversa.")
+
+        if realizar_busca_agora:
+            if not sessao.filtros:
+                resultado.mensagem = (
+                    "Para buscar, preciso de alguns filtros ou uma confirmação do que já conversamos. "
+                    "O que você gostaria de procurar?"
+                )
+            else:
+                # Com a busca antecipada aproveitada, a etapa "mcp" é só o que faltava dela
+                with medir_etapa("mcp", tempos):
+                    await _buscar(resultado, sessao.filtros, await sessao.antecipada.obter(sessao.filtros))
+        sessao.antecipada.descartar() # Turno sem busca (só conversa): a antecipada não espera o próximo
+        return resultado
@@ -0,0 +1,211 @@
+# app/agent/extrator_regras.py
+"""
+Extrator determinístico de filtros (caminho rápido do agente).
+
+Frases simples como "quero um Toyota flex automático acima de 150 cv" não precisam do
+LLM: regras sobre o texto (sem acentos e em minúsculas, ver `dobrar_texto`) preenchem os
+campos de FILTROS_CONHECIDOS. Marcas, modelos e combustíveis vêm dos valores distintos do
+inventário (`VocabularioInventario`), o resto de padrões fixos (números com unidade,
+anos com "a partir de"/"até", portas, câmbio).
+
+A confiança é a fração das palavras relevantes da frase que alguma regra explicou: palavras
+desconhecidas (ex: uma marca fora do inventário), valores conflitantes ("Toyota ou Honda")
+e números ambíguos (um ano solto) a reduzem. Frases de conversa (saudações, pedidos de
+opinião) são marcadas como conversacionais e sempre vão para o LLM.
+
+Negações que as regras não resolvem ("que não seja automático", "nada de diesel") também
+vão para o LLM: um valor com um negador livre até JANELA_NEGACAO palavras antes dele não
+vira filtro, e a frase é tratada como conversacional. Só "não/sem automático" colados têm
+regra própria.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.database.texto import dobrar_texto
+
+# Combustíveis aceitos pelo filtro, mesmo que ainda não existam no inventário
+COMBUSTIVEIS_CONHECIDOS = ["Flex", "Diesel", "Gasolina", "Etanol", "Elétrico", "Híbrido"]
+
+# Apelidos (já dobrados) -> valor canônico; só valem se o valor existir no vocabulário
+APELIDOS = {
+    "marca": {"vw": "Volkswagen", "volks": "Volkswagen", "chevy": "Chevrolet", "gm": "Chevrolet"},
+    "combustivel": {"alcool": "Etanol", "eletrico": "Elétrico", "hibrido": "Híbrido"},
+}
+
+NUMEROS_POR_EXTENSO = {"dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5}
+
+# Palavras que não carregam filtro nem mudam o sentido da busca
+PALAVRAS_NEUTRAS = set("""
+    a o os as um uma uns umas de do da dos das em no na nos nas com e para pra por que
+    quero queria gostaria procuro procurando busco buscar busque procure pesquise pesquisar mostre mostrar
+    liste listar ache achar encontre encontrar me mostra traga tem temos voces vcs voce algum alguma alguns
+    algumas carro carros veiculo veiculos automovel modelo modelos marca motor cambio transmissao combustivel
+    potencia ano anos seja sejam ser favor preciso precisando opcao opcoes disponivel disponiveis estoque
+    inventario ai ver agora tambem so apenas somente quantos quantas resumo resuma ter tenha movido
+    versao versoes ou quais
+""".split())
+
+# Indícios de conversa (saudação, agradecimento, opinião): a resposta precisa do LLM
+PADRAO_CONVERSA = re.compile(
+    r"\b(oi|ola|bom dia|boa tarde|boa noite|obrigad[oa]|valeu|tchau|ajuda|recomenda\w*|sugere|sugest\w*|"
+    r"melhor|pior|diferenca|compar\w*|vale a pena|acha|opiniao|por que|porque|explica\w*)\b"
+)
+
+_UNIDADE_CV = r"(?:cv|cavalos|hp)"
+_ANO = r"(19[5-9]\d|20[0-4]\d)"
+_PREFIXO_MINIMO = r"(?:acima de|mais de|a partir de|pelo menos|no minimo|minimo de|superior a|maior que|>=?)"
+_PREFIXO_MAXIMO = r"(?:abaixo de|menos de|ate|no maximo|maximo de|inferior a|menor que|<=?)"
+
+# Negadores que invertem (ou tornam incerto) o valor logo adiante. "menos de 100 cv" e
+# "não automático" são consumidos antes pelas suas regras e não contam como negação livre
+PADRAO_NEGADOR = r"\b(?:nao|sem|nada de|nem|exceto|menos)\b"
+JANELA_NEGACAO = 3 # Palavras antes do valor: "que nao seja automatico"
+
+
+@dataclass(frozen=True)
+class VocabularioInventario:
+    """Valores conhecidos de marca, modelo e combustível, indexados pela forma dobrada."""
+    marca: Dict[str, str] = field(default_factory=dict)
+    modelo: Dict[str, str] = field(default_factory=dict)
+    combustivel: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def de_valores(cls, valores: Dict[str, Iterable[Optional[str]]]) -> "VocabularioInventario":
+        """Monta o vocabulário a partir de {"marca": [...], "modelo": [...], "combustivel": [...]}."""
+        def indexar(campo: str, extras: Iterable[str] = ()) -> Dict[str, str]:
+            termos = {dobrar_texto(v): v for v in list(extras) + list(valores.get(campo) or []) if v}
+            for apelido, canonico in APELIDOS.get(campo, {}).items():
+                if dobrar_texto(canonico) in termos:
+                    termos.setdefault(apelido, termos[dobrar_texto(canonico)])
+            return termos
+
+        return cls(
+            marca=indexar("marca"),
+            modelo=indexar("modelo"),
+            combustivel=indexar("combustivel", COMBUSTIVEIS_CONHECIDOS),
+        )
+
+
+@dataclass
+class ResultadoExtracao:
+    filtros: Dict[str, Any]
+    confianca: float     # 0 a 1
+    conversacional: bool
+
+    def dispensa_llm(self, limiar: float) -> bool:
+        return bool(self.filtros) and not self.conversacional and self.confianca >= limiar
+
+
+class _Texto:
+    """Texto dobrado com marcação dos trechos já explicados por alguma regra."""
+
+    def __init__(self, texto: str):
+        self.texto = re.sub(r"[^\w<>=]+", " ", dobrar_texto(texto)).strip()
+        self._consumido = [False] * len(self.texto)
+
+    def buscar(self, padrao: str) -> List[re.Match]:
+        """Ocorrências de `padrao` em trechos ainda livres (e as consome)."""
+        ocorrencias = []
+        for ocorrencia in re.finditer(padrao, self.texto):
+            inicio, fim = ocorrencia.span()
+            if not any(self._consumido[inicio:fim]):
+                self._consumido[inicio:fim] = [True] * (fim - inicio)
+                ocorrencias.append(ocorrencia)
+        return ocorrencias
+
+    def negado(self, inicio: int) -> bool:
+        """Se há um negador livre entre as JANELA_NEGACAO palavras antes da posição `inicio`."""
+        anteriores = list(re.finditer(r"\S+", self.texto[:inicio]))[-JANELA_NEGACAO:]
+        if not anteriores:
+            return False
+        for negador in re.finditer(PADRAO_NEGADOR, self.texto[:inicio]):
+            comeco, fim = negador.span()
+            if comeco >= anteriores[0].start() and not any(self._consumido[comeco:fim]):
+                return True
+        return False
+
+    def palavras_livres(self) -> List[str]:
+        livres = "".join(c if not usado else " " for c, usado in zip(self.texto, self._consumido))
+        return livres.split()
+
+
+def _termos(indice: Dict[str, str]) -> List[Tuple[str, str]]:
+    # Termos mais longos primeiro ("golf" antes de "gol"), sempre como palavra inteira
+    return sorted(indice.items(), key=lambda item: -len(item[0]))
+
+
+def extrair_filtros_por_regras(texto: str, vocabulario: VocabularioInventario) -> ResultadoExtracao:
+    """Extrai os filtros de `texto` por regras e calcula a confiança (ver docstring do módulo)."""
+    t = _Texto(texto)
+    filtros: Dict[str, Any] = {}
+    candidatos: Dict[str, set] = {}
+    ambiguidades = 0
+    negacoes = 0
+
+    def propor(chave: str, valor: Any, ocorrencia: re.Match):
+        nonlocal negacoes
+        if t.negado(ocorrencia.start()):
+            negacoes += 1 # "que nao seja diesel": nem diesel nem o oposto, fica para o LLM
+        else:
+            candidatos.setdefault(chave, set()).add(valor)
+
+    # Potência (sempre com unidade, para não confundir com ano ou portas)
+    for m in t.buscar(rf"\bentre (\d{{2,4}}) {_UNIDADE_CV}? ?e (\d{{2,4}}) {_UNIDADE_CV}\b"):
+        propor("potencia_cv_min", int(m.group(1)), m)
+        propor("potencia_cv_max", int(m.group(2)), m)
+    for m in t.buscar(rf"{_PREFIXO_MINIMO} ?(\d{{2,4}}) ?{_UNIDADE_CV}\b"):
+        propor("potencia_cv_min", int(m.group(1)), m)
+    for m in t.buscar(rf"{_PREFIXO_MAXIMO} ?(\d{{2,4}}) ?{_UNIDADE_CV}\b"):
+        propor("potencia_cv_max", int(m.group(1)), m)
+    for m in t.buscar(rf"\b(\d{{2,4}}) ?{_UNIDADE_CV}\b"):
+        # Potência sem "acima de"/"até": tratamos como mínimo, mas é um palpite
+        propor("potencia_cv_min", int(m.group(1)), m)
+        ambiguidades += 1
+
+    # Anos
+    for m in t.buscar(rf"\b(?:sai(?:u|ram) de linha|fora de linha|descontinuado|deixou de ser produzido) (?:em )?{_ANO}\b"):
+        propor("ano_producao_final_especifico", int(m.group(1)), m)
+    for m in t.buscar(rf"\bentre {_ANO} e {_ANO}\b"):
+        propor("ano_producao_inicial_min", int(m.group(1)), m)
+        propor("ano_producao_inicial_max", int(m.group(2)), m)
+    for m in t.buscar(rf"\b(?:a partir de|depois de|desde|apos|posterior a|mais novo que|{_PREFIXO_MINIMO}) ?{_ANO}\b"):
+        propor("ano_producao_inicial_min", int(m.group(1)), m)
+    for m in t.buscar(rf"\b(?:antes de|anterior a|mais antigo que|{_PREFIXO_MAXIMO}) ?{_ANO}\b"):
+        propor("ano_producao_inicial_max", int(m.group(1)), m)
+
+    # Portas
+    for m in t.buscar(r"\b([2-5]|dois|duas|tres|quatro|cinco) portas\b"):
+        numero = m.group(1)
+        propor("num_portas", int(numero) if numero.isdigit() else NUMEROS_POR_EXTENSO[numero], m)
+
+    # Câmbio (a negação vem antes para "não automático" não virar automático)
+    for m in t.buscar(r"\b(?:nao|sem) (?:cambio |transmissao )?automatic[oa]s?\b"):
+        propor("transmissao_automatica", False, m)
+    for m in t.buscar(r"\b(?:automatic[oa]s?|autom)\b"):
+        propor("transmissao_automatica", True, m)
+    for m in t.buscar(r"\bmanua(?:l|is)\b"):
+        propor("transmissao_automatica", False, m)
+
+    # Vocabulário do inventário
+    for chave, indice in (("combustivel", vocabulario.combustivel), ("marca", vocabulario.marca),
+                          ("modelo", vocabulario.modelo)):
+        for termo, canonico in _termos(indice):
+            for m in t.buscar(rf"\b{re.escape(termo)}\b"):
+                propor(chave, canonico, m)
+
+    # Um campo com mais de um valor ("Toyota ou Honda") não cabe em VeiculoFiltros: fica para o LLM
+    for chave, valores in candidatos.items():
+        if len(valores) == 1:
+            filtros[chave] = valores.pop()
+        else:
+            ambiguidades += len(valores)
+
+    # O que sobrou (anos soltos, números sem unidade, marcas fora do inventário) é desconhecido
+    livres = [p for p in t.palavras_livres() if p not in PALAVRAS_NEUTRAS]
+    desconhecidas = len(livres) + ambiguidades
+    explicadas = len(filtros)
+    confianca = explicadas / (explicadas + desconhecidas) if explicadas else 0.0
+
+    conversacional = bool(PADRAO_CONVERSA.search(t.texto)) or not filtros or negacoes > 0
+    return ResultadoExtracao(filtros=filtros, confianca=round(confianca, 3), conversacional=conversacional)
@@ -0,0 +1,98 @@
+# app/agent/fila_llm.py
+"""
+Fila das chamadas ao LLM do serviço do agente.
+
+O Ollama numa máquina sem GPU atende poucas gerações ao mesmo tempo; mandar todas as
+sessões de uma vez só aumenta o tempo de cada uma. A fila limita as chamadas simultâneas
+(`max_concorrentes`) e o total de chamadas esperando (`max_pendentes`, acima disso
+`FilaCheia`). A admissão é em rodízio entre sessões: cada sessão tem sua própria fila e,
+a cada vaga, a próxima sessão da vez manda UMA chamada. Uma sessão com muitas mensagens
+não atrasa as outras.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class FilaCheia(Exception):
+    """Chamadas demais esperando pelo LLM: o cliente deve tentar de novo mais tarde."""
+
+
+class FilaLLMJusta:
+    """Limita as chamadas simultâneas ao LLM, com admissão em rodízio entre sessões."""
+
+    def __init__(self, max_concorrentes: int, max_pendentes: int):
+        self.max_concorrentes = max_concorrentes
+        self.max_pendentes = max_pendentes
+        self._filas: Dict[str, Deque[Tuple[Callable[[], Awaitable[Any]], asyncio.Future, float]]] = {}
+        self._rodizio: Deque[str] = deque() # Sessões com chamadas esperando, na ordem da vez
+        self.em_execucao = 0
+        self.pendentes = 0
+        self.admitidas = 0
+        self.executadas = 0
+        self.rejeitadas = 0
+        self.espera_total_s = 0.0
+        self.espera_max_s = 0.0
+
+    async def executar(self, sessao_id: str, funcao: Callable[[], Awaitable[T]]) -> T:
+        """Espera a vez da sessão, executa `funcao()` e devolve o resultado. Levanta FilaCheia."""
+        if self.pendentes >= self.max_pendentes:
+            self.rejeitadas += 1
+            raise FilaCheia(f"{self.pendentes} chamadas ao LLM já estão esperando.")
+        futuro = asyncio.get_running_loop().create_future()
+        if sessao_id not in self._filas:
+            self._filas[sessao_id] = deque()
+            self._rodizio.append(sessao_id)
+        self._filas[sessao_id].append((funcao, futuro, time.perf_counter()))
+        self.pendentes += 1
+        self._despachar()
+        return await futuro
+
+    def _despachar(self) -> None:
+        while self.em_execucao < self.max_concorrentes and self._rodizio:
+            sessao_id = self._rodizio.popleft()
+            fila = self._filas[sessao_id]
+            funcao, futuro, enfileirada_em = fila.popleft()
+            if fila:
+                self._rodizio.append(sessao_id) # Volta para o fim da vez
+            else:
+                del self._filas[sessao_id]
+            self.pendentes -= 1
+            if futuro.cancelled(): # Quem esperava desistiu (ex: cliente desconectou)
+                continue
+            espera = time.perf_counter() - enfileirada_em
+            self.espera_total_s += espera
+            self.espera_max_s = max(self.espera_max_s, espera)
+            self.admitidas += 1
+            self.em_execucao += 1
+            asyncio.ensure_future(self._rodar(funcao, futuro))
+
+    async def _rodar(self, funcao: Callable[[], Awaitable[Any]], futuro: asyncio.Future) -> None:
+        try:
+            resultado = await funcao()
+        except BaseException as e:
+            if not futuro.done():
+                futuro.set_exception(e)
+        else:
+            if not futuro.done():
+                futuro.set_result(resultado)
+        finally:
+            self.em_execucao -= 1
+            self.executadas += 1
+            self._despachar()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "max_concorrentes": self.max_concorrentes,
+            "max_pendentes": self.max_pendentes,
+            "em_execucao": self.em_execucao,
+            "pendentes": self.pendentes,
+            "sessoes_esperando": len(self._rodizio),
+            "executadas": self.executadas,
+            "rejeitadas": self.rejeitadas,
+            "espera_media_s": self.espera_total_s / self.admitidas if self.admitidas else 0.0,
+            "espera_max_s": self.espera_max_s,
+        }
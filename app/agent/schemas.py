@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+# --------------------
+# Schemas do serviço do agente (app/agent/servico.py)
+# --------------------
+class MensagemUsuario(BaseModel):
+    texto: str = Field(..., min_length=1)
+
+
+class SessaoCriada(BaseModel):
+    sessao_id: str
+
+
+# Resultado de um turno da conversa (ver `ResultadoTurno` em app/agent/conversa.py).
+# `veiculos` vem preenchido quando acao == "busca", `resumo` quando acao == "resumo".
+class RespostaTurno(BaseModel):
+    resposta: Optional[str] = None
+    filtros: Dict[str, Any]
+    caminho: str
+    acao: Optional[str] = None
+    veiculos: Optional[List[Dict[str, Any]]] = None
+    aproximados: bool = False
+    resumo: Optional[Dict[str, Any]] = None
+    mensagem: Optional[str] = None
+    avisos: List[str] = []
+    erro: Optional[str] = None
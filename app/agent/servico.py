@@ -0,0 +1,180 @@
+# app/agent/servico.py
+"""
+Serviço HTTP/WebSocket do agente: várias conversas por processo.
+
+Cada conversa é uma sessão (`SessaoConversa`) guardada no armazém de sessões; os turnos
+passam por `processar_turno`, e as chamadas ao LLM de todas as sessões dividem a
+`FilaLLMJusta` (limite de chamadas simultâneas ao Ollama, admissão em rodízio).
+
+A resposta de um turno pode ser pedida inteira (POST .../mensagens/) ou em eventos, pelo
+stream NDJSON (POST .../mensagens/stream) ou pelo WebSocket (.../ws). Os eventos são:
+    {"tipo": "trecho", "conteudo": "..."}    pedaço da resposta do LLM, assim que gerado
+    {"tipo": "resultado", ...RespostaTurno}  fim do turno
+    {"tipo": "erro", "status": 503, "detalhe": "..."}
+"""
+import asyncio
+import json
+import logging
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.agent.conversa import SessaoConversa, chamar_llm_direto, medir_etapa, processar_turno
+from app.agent.fila_llm import FilaCheia, FilaLLMJusta
+from app.agent.schemas import MensagemUsuario, RespostaTurno, SessaoCriada
+from app.agent.sessoes import ArmazemSessoes, ArmazemSessoesMemoria
+from app.core.config import (
+    AGENTE_MAX_LLM_CONCORRENTES, AGENTE_MAX_LLM_PENDENTES, AGENTE_MAX_SESSOES, AGENTE_SESSAO_TTL_S,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/agente",
+    tags=["Agente - Conversa"],
+)
+
+_armazem = ArmazemSessoesMemoria(AGENTE_MAX_SESSOES, AGENTE_SESSAO_TTL_S)
+_fila = FilaLLMJusta(AGENTE_MAX_LLM_CONCORRENTES, AGENTE_MAX_LLM_PENDENTES)
+
+# Segundos sugeridos ao cliente (Retry-After) quando a fila do LLM está cheia
+ESPERA_SUGERIDA_FILA_CHEIA_S = 2
+
+
+def obter_armazem() -> ArmazemSessoes:
+    return _armazem
+
+
+def obter_fila() -> FilaLLMJusta:
+    return _fila
+
+
+def _sessao_ou_404(sessao_id: str, armazem: ArmazemSessoes) -> SessaoConversa:
+    sessao = armazem.obter(sessao_id)
+    if sessao is None:
+        raise HTTPException(status_code=404, detail="Sessão não encontrada (encerrada ou expirada).")
+    return sessao
+
+
+def _chamada_pela_fila(sessao_id: str, fila: FilaLLMJusta):
+    async def chamar_llm(mensagens, ao_receber_trecho):
+        return await fila.executar(sessao_id, lambda: chamar_llm_direto(mensagens, ao_receber_trecho))
+    return chamar_llm
+
+
+async def eventos_do_turno(sessao: SessaoConversa, texto: str, fila: FilaLLMJusta) -> AsyncIterator[Dict[str, Any]]:
+    """Roda o turno e emite os trechos do LLM conforme chegam, depois o resultado (ou o erro)."""
+    loop = asyncio.get_running_loop()
+    trechos: asyncio.Queue = asyncio.Queue()
+
+    def ao_receber_trecho(trecho: str):
+        # Chamado na thread do LLM: entrega o trecho ao event loop
+        loop.call_soon_threadsafe(trechos.put_nowait, trecho)
+
+    turno = asyncio.ensure_future(
+        processar_turno(sessao, texto, _chamada_pela_fila(sessao.id, fila), ao_receber_trecho)
+    )
+    while not turno.done() or not trechos.empty():
+        proximo_trecho = asyncio.ensure_future(trechos.get())
+        await asyncio.wait({proximo_trecho, turno}, return_when=asyncio.FIRST_COMPLETED)
+        if proximo_trecho.done():
+            yield {"tipo": "trecho", "conteudo": proximo_trecho.result()}
+        else:
+            proximo_trecho.cancel()
+
+    try:
+        resultado = turno.result()
+    except FilaCheia as e:
+        yield {"tipo": "erro", "status": 503, "detalhe": f"Agente ocupado, tente de novo em instantes. ({e})"}
+        return
+    with medir_etapa("render"):
+        evento = {"tipo": "resultado", **asdict(resultado)}
+    yield evento
+
+
+@router.post("/sessoes/", response_model=SessaoCriada, status_code=201)
+async def criar_sessao_endpoint(armazem: ArmazemSessoes = Depends(obter_armazem)):
+    sessao = SessaoConversa()
+    armazem.guardar(sessao)
+    return SessaoCriada(sessao_id=sessao.id)
+
+
+@router.delete("/sessoes/{sessao_id}", status_code=204)
+async def encerrar_sessao_endpoint(sessao_id: str, armazem: ArmazemSessoes = Depends(obter_armazem)):
+    sessao = _sessao_ou_404(sessao_id, armazem)
+    sessao.antecipada.descartar()
+    armazem.remover(sessao_id)
+    return Response(status_code=204)
+
+
+@router.post("/sessoes/{sessao_id}/mensagens/", response_model=RespostaTurno)
+async def enviar_mensagem_endpoint(
+    sessao_id: str,
+    mensagem: MensagemUsuario,
+    armazem: ArmazemSessoes = Depends(obter_armazem),
+    fila: FilaLLMJusta = Depends(obter_fila),
+):
+    """Processa a fala do usuário e devolve o turno inteiro (sem os trechos intermediários)."""
+    sessao = _sessao_ou_404(sessao_id, armazem)
+    try:
+        resultado = await processar_turno(sessao, mensagem.texto, _chamada_pela_fila(sessao.id, fila))
+    except FilaCheia as e:
+        raise HTTPException(
+            status_code=503, detail=f"Agente ocupado, tente de novo em instantes. ({e})",
+            headers={"Retry-After": str(ESPERA_SUGERIDA_FILA_CHEIA_S)},
+        )
+    with medir_etapa("render"):
+        return RespostaTurno(**asdict(resultado))
+
+
+@router.post("/sessoes/{sessao_id}/mensagens/stream")
+async def enviar_mensagem_stream_endpoint(
+    sessao_id: str,
+    mensagem: MensagemUsuario,
+    armazem: ArmazemSessoes = Depends(obter_armazem),
+    fila: FilaLLMJusta = Depends(obter_fila),
+):
+    """Processa a fala do usuário emitindo os eventos do turno em NDJSON (um por linha)."""
+    sessao = _sessao_ou_404(sessao_id, armazem)
+
+    async def linhas():
+        async for evento in eventos_do_turno(sessao, mensagem.texto, fila):
+            yield json.dumps(evento, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(linhas(), media_type="application/x-ndjson")
+
+
+@router.websocket("/sessoes/{sessao_id}/ws")
+async def conversa_websocket(
+    websocket: WebSocket,
+    sessao_id: str,
+    armazem: ArmazemSessoes = Depends(obter_armazem),
+    fila: FilaLLMJusta = Depends(obter_fila),
+):
+    """Conversa por WebSocket: cada {"texto": "..."} recebido gera os eventos do turno."""
+    await websocket.accept()
+    try:
+        while True:
+            dados = await websocket.receive_json()
+            sessao = armazem.obter(sessao_id)
+            if sessao is None:
+                await websocket.send_json({"tipo": "erro", "status": 404, "detalhe": "Sessão não encontrada (encerrada ou expirada)."})
+                await websocket.close(code=1008)
+                return
+            texto = str(dados.get("texto", "")).strip() if isinstance(dados, dict) else ""
+            if not texto:
+                await websocket.send_json({"tipo": "erro", "status": 422, "detalhe": "Envie {\"texto\": \"...\"}."})
+                continue
+            async for evento in eventos_do_turno(sessao, texto, fila):
+                await websocket.send_json(evento)
+    except WebSocketDisconnect:
+        logger.debug("WebSocket da sessão %s desconectado", sessao_id)
+
+
+@router.get("/estatisticas/")
+async def estatisticas_endpoint(
+    armazem: ArmazemSessoes = Depends(obter_armazem), fila: FilaLLMJusta = Depends(obter_fila)
+):
+    return {"sessoes": armazem.estatisticas(), "fila_llm": fila.estatisticas()}
@@ -0,0 +1,90 @@
+# app/agent/sessoes.py
+"""
+Armazenamento das sessões de conversa do serviço do agente.
+
+`ArmazemSessoes` é a interface usada pelo serviço; `ArmazemSessoesMemoria` guarda as
+sessões no próprio processo, com limite de sessões (remove a usada há mais tempo) e
+expiração por inatividade. Um armazém compartilhado entre processos (ex: Redis) precisa
+serializar `SessaoConversa` e pode ser plugado em `servico.obter_armazem`.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.agent.conversa import SessaoConversa
+
+
+class ArmazemSessoes(ABC):
+    @abstractmethod
+    def obter(self, sessao_id: str) -> Optional[SessaoConversa]:
+        """Sessão pelo id, ou None se não existe (ou expirou)."""
+
+    @abstractmethod
+    def guardar(self, sessao: SessaoConversa) -> None:
+        ...
+
+    @abstractmethod
+    def remover(self, sessao_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def estatisticas(self) -> Dict[str, Any]:
+        ...
+
+
+class ArmazemSessoesMemoria(ArmazemSessoes):
+    """
+    Sessões em memória, LRU com expiração por inatividade (`ttl_s` desde o último uso).
+    Sessões que saem pelo limite ou pela expiração têm a busca antecipada descartada,
+    como no encerramento explícito.
+    """
+
+    def __init__(self, max_sessoes: int, ttl_s: float):
+        self.max_sessoes = max_sessoes
+        self.ttl_s = ttl_s
+        self._sessoes: "OrderedDict[str, tuple]" = OrderedDict()
+        self._trava = threading.Lock()
+        self.expiradas = 0
+        self.removidas_por_limite = 0
+
+    def obter(self, sessao_id: str) -> Optional[SessaoConversa]:
+        with self._trava:
+            entrada = self._sessoes.get(sessao_id)
+            if entrada is None:
+                return None
+            if entrada[0] >= time.monotonic():
+                # Usar a sessão renova o prazo
+                self._sessoes[sessao_id] = (time.monotonic() + self.ttl_s, entrada[1])
+                self._sessoes.move_to_end(sessao_id)
+                return entrada[1]
+            del self._sessoes[sessao_id] # Inativa por mais de ttl_s
+            self.expiradas += 1
+        entrada[1].antecipada.descartar()
+        return None
+
+    def guardar(self, sessao: SessaoConversa) -> None:
+        removidas = []
+        with self._trava:
+            self._sessoes[sessao.id] = (time.monotonic() + self.ttl_s, sessao)
+            self._sessoes.move_to_end(sessao.id)
+            while len(self._sessoes) > self.max_sessoes:
+                removidas.append(self._sessoes.popitem(last=False)[1][1])
+                self.removidas_por_limite += 1
+        for removida in removidas:
+            removida.antecipada.descartar()
+
+    def remover(self, sessao_id: str) -> bool:
+        with self._trava:
+            return self._sessoes.pop(sessao_id, None) is not None
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._trava:
+            return {
+                "sessoes": len(self._sessoes),
+                "max_sessoes": self.max_sessoes,
+                "ttl_s": self.ttl_s,
+                "expiradas": self.expiradas,
+                "removidas_por_limite": self.removidas_por_limite,
+            }
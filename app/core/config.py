@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 DB_USER = os.getenv("DB_USER", "teste")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "123abc")
@@ -6,7 +7,113 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "TesteC2S")
 
-DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# DATABASE_URL pode ser sobrescrita inteira (ex: "sqlite:///./veiculos.db" nos testes)
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# URL para o acesso assíncrono. Se não informada, é derivada de DATABASE_URL
+# trocando o driver (psycopg2 -> asyncpg, pysqlite -> aiosqlite).
+DATABASE_URL_ASYNC = os.getenv("DATABASE_URL_ASYNC")
+
+# Pool de conexões (vale para todos os engines: síncrono, assíncrono e réplicas de leitura)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Conexões mais velhas que isto são refeitas no checkout (-1 desliga); evita conexões
+# derrubadas por timeout de ociosidade do banco ou de um balanceador no caminho
+DB_POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+# Espera máxima por uma conexão livre com o pool esgotado, antes de levantar erro
+DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "30"))
+
+# Réplicas de leitura (URLs síncronas separadas por vírgula; o driver assíncrono é derivado
+# como em DATABASE_URL_ASYNC). As buscas do servidor MCP vão para uma réplica saudável e,
+# sem nenhuma, para o primário; a carga de dados (popula_dados) sempre grava no primário.
+DATABASE_URL_LEITURA = [url.strip() for url in os.getenv("DATABASE_URL_LEITURA", "").split(",") if url.strip()]
+# Tempo em que uma réplica que falhou ao conectar fica fora da seleção
+DB_REPLICA_QUARENTENA_S = float(os.getenv("DB_REPLICA_QUARENTENA_S", "30"))
+# Ao subir, o servidor MCP abre DB_POOL_SIZE conexões em segundo plano (aquecimento do pool)
+DB_AQUECER_POOL = os.getenv("DB_AQUECER_POOL", "true").lower() in ("1", "true", "sim")
 
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "SUA_CHAVE_API_AQUI_SE_NECESSARIO")
+
+# Paginação da busca de veículos no servidor MCP
+MCP_TAMANHO_PAGINA_PADRAO = int(os.getenv("MCP_TAMANHO_PAGINA_PADRAO", "50"))
+MCP_TAMANHO_PAGINA_MAXIMO = int(os.getenv("MCP_TAMANHO_PAGINA_MAXIMO", "500"))
+
+# Índice colunar em memória (app/mcp/indice_memoria.py): responde às buscas sem ir ao banco.
+# Desligado por padrão; o caminho SQL é sempre o fallback.
+MCP_INDICE_MEMORIA = os.getenv("MCP_INDICE_MEMORIA", "false").lower() in ("1", "true", "sim")
+# Snapshot do inventário num arquivo mapeado em memória (app/mcp/snapshot_inventario.py),
+# lido por todos os workers. Vale com o índice em memória ligado; o modo com vários
+# workers de run_mcp_server.py liga os dois.
+MCP_SNAPSHOT_COMPARTILHADO = os.getenv("MCP_SNAPSHOT_COMPARTILHADO", "false").lower() in ("1", "true", "sim")
+MCP_SNAPSHOT_ARQUIVO = os.getenv(
+    "MCP_SNAPSHOT_ARQUIVO", os.path.join(tempfile.gettempdir(), "c2s_inventario.snapshot")
+)
+
+# Cache de resultados da busca (app/mcp/cache.py)
+MCP_CACHE_RESULTADOS = os.getenv("MCP_CACHE_RESULTADOS", "true").lower() in ("1", "true", "sim")
+MCP_CACHE_MAX_ENTRADAS = int(os.getenv("MCP_CACHE_MAX_ENTRADAS", "1024"))
+MCP_CACHE_TTL_S = float(os.getenv("MCP_CACHE_TTL_S", "300"))
+# Intervalo mínimo entre releituras da versão dos dados no banco (segundos)
+MCP_VERSAO_DADOS_INTERVALO_S = float(os.getenv("MCP_VERSAO_DADOS_INTERVALO_S", "1.0"))
+
+# Busca em streaming (NDJSON): linhas buscadas do cursor do banco por vez
+MCP_STREAM_TAMANHO_LOTE = int(os.getenv("MCP_STREAM_TAMANHO_LOTE", "1000"))
+
+# Busca em lote: máximo de conjuntos de filtros por requisição
+MCP_LOTE_MAX_BUSCAS = int(os.getenv("MCP_LOTE_MAX_BUSCAS", "20"))
+
+# Instrumentação dos servidores (app/core/instrumentacao.py): métricas em GET /metrics e
+# log JSON por requisição no logger "app.tempos" (nível em SERVIDOR_LOG_NIVEL).
+# INSTRUMENTACAO_SQL=false desliga os ganchos de tempo das consultas e do pool.
+INSTRUMENTACAO_SQL = os.getenv("INSTRUMENTACAO_SQL", "true").lower() in ("1", "true", "sim")
+LOG_TEMPOS_REQUISICOES = os.getenv("LOG_TEMPOS_REQUISICOES", "true").lower() in ("1", "true", "sim")
+SERVIDOR_LOG_NIVEL = os.getenv("SERVIDOR_LOG_NIVEL", "INFO")
+# Processos do servidor MCP em run_mcp_server.py (1 = modo de desenvolvimento, com reload)
+SERVIDOR_WORKERS = int(os.getenv("SERVIDOR_WORKERS", "1"))
+
+# Cliente MCP (app/mcp/client.py)
+MCP_API_BASE_URL = os.getenv("MCP_API_BASE_URL", "http://localhost:8000")
+MCP_TIMEOUT_CONEXAO_S = float(os.getenv("MCP_TIMEOUT_CONEXAO_S", "3.05"))
+MCP_TIMEOUT_LEITURA_S = float(os.getenv("MCP_TIMEOUT_LEITURA_S", "10"))
+MCP_MAX_TENTATIVAS = int(os.getenv("MCP_MAX_TENTATIVAS", "3"))
+MCP_BACKOFF_BASE_S = float(os.getenv("MCP_BACKOFF_BASE_S", "0.2"))
+MCP_TAMANHO_POOL_CLIENTE = int(os.getenv("MCP_TAMANHO_POOL_CLIENTE", "10"))
+
+# Agente de terminal (app/agent): orçamento de tokens do contexto enviado ao LLM
+# (prompt de sistema + estado + turnos recentes). O num_ctx padrão do Ollama é 2048:
+# o orçamento deixa espaço para a resposta dentro dele.
+AGENTE_ORCAMENTO_TOKENS = int(os.getenv("AGENTE_ORCAMENTO_TOKENS", "1536"))
+# Nível de log do agente (tempos de resposta do LLM saem em INFO)
+AGENTE_LOG_NIVEL = os.getenv("AGENTE_LOG_NIVEL", "INFO")
+# Confiança mínima do extrator de filtros por regras para responder sem chamar o LLM (0 a 1)
+AGENTE_LIMIAR_CONFIANCA_REGRAS = float(os.getenv("AGENTE_LIMIAR_CONFIANCA_REGRAS", "0.75"))
+# Busca antecipada: começa a busca com os filtros mais prováveis enquanto o LLM responde
+AGENTE_BUSCA_ANTECIPADA = os.getenv("AGENTE_BUSCA_ANTECIPADA", "true").lower() in ("1", "true", "sim")
+# Veículos que o agente mostra por busca (a busca antecipada também para aí: não pagina o resultado inteiro)
+AGENTE_MAX_VEICULOS_EXIBIDOS = int(os.getenv("AGENTE_MAX_VEICULOS_EXIBIDOS", "20"))
+# Busca sem resultados: mostra os veículos mais próximos dos filtros (busca por proximidade
+# do servidor MCP), marcados como aproximados, em vez de só dizer que não achou nada
+AGENTE_SUGERIR_PROXIMOS = os.getenv("AGENTE_SUGERIR_PROXIMOS", "true").lower() in ("1", "true", "sim")
+AGENTE_QTD_PROXIMOS = int(os.getenv("AGENTE_QTD_PROXIMOS", "5"))
+# Serviço do agente (app/agent/servico.py, run_agent_server.py): chamadas simultâneas ao
+# Ollama, chamadas esperando na fila (acima disso o serviço responde 503), limite de
+# sessões em memória e expiração por inatividade
+AGENTE_API_BASE_URL = os.getenv("AGENTE_API_BASE_URL", "http://localhost:8001")
+AGENTE_MAX_LLM_CONCORRENTES = int(os.getenv("AGENTE_MAX_LLM_CONCORRENTES", "2"))
+AGENTE_MAX_LLM_PENDENTES = int(os.getenv("AGENTE_MAX_LLM_PENDENTES", "64"))
+AGENTE_MAX_SESSOES = int(os.getenv("AGENTE_MAX_SESSOES", "1000"))
+AGENTE_SESSAO_TTL_S = float(os.getenv("AGENTE_SESSAO_TTL_S", "1800"))
+# Leitura do cliente do terminal: um turno inclui a geração do LLM (e a espera na fila)
+AGENTE_TIMEOUT_LEITURA_S = float(os.getenv("AGENTE_TIMEOUT_LEITURA_S", "300"))
+# Cache persistente das respostas do LLM (app/agent/cache_llm.py): arquivo SQLite,
+# limite de entradas e validade (padrão: 7 dias). AGENTE_CACHE_LLM=false desliga.
+AGENTE_CACHE_LLM = os.getenv("AGENTE_CACHE_LLM", "true").lower() in ("1", "true", "sim")
+AGENTE_CACHE_LLM_ARQUIVO = os.getenv(
+    "AGENTE_CACHE_LLM_ARQUIVO", os.path.join(os.path.expanduser("~"), ".cache", "alfred", "respostas_llm.sqlite3")
+)
+AGENTE_CACHE_LLM_MAX_ENTRADAS = int(os.getenv("AGENTE_CACHE_LLM_MAX_ENTRADAS", "5000"))
+AGENTE_CACHE_LLM_TTL_S = float(os.getenv("AGENTE_CACHE_LLM_TTL_S", str(7 * 24 * 3600)))
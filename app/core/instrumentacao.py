@@ -0,0 +1,198 @@
+# app/core/instrumentacao.py
+"""
+Instrumentação dos servidores FastAPI e do acesso ao banco.
+
+- `MiddlewareMetricas`: latência (histograma), requisições em andamento e contagem por rota,
+  e um log estruturado por requisição (JSON no logger "app.tempos") com o tempo total
+  e o tempo gasto no banco.
+- `instrumentar_engine`: ganchos `before/after_cursor_execute` do SQLAlchemy (duração e
+  linhas por operação), a espera pelo checkout de conexões do pool e o uso do pool.
+- `instrumentar_app`: middleware + GET /metrics no formato de texto do Prometheus.
+
+O FastAPI/Starlette só é importado por quem instrumenta uma aplicação: a camada de banco
+(app/database/session.py) usa este módulo sem carregá-los.
+"""
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import INSTRUMENTACAO_SQL, LOG_TEMPOS_REQUISICOES
+from app.core.metricas import registro
+
+logger_tempos = logging.getLogger("app.tempos")
+
+REQUISICOES = registro.contador(
+    "http_requisicoes_total", "Requisições HTTP atendidas.", ["metodo", "rota", "status"]
+)
+DURACAO_REQUISICAO = registro.histograma(
+    "http_requisicao_duracao_segundos", "Duração das requisições HTTP (até o fim do corpo).", ["metodo", "rota"]
+)
+EM_ANDAMENTO = registro.medidor(
+    "http_requisicoes_em_andamento", "Requisições HTTP sendo atendidas agora.", ["metodo", "rota"]
+)
+DURACAO_CONSULTA = registro.histograma(
+    "db_consulta_duracao_segundos", "Duração das execuções de SQL no driver.", ["engine", "operacao"]
+)
+LINHAS_CONSULTA = registro.contador(
+    "db_consulta_linhas_total",
+    "Linhas afetadas/retornadas, quando o driver informa (DML; SELECT só em drivers que contam, ex: psycopg2).",
+    ["engine", "operacao"],
+)
+ESPERA_CHECKOUT = registro.histograma(
+    "db_pool_espera_checkout_segundos", "Espera para obter uma conexão do pool (inclui abrir uma nova).", ["engine"]
+)
+CONEXOES_EM_USO = registro.medidor("db_pool_conexoes_em_uso", "Conexões emprestadas pelo pool agora.", ["engine"])
+UTILIZACAO_POOL = registro.medidor(
+    "db_pool_utilizacao", "Fração da capacidade do pool (pool_size + max_overflow) emprestada agora.", ["engine"]
+)
+REPLICA_DISPONIVEL = registro.medidor(
+    "db_replica_disponivel", "1 se a réplica de leitura está na seleção; 0 se está em quarentena após falha.", ["engine"]
+)
+FALHAS_REPLICA = registro.contador(
+    "db_replica_falhas_total", "Conexões a uma réplica de leitura que falharam (a leitura seguiu em outra).", ["engine"]
+)
+
+ROTA_DESCONHECIDA = "<sem rota>"
+OPERACOES_SQL = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+# Acumulado da requisição atual: o middleware cria, os ganchos de SQL somam
+_tempos_requisicao: ContextVar[Optional[Dict[str, Any]]] = ContextVar("tempos_requisicao", default=None)
+
+
+def _rota_da_requisicao(scope) -> str:
+    """Caminho declarado da rota (ex: /agente/sessoes/{sessao_id}), para não criar uma série por id."""
+    from starlette.routing import Match
+
+    aplicacao = scope.get("app")
+    for rota in getattr(getattr(aplicacao, "router", None), "routes", ()):
+        correspondencia, _ = rota.matches(scope)
+        if correspondencia != Match.NONE:
+            return getattr(rota, "path", ROTA_DESCONHECIDA)
+    return ROTA_DESCONHECIDA
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: mede cada requisição HTTP, inclusive respostas em streaming até o último byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo, rota = scope["method"], _rota_da_requisicao(scope)
+        status = 500 # Se a aplicação falhar antes de responder
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        acumulado = {"consultas": 0, "banco_s": 0.0}
+        token = _tempos_requisicao.set(acumulado)
+        EM_ANDAMENTO.incrementar(metodo=metodo, rota=rota)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            _tempos_requisicao.reset(token)
+            EM_ANDAMENTO.decrementar(metodo=metodo, rota=rota)
+            DURACAO_REQUISICAO.observar(duracao, metodo=metodo, rota=rota)
+            REQUISICOES.incrementar(metodo=metodo, rota=rota, status=status)
+            if LOG_TEMPOS_REQUISICOES and logger_tempos.isEnabledFor(logging.INFO):
+                logger_tempos.info(json.dumps({
+                    "metodo": metodo,
+                    "caminho": scope["path"],
+                    "rota": rota,
+                    "status": status,
+                    "duracao_ms": round(duracao * 1000, 2),
+                    "consultas_sql": acumulado["consultas"],
+                    "banco_ms": round(acumulado["banco_s"] * 1000, 2),
+                }, ensure_ascii=False))
+
+
+def _operacao(instrucao: str) -> str:
+    palavra = instrucao.lstrip().split(None, 1)[0].upper() if instrucao.strip() else ""
+    return palavra if palavra in OPERACOES_SQL else "OUTRA"
+
+
+def _medir_checkout(pool, nome: str) -> None:
+    # `_do_get` é onde o pool entrega (ou espera por) uma conexão; não há evento público antes da espera
+    obter_conexao = pool._do_get
+
+    def obter_conexao_medindo():
+        inicio = time.perf_counter()
+        try:
+            return obter_conexao()
+        finally:
+            ESPERA_CHECKOUT.observar(time.perf_counter() - inicio, engine=nome)
+
+    pool._do_get = obter_conexao_medindo
+
+
+def instrumentar_engine(engine: Engine, nome: str) -> None:
+    """
+    Registra os ganchos de métricas num engine síncrono (para o assíncrono, passe
+    `async_engine.sync_engine`). Desligado com INSTRUMENTACAO_SQL=false.
+    """
+    if not INSTRUMENTACAO_SQL:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def antes_de_executar(conexao, cursor, instrucao, parametros, contexto, executemany):
+        conexao.info.setdefault("inicio_consultas", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def depois_de_executar(conexao, cursor, instrucao, parametros, contexto, executemany):
+        inicios = conexao.info.get("inicio_consultas")
+        if not inicios:
+            return
+        duracao = time.perf_counter() - inicios.pop()
+        operacao = _operacao(instrucao)
+        DURACAO_CONSULTA.observar(duracao, engine=nome, operacao=operacao)
+        linhas = getattr(cursor, "rowcount", -1)
+        if linhas is not None and linhas > 0:
+            LINHAS_CONSULTA.incrementar(linhas, engine=nome, operacao=operacao)
+        acumulado = _tempos_requisicao.get()
+        if acumulado is not None:
+            acumulado["consultas"] += 1
+            acumulado["banco_s"] += duracao
+
+    # `dispose()` troca o pool por um novo: a medição do checkout é refeita nele
+    @event.listens_for(engine, "engine_disposed")
+    def ao_descartar_pool(engine_descartado):
+        _medir_checkout(engine_descartado.pool, nome)
+
+    _medir_checkout(engine.pool, nome)
+
+    @registro.ao_exportar
+    def coletar_uso_do_pool():
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            CONEXOES_EM_USO.definir(pool.checkedout(), engine=nome)
+            # max_overflow -1 é "sem limite": aí não há capacidade para calcular a fração
+            capacidade = pool.size() + getattr(pool, "_max_overflow", 0)
+            if getattr(pool, "_max_overflow", 0) >= 0 and capacidade > 0:
+                UTILIZACAO_POOL.definir(pool.checkedout() / capacidade, engine=nome)
+
+
+async def _metricas_endpoint():
+    from fastapi import Response
+
+    return Response(content=registro.exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def instrumentar_app(app):
+    """Adiciona o middleware de métricas e a rota GET /metrics (formato Prometheus) à aplicação FastAPI."""
+    app.add_middleware(MiddlewareMetricas)
+    app.add_api_route("/metrics", _metricas_endpoint, methods=["GET"], include_in_schema=False)
+    return app
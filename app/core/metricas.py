@@ -0,0 +1,189 @@
+# app/core/metricas.py
+"""
+Métricas em processo, exportadas no formato de texto do Prometheus (versão 0.0.4).
+
+Contadores, medidores e histogramas com rótulos ficam num registro (`registro`, global
+do processo); `registro.exportar()` gera o texto servido em GET /metrics. Cada métrica tem
+uma trava própria: os ganchos do SQLAlchemy rodam nas threads do pool e do aiosqlite.
+
+    REQUISICOES = registro.contador("http_requisicoes_total", "Requisições atendidas.", ["rota"])
+    REQUISICOES.incrementar(rota="/mcp/buscar_veiculos/")
+"""
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Limites (em segundos) dos histogramas de latência: de 1 ms (consultas no SQLite) a 60 s (LLM em CPU)
+BUCKETS_LATENCIA_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _formatar_numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._trava = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def _chave(self, rotulos: Dict[str, object]) -> Tuple[str, ...]:
+        if len(rotulos) != len(self.rotulos) or any(nome not in rotulos for nome in self.rotulos):
+            raise ValueError(f"{self.nome} espera os rótulos {self.rotulos}, recebeu {tuple(rotulos)}")
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def _linhas(self) -> List[str]:
+        raise NotImplementedError
+
+    def exportar(self) -> str:
+        cabecalho = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._trava:
+            return "\n".join(cabecalho + self._linhas())
+
+
+class Contador(_Metrica):
+    """Valor que só cresce (requisições, linhas lidas). O nome deve terminar em `_total`."""
+    tipo = "counter"
+
+    def incrementar(self, valor: float = 1, **rotulos) -> None:
+        if valor < 0:
+            raise ValueError("Um contador não pode diminuir.")
+        chave = self._chave(rotulos)
+        with self._trava:
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+    def valor(self, **rotulos) -> float:
+        with self._trava:
+            return self._series.get(self._chave(rotulos), 0)
+
+    def _linhas(self) -> List[str]:
+        return [
+            f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(valor)}"
+            for chave, valor in sorted(self._series.items())
+        ]
+
+
+class Medidor(Contador):
+    """Valor que sobe e desce (requisições em andamento, conexões em uso)."""
+    tipo = "gauge"
+
+    def incrementar(self, valor: float = 1, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._trava:
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+    def decrementar(self, valor: float = 1, **rotulos) -> None:
+        self.incrementar(-valor, **rotulos)
+
+    def definir(self, valor: float, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._trava:
+            self._series[chave] = valor
+
+
+class Histograma(_Metrica):
+    """Distribuição de valores (latências) em faixas cumulativas, com soma e contagem."""
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = (), buckets: Iterable[float] = BUCKETS_LATENCIA_S):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor: float, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        # Primeira faixa cujo limite é >= valor (a última posição é o +Inf)
+        posicao = bisect_left(self.buckets, valor)
+        with self._trava:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][posicao] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def contagem(self, **rotulos) -> int:
+        with self._trava:
+            serie = self._series.get(self._chave(rotulos))
+            return serie[2] if serie else 0
+
+    def soma(self, **rotulos) -> float:
+        with self._trava:
+            serie = self._series.get(self._chave(rotulos))
+            return serie[1] if serie else 0.0
+
+    def _linhas(self) -> List[str]:
+        linhas = []
+        for chave, (por_faixa, soma, contagem) in sorted(self._series.items()):
+            acumulado = 0
+            for limite, quantidade in zip(self.buckets + (math.inf,), por_faixa):
+                acumulado += quantidade
+                faixa = f'le="{_formatar_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, faixa)} {acumulado}")
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_numero(soma)}")
+            linhas.append(f"{self.nome}_count{rotulos} {contagem}")
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto das métricas de um processo. Coletores rodam antes de cada exportação."""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._coletores: List[Callable[[], None]] = []
+        self._trava = threading.Lock()
+
+    def _registrar(self, metrica: _Metrica) -> _Metrica:
+        with self._trava:
+            existente = self._metricas.get(metrica.nome)
+            if existente is not None:
+                # Reimportar um módulo não duplica a métrica
+                if type(existente) is not type(metrica) or existente.rotulos != metrica.rotulos:
+                    raise ValueError(f"Métrica {metrica.nome} já registrada com outro tipo ou rótulos.")
+                return existente
+            self._metricas[metrica.nome] = metrica
+            return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        return self._registrar(Contador(nome, ajuda, rotulos))
+
+    def medidor(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Medidor:
+        return self._registrar(Medidor(nome, ajuda, rotulos))
+
+    def histograma(
+        self, nome: str, ajuda: str, rotulos: Sequence[str] = (), buckets: Iterable[float] = BUCKETS_LATENCIA_S
+    ) -> Histograma:
+        return self._registrar(Histograma(nome, ajuda, rotulos, buckets))
+
+    def ao_exportar(self, coletor: Callable[[], None]) -> Callable[[], None]:
+        """Registra uma função que atualiza medidores lidos sob demanda (ex: uso do pool)."""
+        self._coletores.append(coletor)
+        return coletor
+
+    def exportar(self) -> str:
+        for coletor in list(self._coletores):
+            coletor()
+        with self._trava:
+            metricas = sorted(self._metricas.values(), key=lambda m: m.nome)
+        return "\n".join(metrica.exportar() for metrica in metricas) + "\n"
+
+
+registro = RegistroMetricas()
@@ -0,0 +1,75 @@
+# app/database/eventos.py
+"""
+Ganchos em processo para reagir a alterações nos dados de veículos.
+
+Quem mantém estado derivado da tabela `veiculos` (índices em memória, caches)
+registra uma função com `ao_alterar_dados`; quem escreve na tabela
+(ex: `popula_dados`) chama `notificar_dados_alterados` após o commit.
+
+Quem consegue aproveitar só parte do estado (o cache de resultados) registra com
+`ao_alterar_dados_com_escopo` e recebe o `EscopoAlteracao` da escrita, quando conhecido:
+None significa "qualquer veículo pode ter mudado".
+"""
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, List, Mapping, Optional, Tuple
+
+# Campos de texto que identificam os veículos afetados, na ordem das tuplas de `linhas`
+CAMPOS_ESCOPO = ("marca", "modelo", "combustivel")
+
+LinhaEscopo = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+@dataclass(frozen=True)
+class EscopoAlteracao:
+    """
+    Veículos alterados por uma escrita (antes e depois da alteração), pelos valores dobrados
+    (ver `dobrar_texto`) de marca, modelo e combustível.
+    """
+    linhas: FrozenSet[LinhaEscopo]
+
+    def __or__(self, outro: "EscopoAlteracao") -> "EscopoAlteracao":
+        return EscopoAlteracao(self.linhas | outro.linhas)
+
+    def pode_afetar(self, termos: Mapping[str, str]) -> bool:
+        """
+        Se uma busca com estes filtros de texto (já dobrados) pode incluir algum veículo
+        alterado. Como no servidor, cada termo casa com os valores que o contêm; os demais
+        filtros (potência, anos...) não são considerados, então a resposta erra só para o
+        lado de invalidar.
+        """
+        posicoes = [(CAMPOS_ESCOPO.index(campo), termo) for campo, termo in termos.items() if campo in CAMPOS_ESCOPO]
+        return any(
+            all(linha[posicao] is not None and termo in linha[posicao] for posicao, termo in posicoes)
+            for linha in self.linhas
+        )
+
+
+_ouvintes: List[Callable[[], None]] = []
+_ouvintes_com_escopo: List[Callable[[Optional[EscopoAlteracao]], None]] = []
+
+
+def ao_alterar_dados(funcao: Callable[[], None]) -> Callable[[], None]:
+    """Registra `funcao` para ser chamada sempre que os dados de veículos mudarem."""
+    if funcao not in _ouvintes:
+        _ouvintes.append(funcao)
+    return funcao
+
+
+def ao_alterar_dados_com_escopo(
+    funcao: Callable[[Optional[EscopoAlteracao]], None]
+) -> Callable[[Optional[EscopoAlteracao]], None]:
+    """Como `ao_alterar_dados`, mas `funcao` recebe o escopo da alteração (None se desconhecido)."""
+    if funcao not in _ouvintes_com_escopo:
+        _ouvintes_com_escopo.append(funcao)
+    return funcao
+
+
+def notificar_dados_alterados(escopo: Optional[EscopoAlteracao] = None) -> None:
+    """Avisa todos os ouvintes registrados de que a tabela `veiculos` foi alterada."""
+    chamadas = [(funcao, ()) for funcao in _ouvintes] + [(funcao, (escopo,)) for funcao in _ouvintes_com_escopo]
+    for funcao, argumentos in chamadas:
+        try:
+            funcao(*argumentos)
+        except Exception as e:
+            # Um ouvinte com problema não pode impedir os demais de serem avisados
+            print(f"Erro ao notificar alteração de dados em {funcao!r}: {e}")
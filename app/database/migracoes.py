@@ -0,0 +1,167 @@
+# app/database/migracoes.py
+"""
+Migrações versionadas do esquema, aplicadas em ordem por `aplicar_migracoes`.
+
+`create_all` só cria o que falta em tabelas novas e não altera bancos já existentes. Por
+isso toda mudança de esquema de tabelas já publicadas passa por aqui, e não só pelos
+modelos: bancos novos e antigos seguem o mesmo caminho, e `aplicar_migracoes` é a única
+porta de atualização. A última versão aplicada fica em `metadados_sistema` (chave
+"versao_esquema"), gravada na mesma transação dos comandos da migração.
+
+Cada comando é um DDL aceito por SQLite e Postgres ou uma função que recebe a conexão,
+para o que o SQL sozinho não expressa nos dois bancos (SQLite não tem `ADD COLUMN IF NOT
+EXISTS`). Num banco novo o `create_all` já criou tudo: os comandos precisam ser
+inofensivos quando o objeto já existe.
+
+Para mudar o esquema, acrescente uma `Migracao` com a próxima versão ao fim de
+MIGRACOES; nunca altere uma migração já publicada.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple, Union
+
+from sqlalchemy import delete, func, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.database.models import AlteracaoDados, COLUNAS_DE_BUSCA, DDL_INDICES_TRIGRAMA, MetadadoSistema, Veiculo
+from app.database.texto import dobrar_texto
+
+CHAVE_VERSAO_ESQUEMA = "versao_esquema"
+
+logger = logging.getLogger(__name__)
+
+Comando = Union[str, Callable[[Connection], None]]
+
+
+@dataclass(frozen=True)
+class Migracao:
+    versao: int
+    descricao: str
+    comandos: Tuple[Comando, ...] # Executados em ordem, na mesma transação
+
+
+def _colunas_existentes(conexao: Connection) -> set:
+    return {c["name"] for c in inspect(conexao).get_columns(Veiculo.__tablename__)}
+
+
+def criar_colunas_de_busca(conexao: Connection) -> None:
+    """
+    Bancos criados antes das colunas de busca (marca_busca, modelo_busca, combustivel_busca)
+    recebem as colunas, o preenchimento a partir dos valores originais e os índices.
+    """
+    faltantes = [sombra for sombra in COLUNAS_DE_BUSCA.values() if sombra not in _colunas_existentes(conexao)]
+    if not faltantes:
+        return
+    tabela = Veiculo.__table__
+    for sombra in faltantes:
+        tipo = tabela.c[sombra].type.compile(dialect=conexao.dialect)
+        conexao.execute(text(f"ALTER TABLE {tabela.name} ADD COLUMN {sombra} {tipo}"))
+    # Preenche uma vez por valor distinto (poucos), e não por linha
+    for original, sombra in COLUNAS_DE_BUSCA.items():
+        if sombra not in faltantes:
+            continue
+        for (valor,) in conexao.execute(select(tabela.c[original]).distinct()):
+            conexao.execute(update(tabela).where(tabela.c[original] == valor).values({sombra: dobrar_texto(valor)}))
+    for indice in tabela.indexes:
+        if set(indice.columns.keys()) & set(faltantes):
+            indice.create(bind=conexao, checkfirst=True)
+    if conexao.dialect.name == "postgresql":
+        for comando in DDL_INDICES_TRIGRAMA:
+            conexao.execute(text(comando))
+
+
+def criar_indice_chave_natural(conexao: Connection) -> None:
+    """
+    Cria o índice único da chave natural em bancos antigos. Versões anteriores do loader
+    podiam gravar duplicatas, que são removidas antes (mantendo o registro de menor `id`)
+    para o índice poder ser criado.
+    """
+    indice = next(i for i in Veiculo.__table__.indexes if i.name == "uq_veiculos_chave_natural")
+    if indice.name in {i["name"] for i in inspect(conexao).get_indexes(Veiculo.__tablename__)}:
+        return
+    primeiros_ids = select(func.min(Veiculo.id)).group_by(*indice.columns)
+    removidos = conexao.execute(delete(Veiculo).where(Veiculo.id.not_in(primeiros_ids))).rowcount
+    if removidos:
+        logger.warning("%d veículos duplicados (mesma marca, modelo, ano inicial e potência) removidos.", removidos)
+    indice.create(bind=conexao)
+
+
+def criar_coluna_hash_linha(conexao: Connection) -> None:
+    """
+    Bancos criados antes da sincronização incremental recebem a coluna `hash_linha`, vazia.
+    Não é preciso preenchê-la aqui: `sincronizar_dados` calcula o hash das linhas sem ele a
+    partir dos valores gravados e o grava na primeira execução.
+    """
+    if "hash_linha" in _colunas_existentes(conexao):
+        return
+    tipo = Veiculo.__table__.c.hash_linha.type.compile(dialect=conexao.dialect)
+    conexao.execute(text(f"ALTER TABLE {Veiculo.__tablename__} ADD COLUMN hash_linha {tipo}"))
+
+
+def criar_tabela_alteracoes_dados(conexao: Connection) -> None:
+    AlteracaoDados.__table__.create(bind=conexao, checkfirst=True)
+
+
+# Índices dos filtros de `construir_consulta_veiculos`. Igualdades vêm antes do intervalo na
+# chave composta; o filtro de texto chega como `coluna_busca IN (...)` (índice n-grama) e
+# combina com o intervalo de ano. Quase todo modelo segue em produção (ano final nulo):
+# o índice parcial guarda só os que saíram de linha, os únicos que `ano final = X` encontra.
+DDL_INDICES_FILTROS = (
+    "CREATE INDEX IF NOT EXISTS ix_veiculos_ano_inicial_potencia ON veiculos (ano_producao_inicial, potencia_cv)",
+    "CREATE INDEX IF NOT EXISTS ix_veiculos_potencia_ano_inicial ON veiculos (potencia_cv, ano_producao_inicial)",
+    "CREATE INDEX IF NOT EXISTS ix_veiculos_portas_transmissao_potencia "
+    "ON veiculos (num_portas, transmissao_automatica, potencia_cv)",
+    "CREATE INDEX IF NOT EXISTS ix_veiculos_transmissao_potencia ON veiculos (transmissao_automatica, potencia_cv)",
+    "CREATE INDEX IF NOT EXISTS ix_veiculos_combustivel_ano_inicial ON veiculos (combustivel_busca, ano_producao_inicial)",
+    "CREATE INDEX IF NOT EXISTS ix_veiculos_ano_final ON veiculos (ano_producao_final) "
+    "WHERE ano_producao_final IS NOT NULL",
+)
+
+
+MIGRACOES: Tuple[Migracao, ...] = (
+    # As colunas de busca e o índice único vieram antes das migrações (e antes deste
+    # número): bancos já na versão 1 os têm, e os demais precisam deles antes dos índices
+    # dos filtros, que usam combustivel_busca
+    Migracao(
+        1, "Colunas de busca, índice único da chave natural e índices dos filtros",
+        (criar_colunas_de_busca, criar_indice_chave_natural, *DDL_INDICES_FILTROS),
+    ),
+    Migracao(2, "Coluna hash_linha da sincronização incremental", (criar_coluna_hash_linha,)),
+    Migracao(3, "Tabela alteracoes_dados (escopo de cada versão dos dados)", (criar_tabela_alteracoes_dados,)),
+)
+
+
+def versao_esquema(conexao: Connection) -> int:
+    """Última migração aplicada (0 se nenhuma)."""
+    consulta = select(MetadadoSistema.valor).where(MetadadoSistema.chave == CHAVE_VERSAO_ESQUEMA)
+    valor = conexao.execute(consulta).scalar_one_or_none()
+    return int(valor) if valor is not None else 0
+
+
+def _gravar_versao(conexao: Connection, versao: int, existia: bool) -> None:
+    tabela = MetadadoSistema.__table__
+    if existia:
+        conexao.execute(tabela.update().where(tabela.c.chave == CHAVE_VERSAO_ESQUEMA).values(valor=str(versao)))
+    else:
+        conexao.execute(tabela.insert().values(chave=CHAVE_VERSAO_ESQUEMA, valor=str(versao)))
+
+
+def aplicar_migracoes(engine: Engine, migracoes: Optional[Tuple[Migracao, ...]] = None) -> List[Migracao]:
+    """
+    Aplica, em ordem e cada uma na sua transação, as migrações com versão acima da
+    registrada no banco. As tabelas já devem existir (`create_all`). Devolve as aplicadas.
+    """
+    aplicadas = []
+    for migracao in sorted(migracoes or MIGRACOES, key=lambda m: m.versao):
+        with engine.begin() as conexao:
+            atual = versao_esquema(conexao)
+            if migracao.versao <= atual:
+                continue
+            for comando in migracao.comandos:
+                if callable(comando):
+                    comando(conexao)
+                else:
+                    conexao.execute(text(comando))
+            _gravar_versao(conexao, migracao.versao, existia=atual > 0)
+        aplicadas.append(migracao)
+    return aplicadas
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float
+from sqlalchemy import Column, Integer, String, Boolean, Float, Index, DDL, Text, event
 from sqlalchemy.orm import declarative_base # Correção para SQLAlchemy >= 1.4, antes era sqlalchemy.ext.declarative
 from sqlalchemy import create_engine
 
+from app.database.texto import dobrar_texto
+
 # Base declarativa para nossos modelos SQLAlchemy.
 # Em projetos maiores, isso pode ficar em um arquivo separado, como app/database/base_class.py
 Base = declarative_base()
@@ -26,8 +28,74 @@ class Veiculo(Base):
     tanque_litros = Column(Integer, nullable=True) # Capacidade do tanque de combustível em litros
     autonomia_km_l = Column(Float, nullable=True) # Autonomia em km/l (ou km por carga para elétricos)    
 
+    # Colunas "sombra" para busca: sem acentos e em minúsculas (ver dobrar_texto).
+    # São preenchidas automaticamente na gravação e nunca devem ser editadas à mão.
+    marca_busca = Column(String(100), index=True)
+    modelo_busca = Column(String(100), index=True)
+    combustivel_busca = Column(String(50), index=True)
+
+    # Resumo dos dados da linha do CSV de origem (ver scripts/populate_db.py:hash_registro).
+    # A sincronização incremental compara este valor para achar as linhas que mudaram.
+    hash_linha = Column(String(32), nullable=True)
+
+    # Chave natural: um veículo é único por marca, modelo, ano inicial e potência.
+    # O loader em lote usa este índice para descartar duplicatas (ON CONFLICT DO NOTHING).
+    __table_args__ = (
+        Index(
+            "uq_veiculos_chave_natural",
+            "marca", "modelo", "ano_producao_inicial", "potencia_cv",
+            unique=True,
+        ),
+    )
+
     def __repr__(self):
         return f"<Veiculo(id={self.id}, marca='{self.marca}', modelo='{self.modelo}', ano_inicial={self.ano_producao_inicial})>"
 
 
+# Pares (coluna original, coluna de busca) mantidos sincronizados na gravação
+COLUNAS_DE_BUSCA = {
+    "marca": "marca_busca",
+    "modelo": "modelo_busca",
+    "combustivel": "combustivel_busca",
+}
+
+@event.listens_for(Veiculo, "before_insert")
+@event.listens_for(Veiculo, "before_update")
+def _preencher_colunas_de_busca(mapper, connection, veiculo):
+    for original, sombra in COLUNAS_DE_BUSCA.items():
+        setattr(veiculo, sombra, dobrar_texto(getattr(veiculo, original)))
+
+# Postgres: índices de trigramas (pg_trgm) permitem que LIKE '%termo%' nas colunas de
+# busca use índice. Em outros bancos (SQLite) o servidor usa um índice n-grama em memória.
+DDL_INDICES_TRIGRAMA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    *(
+        f"CREATE INDEX IF NOT EXISTS ix_veiculos_{sombra}_trgm ON veiculos USING gin ({sombra} gin_trgm_ops)"
+        for sombra in COLUNAS_DE_BUSCA.values()
+    ),
+]
+for _comando in DDL_INDICES_TRIGRAMA:
+    event.listen(Veiculo.__table__, "after_create", DDL(_comando).execute_if(dialect="postgresql"))
+
+
+class MetadadoSistema(Base):
+    """Pares chave/valor de controle interno (ex: versão dos dados de veículos)."""
+    __tablename__ = "metadados_sistema"
+
+    chave = Column(String(100), primary_key=True)
+    valor = Column(String(255), nullable=False)
+
+    def __repr__(self):
+        return f"<MetadadoSistema(chave='{self.chave}', valor='{self.valor}')>"
+
+
+class AlteracaoDados(Base):
+    """
+    Veículos afetados por cada versão dos dados (JSON com as tuplas de `EscopoAlteracao`),
+    para os servidores invalidarem só o que a escrita pode ter mudado. Sem o registro de
+    uma versão, a invalidação é total.
+    """
+    __tablename__ = "alteracoes_dados"
 
+    versao = Column(Integer, primary_key=True, autoincrement=False)
+    escopo = Column(Text, nullable=False)
@@ -1,10 +1,201 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+"""
+Engines e fábricas de sessão do banco.
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+Nada aqui conecta ao banco nem carrega o driver na importação: os engines são criados no
+primeiro uso (`obter_engine`, `obter_engine_async`), e `SessionLocal` / `AsyncSessionLocal`
+só pedem o engine ao abrir a primeira sessão. Assim os
+pontos de entrada sobem rápido e não falham na importação se o banco estiver fora do ar.
+`engine` e `async_engine` continuam acessíveis como atributos do módulo (criados no acesso).
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Leituras e escritas: o primário (DATABASE_URL) recebe as escritas e as sessões comuns. As
+buscas do servidor MCP usam `abrir_sessao_leitura` / `get_async_db_leitura`, que vão para
+uma réplica de leitura saudável (DATABASE_URL_LEITURA) e caem no primário sem nenhuma.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url, URL
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import (
+    DATABASE_URL, DATABASE_URL_ASYNC, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE_S, DB_POOL_TIMEOUT_S,
+    DATABASE_URL_LEITURA, DB_REPLICA_QUARENTENA_S,
+)
+from app.core.instrumentacao import FALHAS_REPLICA, REPLICA_DISPONIVEL, instrumentar_engine
+from app.core.metricas import registro
+
+logger = logging.getLogger(__name__)
+
+_trava_engines = threading.Lock()
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_seletor_replicas: Optional["SeletorReplicas"] = None
+
+# Drivers assíncronos equivalentes a cada backend suportado
+DRIVERS_ASSINCRONOS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def url_assincrona(url: str) -> URL:
+    """Converte a URL síncrona (ex: postgresql+psycopg2) para o driver assíncrono do mesmo backend."""
+    url_obj = make_url(url)
+    driver = DRIVERS_ASSINCRONOS.get(url_obj.get_backend_name(), url_obj.drivername)
+    return url_obj.set(drivername=driver)
+
+def opcoes_pool() -> Dict[str, Any]:
+    """Configuração do pool, a mesma para todos os engines."""
+    return {
+        "pool_pre_ping": True,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE_S,
+        "pool_timeout": DB_POOL_TIMEOUT_S,
+    }
+
+def obter_engine() -> Engine:
+    """Engine síncrono (scripts de carga, testes), criado na primeira chamada."""
+    global _engine
+    if _engine is None:
+        with _trava_engines:
+            if _engine is None:
+                novo = create_engine(DATABASE_URL, **opcoes_pool())
+                instrumentar_engine(novo, "sincrono")
+                _engine = novo
+    return _engine
+
+def obter_engine_async() -> AsyncEngine:
+    """Engine assíncrono, usado pelos endpoints do servidor MCP para não bloquear o event loop."""
+    global _async_engine
+    if _async_engine is None:
+        with _trava_engines:
+            if _async_engine is None:
+                novo = create_async_engine(DATABASE_URL_ASYNC or url_assincrona(DATABASE_URL), **opcoes_pool())
+                instrumentar_engine(novo.sync_engine, "assincrono")
+                _async_engine = novo
+    return _async_engine
+
+class SeletorReplicas:
+    """
+    Escolhe a réplica de leitura de cada sessão: rodízio entre as saudáveis. Uma réplica
+    que falha ao conectar fica `quarentena_s` segundos fora do rodízio e depois volta a
+    ser tentada; sem nenhuma saudável, a leitura vai para o primário.
+    """
+
+    def __init__(self, engines: Sequence[AsyncEngine], nomes: Sequence[str], quarentena_s: float):
+        self.engines = list(engines)
+        self.nomes = list(nomes)
+        self.quarentena_s = quarentena_s
+        self._indisponivel_ate = [0.0] * len(self.engines)
+        self._proxima = 0
+        self._trava = threading.Lock()
+
+    def disponivel(self, indice: int) -> bool:
+        return time.monotonic() >= self._indisponivel_ate[indice]
+
+    def candidatas(self) -> List[int]:
+        """Índices das réplicas saudáveis, a partir da próxima do rodízio."""
+        with self._trava:
+            inicio = self._proxima
+            self._proxima = (self._proxima + 1) % max(len(self.engines), 1)
+        ordem = [(inicio + i) % len(self.engines) for i in range(len(self.engines))]
+        return [i for i in ordem if self.disponivel(i)]
+
+    def marcar_falha(self, indice: int) -> None:
+        self._indisponivel_ate[indice] = time.monotonic() + self.quarentena_s
+        FALHAS_REPLICA.incrementar(engine=self.nomes[indice])
+
+    def exportar_saude(self) -> None:
+        for indice, nome in enumerate(self.nomes):
+            REPLICA_DISPONIVEL.definir(1 if self.disponivel(indice) else 0, engine=nome)
+
+    async def descartar(self) -> None:
+        for engine_replica in self.engines:
+            await engine_replica.dispose()
+
+def criar_seletor_replicas(urls: Sequence[str], quarentena_s: float = DB_REPLICA_QUARENTENA_S) -> SeletorReplicas:
+    """Engines assíncronos (instrumentados como "replica_1", "replica_2", ...) para as URLs de leitura."""
+    engines, nomes = [], []
+    for posicao, url in enumerate(urls, start=1):
+        engine_replica = create_async_engine(url_assincrona(url), **opcoes_pool())
+        instrumentar_engine(engine_replica.sync_engine, f"replica_{posicao}")
+        engines.append(engine_replica)
+        nomes.append(f"replica_{posicao}")
+    return SeletorReplicas(engines, nomes, quarentena_s)
+
+def obter_seletor_replicas() -> Optional[SeletorReplicas]:
+    """Seletor das réplicas de DATABASE_URL_LEITURA (None se não houver), criado na primeira chamada."""
+    global _seletor_replicas
+    if _seletor_replicas is None and DATABASE_URL_LEITURA:
+        with _trava_engines:
+            if _seletor_replicas is None:
+                _seletor_replicas = criar_seletor_replicas(DATABASE_URL_LEITURA)
+    return _seletor_replicas
+
+@registro.ao_exportar
+def _exportar_saude_replicas():
+    if _seletor_replicas is not None:
+        _seletor_replicas.exportar_saude()
+
+def __getattr__(nome: str):
+    # `from app.database.session import engine` continua funcionando (cria o engine nesse momento)
+    if nome == "engine":
+        return obter_engine()
+    if nome == "async_engine":
+        return obter_engine_async()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+class _FabricaSessoes(sessionmaker):
+    """sessionmaker que só pede o engine (e o cria) ao abrir a primeira sessão."""
+    def __call__(self, **opcoes) -> Session:
+        opcoes.setdefault("bind", obter_engine())
+        return super().__call__(**opcoes)
+
+class _FabricaSessoesAsync(async_sessionmaker):
+    def __call__(self, **opcoes) -> AsyncSession:
+        opcoes.setdefault("bind", obter_engine_async())
+        return super().__call__(**opcoes)
+
+SessionLocal = _FabricaSessoes(autocommit=False, autoflush=False)
+
+# expire_on_commit=False: os objetos continuam legíveis após o commit sem novo I/O implícito
+AsyncSessionLocal = _FabricaSessoesAsync(autoflush=False, expire_on_commit=False)
+
+async def aquecer_pool_async(conexoes: int = DB_POOL_SIZE) -> int:
+    """
+    Abre `conexoes` conexões do pool assíncrono ao mesmo tempo (e as devolve ao pool),
+    para que as primeiras requisições não paguem a conexão ao banco. Falhas só vão para
+    o log: com o banco fora do ar o servidor sobe mesmo assim. Retorna quantas abriram.
+    """
+    engine_async = obter_engine_async()
+
+    async def abrir(conexoes_abertas: list):
+        conexao = await engine_async.connect()
+        conexoes_abertas.append(conexao)
+        await conexao.execute(text("SELECT 1"))
+
+    abertas: list = []
+    try:
+        resultados = await asyncio.gather(*(abrir(abertas) for _ in range(conexoes)), return_exceptions=True)
+    finally:
+        for conexao in abertas:
+            await conexao.close()
+    falhas = [r for r in resultados if isinstance(r, BaseException)]
+    if falhas:
+        logger.warning("Aquecimento do pool: %d de %d conexões falharam (%s)", len(falhas), conexoes, falhas[0])
+    return conexoes - len(falhas)
+
+async def descartar_engines_async() -> None:
+    """Fecha as conexões dos pools assíncronos (primário e réplicas) que chegaram a ser criados."""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _seletor_replicas is not None:
+        await _seletor_replicas.descartar()
 
 def get_db():
     db = SessionLocal()
@@ -13,6 +204,37 @@ def get_db():
     finally:
         db.close() # Garante que a sessão seja fechada após o uso
 
+async def get_async_db():
+    """Dependência FastAPI que fornece uma AsyncSession e a fecha ao final da requisição."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def abrir_sessao_leitura() -> AsyncSession:
+    """
+    AsyncSession para consultas: na próxima réplica saudável ou, sem nenhuma, no primário.
+    A conexão é obtida já aqui (com o pre-ping do pool), para que uma réplica fora do ar
+    vá para a quarentena e a leitura siga em outra, sem erro para quem chamou.
+    O chamador fecha a sessão.
+    """
+    seletor = obter_seletor_replicas()
+    if seletor is not None:
+        for indice in seletor.candidatas():
+            sessao = AsyncSessionLocal(bind=seletor.engines[indice])
+            try:
+                await sessao.connection()
+                return sessao
+            except (SQLAlchemyError, OSError) as e:
+                await sessao.close()
+                seletor.marcar_falha(indice)
+                logger.warning("Réplica %s indisponível, fora da seleção por %.0f s: %s",
+                               seletor.nomes[indice], seletor.quarentena_s, e)
+    return AsyncSessionLocal()
+
+async def get_async_db_leitura():
+    """Dependência FastAPI de uma sessão só de leitura (réplica saudável ou primário)."""
+    async with await abrir_sessao_leitura() as db:
+        yield db
+
 # Funções para criar e fechar sessões de banco de dados
 # (Útil especialmente se você estiver construindo uma API com FastAPI, por exemplo)
 def get_db_session():
@@ -28,7 +250,7 @@ from app.database.models import Base
 def init_db():
     try:
         print("Tentando criar tabelas no banco de dados...")
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=obter_engine())
         print("Tabelas verificadas/criadas com sucesso.")
     except Exception as e:
         print(f"Erro ao tentar criar tabelas: {e}")
@@ -36,4 +258,4 @@ def init_db():
         print(f"String de conexão utilizada: {DATABASE_URL}")
 
 # Se você quiser executar init_db() ao iniciar a aplicação,
-# você pode chamá-lo de um script principal ou do seu __main__.py
\ No newline at end of file
+# você pode chamá-lo de um script principal ou do seu __main__.py
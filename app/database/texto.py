@@ -0,0 +1,21 @@
+# app/database/texto.py
+"""Normalização de texto usada nas colunas de busca (sombra) e nos termos pesquisados."""
+import unicodedata
+from typing import Optional
+
+
+def dobrar_texto(valor: Optional[str]) -> Optional[str]:
+    """
+    Remove acentos e converte para minúsculas: "Elétrico" -> "eletrico".
+    É a mesma função aplicada ao gravar as colunas *_busca e ao normalizar o termo
+    pesquisado, o que torna a busca insensível a acentos e a maiúsculas/minúsculas.
+    """
+    if valor is None:
+        return None
+    decomposto = unicodedata.normalize("NFKD", valor)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def escapar_like(termo: str, escape: str = "\\") -> str:
+    """Escapa os curingas do LIKE para que o termo seja buscado literalmente."""
+    return termo.replace(escape, escape * 2).replace("%", escape + "%").replace("_", escape + "_")
@@ -0,0 +1,90 @@
+# app/database/versao_dados.py
+"""
+Contador de versão dos dados de veículos, guardado na tabela `metadados_sistema`.
+
+Todo processo que grava na tabela `veiculos` incrementa o contador na mesma transação.
+Os leitores (servidor MCP) comparam a versão para descobrir que caches e índices
+derivados ficaram desatualizados, mesmo quando a escrita veio de outro processo.
+
+Quem sabe quais veículos alterou (a sincronização incremental) grava também o escopo da
+versão em `alteracoes_dados` (`registrar_escopo`); o monitor o repassa aos ouvintes,
+e o cache de resultados descarta só as entradas que o escopo pode afetar.
+"""
+import json
+import time
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database.eventos import EscopoAlteracao, notificar_dados_alterados
+from app.database.models import AlteracaoDados, MetadadoSistema
+
+CHAVE_VERSAO_DADOS = "versao_dados_veiculos"
+# Escopos guardados (um por versão): um servidor que ficou mais versões para trás invalida tudo
+MAX_VERSOES_COM_ESCOPO = 100
+# Acima disso a escrita mexeu em quase tudo: não vale guardar o escopo, a invalidação é total
+MAX_LINHAS_ESCOPO = 5000
+
+
+def incrementar_versao_dados(db: Session) -> int:
+    """Incrementa a versão dos dados na transação corrente (o commit fica com o chamador)."""
+    registro = db.get(MetadadoSistema, CHAVE_VERSAO_DADOS, with_for_update=True)
+    if registro is None:
+        db.add(MetadadoSistema(chave=CHAVE_VERSAO_DADOS, valor="1"))
+        return 1
+    nova_versao = int(registro.valor) + 1
+    registro.valor = str(nova_versao)
+    return nova_versao
+
+
+def registrar_escopo(db: Session, versao: int, escopo: EscopoAlteracao) -> None:
+    """Grava o escopo de `versao` na transação corrente (a mesma que incrementou a versão)."""
+    db.execute(delete(AlteracaoDados).where(AlteracaoDados.versao <= versao - MAX_VERSOES_COM_ESCOPO))
+    if len(escopo.linhas) <= MAX_LINHAS_ESCOPO:
+        db.add(AlteracaoDados(versao=versao, escopo=json.dumps(sorted(escopo.linhas, key=str), ensure_ascii=False)))
+
+
+async def ler_escopo(db: AsyncSession, de: int, ate: int) -> Optional[EscopoAlteracao]:
+    """Escopo somado das versões de `de` (exclusive) a `ate`, ou None se alguma não tem escopo."""
+    consulta = select(AlteracaoDados.escopo).where(AlteracaoDados.versao > de, AlteracaoDados.versao <= ate)
+    escopos = (await db.execute(consulta)).scalars().all()
+    if ate <= de or len(escopos) != ate - de:
+        return None
+    return EscopoAlteracao(frozenset(tuple(linha) for escopo in escopos for linha in json.loads(escopo)))
+
+
+async def obter_versao_dados(db: AsyncSession) -> int:
+    """Lê a versão atual dos dados (0 se o contador ainda não existir)."""
+    consulta = select(MetadadoSistema.valor).where(MetadadoSistema.chave == CHAVE_VERSAO_DADOS)
+    valor = (await db.execute(consulta)).scalar_one_or_none()
+    return int(valor) if valor is not None else 0
+
+
+class MonitorVersaoDados:
+    """
+    Mantém a última versão lida do banco e a relê no máximo a cada `intervalo_s` segundos,
+    para não custar uma consulta extra em toda requisição. Quando percebe que a versão
+    mudou, dispara `notificar_dados_alterados` (com o escopo das versões novas, se todas o
+    registraram) para que os ouvintes deste processo (índice em memória, cache de
+    resultados) descartem o estado antigo.
+    """
+
+    def __init__(self, intervalo_s: float):
+        self.intervalo_s = intervalo_s
+        self._versao: Optional[int] = None
+        self._lida_em = 0.0
+
+    async def versao_atual(self, db: AsyncSession) -> int:
+        agora = time.monotonic()
+        if self._versao is None or agora - self._lida_em >= self.intervalo_s:
+            versao = await obter_versao_dados(db)
+            if self._versao is not None and versao != self._versao:
+                notificar_dados_alterados(await ler_escopo(db, self._versao, versao))
+            self._versao, self._lida_em = versao, agora
+        return self._versao
+
+    def esquecer(self) -> None:
+        """Força a releitura da versão na próxima chamada."""
+        self._versao = None
@@ -7,31 +7,34 @@ project_root = app_dir.parent
 sys.path.append(str(project_root))
 
 from app.agent.terminal_agent import run_conversation_agent
-from scripts.populate_db import popula_dados, criar_tabelas_se_nao_existirem
-import os 
+from app.core.config import AGENTE_LOG_NIVEL
+import logging
+import time
 
-def inicia_dados():
-    criar_tabelas_se_nao_existirem()
-    
-    # Caminho para o diretório onde o main.py está (a pasta 'app')
-    diretorio_atual_script = Path(__file__).resolve().parent
+def inicia_dados(tentativas: int = 3, espera_s: float = 1.0):
+    """
+    Garante a semente do banco: o CSV só é carregado quando mudou desde a última carga
+    (impressão digital em `metadados_sistema`). Se o banco não responder, o agente sobe
+    mesmo assim, pois as buscas passam pelos servidores, e não por este processo.
+    """
+    # Importado aqui: o SQLAlchemy (e o pandas, se houver carga) só são carregados nesta etapa
+    from sqlalchemy.exc import OperationalError
+    from scripts.populate_db import semear_se_necessario
 
-    # Caminho para a raiz do projeto (um nível acima da pasta 'app')
-    raiz_do_projeto = diretorio_atual_script.parent
-
-    # Nome do arquivo CSV
-    nome_arquivo_csv = "veiculos_fabricados_brasil_reais.csv"
-
-    # Monta o caminho completo para o arquivo CSV
-    csv_path = raiz_do_projeto / "scripts" / nome_arquivo_csv
-      
-    # Se a função popula_dados espera uma string como caminho:
-    if csv_path.exists():
-        popula_dados(str(csv_path)) # Converte o objeto Path para string        
-    else:
-        print(f"ERRO: Arquivo CSV não encontrado em: {str(csv_path)}")
-    
+    csv_path = project_root / "scripts" / "veiculos_fabricados_brasil_reais.csv"
+    for tentativa in range(1, tentativas + 1):
+        try:
+            print(semear_se_necessario(str(csv_path)))
+            return
+        except OperationalError as e:
+            if tentativa == tentativas:
+                print(f"AVISO: banco indisponível, a semente não foi conferida ({e.orig}).")
+                return
+            time.sleep(espera_s * tentativa)
 
 if __name__ == "__main__":        
+    # Só o agente fala no nível configurado (tempos do LLM); o resto fica em WARNING
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    logging.getLogger("app.agent").setLevel(AGENTE_LOG_NIVEL)
     inicia_dados()
     run_conversation_agent()
\ No newline at end of file
@@ -0,0 +1,128 @@
+# app/mcp/busca_texto.py
+"""
+Busca por substring em `marca`, `modelo` e `combustivel`, insensível a acentos e
+a maiúsculas/minúsculas, sempre sobre as colunas de busca (sombra) do modelo `Veiculo`.
+
+- Postgres: `coluna_busca LIKE '%termo%'`, atendido pelos índices de trigramas (pg_trgm).
+- Demais bancos (SQLite): um índice n-grama em memória sobre os valores DISTINTOS de cada
+  coluna resolve o termo para a lista de valores que o contêm, e a consulta vira
+  `coluna_busca IN (...)`, atendida pelo índice btree da coluna. O custo depende do número
+  de valores distintos, e não do número de veículos.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import false, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.eventos import ao_alterar_dados
+from app.database.models import Veiculo, COLUNAS_DE_BUSCA
+from app.database.texto import dobrar_texto, escapar_like
+
+TAMANHO_NGRAMA = 3
+# Acima disso o termo é pouco seletivo: um IN enorme não ajuda, usamos LIKE direto
+MAX_VALORES_CANDIDATOS = 500
+
+
+def ngramas(texto: str, tamanho: int = TAMANHO_NGRAMA) -> Set[str]:
+    return {texto[i:i + tamanho] for i in range(len(texto) - tamanho + 1)}
+
+
+class IndiceNgramTexto:
+    """Para cada coluna de texto, mapeia n-grama -> valores distintos (já dobrados) que o contêm."""
+
+    def __init__(self):
+        self._dados: Optional[Dict[str, Tuple[Set[str], Dict[str, Set[str]]]]] = None
+        self._trava = threading.Lock()
+
+    @property
+    def carregado(self) -> bool:
+        return self._dados is not None
+
+    def carregar(self, valores_por_campo: Dict[str, Iterable[Optional[str]]]) -> None:
+        dados = {}
+        for campo, valores in valores_por_campo.items():
+            distintos = {v for v in valores if v is not None}
+            postagens: Dict[str, Set[str]] = {}
+            for valor in distintos:
+                for grama in ngramas(valor):
+                    postagens.setdefault(grama, set()).add(valor)
+            dados[campo] = (distintos, postagens)
+        with self._trava:
+            self._dados = dados
+
+    def invalidar(self) -> None:
+        with self._trava:
+            self._dados = None
+
+    def candidatos(self, campo: str, termo_dobrado: str) -> Set[str]:
+        """Valores distintos de `campo` que contêm `termo_dobrado`."""
+        dados = self._dados
+        if dados is None:
+            raise RuntimeError("Índice n-grama não carregado.")
+        distintos, postagens = dados[campo]
+        gramas = ngramas(termo_dobrado)
+        if not gramas: # Termo menor que o n-grama: verifica todos os valores distintos
+            return {v for v in distintos if termo_dobrado in v}
+        listas = sorted((postagens.get(g, set()) for g in gramas), key=len)
+        possiveis = set.intersection(*listas)
+        # Ter todos os n-gramas não garante a substring contígua: confirma cada candidato
+        return {v for v in possiveis if termo_dobrado in v}
+
+
+indice_ngram_texto = IndiceNgramTexto()
+ao_alterar_dados(indice_ngram_texto.invalidar)
+_trava_carga = asyncio.Lock()
+
+
+# Variantes do predicado de texto (parte da forma das consultas compiladas em app/mcp/filtros.py)
+TEXTO_LIKE, TEXTO_IN, TEXTO_NENHUM = "like", "in", "nenhum"
+
+
+def forma_texto(termo: str, candidatos: Optional[Set[str]] = None) -> Tuple[str, Any]:
+    """
+    Variante do predicado "contém `termo`" e o valor a comparar: o padrão do LIKE (curingas
+    escapados), a lista ordenada de candidatos do IN, ou None quando nenhum valor casa.
+    """
+    if candidatos is None or len(candidatos) > MAX_VALORES_CANDIDATOS:
+        return TEXTO_LIKE, f"%{escapar_like(dobrar_texto(termo))}%"
+    if not candidatos:
+        return TEXTO_NENHUM, None
+    return TEXTO_IN, sorted(candidatos)
+
+
+def condicao_texto(coluna, variante: str, valor):
+    """Condição SQL de uma variante; `valor` pode ser o próprio valor ou um `bindparam`."""
+    if variante == TEXTO_LIKE:
+        return coluna.like(valor, escape="\\")
+    if variante == TEXTO_NENHUM:
+        return false()
+    return coluna.in_(valor)
+
+
+def predicado_texto(campo: str, termo: str, candidatos: Optional[Set[str]] = None):
+    """
+    Condição SQL para "`campo` contém `termo`". Com `candidatos` (vindos do índice n-grama)
+    a condição é um IN sobre a coluna de busca; sem eles, um LIKE com curingas escapados.
+    """
+    coluna = getattr(Veiculo, COLUNAS_DE_BUSCA[campo])
+    return condicao_texto(coluna, *forma_texto(termo, candidatos))
+
+
+async def resolver_candidatos_texto(db: AsyncSession, termos: Dict[str, str]) -> Dict[str, Set[str]]:
+    """
+    Resolve cada termo de texto para os valores candidatos via índice n-grama.
+    No Postgres devolve {} (o LIKE já usa o índice de trigramas do banco).
+    """
+    if not termos or db.bind.dialect.name == "postgresql":
+        return {}
+    if not indice_ngram_texto.carregado:
+        async with _trava_carga:
+            if not indice_ngram_texto.carregado:
+                valores = {}
+                for campo, sombra in COLUNAS_DE_BUSCA.items():
+                    coluna = getattr(Veiculo, sombra)
+                    valores[campo] = (await db.execute(select(coluna).distinct())).scalars().all()
+                indice_ngram_texto.carregar(valores)
+    return {campo: indice_ngram_texto.candidatos(campo, dobrar_texto(termo)) for campo, termo in termos.items()}
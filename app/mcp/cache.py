@@ -0,0 +1,131 @@
+# app/mcp/cache.py
+"""
+Cache de resultados de busca do servidor MCP.
+
+As entradas são chaveadas pela forma canônica de `VeiculoFiltros` (campos None
+removidos, textos sem acentos e em minúsculas, chaves ordenadas) somada à paginação. A
+evicção é LRU com TTL e limite de entradas.
+
+Quando os dados mudam, `invalidar` recebe o escopo da alteração (ver
+app/database/eventos.py) e descarta só as entradas cujos filtros de texto podem casar com
+algum veículo alterado; sem escopo, descarta tudo. Uma entrada calculada antes de uma
+invalidação e guardada depois dela é ignorada (ver `geracao`).
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Mapping, Optional
+
+from app.database.eventos import EscopoAlteracao
+from app.database.texto import dobrar_texto
+from app.mcp.schemas import VeiculoFiltros
+
+
+def filtros_canonicos(filtros: VeiculoFiltros) -> str:
+    """
+    Representação canônica dos filtros. Como a busca de texto ignora acentos e
+    maiúsculas/minúsculas, "Elétrico" e "eletrico" produzem a mesma chave.
+    """
+    campos = {
+        campo: dobrar_texto(valor) if isinstance(valor, str) else valor
+        for campo, valor in filtros.model_dump(exclude_none=True).items()
+    }
+    return json.dumps(campos, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def termos_canonicos(filtros: VeiculoFiltros) -> Dict[str, str]:
+    """Filtros de texto (marca, modelo, combustivel) dobrados: o que `invalidar` compara com o escopo."""
+    return {
+        campo: dobrar_texto(valor)
+        for campo, valor in filtros.model_dump(include={"marca", "modelo", "combustivel"}, exclude_none=True).items()
+    }
+
+
+def gerar_etag(*partes: Any) -> str:
+    """ETag forte derivada das partes que determinam o conteúdo da resposta."""
+    bruto = "|".join(str(p) for p in partes).encode()
+    return f'"{hashlib.sha256(bruto).hexdigest()[:32]}"'
+
+
+def etag_corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    """Avalia o cabeçalho If-None-Match (lista separada por vírgulas, `*` ou validadores fracos)."""
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidatos or any(c.removeprefix("W/") == etag for c in candidatos)
+
+
+class CacheResultados:
+    """Cache LRU com TTL, limite de entradas e contadores de acertos/faltas."""
+
+    def __init__(self, max_entradas: int, ttl_s: float):
+        self.max_entradas = max_entradas
+        self.ttl_s = ttl_s
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._trava = threading.Lock()
+        self.geracao = 0 # Incrementada a cada invalidação
+        self.acertos = 0
+        self.faltas = 0
+        self.remocoes = 0
+        self.invalidadas = 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada[0] < time.monotonic():
+                if entrada is not None:
+                    del self._entradas[chave] # Expirou pelo TTL
+                self.faltas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[1]
+
+    def guardar(
+        self, chave: Hashable, valor: Any, geracao: Optional[int] = None, termos: Optional[Mapping[str, str]] = None
+    ) -> None:
+        """
+        Guarda `valor`. `geracao` é o valor de `self.geracao` lido antes de calcular o valor:
+        se houve uma invalidação no meio, o valor pode estar velho e não é guardado. `termos`
+        são os filtros de texto da busca (`termos_canonicos`); sem eles, qualquer alteração
+        dos dados invalida a entrada.
+        """
+        with self._trava:
+            if geracao is not None and geracao != self.geracao:
+                return
+            self._entradas[chave] = (time.monotonic() + self.ttl_s, valor, dict(termos or {}))
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False) # Remove o menos usado recentemente
+                self.remocoes += 1
+
+    def invalidar(self, escopo: Optional[EscopoAlteracao] = None) -> None:
+        """Descarta as entradas que `escopo` pode afetar (todas, sem escopo)."""
+        with self._trava:
+            self.geracao += 1
+            afetadas = [
+                chave for chave, (_, _, termos) in self._entradas.items()
+                if escopo is None or escopo.pode_afetar(termos)
+            ]
+            for chave in afetadas:
+                del self._entradas[chave]
+            self.invalidadas += len(afetadas)
+
+    def limpar(self) -> None:
+        self.invalidar(None)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._trava:
+            consultas = self.acertos + self.faltas
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_s": self.ttl_s,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "remocoes": self.remocoes,
+                "invalidadas": self.invalidadas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
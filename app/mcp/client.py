@@ -1,119 +1,688 @@
-import requests  
-import json      
-from typing import List, Dict, Any # Para tipagem
+import asyncio
+import json
+import logging
+import random
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Sequence, Tuple # Para tipagem
 
-# URL base do nosso servidor MCP.
-# No futuro, isso poderia vir de um arquivo de configuração ou variável de ambiente.
-MCP_API_BASE_URL = "http://localhost:8000" # Servidor FastAPI rodando localmente na porta 8000
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def consultar_veiculos_mcp(filtros: Dict[str, Any]) -> List[Dict[str, Any]]:
+from app.core.config import (
+    MCP_API_BASE_URL, MCP_TIMEOUT_CONEXAO_S, MCP_TIMEOUT_LEITURA_S,
+    MCP_MAX_TENTATIVAS, MCP_BACKOFF_BASE_S, MCP_TAMANHO_POOL_CLIENTE,
+)
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_BUSCA = "/mcp/buscar_veiculos/"
+CAMINHO_BUSCA_STREAM = "/mcp/buscar_veiculos/stream"
+CAMINHO_BUSCA_LOTE = "/mcp/buscar_veiculos/lote/"
+CAMINHO_FACETAS = "/mcp/facetas/"
+CAMINHO_PROXIMOS = "/mcp/buscar_veiculos/proximos/"
+CAMINHO_VOCABULARIO = "/mcp/vocabulario/"
+
+# Respostas que indicam falha transitória do servidor: vale tentar de novo
+STATUS_PARA_NOVA_TENTATIVA = (429, 500, 502, 503, 504)
+
+# Últimas páginas recebidas com seus ETags, para requisições condicionais (If-None-Match).
+# Se o servidor responder 304, reaproveitamos a página guardada sem baixar o corpo de novo.
+MAX_PAGINAS_COM_ETAG = 128
+
+
+class ErroConexaoMCP(requests.exceptions.ConnectionError):
+    """Servidor MCP inacessível mesmo após as novas tentativas (também usado pelo cliente assíncrono)."""
+
+
+def espera_backoff(tentativa: int, base_s: float = MCP_BACKOFF_BASE_S, maximo_s: float = 5.0) -> float:
+    """Backoff exponencial com jitter completo: sorteia entre 0 e base * 2^tentativa."""
+    return random.uniform(0, min(maximo_s, base_s * (2 ** tentativa)))
+
+
+class _PaginasComEtag:
+    """
+    Guarda as últimas páginas com seus ETags (LRU limitado). Compartilhado pelas threads
+    de `asyncio.to_thread` que usam o mesmo cliente: toda leitura e escrita é sob a trava.
+    """
+
+    def __init__(self, maximo: int = MAX_PAGINAS_COM_ETAG):
+        self.maximo = maximo
+        self._paginas: "OrderedDict[tuple, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def chave(filtros: Dict[str, Any], params: Dict[str, Any]) -> tuple:
+        return json.dumps(filtros, sort_keys=True), json.dumps(params, sort_keys=True)
+
+    def obter(self, chave: tuple) -> Optional[Tuple[str, Dict[str, Any]]]:
+        with self._trava:
+            entrada = self._paginas.get(chave)
+            if entrada is not None:
+                self._paginas.move_to_end(chave)
+            return entrada
+
+    def guardar(self, chave: tuple, etag: Optional[str], pagina: Dict[str, Any]) -> None:
+        if not etag:
+            return
+        with self._trava:
+            self._paginas[chave] = (etag, pagina)
+            self._paginas.move_to_end(chave)
+            while len(self._paginas) > self.maximo:
+                self._paginas.popitem(last=False)
+
+
+def _parametros_paginacao(
+    limite: Optional[int], cursor: Optional[str], campos: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    params = {}
+    if limite is not None:
+        params["limite"] = limite
+    if cursor:
+        params["cursor"] = cursor
+    if campos:
+        params["campos"] = ",".join(campos)
+    return params
+
+
+def _validar_pagina(pagina: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(pagina, dict) or not isinstance(pagina.get("itens"), list):
+        logger.warning("Resposta do servidor não é uma página válida: %s", type(pagina))
+        return None
+    return pagina
+
+
+def _validar_lote(corpo: Any, quantidade: int) -> Optional[List[Dict[str, Any]]]:
+    resultados = corpo.get("resultados") if isinstance(corpo, dict) else None
+    if not isinstance(resultados, list) or len(resultados) != quantidade:
+        logger.warning("Resposta do servidor não é um lote válido de %d buscas.", quantidade)
+        return None
+    paginas = [_validar_pagina(pagina) for pagina in resultados]
+    return None if any(pagina is None for pagina in paginas) else paginas
+
+
+class ClienteMCP:
+    """
+    Cliente síncrono do servidor MCP, feito para ser reutilizado: mantém uma `requests.Session`
+    com pool de conexões keep-alive, timeouts separados de conexão e leitura e novas tentativas
+    limitadas com backoff exponencial e jitter. A busca é idempotente (só leitura), por isso
+    o POST também é repetido em erros de conexão/leitura e nos status de STATUS_PARA_NOVA_TENTATIVA.
+    """
+
+    def __init__(
+        self,
+        base_url: str = MCP_API_BASE_URL,
+        timeout_conexao_s: float = MCP_TIMEOUT_CONEXAO_S,
+        timeout_leitura_s: float = MCP_TIMEOUT_LEITURA_S,
+        max_tentativas: int = MCP_MAX_TENTATIVAS,
+        backoff_base_s: float = MCP_BACKOFF_BASE_S,
+        tamanho_pool: int = MCP_TAMANHO_POOL_CLIENTE,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (timeout_conexao_s, timeout_leitura_s)
+        self._paginas_com_etag = _PaginasComEtag()
+
+        novas_tentativas = Retry(
+            total=max_tentativas - 1,
+            status_forcelist=STATUS_PARA_NOVA_TENTATIVA,
+            allowed_methods=frozenset({"GET", "POST"}),
+            backoff_factor=backoff_base_s,
+            backoff_jitter=backoff_base_s,
+            raise_on_status=False, # Esgotadas as tentativas, devolve a última resposta
+        )
+        adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool, max_retries=novas_tentativas)
+        self.session = requests.Session()
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+
+    def fechar(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "ClienteMCP":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+    def buscar_pagina(
+        self,
+        filtros: Dict[str, Any],
+        limite: Optional[int] = None,
+        cursor: Optional[str] = None,
+        campos: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Busca UMA página de veículos no servidor MCP.
+
+        Args:
+            filtros (Dict[str, Any]): Filtros compatíveis com o schema `VeiculoFiltros`.
+            limite (Optional[int]): Tamanho da página. Se None, o servidor usa o padrão configurado.
+            cursor (Optional[str]): Valor de `next_cursor` da página anterior (None para a primeira).
+            campos (Optional[Sequence[str]]): Campos a devolver em cada veículo (None para todos).
+                                              O servidor lê só essas colunas do banco.
+
+        Returns:
+            Optional[Dict[str, Any]]: O corpo da resposta (`{"itens": [...], "next_cursor": ...}`)
+                                      ou None em caso de erro leve de comunicação.
+
+        Raises:
+            requests.exceptions.ConnectionError: Se não conseguir se conectar ao servidor.
+        """
+        endpoint_busca = f"{self.base_url}{CAMINHO_BUSCA}"
+        params = _parametros_paginacao(limite, cursor, campos)
+        logger.debug("Enviando filtros para %s: %s (paginação: %s)", endpoint_busca, filtros, params)
+
+        chave_etag = _PaginasComEtag.chave(filtros, params)
+        pagina_guardada = self._paginas_com_etag.obter(chave_etag)
+        cabecalhos = {"If-None-Match": pagina_guardada[0]} if pagina_guardada else {}
+
+        try:
+            response = self.session.post(
+                endpoint_busca, json=filtros, params=params, headers=cabecalhos, timeout=self.timeout
+            )
+
+            if response.status_code == 304 and pagina_guardada:
+                logger.debug("Página não mudou desde a última consulta (304), reaproveitando.")
+                return pagina_guardada[1]
+
+            # Verifica se a resposta do servidor indica um erro HTTP (status code 4xx ou 5xx)
+            response.raise_for_status()
+
+            pagina = _validar_pagina(response.json())
+            if pagina is not None:
+                logger.debug("Recebidos %d veículos do servidor.", len(pagina["itens"]))
+                self._paginas_com_etag.guardar(chave_etag, response.headers.get("ETag"), pagina)
+            return pagina
+
+        except requests.exceptions.HTTPError:
+            # Erros como 404 Not Found, 422 Unprocessable Entity, 500 Internal Server Error, etc.
+            logger.error("Erro HTTP %s em %s: %s", response.status_code, endpoint_busca, response.text[:500])
+            return None
+
+        except requests.exceptions.ConnectionError as conn_err:
+            logger.error(
+                "Não foi possível conectar ao servidor em %s (verifique se run_mcp_server.py está em execução): %s",
+                endpoint_busca, conn_err,
+            )
+            raise # Relança a exceção para que a aplicação principal saiba da falha crítica
+
+        except requests.exceptions.Timeout as timeout_err:
+            logger.error("Timeout durante a requisição para %s: %s", endpoint_busca, timeout_err)
+            return None
+
+        except (requests.exceptions.RequestException, ValueError) as req_err:
+            # Outros erros da biblioteca requests ou JSON mal formado na resposta
+            logger.error("Erro de requisição para %s: %s", endpoint_busca, req_err)
+            return None
+
+    def iterar_veiculos(
+        self, filtros: Dict[str, Any], tamanho_pagina: Optional[int] = None, campos: Optional[Sequence[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Itera sobre todos os veículos que correspondem aos filtros, buscando as páginas
+        no servidor sob demanda (a próxima página só é pedida quando a atual se esgota).
+        """
+        cursor = None
+        while True:
+            pagina = self.buscar_pagina(filtros, limite=tamanho_pagina, cursor=cursor, campos=campos)
+            if pagina is None:
+                return # Erro leve de comunicação: encerra a iteração
+            yield from pagina["itens"]
+            cursor = pagina.get("next_cursor")
+            if not cursor:
+                return
+
+    def consultar_veiculos(
+        self, filtros: Dict[str, Any], limite: Optional[int] = None, campos: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Lista os veículos dos filtros (até `limite`, ou todas as páginas se None)."""
+        # Com limite, pede páginas do mesmo tamanho para não trafegar veículos que serão descartados
+        return list(islice(self.iterar_veiculos(filtros, tamanho_pagina=limite, campos=campos), limite))
+
+    def buscar_em_lote(
+        self,
+        lista_filtros: List[Dict[str, Any]],
+        limite: Optional[int] = None,
+        campos: Optional[Sequence[str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Executa várias buscas em UMA requisição (e uma consulta no servidor).
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: A primeira página de cada busca, na mesma ordem de
+                                            `lista_filtros`, ou None em caso de erro leve.
+
+        Raises:
+            requests.exceptions.ConnectionError: Se não conseguir se conectar ao servidor.
+        """
+        endpoint_lote = f"{self.base_url}{CAMINHO_BUSCA_LOTE}"
+        params = _parametros_paginacao(limite, None, campos)
+        try:
+            response = self.session.post(
+                endpoint_lote, json={"buscas": lista_filtros}, params=params, timeout=self.timeout
+            )
+            response.raise_for_status()
+            return _validar_lote(response.json(), len(lista_filtros))
+        except requests.exceptions.HTTPError:
+            logger.error("Erro HTTP %s em %s: %s", response.status_code, endpoint_lote, response.text[:500])
+            return None
+        except requests.exceptions.ConnectionError as conn_err:
+            logger.error("Não foi possível conectar ao servidor em %s: %s", endpoint_lote, conn_err)
+            raise
+        except (requests.exceptions.RequestException, ValueError) as req_err:
+            logger.error("Erro de requisição para %s: %s", endpoint_lote, req_err)
+            return None
+
+    def resumir_veiculos(
+        self, filtros: Dict[str, Any], facetas: Optional[Sequence[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Resumo dos veículos dos filtros sem baixar nenhum veículo: total, contagens por
+        faceta e histogramas (ver `ResumoFacetas` no servidor). None em caso de erro leve.
+
+        Raises:
+            requests.exceptions.ConnectionError: Se não conseguir se conectar ao servidor.
+        """
+        endpoint_facetas = f"{self.base_url}{CAMINHO_FACETAS}"
+        params = {"facetas": ",".join(facetas)} if facetas else {}
+        try:
+            response = self.session.post(endpoint_facetas, json=filtros, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            resumo = response.json()
+            if not isinstance(resumo, dict) or "total" not in resumo:
+                logger.warning("Resposta do servidor não é um resumo válido: %s", type(resumo))
+                return None
+            return resumo
+        except requests.exceptions.HTTPError:
+            logger.error("Erro HTTP %s em %s: %s", response.status_code, endpoint_facetas, response.text[:500])
+            return None
+        except requests.exceptions.ConnectionError as conn_err:
+            logger.error("Não foi possível conectar ao servidor em %s: %s", endpoint_facetas, conn_err)
+            raise
+        except (requests.exceptions.RequestException, ValueError) as req_err:
+            logger.error("Erro de requisição para %s: %s", endpoint_facetas, req_err)
+            return None
+
+    def buscar_proximos(
+        self,
+        filtros: Dict[str, Any],
+        pesos: Optional[Dict[str, float]] = None,
+        limite: Optional[int] = None,
+        campos: Optional[Sequence[str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Os veículos mais próximos dos filtros, mesmo que nenhum atenda a todos, do mais para
+        o menos próximo; cada um traz `distancia` (0 a 1). None em caso de erro leve.
+
+        Raises:
+            requests.exceptions.ConnectionError: Se não conseguir se conectar ao servidor.
+        """
+        endpoint_proximos = f"{self.base_url}{CAMINHO_PROXIMOS}"
+        params = _parametros_paginacao(limite, None, campos)
+        try:
+            response = self.session.post(
+                endpoint_proximos, json={"filtros": filtros, "pesos": pesos or {}}, params=params, timeout=self.timeout
+            )
+            response.raise_for_status()
+            corpo = response.json()
+            itens = corpo.get("itens") if isinstance(corpo, dict) else None
+            if not isinstance(itens, list):
+                logger.warning("Resposta do servidor não traz a lista de veículos próximos: %s", type(itens))
+                return None
+            return itens
+        except requests.exceptions.HTTPError:
+            logger.error("Erro HTTP %s em %s: %s", response.status_code, endpoint_proximos, response.text[:500])
+            return None
+        except requests.exceptions.ConnectionError as conn_err:
+            logger.error("Não foi possível conectar ao servidor em %s: %s", endpoint_proximos, conn_err)
+            raise
+        except (requests.exceptions.RequestException, ValueError) as req_err:
+            logger.error("Erro de requisição para %s: %s", endpoint_proximos, req_err)
+            return None
+
+    def obter_vocabulario(self) -> Optional[Dict[str, List[str]]]:
+        """
+        Valores distintos de marca, modelo e combustível do inventário, ou None em caso de erro leve.
+
+        Raises:
+            requests.exceptions.ConnectionError: Se não conseguir se conectar ao servidor.
+        """
+        endpoint_vocabulario = f"{self.base_url}{CAMINHO_VOCABULARIO}"
+        try:
+            response = self.session.get(endpoint_vocabulario, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.HTTPError:
+            logger.error("Erro HTTP %s em %s: %s", response.status_code, endpoint_vocabulario, response.text[:500])
+            return None
+        except requests.exceptions.ConnectionError as conn_err:
+            logger.error("Não foi possível conectar ao servidor em %s: %s", endpoint_vocabulario, conn_err)
+            raise
+        except (requests.exceptions.RequestException, ValueError) as req_err:
+            logger.error("Erro de requisição para %s: %s", endpoint_vocabulario, req_err)
+            return None
+
+    def transmitir_veiculos(
+        self, filtros: Dict[str, Any], campos: Optional[Sequence[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Itera sobre TODOS os veículos dos filtros consumindo o endpoint NDJSON em streaming:
+        cada linha é decodificada assim que chega, sem montar a lista inteira em memória.
+        Indicado para exportações e outros consumidores em lote.
+
+        Raises:
+            requests.exceptions.ConnectionError: Se não conseguir se conectar ao servidor.
+            requests.exceptions.HTTPError: Se o servidor responder com erro.
+        """
+        endpoint_stream = f"{self.base_url}{CAMINHO_BUSCA_STREAM}"
+        logger.debug("Abrindo stream em %s com filtros: %s", endpoint_stream, filtros)
+        params = _parametros_paginacao(None, None, campos)
+        with self.session.post(
+            endpoint_stream, json=filtros, params=params, timeout=self.timeout, stream=True
+        ) as response:
+            response.raise_for_status()
+            for linha in response.iter_lines():
+                if linha:
+                    yield json.loads(linha)
+
+
+class ClienteMCPAsync:
+    """
+    Variante assíncrona (httpx) do ClienteMCP, para disparar muitas buscas em paralelo
+    sobre um único pool de conexões. Mesma política de timeouts e novas tentativas.
     """
-    Envia uma requisição ao servidor MCP para buscar veículos com base nos filtros.
+
+    def __init__(
+        self,
+        base_url: str = MCP_API_BASE_URL,
+        timeout_conexao_s: float = MCP_TIMEOUT_CONEXAO_S,
+        timeout_leitura_s: float = MCP_TIMEOUT_LEITURA_S,
+        max_tentativas: int = MCP_MAX_TENTATIVAS,
+        backoff_base_s: float = MCP_BACKOFF_BASE_S,
+        tamanho_pool: int = MCP_TAMANHO_POOL_CLIENTE,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_tentativas = max_tentativas
+        self.backoff_base_s = backoff_base_s
+        self.tamanho_pool = tamanho_pool
+        self._paginas_com_etag = _PaginasComEtag()
+        self._cliente = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=httpx.Timeout(timeout_leitura_s, connect=timeout_conexao_s),
+            limits=httpx.Limits(max_connections=tamanho_pool, max_keepalive_connections=tamanho_pool),
+            transport=transport,
+        )
+
+    async def fechar(self) -> None:
+        await self._cliente.aclose()
+
+    async def __aenter__(self) -> "ClienteMCPAsync":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.fechar()
+
+    async def _post_com_novas_tentativas(self, corpo, params, cabecalhos, caminho=CAMINHO_BUSCA) -> httpx.Response:
+        tentativa = 0
+        while True:
+            ultima = tentativa + 1 >= self.max_tentativas
+            try:
+                response = await self._cliente.post(caminho, json=corpo, params=params, headers=cabecalhos)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as erro:
+                if ultima:
+                    raise ErroConexaoMCP(f"Não foi possível conectar ao servidor MCP: {erro}") from erro
+                logger.warning("Falha de conexão (%s), tentando de novo.", erro)
+            except (httpx.ReadError, httpx.ReadTimeout) as erro:
+                if ultima:
+                    raise
+                logger.warning("Falha de leitura (%s), tentando de novo.", erro)
+            else:
+                if response.status_code not in STATUS_PARA_NOVA_TENTATIVA or ultima:
+                    return response
+                logger.warning("Status %s do servidor, tentando de novo.", response.status_code)
+            await asyncio.sleep(espera_backoff(tentativa, self.backoff_base_s))
+            tentativa += 1
+
+    async def buscar_pagina(
+        self,
+        filtros: Dict[str, Any],
+        limite: Optional[int] = None,
+        cursor: Optional[str] = None,
+        campos: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Mesmo contrato de `ClienteMCP.buscar_pagina` (levanta ErroConexaoMCP se o servidor estiver fora)."""
+        params = _parametros_paginacao(limite, cursor, campos)
+        chave_etag = _PaginasComEtag.chave(filtros, params)
+        pagina_guardada = self._paginas_com_etag.obter(chave_etag)
+        cabecalhos = {"If-None-Match": pagina_guardada[0]} if pagina_guardada else {}
+
+        try:
+            response = await self._post_com_novas_tentativas(filtros, params, cabecalhos)
+        except httpx.TimeoutException as timeout_err:
+            logger.error("Timeout durante a busca: %s", timeout_err)
+            return None
+        except httpx.TransportError as erro:
+            logger.error("Erro de comunicação com o servidor MCP: %s", erro)
+            return None
+
+        if response.status_code == 304 and pagina_guardada:
+            return pagina_guardada[1]
+        if response.is_error:
+            logger.error("Erro HTTP %s na busca: %s", response.status_code, response.text[:500])
+            return None
+        try:
+            pagina = _validar_pagina(response.json())
+        except ValueError as erro:
+            logger.error("Resposta do servidor não é JSON: %s", erro)
+            return None
+        if pagina is not None:
+            self._paginas_com_etag.guardar(chave_etag, response.headers.get("ETag"), pagina)
+        return pagina
+
+    async def iterar_veiculos(
+        self, filtros: Dict[str, Any], tamanho_pagina: Optional[int] = None, campos: Optional[Sequence[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        cursor = None
+        while True:
+            pagina = await self.buscar_pagina(filtros, limite=tamanho_pagina, cursor=cursor, campos=campos)
+            if pagina is None:
+                return
+            for veiculo in pagina["itens"]:
+                yield veiculo
+            cursor = pagina.get("next_cursor")
+            if not cursor:
+                return
+
+    async def consultar_veiculos(
+        self, filtros: Dict[str, Any], limite: Optional[int] = None, campos: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        veiculos = []
+        async for veiculo in self.iterar_veiculos(filtros, tamanho_pagina=limite, campos=campos):
+            veiculos.append(veiculo)
+            if limite is not None and len(veiculos) >= limite:
+                break
+        return veiculos
+
+    async def consultar_varios(
+        self,
+        lista_filtros: List[Dict[str, Any]],
+        limite: Optional[int] = None,
+        campos: Optional[Sequence[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Executa várias buscas em paralelo (no máximo `tamanho_pool` em voo ao mesmo tempo)
+        e devolve os resultados na mesma ordem de `lista_filtros`.
+        """
+        semaforo = asyncio.Semaphore(self.tamanho_pool)
+
+        async def uma_busca(filtros):
+            async with semaforo:
+                return await self.consultar_veiculos(filtros, limite=limite, campos=campos)
+
+        return list(await asyncio.gather(*(uma_busca(f) for f in lista_filtros)))
+
+    async def buscar_em_lote(
+        self,
+        lista_filtros: List[Dict[str, Any]],
+        limite: Optional[int] = None,
+        campos: Optional[Sequence[str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Mesmo contrato de `ClienteMCP.buscar_em_lote`: uma requisição para todas as buscas."""
+        params = _parametros_paginacao(limite, None, campos)
+        try:
+            response = await self._post_com_novas_tentativas(
+                {"buscas": lista_filtros}, params, {}, caminho=CAMINHO_BUSCA_LOTE
+            )
+            response.raise_for_status()
+            return _validar_lote(response.json(), len(lista_filtros))
+        except httpx.HTTPStatusError as erro:
+            logger.error("Erro HTTP %s na busca em lote: %s", erro.response.status_code, erro.response.text[:500])
+            return None
+        except (httpx.TransportError, ValueError) as erro:
+            logger.error("Erro na busca em lote: %s", erro)
+            return None
+
+
+# --------------------
+# Funções de conveniência sobre um cliente compartilhado (usadas pelo agente)
+# --------------------
+_cliente_padrao: Optional[ClienteMCP] = None
+
+
+def obter_cliente_padrao() -> ClienteMCP:
+    """ClienteMCP compartilhado pelo processo (criado na primeira chamada)."""
+    global _cliente_padrao
+    if _cliente_padrao is None:
+        _cliente_padrao = ClienteMCP()
+    return _cliente_padrao
+
+
+def buscar_pagina_veiculos_mcp(
+    filtros: Dict[str, Any],
+    limite: Optional[int] = None,
+    cursor: Optional[str] = None,
+    campos: Optional[Sequence[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    return obter_cliente_padrao().buscar_pagina(filtros, limite=limite, cursor=cursor, campos=campos)
+
+
+def iterar_veiculos_mcp(
+    filtros: Dict[str, Any], tamanho_pagina: Optional[int] = None, campos: Optional[Sequence[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    return obter_cliente_padrao().iterar_veiculos(filtros, tamanho_pagina=tamanho_pagina, campos=campos)
+
+
+def buscar_em_lote_mcp(
+    lista_filtros: List[Dict[str, Any]], limite: Optional[int] = None, campos: Optional[Sequence[str]] = None
+) -> Optional[List[Dict[str, Any]]]:
+    return obter_cliente_padrao().buscar_em_lote(lista_filtros, limite=limite, campos=campos)
+
+
+def resumir_veiculos_mcp(
+    filtros: Dict[str, Any], facetas: Optional[Sequence[str]] = None
+) -> Optional[Dict[str, Any]]:
+    return obter_cliente_padrao().resumir_veiculos(filtros, facetas=facetas)
+
+
+def buscar_proximos_mcp(
+    filtros: Dict[str, Any],
+    pesos: Optional[Dict[str, float]] = None,
+    limite: Optional[int] = None,
+    campos: Optional[Sequence[str]] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    return obter_cliente_padrao().buscar_proximos(filtros, pesos=pesos, limite=limite, campos=campos)
+
+
+def obter_vocabulario_mcp() -> Optional[Dict[str, List[str]]]:
+    return obter_cliente_padrao().obter_vocabulario()
+
+
+def transmitir_veiculos_mcp(
+    filtros: Dict[str, Any], campos: Optional[Sequence[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    return obter_cliente_padrao().transmitir_veiculos(filtros, campos=campos)
+
+
+def consultar_veiculos_mcp(
+    filtros: Dict[str, Any], limite: Optional[int] = None, campos: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Envia requisições ao servidor MCP para buscar veículos com base nos filtros.
 
     Args:
         filtros (Dict[str, Any]): Um dicionário contendo os filtros.
             Exemplo: {"marca": "Toyota", "ano_producao_inicial_min": 2010}
             A estrutura deste dicionário deve ser compatível com o schema
             `VeiculoFiltros` definido no servidor.
+        limite (Optional[int]): Número máximo de veículos a retornar. Se None,
+            percorre todas as páginas.
+        campos (Optional[Sequence[str]]): Campos a devolver em cada veículo (None para todos).
 
     Returns:
         List[Dict[str, Any]]: Uma lista de dicionários, onde cada dicionário
                               representa um veículo conforme retornado pelo servidor.
                               Retorna uma lista vazia em caso de não encontrar resultados
                               ou alguns tipos de erro de comunicação.
-    
+
     Raises:
         requests.exceptions.ConnectionError: Se não conseguir se conectar ao servidor.
     """
-    endpoint_busca = f"{MCP_API_BASE_URL}/mcp/buscar_veiculos/"
-    
-    print(f"CLIENTE_MCP: Enviando filtros para {endpoint_busca}: {filtros}") # Log para depuração
+    return obter_cliente_padrao().consultar_veiculos(filtros, limite=limite, campos=campos)
 
-    try:
-        # Faz a requisição POST, enviando os filtros no corpo como JSON.
-        # Timeout de 10 segundos para a requisição.
-        response = requests.post(endpoint_busca, json=filtros, timeout=10)
-
-        # Verifica se a resposta do servidor indica um erro HTTP (status code 4xx ou 5xx)
-        response.raise_for_status()  # Se houver erro, levanta uma exceção HTTPError
-
-        # Se a requisição foi bem-sucedida (status 2xx), converte a resposta JSON.
-        # O servidor FastAPI já retorna uma lista de objetos VeiculoResposta.
-        resultados = response.json()
-        
-        if not isinstance(resultados, list):
-            print(f"CLIENTE_MCP AVISO: Resposta do servidor não é uma lista: {type(resultados)}")
-            return [] # Ou trate como um erro mais sério
-
-        print(f"CLIENTE_MCP: Recebidos {len(resultados)} veículos do servidor.") # Log para depuração
-        return resultados
-
-    except requests.exceptions.HTTPError as http_err:
-        # Erros como 404 Not Found, 422 Unprocessable Entity, 500 Internal Server Error, etc.
-        print(f"CLIENTE_MCP ERRO HTTP: {http_err}")
-        print(f"CLIENTE_MCP ERRO HTTP: Status Code: {response.status_code}")
-        try:
-            # Tenta mostrar o corpo da resposta de erro, que pode conter detalhes do FastAPI
-            print(f"CLIENTE_MCP ERRO HTTP: Detalhes: {response.json()}")
-        except json.JSONDecodeError:
-            print(f"CLIENTE_MCP ERRO HTTP: Corpo da resposta não é JSON: {response.text}")
-        return [] # Retorna lista vazia para o agente tratar
-        
-    except requests.exceptions.ConnectionError as conn_err:
-        print(f"CLIENTE_MCP ERRO DE CONEXÃO: Não foi possível conectar ao servidor em {endpoint_busca}.")
-        print(f"CLIENTE_MCP ERRO DE CONEXÃO: Detalhe: {conn_err}")
-        print("CLIENTE_MCP ERRO DE CONEXÃO: Verifique se o servidor MCP (run_mcp_server.py) está em execução.")
-        raise # Relança a exceção para que a aplicação principal saiba da falha crítica
-        
-    except requests.exceptions.Timeout as timeout_err:
-        print(f"CLIENTE_MCP ERRO: Timeout durante a requisição para {endpoint_busca}: {timeout_err}")
-        return []
-        
-    except requests.exceptions.RequestException as req_err:
-        # Outros erros da biblioteca requests (ex: JSON mal formado na resposta)
-        print(f"CLIENTE_MCP ERRO DE REQUISIÇÃO: {req_err}")
-        return []
-    except Exception as e:
-        print(f"CLIENTE_MCP ERRO INESPERADO: {e}")
-        return []
 
 # Bloco para testar este cliente diretamente (opcional)
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format="%(levelname)s %(name)s: %(message)s")
     print("--- Iniciando teste do cliente MCP ---")
     print("IMPORTANTE: Certifique-se de que o servidor MCP (run_mcp_server.py) está rodando em outro terminal!")
 
-    # Teste 1: Sem filtros
-    print("\n[TESTE 1] Buscando todos os veículos (sem filtros)...")
-    try:
-        veiculos_todos = consultar_veiculos_mcp({})
-        if veiculos_todos:
-            print(f"Encontrados {len(veiculos_todos)} veículos.")
-            print("Exemplo do primeiro veículo:", veiculos_todos[0])
-        else:
-            print("Nenhum veículo encontrado ou ocorreu um erro leve na comunicação.")
-    except requests.exceptions.ConnectionError:
-        print("Teste 1 falhou devido a erro de conexão. O servidor está rodando?")
-    except Exception as e:
-        print(f"Erro inesperado no Teste 1: {e}")
-
-    # Teste 2: Com filtros
-    filtros_exemplo = {
-        "marca": "Volkswagen",
-        "ano_producao_inicial_min": 2000,
-        "transmissao_automatica": False # Lembre-se que no JSON é true/false (minúsculo)
-    }
-    print(f"\n[TESTE 2] Buscando veículos com filtros: {filtros_exemplo}...")
+    with ClienteMCP() as cliente:
+        # Teste 1: Sem filtros
+        print("\n[TESTE 1] Buscando todos os veículos (sem filtros)...")
+        try:
+            veiculos_todos = cliente.consultar_veiculos({})
+            if veiculos_todos:
+                print(f"Encontrados {len(veiculos_todos)} veículos.")
+                print("Exemplo do primeiro veículo:", veiculos_todos[0])
+            else:
+                print("Nenhum veículo encontrado ou ocorreu um erro leve na comunicação.")
+        except requests.exceptions.ConnectionError:
+            print("Teste 1 falhou devido a erro de conexão. O servidor está rodando?")
+
+        # Teste 2: Com filtros
+        filtros_exemplo = {
+            "marca": "Volkswagen",
+            "ano_producao_inicial_min": 2000,
+            "transmissao_automatica": False # Lembre-se que no JSON é true/false (minúsculo)
+        }
+        print(f"\n[TESTE 2] Buscando veículos com filtros: {filtros_exemplo}...")
+        try:
+            veiculos_filtrados = cliente.consultar_veiculos(filtros_exemplo)
+            if veiculos_filtrados:
+                print(f"Encontrados {len(veiculos_filtrados)} veículos para os filtros.")
+                for v in veiculos_filtrados[:3]: # Mostra os 3 primeiros
+                    print(f"  - {v.get('marca')} {v.get('modelo')} ({v.get('ano_producao_inicial')}), Transmissão Automática: {v.get('transmissao_automatica')}")
+            else:
+                print("Nenhum veículo encontrado para os filtros ou ocorreu um erro leve na comunicação.")
+        except requests.exceptions.ConnectionError:
+            print("Teste 2 falhou devido a erro de conexão. O servidor está rodando?")
+
+    # Teste 3: Várias buscas em paralelo com o cliente assíncrono
+    async def _teste_paralelo():
+        async with ClienteMCPAsync() as cliente_async:
+            resultados = await cliente_async.consultar_varios(
+                [{"marca": "Fiat"}, {"marca": "Toyota"}, {"combustivel": "Diesel"}], limite=5
+            )
+            for i, veiculos in enumerate(resultados):
+                print(f"  Busca {i}: {len(veiculos)} veículos")
+
+    print("\n[TESTE 3] Buscas em paralelo com o cliente assíncrono...")
     try:
-        veiculos_filtrados = consultar_veiculos_mcp(filtros_exemplo)
-        if veiculos_filtrados:
-            print(f"Encontrados {len(veiculos_filtrados)} veículos para os filtros.")
-            for v in veiculos_filtrados[:3]: # Mostra os 3 primeiros
-                print(f"  - {v.get('marca')} {v.get('modelo')} ({v.get('ano_producao_inicial')}), Transmissão Automática: {v.get('transmissao_automatica')}")
-        else:
-            print("Nenhum veículo encontrado para os filtros ou ocorreu um erro leve na comunicação.")
+        asyncio.run(_teste_paralelo())
     except requests.exceptions.ConnectionError:
-        print("Teste 2 falhou devido a erro de conexão. O servidor está rodando?")
-    except Exception as e:
-        print(f"Erro inesperado no Teste 2: {e}")
-    
-    print("\n--- Teste do cliente MCP finalizado ---")
\ No newline at end of file
+        print("Teste 3 falhou devido a erro de conexão. O servidor está rodando?")
+
+    print("\n--- Teste do cliente MCP finalizado ---")
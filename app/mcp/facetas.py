@@ -0,0 +1,124 @@
+# app/mcp/facetas.py
+"""
+Resumo agregado do inventário: total de veículos, contagem por valor de alguns campos
+(facetas) e histogramas em faixas fixas, sempre sobre os filtros de `VeiculoFiltros`.
+
+Tudo sai de UMA consulta: os veículos filtrados viram uma CTE e cada faceta/histograma
+é um GROUP BY sobre ela, unidos com UNION ALL. Cada linha traz o nome da faceta, o valor
+(em `texto` ou `numero`, para que as partes do UNION tenham tipos compatíveis também
+no Postgres) e a quantidade.
+"""
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import Integer, Float, String, Select, cast, func, literal, select, union_all
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.database.models import Veiculo
+
+# Campos que aceitam contagem por valor, com o tipo devolvido ao cliente
+FACETAS_DISPONIVEIS = {
+    "marca": str,
+    "combustivel": str,
+    "num_portas": int,
+    "transmissao_automatica": bool,
+}
+
+# Histogramas: campo -> largura de cada faixa
+LARGURA_FAIXAS = {
+    "potencia_cv": 50,
+    "ano_producao_inicial": 10,
+    "autonomia_km_l": 2,
+}
+
+
+class piso(FunctionElement):
+    """FLOOR(x). O SQLite nem sempre tem funções matemáticas: lá usamos CAST, que trunca."""
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(piso)
+def _compilar_piso(elemento, compilador, **kw):
+    return f"FLOOR({compilador.process(elemento.clauses, **kw)})"
+
+
+@compiles(piso, "sqlite")
+def _compilar_piso_sqlite(elemento, compilador, **kw):
+    # Truncar é o mesmo que arredondar para baixo aqui: todos os campos de histograma são positivos
+    return f"CAST({compilador.process(elemento.clauses, **kw)} AS INTEGER)"
+
+
+_TOTAL = "__total__"
+_PREFIXO_HISTOGRAMA = "histograma:"
+
+
+def construir_consulta_facetas(base: Select, facetas: Sequence[str]) -> Select:
+    """
+    Monta o UNION ALL de agregações sobre `base` (o SELECT de veículos já filtrado).
+    Colunas do resultado: faceta, texto, numero, quantidade.
+    """
+    campos_usados = list(facetas) + list(LARGURA_FAIXAS)
+    filtrados = base.with_only_columns(*(getattr(Veiculo, c) for c in campos_usados)).cte("veiculos_filtrados")
+    texto_nulo, numero_nulo = cast(None, String), cast(None, Float)
+
+    partes = [
+        select(literal(_TOTAL).label("faceta"), texto_nulo.label("texto"), numero_nulo.label("numero"),
+               func.count().label("quantidade")).select_from(filtrados)
+    ]
+    for faceta in facetas:
+        coluna = filtrados.c[faceta]
+        if FACETAS_DISPONIVEIS[faceta] is str:
+            texto, numero = coluna, numero_nulo
+        else:
+            # Booleano vira 0/1 (mesmo resultado no SQLite e no Postgres)
+            texto, numero = texto_nulo, cast(cast(coluna, Integer), Float)
+        partes.append(
+            select(literal(faceta), texto, numero, func.count()).select_from(filtrados).group_by(coluna)
+        )
+    for campo, largura in LARGURA_FAIXAS.items():
+        faixa = cast(piso(filtrados.c[campo] / largura) * largura, Float)
+        partes.append(
+            select(literal(_PREFIXO_HISTOGRAMA + campo), texto_nulo, faixa, func.count())
+            .select_from(filtrados)
+            .where(filtrados.c[campo].isnot(None))
+            .group_by(faixa)
+        )
+    return union_all(*partes)
+
+
+def montar_resumo(linhas: Sequence[Any], facetas: Sequence[str]) -> Dict[str, Any]:
+    """Converte as linhas da consulta no formato de `ResumoFacetas`."""
+    resumo: Dict[str, Any] = {
+        "total": 0,
+        "facetas": {faceta: [] for faceta in facetas},
+        "histogramas": {campo: [] for campo in LARGURA_FAIXAS},
+    }
+    for faceta, texto, numero, quantidade in linhas:
+        if faceta == _TOTAL:
+            resumo["total"] = quantidade
+        elif faceta.startswith(_PREFIXO_HISTOGRAMA):
+            campo = faceta[len(_PREFIXO_HISTOGRAMA):]
+            inicio = int(numero) if float(numero).is_integer() else numero
+            resumo["histogramas"][campo].append(
+                {"inicio": inicio, "fim": inicio + LARGURA_FAIXAS[campo], "quantidade": quantidade}
+            )
+        else:
+            tipo = FACETAS_DISPONIVEIS[faceta]
+            valor = texto if tipo is str else (None if numero is None else tipo(int(numero)))
+            resumo["facetas"][faceta].append({"valor": valor, "quantidade": quantidade})
+
+    for contagens in resumo["facetas"].values():
+        contagens.sort(key=lambda c: (-c["quantidade"], str(c["valor"])))
+    for faixas in resumo["histogramas"].values():
+        faixas.sort(key=lambda f: f["inicio"])
+    return resumo
+
+
+def resolver_facetas(facetas: str) -> List[str]:
+    """Lista de facetas pedidas ("marca,combustivel"); vazio = todas. Levanta ValueError se desconhecida."""
+    pedidas = [f.strip() for f in facetas.split(",") if f.strip()] if facetas else list(FACETAS_DISPONIVEIS)
+    desconhecidas = sorted(set(pedidas) - set(FACETAS_DISPONIVEIS))
+    if desconhecidas:
+        raise ValueError(f"Facetas desconhecidas: {', '.join(desconhecidas)}.")
+    return [f for f in FACETAS_DISPONIVEIS if f in pedidas]
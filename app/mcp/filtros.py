@@ -0,0 +1,131 @@
+# app/mcp/filtros.py
+"""
+Compilador declarativo dos filtros de busca de veículos.
+
+Cada campo de `VeiculoFiltros` tem uma `RegraFiltro`: a coluna de `Veiculo` que ele
+restringe e como (texto "contém", igualdade, mínimo ou máximo). A partir das regras:
+
+- `construir_consulta_veiculos` monta o SELECT com os valores embutidos, para quem ainda
+  compõe a consulta (facetas, busca em lote, streaming);
+- `compilar_filtros` + `consulta_compilada` atendem a busca paginada: a consulta, com
+  `bindparam` no lugar dos valores, é montada uma vez por FORMA (quais campos vieram e a
+  variante de cada filtro de texto) e reaproveitada. O mesmo objeto Select mantém a chave
+  de cache já calculada e acerta o SQL compilado pelo SQLAlchemy, então cada requisição
+  só paga a execução.
+
+O índice em memória (app/mcp/indice_memoria.py) avalia as mesmas regras com NumPy.
+"""
+import operator
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import Integer, Select, bindparam, select
+
+from app.database.models import Veiculo, COLUNAS_DE_BUSCA
+from app.mcp.busca_texto import TEXTO_IN, TEXTO_NENHUM, condicao_texto, forma_texto
+from app.mcp.schemas import VeiculoFiltros
+
+TEXTO, IGUAL, MINIMO, MAXIMO = "texto", "igual", "minimo", "maximo"
+
+# Parâmetros da paginação nas consultas compiladas (os filtros usam "filtro_<campo>")
+PARAMETRO_APOS_ID = "apos_id"
+PARAMETRO_LIMITE = "limite"
+
+# Formas distintas guardadas; na prática são poucas (combinações de campos que os clientes usam)
+MAX_FORMAS_EM_CACHE = 512
+
+
+@dataclass(frozen=True)
+class RegraFiltro:
+    campo: str     # Campo de VeiculoFiltros
+    coluna: str    # Coluna de Veiculo restringida (para texto, a coluna de busca sem acentos)
+    operador: str  # TEXTO, IGUAL, MINIMO ou MAXIMO
+
+
+REGRAS_FILTROS: Tuple[RegraFiltro, ...] = (
+    RegraFiltro("marca", COLUNAS_DE_BUSCA["marca"], TEXTO),
+    RegraFiltro("modelo", COLUNAS_DE_BUSCA["modelo"], TEXTO),
+    RegraFiltro("ano_producao_inicial_min", "ano_producao_inicial", MINIMO),
+    RegraFiltro("ano_producao_inicial_max", "ano_producao_inicial", MAXIMO),
+    RegraFiltro("ano_producao_final_especifico", "ano_producao_final", IGUAL),
+    RegraFiltro("combustivel", COLUNAS_DE_BUSCA["combustivel"], TEXTO),
+    RegraFiltro("num_portas", "num_portas", IGUAL),
+    RegraFiltro("transmissao_automatica", "transmissao_automatica", IGUAL),
+    RegraFiltro("potencia_cv_min", "potencia_cv", MINIMO),
+    RegraFiltro("potencia_cv_max", "potencia_cv", MAXIMO),
+    RegraFiltro("porta_malas_litros_min", "porta_malas_litros", MINIMO),
+    RegraFiltro("autonomia_km_l_min", "autonomia_km_l", MINIMO),
+)
+_REGRA_POR_CAMPO = {regra.campo: regra for regra in REGRAS_FILTROS}
+_COMPARACOES = {IGUAL: operator.eq, MINIMO: operator.ge, MAXIMO: operator.le}
+
+# Forma de uma busca: (campo, variante) de cada filtro presente, na ordem de REGRAS_FILTROS.
+# A variante é o operador da regra ou, para texto, a de `forma_texto` (like, in, nenhum).
+Forma = Tuple[Tuple[str, str], ...]
+
+
+def _nome_parametro(campo: str) -> str:
+    return f"filtro_{campo}"
+
+
+def _condicao(regra: RegraFiltro, variante: str, valor: Any):
+    coluna = getattr(Veiculo, regra.coluna)
+    if regra.operador == TEXTO:
+        return condicao_texto(coluna, variante, valor)
+    return _COMPARACOES[regra.operador](coluna, valor)
+
+
+def compilar_filtros(
+    filtros: VeiculoFiltros, candidatos_texto: Optional[Dict[str, Set[str]]] = None
+) -> Tuple[Forma, Dict[str, Any]]:
+    """
+    Forma da busca e os valores de cada parâmetro. `candidatos_texto` é o resultado de
+    `resolver_candidatos_texto` (índice n-grama); sem ele, os textos viram LIKE.
+    """
+    candidatos_texto = candidatos_texto or {}
+    forma, parametros = [], {}
+    for regra in REGRAS_FILTROS:
+        valor = getattr(filtros, regra.campo)
+        if regra.operador == TEXTO:
+            if not valor: # Texto vazio não filtra
+                continue
+            variante, valor = forma_texto(valor, candidatos_texto.get(regra.campo))
+        elif valor is None:
+            continue
+        else:
+            variante = regra.operador
+        forma.append((regra.campo, variante))
+        if variante != TEXTO_NENHUM:
+            parametros[_nome_parametro(regra.campo)] = valor
+    return tuple(forma), parametros
+
+
+def construir_consulta_veiculos(
+    filtros: VeiculoFiltros, candidatos_texto: Optional[Dict[str, Set[str]]] = None
+) -> Select:
+    """Monta o SELECT de veículos com os filtros aplicados (sem ordenação nem limite)."""
+    forma, parametros = compilar_filtros(filtros, candidatos_texto)
+    return select(Veiculo).where(*(
+        _condicao(_REGRA_POR_CAMPO[campo], variante, parametros.get(_nome_parametro(campo)))
+        for campo, variante in forma
+    ))
+
+
+@lru_cache(maxsize=MAX_FORMAS_EM_CACHE)
+def consulta_compilada(forma: Forma, campos: Optional[Tuple[str, ...]] = None, com_cursor: bool = False) -> Select:
+    """
+    SELECT paginado (ordem por `id`, LIMIT) de uma forma, só com as colunas de `campos`
+    (ou o `Veiculo` inteiro). Execute com os parâmetros de `compilar_filtros` mais
+    PARAMETRO_LIMITE e, com `com_cursor`, PARAMETRO_APOS_ID.
+    """
+    consulta = select(Veiculo) if campos is None else select(*(getattr(Veiculo, c) for c in campos))
+    for campo, variante in forma:
+        parametro = None
+        if variante != TEXTO_NENHUM:
+            # IN com lista de tamanho variável: o bindparam "expandido" não muda o SQL em cache
+            parametro = bindparam(_nome_parametro(campo), expanding=variante == TEXTO_IN)
+        consulta = consulta.where(_condicao(_REGRA_POR_CAMPO[campo], variante, parametro))
+    if com_cursor:
+        consulta = consulta.where(Veiculo.id > bindparam(PARAMETRO_APOS_ID, type_=Integer))
+    return consulta.order_by(Veiculo.id).limit(bindparam(PARAMETRO_LIMITE, type_=Integer))
@@ -0,0 +1,303 @@
+# app/mcp/indice_memoria.py
+"""
+Índice colunar em memória do inventário de veículos.
+
+A tabela `veiculos` é pequena, lida com muito mais frequência do que escrita e tem
+esquema fixo. Este módulo a carrega uma única vez em arrays NumPy (uma coluna por
+array, com `marca`, `modelo` e `combustivel` codificados por dicionário) e avalia os
+filtros de `VeiculoFiltros` como máscaras booleanas vetorizadas, sem ida ao banco.
+
+As regras são as mesmas da consulta SQL (REGRAS_FILTROS, em app/mcp/filtros.py):
+texto com "contém" sem diferenciar acentos nem maiúsculas/minúsculas, comparações com NULL
+nunca casam e a ordem de retorno é por `id`. O caminho SQL continua sendo o padrão
+(o índice só é usado com MCP_INDICE_MEMORIA=true) e o fallback em caso de falha.
+
+A busca por proximidade (`mais_proximos`) sempre usa este snapshot: ela pontua todos os
+veículos pela distância aos filtros, o que não tem equivalente barato em SQL.
+
+Com vários workers, o snapshot pode vir de um arquivo mapeado em memória, compartilhado
+por todos (app/mcp/snapshot_inventario.py, ligado com `usar_snapshot`).
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.database.eventos import ao_alterar_dados
+from app.database.texto import dobrar_texto
+from app.mcp.filtros import IGUAL, MAXIMO, MINIMO, REGRAS_FILTROS, TEXTO
+from app.mcp.schemas import VeiculoFiltros, VeiculoResposta
+
+# Colunas devolvidas em cada veículo (as mesmas de VeiculoResposta)
+CAMPOS_VEICULO = list(VeiculoResposta.model_fields)
+CAMPOS_TEXTO = ["marca", "modelo", "combustivel"]
+# Inteiros que podem ser nulos são guardados como float64, com NaN no lugar de NULL
+CAMPOS_NUMERICOS = [
+    "ano_producao_inicial", "ano_producao_final", "potencia_cv", "num_portas", "porta_malas_litros", "autonomia_km_l",
+]
+_COMPARACOES = {IGUAL: np.equal, MINIMO: np.greater_equal, MAXIMO: np.less_equal}
+
+# Busca por proximidade: cada critério informado gera uma penalidade de 0 (atende) a 1.
+# Texto e câmbio valem 0 ou 1; os numéricos, a distância até o valor/faixa pedida dividida
+# pela amplitude da coluna no inventário (incluindo o valor pedido). O chamador pode trocar
+# qualquer peso.
+PESOS_PADRAO = {
+    "marca": 3.0,
+    "modelo": 3.0,
+    "combustivel": 2.0,
+    "transmissao_automatica": 2.0,
+    "potencia_cv": 1.5,
+    "ano_producao_inicial": 1.0,
+    "ano_producao_final": 1.0,
+    "autonomia_km_l": 1.0,
+    "porta_malas_litros": 1.0,
+    "num_portas": 1.0,
+}
+
+
+@dataclass(frozen=True)
+class _ColunaTexto:
+    codigos: np.ndarray            # int32 por linha; -1 representa NULL
+    categorias: List[str]          # valor original de cada código
+    categorias_dobradas: List[str]  # valor distinto (sem acentos, minúsculo) de cada código
+
+    def contem(self, termo: str) -> np.ndarray:
+        """Máscara das linhas cujo valor contém `termo` (mesma regra das colunas *_busca)."""
+        termo = dobrar_texto(termo)
+        codigos_que_casam = [i for i, valor in enumerate(self.categorias_dobradas) if termo in valor]
+        return np.isin(self.codigos, codigos_que_casam)
+
+
+@dataclass(frozen=True)
+class _Colunas:
+    ids: np.ndarray
+    texto: Dict[str, _ColunaTexto]
+    numericas: Dict[str, np.ndarray]
+    transmissao_automatica: np.ndarray  # int8: 1, 0 ou -1 (NULL)
+    registros: Sequence[Dict[str, Any]] # linha completa, na mesma posição dos arrays
+    extremos: Dict[str, Tuple[float, float]] # (mínimo, máximo) de cada coluna numérica
+
+
+def _codificar_texto(valores: List[Optional[str]]) -> _ColunaTexto:
+    categorias: Dict[str, int] = {}
+    codigos = np.empty(len(valores), dtype=np.int32)
+    for posicao, valor in enumerate(valores):
+        codigos[posicao] = -1 if valor is None else categorias.setdefault(valor, len(categorias))
+    return montar_coluna_texto(codigos, list(categorias))
+
+
+def montar_coluna_texto(codigos: np.ndarray, categorias: List[str]) -> _ColunaTexto:
+    return _ColunaTexto(codigos=codigos, categorias=categorias, categorias_dobradas=[dobrar_texto(c) for c in categorias])
+
+
+def _extremos(valores: np.ndarray) -> Tuple[float, float]:
+    presentes = valores[~np.isnan(valores)]
+    return (float(presentes.min()), float(presentes.max())) if presentes.size else (0.0, 0.0)
+
+
+def coluna_numerica(registros: Sequence[Dict[str, Any]], campo: str) -> np.ndarray:
+    """Valores de `campo` em float64, com NaN no lugar de NULL."""
+    return np.array([np.nan if r[campo] is None else r[campo] for r in registros], dtype=np.float64)
+
+
+def _coluna_transmissao(registros: Sequence[Dict[str, Any]]) -> np.ndarray:
+    return np.array(
+        [-1 if r["transmissao_automatica"] is None else int(r["transmissao_automatica"]) for r in registros],
+        dtype=np.int8,
+    )
+
+
+def montar_colunas(
+    ids: np.ndarray, texto: Dict[str, _ColunaTexto], numericas: Dict[str, np.ndarray],
+    transmissao_automatica: np.ndarray, registros: Sequence[Dict[str, Any]],
+) -> _Colunas:
+    return _Colunas(
+        ids=ids, texto=texto, numericas=numericas, transmissao_automatica=transmissao_automatica,
+        registros=registros, extremos={campo: _extremos(valores) for campo, valores in numericas.items()},
+    )
+
+
+def extrair_registros(veiculos: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Registros (CAMPOS_VEICULO) de objetos `Veiculo` ou equivalentes, ordenados por `id`."""
+    registros = [{campo: getattr(v, campo) for campo in CAMPOS_VEICULO} for v in veiculos]
+    registros.sort(key=lambda r: r["id"])
+    return registros
+
+
+def construir_colunas(registros: List[Dict[str, Any]]) -> _Colunas:
+    """Monta os arrays colunares a partir de registros já ordenados por `id`."""
+    return montar_colunas(
+        ids=np.fromiter((r["id"] for r in registros), dtype=np.int64, count=len(registros)),
+        texto={campo: _codificar_texto([r[campo] for r in registros]) for campo in CAMPOS_TEXTO},
+        numericas={campo: coluna_numerica(registros, campo) for campo in CAMPOS_NUMERICOS},
+        transmissao_automatica=_coluna_transmissao(registros),
+        registros=registros,
+    )
+
+
+def avaliar_filtros(colunas: _Colunas, filtros: VeiculoFiltros) -> np.ndarray:
+    """Retorna a máscara booleana das linhas que atendem a todos os filtros informados."""
+    mascara = np.ones(len(colunas.ids), dtype=bool)
+
+    # As mesmas regras (campo, coluna, operador) que montam a consulta SQL
+    for regra in REGRAS_FILTROS:
+        valor = getattr(filtros, regra.campo)
+        if regra.operador == TEXTO:
+            if valor:
+                mascara &= colunas.texto[regra.campo].contem(valor)
+        elif valor is not None:
+            if regra.coluna == "transmissao_automatica":
+                mascara &= _COMPARACOES[regra.operador](colunas.transmissao_automatica, int(valor))
+            else:
+                mascara &= _COMPARACOES[regra.operador](colunas.numericas[regra.coluna], valor)
+
+    return mascara
+
+
+def resolver_pesos(pesos: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """PESOS_PADRAO com os pesos do chamador por cima. ValueError para critério desconhecido ou peso negativo."""
+    pesos = pesos or {}
+    desconhecidos = set(pesos) - set(PESOS_PADRAO)
+    if desconhecidos:
+        raise ValueError(
+            f"Critérios desconhecidos: {', '.join(sorted(desconhecidos))}. Use: {', '.join(PESOS_PADRAO)}."
+        )
+    negativos = sorted(criterio for criterio, peso in pesos.items() if peso < 0)
+    if negativos:
+        raise ValueError(f"Pesos não podem ser negativos: {', '.join(negativos)}.")
+    return {**PESOS_PADRAO, **pesos}
+
+
+def calcular_distancias(colunas: _Colunas, filtros: VeiculoFiltros, pesos: Dict[str, float]) -> np.ndarray:
+    """
+    Distância de cada linha aos filtros, de 0 (atende a todos) a 1: média das penalidades
+    dos critérios informados, ponderada por `pesos`. Valor ausente (NULL) conta como 1.
+    """
+    penalidades: Dict[str, np.ndarray] = {}
+    for regra in REGRAS_FILTROS:
+        valor = getattr(filtros, regra.campo)
+        if valor is None or (regra.operador == TEXTO and not valor):
+            continue
+        if regra.operador == TEXTO:
+            criterio, penalidade = regra.campo, ~colunas.texto[regra.campo].contem(valor)
+        elif regra.coluna == "transmissao_automatica":
+            criterio, penalidade = regra.coluna, colunas.transmissao_automatica != int(valor)
+        else:
+            criterio, coluna = regra.coluna, colunas.numericas[regra.coluna]
+            if regra.operador == MINIMO:
+                desvio = np.maximum(valor - coluna, 0.0) # NaN (NULL) se propaga
+            elif regra.operador == MAXIMO:
+                desvio = np.maximum(coluna - valor, 0.0)
+            else:
+                desvio = np.abs(coluna - valor)
+            # Escala: a amplitude da coluna, estendida até o valor pedido. Assim a penalidade
+            # fica entre 0 e 1 e ainda ordena os veículos quando o pedido está fora do inventário
+            minimo, maximo = colunas.extremos[regra.coluna]
+            escala = max(maximo, valor) - min(minimo, valor)
+            penalidade = desvio / escala if escala > 0 else desvio
+        # Mínimo e máximo da mesma coluna somam numa só penalidade
+        penalidades[criterio] = penalidades.get(criterio, 0.0) + penalidade
+
+    distancias = np.zeros(len(colunas.ids), dtype=np.float64)
+    peso_total = 0.0
+    for criterio, penalidade in penalidades.items():
+        distancias += pesos[criterio] * np.minimum(np.nan_to_num(penalidade, nan=1.0), 1.0)
+        peso_total += pesos[criterio]
+    return distancias / peso_total if peso_total > 0 else distancias
+
+
+def menores_k(valores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Posições dos `k` menores valores, em ordem crescente (empates pela posição, isto é, pelo
+    `id`). Seleção parcial em O(n) com np.partition; só os k escolhidos são ordenados.
+    """
+    k = min(k, len(valores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    limite = np.partition(valores, k - 1)[k - 1]
+    abaixo = np.flatnonzero(valores < limite)
+    empatados = np.flatnonzero(valores == limite)[:k - len(abaixo)]
+    escolhidos = np.concatenate((abaixo, empatados))
+    return escolhidos[np.lexsort((escolhidos, valores[escolhidos]))]
+
+
+class IndiceInventario:
+    """Guarda o snapshot colunar do inventário e responde às buscas a partir dele."""
+
+    def __init__(self):
+        self._colunas: Optional[_Colunas] = None
+        self._snapshot = None # Fonte compartilhada opcional (SnapshotCompartilhado)
+        self._trava = threading.Lock()
+
+    def usar_snapshot(self, snapshot) -> None:
+        """
+        Passa a responder a partir de `snapshot` (um `SnapshotCompartilhado`) sempre que o
+        arquivo existir; sem ele, vale o snapshot local de `carregar`. None desliga.
+        """
+        self._snapshot = snapshot
+
+    def _colunas_atuais(self) -> Optional[_Colunas]:
+        if self._snapshot is not None:
+            colunas = self._snapshot.colunas()
+            if colunas is not None:
+                return colunas
+        return self._colunas
+
+    @property
+    def carregado(self) -> bool:
+        return self._colunas_atuais() is not None
+
+    def carregar(self, veiculos: Iterable[Any]) -> int:
+        """
+        (Re)constrói o índice a partir de objetos `Veiculo` (ou qualquer objeto com os
+        mesmos atributos). A troca do snapshot é atômica: buscas em andamento continuam
+        usando o anterior. Retorna a quantidade de veículos carregados.
+        """
+        registros = extrair_registros(veiculos)
+        colunas = construir_colunas(registros)
+        with self._trava:
+            self._colunas = colunas
+        return len(registros)
+
+    def invalidar(self) -> None:
+        """Descarta o snapshot; a próxima busca recarrega a partir do banco."""
+        with self._trava:
+            self._colunas = None
+
+    def buscar(self, filtros: VeiculoFiltros, quantidade: int, apos_id: Optional[int] = None) -> List[VeiculoResposta]:
+        """
+        Retorna até `quantidade` veículos que atendem aos filtros, em ordem de `id`,
+        começando depois de `apos_id` (paginação por keyset, como no caminho SQL).
+        """
+        colunas = self._colunas_atuais()
+        if colunas is None:
+            raise RuntimeError("Índice de inventário não carregado.")
+
+        mascara = avaliar_filtros(colunas, filtros)
+        if apos_id is not None:
+            mascara &= colunas.ids > apos_id
+        posicoes = np.flatnonzero(mascara)[:quantidade]
+        # Os registros vieram do banco já válidos: model_construct evita revalidar cada linha
+        return [VeiculoResposta.model_construct(**colunas.registros[p]) for p in posicoes]
+
+    def mais_proximos(
+        self, filtros: VeiculoFiltros, quantidade: int, pesos: Optional[Dict[str, float]] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Os `quantidade` veículos mais próximos dos filtros (ver `calcular_distancias`), do
+        mais para o menos próximo, cada um com sua distância. Todo o inventário é pontuado.
+        """
+        colunas = self._colunas_atuais()
+        if colunas is None:
+            raise RuntimeError("Índice de inventário não carregado.")
+
+        distancias = calcular_distancias(colunas, filtros, resolver_pesos(pesos))
+        return [(colunas.registros[p], float(distancias[p])) for p in menores_k(distancias, quantidade)]
+
+
+# Instância única usada pelo servidor MCP
+indice_inventario = IndiceInventario()
+
+# Mantém o índice consistente quando o loader grava no banco neste mesmo processo
+ao_alterar_dados(indice_inventario.invalidar)
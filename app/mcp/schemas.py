@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict 
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, Optional, List, Union
 
 # --------------------
 # Schema para os Filtros da Requisição MCP
@@ -48,8 +48,71 @@ class VeiculoResposta(BaseModel):
     capacidade_carga_kg: Optional[float] = None
     tanque_litros: Optional[int] = None
     autonomia_km_l: Optional[float] = None
-   
 
-    class Config:
-        model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True)
+
+
+# --------------------
+# Schema para a Resposta paginada da busca
+# --------------------
+# A busca usa paginação por cursor (keyset): os veículos vêm ordenados por `id`
+# e `next_cursor` é um token opaco que o cliente reenvia para obter a próxima página.
+# Quando `next_cursor` é None, não há mais resultados.
+class VeiculoPagina(BaseModel):
+    itens: List[VeiculoResposta]
+    next_cursor: Optional[str] = None
+
+
+
+# --------------------
+# Schemas da busca em lote
+# --------------------
+# Vários conjuntos de filtros em uma única requisição (ex: comparar "A vs B vs C").
+# `resultados[i]` é a primeira página da busca `buscas[i]`; o `next_cursor` de cada
+# uma continua a paginação pelo endpoint normal de busca, com os mesmos filtros.
+class BuscaEmLote(BaseModel):
+    buscas: List[VeiculoFiltros] = Field(..., min_length=1)
+
+
+class VeiculoLoteResposta(BaseModel):
+    resultados: List[VeiculoPagina]
+
+
+# --------------------
+# Schemas da busca por proximidade
+# --------------------
+# Quando os filtros são restritos demais, os veículos mais próximos deles: cada critério
+# informado vira uma penalidade de 0 a 1, ponderada por `pesos` (critério -> peso; os
+# omitidos ficam com o padrão do servidor). `distancia` 0 atende a todos os filtros.
+class BuscaProximos(BaseModel):
+    filtros: VeiculoFiltros = Field(default_factory=VeiculoFiltros)
+    pesos: Dict[str, float] = Field(default_factory=dict)
+
+
+class VeiculoProximo(VeiculoResposta):
+    distancia: float
+
+
+class VeiculosProximosResposta(BaseModel):
+    itens: List[VeiculoProximo]
+
+
+# --------------------
+# Schemas do resumo agregado (facetas)
+# --------------------
+# Contagens sobre os veículos que atendem aos filtros, sem devolver os veículos.
+class ContagemFaceta(BaseModel):
+    valor: Optional[Union[bool, int, str]] = None
+    quantidade: int
+
+
+class FaixaHistograma(BaseModel):
+    inicio: float  # Início da faixa (inclusive)
+    fim: float     # Fim da faixa (exclusive)
+    quantidade: int
+
 
+class ResumoFacetas(BaseModel):
+    total: int
+    facetas: Dict[str, List[ContagemFaceta]]
+    histogramas: Dict[str, List[FaixaHistograma]]
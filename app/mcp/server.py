@@ -1,11 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List # Para especificar o tipo de retorno como uma lista
+import asyncio
+import base64
+import binascii
+import json
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import literal, select, union_all, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
 
 # Importações dos nossos módulos
-from app.database.session import get_db # Nossa dependência de sessão do banco
-from app.database.models import Veiculo  # Nosso modelo SQLAlchemy
-from app.mcp.schemas import VeiculoFiltros, VeiculoResposta # Nossos schemas Pydantic
+from app.core.config import (
+    MCP_TAMANHO_PAGINA_PADRAO, MCP_TAMANHO_PAGINA_MAXIMO, MCP_INDICE_MEMORIA,
+    MCP_CACHE_RESULTADOS, MCP_CACHE_MAX_ENTRADAS, MCP_CACHE_TTL_S, MCP_VERSAO_DADOS_INTERVALO_S,
+    MCP_STREAM_TAMANHO_LOTE, MCP_LOTE_MAX_BUSCAS, MCP_SNAPSHOT_COMPARTILHADO, MCP_SNAPSHOT_ARQUIVO,
+)
+# Sessões só de leitura: réplica saudável (DATABASE_URL_LEITURA) ou, sem nenhuma, o primário
+from app.database.session import get_async_db_leitura, abrir_sessao_leitura
+from app.database.models import Veiculo, COLUNAS_DE_BUSCA  # Nosso modelo SQLAlchemy
+from app.database.eventos import ao_alterar_dados, ao_alterar_dados_com_escopo
+from app.database.versao_dados import MonitorVersaoDados
+from app.mcp.schemas import ( # Nossos schemas Pydantic
+    VeiculoFiltros, VeiculoResposta, VeiculoPagina, BuscaEmLote, VeiculoLoteResposta, ResumoFacetas,
+    BuscaProximos, VeiculosProximosResposta,
+)
+from app.mcp.indice_memoria import indice_inventario, extrair_registros, resolver_pesos, CAMPOS_VEICULO # Índice colunar em memória
+from app.mcp.snapshot_inventario import SnapshotCompartilhado, publicar_snapshot
+from app.mcp.busca_texto import resolver_candidatos_texto
+from app.mcp.filtros import (
+    PARAMETRO_APOS_ID, PARAMETRO_LIMITE, compilar_filtros, consulta_compilada, construir_consulta_veiculos,
+)
+from app.mcp.cache import CacheResultados, filtros_canonicos, gerar_etag, etag_corresponde, termos_canonicos
+from app.mcp.facetas import construir_consulta_facetas, montar_resumo, resolver_facetas
 
 # Cria um APIRouter. Podemos adicionar prefixos e tags se tivermos muitos endpoints.
 router = APIRouter(
@@ -13,58 +39,477 @@ router = APIRouter(
     tags=["MCP - Veículos"], # Agrupa as rotas na documentação Swagger/OpenAPI
 )
 
-@router.post("/buscar_veiculos/", response_model=List[VeiculoResposta])
+# Evita que várias requisições simultâneas carreguem o índice em memória ao mesmo tempo
+_trava_carga_indice = asyncio.Lock()
+
+# Cache de resultados e monitor da versão dos dados (invalida cache e índice quando o loader grava;
+# no cache, só as entradas que a alteração pode afetar, quando o loader registrou o escopo)
+cache_resultados = CacheResultados(MCP_CACHE_MAX_ENTRADAS, MCP_CACHE_TTL_S)
+monitor_versao_dados = MonitorVersaoDados(MCP_VERSAO_DADOS_INTERVALO_S)
+ao_alterar_dados_com_escopo(cache_resultados.invalidar)
+ao_alterar_dados(monitor_versao_dados.esquecer)
+
+# Com vários workers, o índice em memória lê o snapshot publicado em arquivo (um só para todos)
+snapshot_inventario = SnapshotCompartilhado(MCP_SNAPSHOT_ARQUIVO)
+if MCP_SNAPSHOT_COMPARTILHADO:
+    indice_inventario.usar_snapshot(snapshot_inventario)
+
+
+def codificar_cursor(ultimo_id: int) -> str:
+    """Gera o token opaco de paginação a partir do último `id` entregue."""
+    bruto = json.dumps({"id": ultimo_id}).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> int:
+    """Recupera o último `id` entregue a partir do token. Levanta HTTP 400 se for inválido."""
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        return int(dados["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido.")
+
+
+def resolver_tamanho_pagina(limite: Optional[int]) -> int:
+    """Aplica o tamanho padrão e o teto máximo configurados para a página."""
+    if limite is None:
+        return MCP_TAMANHO_PAGINA_PADRAO
+    return min(limite, MCP_TAMANHO_PAGINA_MAXIMO)
+
+
+def resolver_campos(campos: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Interpreta o seletor `campos` ("marca,modelo,..."). Devolve os campos na ordem de
+    VeiculoResposta, sempre com `id` (necessário para o cursor), ou None se não informado.
+    Levanta HTTP 400 se algum campo não existir.
+    """
+    if not campos:
+        return None
+    pedidos = {c.strip() for c in campos.split(",") if c.strip()}
+    desconhecidos = pedidos - set(CAMPOS_VEICULO)
+    if desconhecidos:
+        raise HTTPException(status_code=400, detail=f"Campos desconhecidos: {', '.join(sorted(desconhecidos))}.")
+    return tuple(c for c in CAMPOS_VEICULO if c == "id" or c in pedidos)
+
+
+# Caminho rápido de serialização: o JSON é montado direto dos valores das colunas, sem
+# validar cada linha com VeiculoResposta (os dados já vêm tipados do banco). Mesmo formato
+# compacto e UTF-8 do `model_dump_json` do Pydantic.
+_codificador_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def serializar_veiculo(campos: Sequence[str], valores: Sequence) -> str:
+    """JSON de um veículo a partir dos valores de `campos`, na mesma ordem."""
+    return _codificador_json.encode(dict(zip(campos, valores)))
+
+
+def serializar_pagina(campos: Sequence[str], linhas: Sequence[Sequence], proximo_cursor: Optional[str]) -> bytes:
+    """JSON de uma página inteira (um único `encode`, mais barato que um por linha)."""
+    itens = [dict(zip(campos, valores)) for valores in linhas]
+    return _codificador_json.encode({"itens": itens, "next_cursor": proximo_cursor}).encode()
+
+
+def termos_de_texto(filtros: VeiculoFiltros) -> Dict[str, str]:
+    """Filtros de texto (marca, modelo, combustivel) preenchidos na requisição."""
+    return {campo: getattr(filtros, campo) for campo in COLUNAS_DE_BUSCA if getattr(filtros, campo)}
+
+
+def paginar_consulta(query: Select, tamanho_pagina: int, cursor: Optional[str]) -> Select:
+    """
+    Aplica a paginação por keyset: ordem estável por `id` e `id > último id entregue`.
+    Busca um registro a mais que o tamanho da página para saber se existe próxima página.
+    """
+    if cursor:
+        query = query.where(Veiculo.id > decodificar_cursor(cursor))
+    return query.order_by(Veiculo.id).limit(tamanho_pagina + 1)
+
+
+def montar_pagina(resultados: list, tamanho_pagina: int) -> Tuple[list, Optional[str]]:
+    """Separa os itens da página e calcula o `next_cursor` a partir do registro extra."""
+    if len(resultados) > tamanho_pagina:
+        itens = resultados[:tamanho_pagina]
+        return itens, codificar_cursor(itens[-1].id)
+    return resultados, None
+
+
+async def preparar_busca_compilada(
+    db: AsyncSession, filtros: VeiculoFiltros, tamanho_pagina: int, cursor: Optional[str],
+    campos: Optional[Tuple[str, ...]] = None,
+) -> Tuple[Select, Dict[str, Any]]:
+    """
+    Consulta paginada já compilada para a forma destes filtros (ver app/mcp/filtros.py)
+    e os parâmetros da execução, com o registro extra de `paginar_consulta`.
+    """
+    candidatos_texto = await resolver_candidatos_texto(db, termos_de_texto(filtros))
+    forma, parametros = compilar_filtros(filtros, candidatos_texto)
+    parametros[PARAMETRO_LIMITE] = tamanho_pagina + 1
+    if cursor:
+        parametros[PARAMETRO_APOS_ID] = decodificar_cursor(cursor)
+    return consulta_compilada(forma, campos, bool(cursor)), parametros
+
+
+async def garantir_snapshot_compartilhado(db: AsyncSession) -> None:
+    """
+    Confere se o snapshot compartilhado acompanha a versão dos dados (lida no máximo uma vez
+    por MCP_VERSAO_DADOS_INTERVALO_S). Normalmente quem publica é o loader; se o snapshot
+    ficou para trás ou ainda não existe, este worker o publica e os demais o mapeiam.
+    """
+    versao = await monitor_versao_dados.versao_atual(db)
+    if snapshot_inventario.versao() >= versao:
+        return
+    async with _trava_carga_indice:
+        if snapshot_inventario.versao() < versao:
+            veiculos = (await db.execute(select(Veiculo))).scalars().all()
+            publicar_snapshot(extrair_registros(veiculos), versao, snapshot_inventario.caminho)
+
+
+async def garantir_indice_memoria(db: AsyncSession) -> None:
+    """Carrega o índice colunar em memória a partir do banco, se ainda não estiver carregado."""
+    if MCP_SNAPSHOT_COMPARTILHADO:
+        await garantir_snapshot_compartilhado(db)
+        return
+    if not indice_inventario.carregado:
+        async with _trava_carga_indice:
+            if not indice_inventario.carregado:
+                veiculos = (await db.execute(select(Veiculo))).scalars().all()
+                indice_inventario.carregar(veiculos)
+
+
+async def buscar_no_indice_memoria(
+    db: AsyncSession, filtros: VeiculoFiltros, quantidade: int, apos_id: Optional[int]
+) -> Optional[list]:
+    """
+    Busca no índice colunar em memória, carregando-o do banco na primeira vez.
+    Retorna None se o índice não puder ser usado, para que o chamador caia no caminho SQL.
+    """
+    try:
+        await garantir_indice_memoria(db)
+        return indice_inventario.buscar(filtros, quantidade, apos_id)
+    except Exception as e:
+        print(f"MCP AVISO: Índice em memória indisponível, usando o banco: {e}")
+        return None
+
+
+async def executar_busca(
+    db: AsyncSession, filtros: VeiculoFiltros, tamanho_pagina: int, cursor: Optional[str]
+) -> VeiculoPagina:
+    """Executa a busca (índice em memória, se habilitado, ou SQL) e monta a página."""
+    resultados = None
+    if MCP_INDICE_MEMORIA:
+        apos_id = decodificar_cursor(cursor) if cursor else None
+        resultados = await buscar_no_indice_memoria(db, filtros, tamanho_pagina + 1, apos_id)
+
+    if resultados is None:
+        consulta, parametros = await preparar_busca_compilada(db, filtros, tamanho_pagina, cursor)
+        resultados = (await db.execute(consulta, parametros)).scalars().all()
+    itens, proximo_cursor = montar_pagina(resultados, tamanho_pagina)
+
+    # Se nenhum resultado for encontrado, `itens` será uma lista vazia,
+    # o que é o comportamento HTTP correto (200 OK).
+    return VeiculoPagina(
+        itens=[VeiculoResposta.model_validate(v) for v in itens],
+        next_cursor=proximo_cursor,
+    )
+
+
+async def executar_busca_projetada(
+    db: AsyncSession, filtros: VeiculoFiltros, tamanho_pagina: int, cursor: Optional[str], campos: Tuple[str, ...]
+) -> bytes:
+    """
+    Como `executar_busca`, mas só com as colunas de `campos`: o SELECT lê apenas essas
+    colunas (tuplas, sem objetos ORM) e a página já sai serializada pelo caminho rápido.
+    """
+    if MCP_INDICE_MEMORIA:
+        apos_id = decodificar_cursor(cursor) if cursor else None
+        veiculos = await buscar_no_indice_memoria(db, filtros, tamanho_pagina + 1, apos_id)
+        if veiculos is not None:
+            # O índice devolve VeiculoResposta completos: extrai só os campos pedidos
+            itens, proximo_cursor = montar_pagina(veiculos, tamanho_pagina)
+            return serializar_pagina(campos, [[getattr(v, c) for c in campos] for v in itens], proximo_cursor)
+
+    consulta, parametros = await preparar_busca_compilada(db, filtros, tamanho_pagina, cursor, campos)
+    # Cada Row já é uma tupla na ordem de `campos` (e expõe `.id` para o cursor)
+    linhas = (await db.execute(consulta, parametros)).all()
+    itens, proximo_cursor = montar_pagina(linhas, tamanho_pagina)
+    return serializar_pagina(campos, itens, proximo_cursor)
+
+
+async def executar_busca_em_lote(
+    db: AsyncSession, lista_filtros: List[VeiculoFiltros], tamanho_pagina: int, campos: Sequence[str]
+) -> bytes:
+    """
+    Executa várias buscas (primeira página de cada) com UMA ida ao banco: cada conjunto de
+    filtros vira um SELECT limitado, marcado com sua posição em `indice_busca`, e todos são
+    unidos com UNION ALL. As linhas voltam agrupadas pela marca, na ordem de `lista_filtros`.
+    """
+    paginas: List[Optional[list]] = [None] * len(lista_filtros)
+    if MCP_INDICE_MEMORIA:
+        for i, filtros in enumerate(lista_filtros):
+            veiculos = await buscar_no_indice_memoria(db, filtros, tamanho_pagina + 1, None)
+            if veiculos is not None:
+                paginas[i] = [[getattr(v, c) for c in campos] for v in veiculos]
+
+    pendentes = [i for i, pagina in enumerate(paginas) if pagina is None]
+    if pendentes:
+        subconsultas = []
+        for i in pendentes:
+            filtros = lista_filtros[i]
+            candidatos_texto = await resolver_candidatos_texto(db, termos_de_texto(filtros))
+            consulta = construir_consulta_veiculos(filtros, candidatos_texto).with_only_columns(
+                *(getattr(Veiculo, campo) for campo in campos)
+            )
+            # ORDER BY/LIMIT dentro de cada parte exige envolvê-la numa subconsulta
+            parte = paginar_consulta(consulta, tamanho_pagina, None).subquery()
+            subconsultas.append(select(literal(i).label("indice_busca"), *parte.c))
+        for i in pendentes:
+            paginas[i] = []
+        for linha in (await db.execute(union_all(*subconsultas))).all():
+            paginas[linha[0]].append(linha[1:])
+
+    resultados = []
+    for linhas in paginas:
+        # `id` é sempre o primeiro campo (resolver_campos / CAMPOS_VEICULO)
+        proximo_cursor = codificar_cursor(linhas[tamanho_pagina - 1][0]) if len(linhas) > tamanho_pagina else None
+        itens = [dict(zip(campos, valores)) for valores in linhas[:tamanho_pagina]]
+        resultados.append({"itens": itens, "next_cursor": proximo_cursor})
+    return _codificador_json.encode({"resultados": resultados}).encode()
+
+
+@router.post("/buscar_veiculos/", response_model=VeiculoPagina)
 async def buscar_veiculos_endpoint(
     filtros: VeiculoFiltros,        # Corpo da requisição, validado pelo Pydantic
-    db: Session = Depends(get_db)   # Injeção de dependência da sessão do banco
+    limite: Optional[int] = Query(None, ge=1, description="Tamanho da página (limitado ao máximo configurado)."),
+    cursor: Optional[str] = Query(None, description="Token `next_cursor` retornado pela página anterior."),
+    campos: Optional[str] = Query(
+        None, description="Campos a devolver, separados por vírgula (ex: `marca,modelo`). `id` sempre vem."
+    ),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db_leitura)   # Sessão assíncrona: a query não bloqueia o event loop
 ):
     """
     Endpoint para buscar veículos com base nos filtros fornecidos.
     O cliente envia um JSON com os filtros, e o servidor retorna
-    uma lista de veículos que correspondem.
-    """
-    query = db.query(Veiculo) # Começa com uma query base para todos os veículos
-
-    # Aplica os filtros dinamicamente
-    if filtros.marca:
-        # Usamos ilike para busca case-insensitive e parcial (contém)
-        query = query.filter(Veiculo.marca.ilike(f"%{filtros.marca}%"))
-    
-    if filtros.modelo:
-        query = query.filter(Veiculo.modelo.ilike(f"%{filtros.modelo}%"))
-    
-    if filtros.ano_producao_inicial_min is not None:
-        query = query.filter(Veiculo.ano_producao_inicial >= filtros.ano_producao_inicial_min)
-    
-    if filtros.ano_producao_inicial_max is not None:
-        query = query.filter(Veiculo.ano_producao_inicial <= filtros.ano_producao_inicial_max)
-
-    if filtros.ano_producao_final_especifico is not None:
-        query = query.filter(Veiculo.ano_producao_final == filtros.ano_producao_final_especifico)
-        
-    if filtros.combustivel:
-        query = query.filter(Veiculo.combustivel.ilike(f"%{filtros.combustivel}%"))
-        
-    if filtros.num_portas is not None:
-        query = query.filter(Veiculo.num_portas == filtros.num_portas)
-        
-    if filtros.transmissao_automatica is not None:
-        query = query.filter(Veiculo.transmissao_automatica == filtros.transmissao_automatica)
-        
-    if filtros.potencia_cv_min is not None:
-        query = query.filter(Veiculo.potencia_cv >= filtros.potencia_cv_min)
-
-    if filtros.potencia_cv_max is not None:
-        query = query.filter(Veiculo.potencia_cv <= filtros.potencia_cv_max)
-
-    # Execute a query para obter os resultados
-    resultados = query.all()
-
-    # O FastAPI cuidará da conversão dos objetos 'Veiculo' (SQLAlchemy)
-    # para o schema 'VeiculoResposta' (Pydantic) devido ao `response_model`
-    # e `orm_mode = True` no schema.
-    # Se nenhum resultado for encontrado, uma lista vazia `[]` será retornada,
-    # o que é o comportamento HTTP correto (200 OK com corpo vazio).
-    
-    return resultados
+    uma página de veículos que correspondem, ordenados por `id`.
+    Para obter as próximas páginas, reenvie os mesmos filtros com `cursor=<next_cursor>`.
+    Com `campos`, só as colunas pedidas são lidas do banco e devolvidas.
+
+    A resposta traz um `ETag` que depende só dos filtros, da paginação e da versão dos
+    dados em que foi calculada; reenviando-o em `If-None-Match` o cliente recebe 304 sem
+    corpo se nada mudou. Uma entrada do cache que sobreviveu a uma alteração sem relação
+    com os filtros mantém o ETag de antes.
+    """
+    tamanho_pagina = resolver_tamanho_pagina(limite)
+    campos_pedidos = resolver_campos(campos)
+    versao = await monitor_versao_dados.versao_atual(db)
+    geracao = cache_resultados.geracao
+    chave = (filtros_canonicos(filtros), tamanho_pagina, cursor, campos_pedidos)
+    guardada = cache_resultados.obter(chave) if MCP_CACHE_RESULTADOS else None
+    etag, corpo = guardada if guardada is not None else (gerar_etag(versao, *chave), None)
+    cabecalhos = {"ETag": etag}
+
+    if etag_corresponde(if_none_match, etag):
+        return Response(status_code=304, headers=cabecalhos)
+
+    cabecalhos["X-Cache"] = "HIT" if corpo is not None else "MISS"
+    if corpo is None:
+        if campos_pedidos:
+            corpo = await executar_busca_projetada(db, filtros, tamanho_pagina, cursor, campos_pedidos)
+        else:
+            pagina = await executar_busca(db, filtros, tamanho_pagina, cursor)
+            corpo = pagina.model_dump_json().encode()
+        # Guardamos o JSON já serializado: um acerto não paga validação nem serialização de novo
+        if MCP_CACHE_RESULTADOS:
+            cache_resultados.guardar(chave, (etag, corpo), geracao, termos_canonicos(filtros))
+
+    return Response(content=corpo, media_type="application/json", headers=cabecalhos)
+
+
+async def gerar_linhas_ndjson(
+    filtros: VeiculoFiltros, candidatos_texto: Dict[str, Set[str]], tamanho_lote: int, campos: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """
+    Percorre o resultado da busca com um cursor do lado do servidor (`yield_per`) e emite
+    um veículo JSON por linha. Só as colunas de `campos` são lidas, como tuplas
+    (sem objetos ORM nem Pydantic), e cada lote do cursor vira um único bloco da resposta:
+    a memória usada depende de `tamanho_lote`, não do tamanho do resultado.
+    """
+    query = (
+        construir_consulta_veiculos(filtros, candidatos_texto)
+        .with_only_columns(*(getattr(Veiculo, campo) for campo in campos))
+        .order_by(Veiculo.id)
+        .execution_options(yield_per=tamanho_lote)
+    )
+    # Sessão própria: a do Depends é encerrada antes de o corpo da resposta ser enviado
+    async with await abrir_sessao_leitura() as db:
+        resultado = await db.stream(query)
+        async for lote in resultado.partitions():
+            yield "".join(serializar_veiculo(campos, linha) + "\n" for linha in lote).encode()
+
+
+@router.post("/buscar_veiculos/stream")
+async def buscar_veiculos_stream_endpoint(
+    filtros: VeiculoFiltros,
+    campos: Optional[str] = Query(None, description="Mesmo seletor de campos da busca paginada."),
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    """
+    Variante em streaming de `buscar_veiculos` para consumidores em lote (exportações,
+    indexadores): devolve TODOS os veículos dos filtros, ordenados por `id`, em NDJSON
+    (`application/x-ndjson`, um objeto por linha), sem paginação e sem cache.
+    """
+    # Sem cache, mas o índice n-grama do SQLite precisa saber de escritas de outro processo
+    await monitor_versao_dados.versao_atual(db)
+    candidatos_texto = await resolver_candidatos_texto(db, termos_de_texto(filtros))
+    return StreamingResponse(
+        gerar_linhas_ndjson(
+            filtros, candidatos_texto, MCP_STREAM_TAMANHO_LOTE, resolver_campos(campos) or CAMPOS_VEICULO
+        ),
+        media_type="application/x-ndjson",
+    )
+
 
+@router.post("/buscar_veiculos/lote/", response_model=VeiculoLoteResposta)
+async def buscar_veiculos_lote_endpoint(
+    lote: BuscaEmLote,
+    limite: Optional[int] = Query(None, ge=1, description="Tamanho da página de cada busca."),
+    campos: Optional[str] = Query(None, description="Mesmo seletor de campos da busca paginada."),
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    """
+    Busca em lote: recebe vários conjuntos de filtros e devolve, em `resultados[i]`, a
+    primeira página da busca `buscas[i]`, tudo em uma única consulta ao banco (UNION ALL).
+    Para continuar uma delas, use o `next_cursor` dela no endpoint normal de busca.
+    """
+    if len(lote.buscas) > MCP_LOTE_MAX_BUSCAS:
+        raise HTTPException(
+            status_code=400, detail=f"No máximo {MCP_LOTE_MAX_BUSCAS} buscas por lote."
+        )
+    await monitor_versao_dados.versao_atual(db) # Escritas de outro processo resetam o índice n-grama
+    corpo = await executar_busca_em_lote(
+        db, lote.buscas, resolver_tamanho_pagina(limite), resolver_campos(campos) or CAMPOS_VEICULO
+    )
+    return Response(content=corpo, media_type="application/json")
+
+
+@router.post("/buscar_veiculos/proximos/", response_model=VeiculosProximosResposta)
+async def buscar_proximos_endpoint(
+    busca: BuscaProximos,
+    limite: Optional[int] = Query(None, ge=1, description="Quantos veículos devolver (limitado ao máximo configurado)."),
+    campos: Optional[str] = Query(None, description="Mesmo seletor de campos da busca paginada."),
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    """
+    Busca por proximidade: em vez de exigir todos os filtros, pontua TODOS os veículos pela
+    distância aos valores pedidos (potência, anos, autonomia, porta-malas, portas, e se
+    marca, modelo, combustível e câmbio batem), com os pesos de `pesos`, e devolve os
+    `limite` mais próximos, do mais para o menos próximo, cada um com sua `distancia`
+    (0 atende a todos os filtros, 1 não atende a nenhum). Usa o índice em memória.
+    """
+    try:
+        pesos = resolver_pesos(busca.pesos)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    quantidade = resolver_tamanho_pagina(limite)
+    campos_pedidos = resolver_campos(campos) or tuple(CAMPOS_VEICULO)
+
+    await monitor_versao_dados.versao_atual(db)
+    geracao = cache_resultados.geracao
+    chave = ("proximos", filtros_canonicos(busca.filtros), tuple(sorted(pesos.items())), quantidade, campos_pedidos)
+    corpo = cache_resultados.obter(chave) if MCP_CACHE_RESULTADOS else None
+    cabecalhos = {"X-Cache": "HIT" if corpo is not None else "MISS"}
+    if corpo is None:
+        await garantir_indice_memoria(db)
+        itens = [
+            {**{campo: registro[campo] for campo in campos_pedidos}, "distancia": round(distancia, 4)}
+            for registro, distancia in indice_inventario.mais_proximos(busca.filtros, quantidade, pesos)
+        ]
+        corpo = _codificador_json.encode({"itens": itens}).encode()
+        if MCP_CACHE_RESULTADOS:
+            # Sem termos: a proximidade pontua todo o inventário, qualquer alteração a afeta
+            cache_resultados.guardar(chave, corpo, geracao)
+    return Response(content=corpo, media_type="application/json", headers=cabecalhos)
+
+
+@router.post("/facetas/", response_model=ResumoFacetas)
+async def facetas_endpoint(
+    filtros: VeiculoFiltros,
+    facetas: Optional[str] = Query(
+        None, description="Campos a contar, separados por vírgula: marca, combustivel, num_portas, "
+                          "transmissao_automatica (padrão: todos)."
+    ),
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    """
+    Resumo dos veículos que atendem aos filtros, sem devolver os veículos: total, contagem
+    por valor de cada faceta (da mais frequente para a menos) e histogramas de `potencia_cv`,
+    `ano_producao_inicial` e `autonomia_km_l`. Tudo em uma consulta (GROUP BY + UNION ALL),
+    guardado no mesmo cache de resultados da busca.
+    """
+    try:
+        facetas_pedidas = resolver_facetas(facetas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await monitor_versao_dados.versao_atual(db)
+    geracao = cache_resultados.geracao
+    chave = ("facetas", filtros_canonicos(filtros), tuple(facetas_pedidas))
+    corpo = cache_resultados.obter(chave) if MCP_CACHE_RESULTADOS else None
+    cabecalhos = {"X-Cache": "HIT" if corpo is not None else "MISS"}
+    if corpo is None:
+        candidatos_texto = await resolver_candidatos_texto(db, termos_de_texto(filtros))
+        consulta = construir_consulta_facetas(construir_consulta_veiculos(filtros, candidatos_texto), facetas_pedidas)
+        resumo = montar_resumo((await db.execute(consulta)).all(), facetas_pedidas)
+        corpo = _codificador_json.encode(resumo).encode()
+        if MCP_CACHE_RESULTADOS:
+            cache_resultados.guardar(chave, corpo, geracao, termos_canonicos(filtros))
+    return Response(content=corpo, media_type="application/json", headers=cabecalhos)
+
+
+@router.get("/vocabulario/")
+async def vocabulario_endpoint(db: AsyncSession = Depends(get_async_db_leitura)):
+    """
+    Valores distintos de `marca`, `modelo` e `combustivel` no inventário (ordenados), em uma
+    única consulta. Usado pelo extrator de filtros por regras do agente.
+    """
+    await monitor_versao_dados.versao_atual(db)
+    geracao = cache_resultados.geracao
+    chave = ("vocabulario",)
+    corpo = cache_resultados.obter(chave) if MCP_CACHE_RESULTADOS else None
+    if corpo is None:
+        consulta = union_all(*(
+            select(literal(campo).label("campo"), getattr(Veiculo, campo).label("valor")).distinct()
+            for campo in COLUNAS_DE_BUSCA
+        ))
+        vocabulario = {campo: [] for campo in COLUNAS_DE_BUSCA}
+        for campo, valor in (await db.execute(consulta)).all():
+            if valor is not None:
+                vocabulario[campo].append(valor)
+        corpo = _codificador_json.encode({campo: sorted(v) for campo, v in vocabulario.items()}).encode()
+        if MCP_CACHE_RESULTADOS:
+            cache_resultados.guardar(chave, corpo, geracao)
+    return Response(content=corpo, media_type="application/json")
+
+
+@router.get("/cache/estatisticas/")
+async def estatisticas_cache_endpoint():
+    """Contadores do cache de resultados (acertos, faltas, entradas, remoções)."""
+    return cache_resultados.estatisticas()
+
+
+@router.post("/indice_memoria/recarregar/")
+async def recarregar_indice_memoria_endpoint(db: AsyncSession = Depends(get_async_db_leitura)):
+    """
+    Recarrega o índice em memória a partir do banco. Útil quando os dados foram
+    alterados por outro processo (ex: `popula_dados` rodando via app/main.py).
+    """
+    async with _trava_carga_indice:
+        veiculos = (await db.execute(select(Veiculo))).scalars().all()
+        if MCP_SNAPSHOT_COMPARTILHADO:
+            # Republica o arquivo: todos os workers passam a ler a nova versão
+            versao = await monitor_versao_dados.versao_atual(db)
+            publicar_snapshot(extrair_registros(veiculos), versao, snapshot_inventario.caminho)
+            total = len(veiculos)
+        else:
+            total = indice_inventario.carregar(veiculos)
+    return {"veiculos_carregados": total}
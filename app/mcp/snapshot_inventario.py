@@ -0,0 +1,228 @@
+# app/mcp/snapshot_inventario.py
+"""
+Snapshot do inventário em arquivo, mapeado em memória e compartilhado entre processos.
+
+Com vários workers, cada processo teria a sua cópia do índice colunar (e faria a sua
+leitura da tabela inteira). Aqui o inventário é gravado uma vez num arquivo binário com
+as mesmas colunas do índice (app/mcp/indice_memoria.py) e cada worker o abre com `mmap`:
+os arrays NumPy apontam direto para as páginas do arquivo, que o sistema operacional
+mantém uma única vez no cache de páginas para todos os processos.
+
+Formato (little-endian):
+
+    MAGICO (8 bytes) | tamanho do cabeçalho (uint64) | cabeçalho JSON | arrays alinhados em 8 bytes
+
+O cabeçalho traz a versão dos dados, a quantidade de linhas, as categorias de cada coluna
+de texto e, para cada array, o dtype e o deslocamento no arquivo.
+
+Publicação atômica: o arquivo novo é escrito ao lado, com fsync, e trocado com
+`os.replace`. Quem já mapeou o anterior continua lendo-o até perceber a troca (o
+`os.stat` muda), quando mapeia o novo; nenhum processo vê um arquivo pela metade.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.mcp.indice_memoria import (
+    CAMPOS_NUMERICOS, CAMPOS_TEXTO, CAMPOS_VEICULO, _Colunas, coluna_numerica, construir_colunas,
+    extrair_registros, montar_coluna_texto, montar_colunas,
+)
+
+MAGICO = b"C2SINV01"
+_TAMANHO_CABECALHO = struct.Struct("<Q")
+_ALINHAMENTO = 8
+
+# Campos numéricos de VeiculoResposta fora do índice (não filtram, mas voltam nos registros)
+CAMPOS_NUMERICOS_EXTRAS = ["capacidade_carga_kg", "tanque_litros"]
+# Voltam como int nos registros; os demais numéricos, como float
+CAMPOS_INTEIROS = {
+    "ano_producao_inicial", "ano_producao_final", "potencia_cv", "num_portas", "porta_malas_litros", "tanque_litros",
+}
+
+
+class RegistrosColunares(Sequence):
+    """
+    Registros montados sob demanda a partir dos arrays do snapshot: o arquivo não guarda
+    dicts, e só as linhas devolvidas numa busca chegam a virar objetos Python.
+    """
+
+    def __init__(self, ids: np.ndarray, texto: Dict[str, Any], numericas: Dict[str, np.ndarray],
+                 transmissao_automatica: np.ndarray):
+        self._ids = ids
+        self._texto = texto
+        self._numericas = numericas
+        self._transmissao = transmissao_automatica
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, posicao):
+        if isinstance(posicao, slice):
+            return [self[p] for p in range(*posicao.indices(len(self)))]
+        valores: Dict[str, Any] = {"id": int(self._ids[posicao])}
+        for campo, coluna in self._texto.items():
+            codigo = coluna.codigos[posicao]
+            valores[campo] = None if codigo < 0 else coluna.categorias[codigo]
+        for campo, coluna in self._numericas.items():
+            valor = coluna[posicao]
+            valores[campo] = None if np.isnan(valor) else (int(valor) if campo in CAMPOS_INTEIROS else float(valor))
+        transmissao = self._transmissao[posicao]
+        valores["transmissao_automatica"] = None if transmissao < 0 else bool(transmissao)
+        return {campo: valores[campo] for campo in CAMPOS_VEICULO}
+
+
+def _arrays_do_snapshot(registros: List[Dict[str, Any]]) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+    colunas = construir_colunas(registros)
+    arrays = {"ids": colunas.ids, "transmissao_automatica": colunas.transmissao_automatica}
+    for campo, coluna in colunas.texto.items():
+        arrays[f"texto.{campo}"] = coluna.codigos
+    for campo, valores in colunas.numericas.items():
+        arrays[f"numerico.{campo}"] = valores
+    for campo in CAMPOS_NUMERICOS_EXTRAS:
+        arrays[f"numerico.{campo}"] = coluna_numerica(registros, campo)
+    categorias = {campo: coluna.categorias for campo, coluna in colunas.texto.items()}
+    return arrays, categorias
+
+
+def _alinhar(posicao: int) -> int:
+    return -(-posicao // _ALINHAMENTO) * _ALINHAMENTO
+
+
+def publicar_snapshot(registros: List[Dict[str, Any]], versao: int, caminho: str) -> Path:
+    """
+    Grava o snapshot de `registros` (ordenados por `id`, ver `extrair_registros`) com a
+    versão dos dados `versao` e o publica em `caminho`, trocando o anterior atomicamente.
+    """
+    destino = Path(caminho)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    arrays, categorias = _arrays_do_snapshot(registros)
+
+    # Os deslocamentos dependem do tamanho do cabeçalho, que depende dos deslocamentos:
+    # eles são contados a partir do fim do cabeçalho, e o leitor soma esse início
+    relativos, posicao = {}, 0
+    for nome, valores in arrays.items():
+        relativos[nome] = [valores.dtype.newbyteorder("<").str, posicao]
+        posicao = _alinhar(posicao + valores.nbytes)
+    cabecalho = json.dumps({
+        "versao": versao, "linhas": len(registros), "categorias": categorias, "arrays": relativos,
+    }, ensure_ascii=False).encode("utf-8")
+    inicio_dados = _alinhar(len(MAGICO) + _TAMANHO_CABECALHO.size + len(cabecalho))
+
+    descritor, temporario = tempfile.mkstemp(dir=destino.parent, prefix=f".{destino.name}.")
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            arquivo.write(MAGICO + _TAMANHO_CABECALHO.pack(len(cabecalho)) + cabecalho)
+            for nome, valores in arrays.items():
+                arquivo.seek(inicio_dados + relativos[nome][1])
+                arquivo.write(valores.astype(relativos[nome][0], copy=False).tobytes())
+            arquivo.truncate(inicio_dados + posicao)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, destino)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(temporario)
+        raise
+    return destino
+
+
+def mapear_snapshot(caminho: str) -> Tuple[int, _Colunas, Tuple[int, int, int]]:
+    """
+    Mapeia o arquivo (somente leitura) e monta as colunas sobre ele, sem copiar os arrays.
+    Devolve a versão dos dados, as colunas e a identidade do arquivo mapeado (inode,
+    mtime e tamanho), para o leitor saber quando o arquivo foi trocado.
+    """
+    with open(caminho, "rb") as arquivo:
+        info = os.fstat(arquivo.fileno())
+        mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) # Continua válido após o close
+    identidade = (info.st_ino, info.st_mtime_ns, info.st_size)
+
+    if mapa[:len(MAGICO)] != MAGICO:
+        raise ValueError(f"Arquivo de snapshot inválido: {caminho}")
+    (tamanho_cabecalho,) = _TAMANHO_CABECALHO.unpack_from(mapa, len(MAGICO))
+    inicio_cabecalho = len(MAGICO) + _TAMANHO_CABECALHO.size
+    cabecalho = json.loads(bytes(mapa[inicio_cabecalho:inicio_cabecalho + tamanho_cabecalho]))
+    inicio_dados = _alinhar(inicio_cabecalho + tamanho_cabecalho)
+    linhas = cabecalho["linhas"]
+
+    def array(nome: str) -> np.ndarray:
+        dtype, deslocamento = cabecalho["arrays"][nome]
+        return np.frombuffer(mapa, dtype=np.dtype(dtype), count=linhas, offset=inicio_dados + deslocamento)
+
+    ids, transmissao = array("ids"), array("transmissao_automatica")
+    texto = {campo: montar_coluna_texto(array(f"texto.{campo}"), cabecalho["categorias"][campo]) for campo in CAMPOS_TEXTO}
+    numericas = {campo: array(f"numerico.{campo}") for campo in CAMPOS_NUMERICOS}
+    todas_numericas = {**numericas, **{campo: array(f"numerico.{campo}") for campo in CAMPOS_NUMERICOS_EXTRAS}}
+    colunas = montar_colunas(
+        ids=ids, texto=texto, numericas=numericas, transmissao_automatica=transmissao,
+        registros=RegistrosColunares(ids, texto, todas_numericas, transmissao),
+    )
+    return cabecalho["versao"], colunas, identidade
+
+
+class SnapshotCompartilhado:
+    """
+    Leitor do snapshot publicado em `caminho`. A cada acesso confere (com um `os.stat`)
+    se o arquivo foi trocado e, se foi, mapeia o novo: os workers passam a usar a nova
+    versão sem reiniciar.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._identidade: Optional[Tuple[int, int, int]] = None
+        self._versao = -1
+        self._colunas: Optional[_Colunas] = None
+        self._trava = threading.Lock()
+
+    def _atualizar(self) -> None:
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            return # Ainda não publicado (ou removido): fica com o que já estava mapeado, se houver
+        if (info.st_ino, info.st_mtime_ns, info.st_size) == self._identidade:
+            return
+        with self._trava:
+            if (info.st_ino, info.st_mtime_ns, info.st_size) != self._identidade:
+                # O mapeamento anterior é liberado quando a última busca que o usa termina
+                self._versao, self._colunas, self._identidade = mapear_snapshot(self.caminho)
+
+    def colunas(self) -> Optional[_Colunas]:
+        """Colunas do snapshot mais recente, ou None se nada foi publicado."""
+        self._atualizar()
+        return self._colunas
+
+    def versao(self) -> int:
+        """Versão dos dados do snapshot mais recente (-1 se nada foi publicado)."""
+        self._atualizar()
+        return self._versao
+
+
+def publicar_snapshot_do_banco(caminho: str) -> int:
+    """
+    Lê o inventário e a versão dos dados pelo engine síncrono e publica o snapshot.
+    Usado pelo loader após gravar e por run_mcp_server.py antes de subir os workers.
+    Retorna a quantidade de veículos publicados.
+    """
+    from sqlalchemy import select
+
+    from app.database.models import MetadadoSistema, Veiculo
+    from app.database.session import SessionLocal
+    from app.database.versao_dados import CHAVE_VERSAO_DADOS
+
+    with SessionLocal() as db:
+        # A versão é lida antes dos veículos: se mudar no meio, o snapshot fica com uma
+        # versão menor que os dados e só é republicado à toa, nunca o contrário
+        valor = db.execute(
+            select(MetadadoSistema.valor).where(MetadadoSistema.chave == CHAVE_VERSAO_DADOS)
+        ).scalar_one_or_none()
+        registros = extrair_registros(db.execute(select(Veiculo)).scalars())
+    publicar_snapshot(registros, int(valor) if valor is not None else 0, caminho)
+    return len(registros)
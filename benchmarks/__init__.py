@@ -0,0 +1,9 @@
+"""
+Benchmarks do projeto. Todos rodam localmente (SQLite temporário, sem Ollama):
+
+- `catalogo`: gera catálogos sintéticos grandes a partir do CSV do projeto;
+- `suite`: mede carga (`popula_dados`), latência da busca e o parser de filtros do LLM,
+  gravando um arquivo de resultados;
+- `resultados`: formato desse arquivo e comparação entre duas execuções (regressões);
+- `bench_*.py`: experimentos pontuais de otimizações específicas.
+"""
@@ -0,0 +1,95 @@
+# benchmarks/bench_extrator_regras.py
+"""
+Avalia o extrator de filtros por regras (app/agent/extrator_regras.py) contra o conjunto
+rotulado `frases_rotuladas.jsonl`. Cada linha traz a frase e os filtros esperados, ou
+`null` quando a frase PRECISA do LLM (conversa, ambiguidade, marca fora do inventário).
+
+Métricas:
+- chamadas ao LLM evitadas: frases resolvidas só pelas regras;
+- acerto no caminho rápido: das frases resolvidas pelas regras, quantas com os filtros exatos;
+- falsos atalhos: frases que deveriam ir ao LLM mas foram resolvidas pelas regras;
+- acerto geral: frase tratada corretamente (filtros exatos no atalho ou encaminhada ao LLM).
+
+O vocabulário vem dos valores distintos do CSV do projeto (o mesmo que popula o banco):
+
+    python benchmarks/bench_extrator_regras.py --limiar 0.75
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parent.parent
+if str(RAIZ_DO_PROJETO) not in sys.path:
+    sys.path.append(str(RAIZ_DO_PROJETO))
+
+ARQUIVO_FRASES = Path(__file__).resolve().parent / "frases_rotuladas.jsonl"
+
+
+def carregar_frases(caminho: Path = ARQUIVO_FRASES) -> list:
+    with open(caminho, encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+
+def vocabulario_do_csv():
+    import pandas as pd
+    from app.agent.extrator_regras import VocabularioInventario
+
+    dados = pd.read_csv(RAIZ_DO_PROJETO / "scripts" / "veiculos_fabricados_brasil_reais.csv")
+    return VocabularioInventario.de_valores(
+        {campo: dados[campo].dropna().unique().tolist() for campo in ("marca", "modelo", "combustivel")}
+    )
+
+
+def avaliar(frases: list, vocabulario, limiar: float) -> dict:
+    """Roda o extrator em cada frase e devolve as métricas (e os erros, para inspeção)."""
+    from app.agent.extrator_regras import extrair_filtros_por_regras
+
+    atalhos = atalhos_corretos = falsos_atalhos = corretas = 0
+    erros = []
+    for item in frases:
+        resultado = extrair_filtros_por_regras(item["frase"], vocabulario)
+        esperado = item["filtros"]
+        if resultado.dispensa_llm(limiar):
+            atalhos += 1
+            if esperado is None:
+                falsos_atalhos += 1
+            elif resultado.filtros == esperado:
+                atalhos_corretos += 1
+                corretas += 1
+                continue
+            erros.append((item["frase"], esperado, resultado))
+        elif esperado is None:
+            corretas += 1
+        else:
+            erros.append((item["frase"], esperado, resultado)) # Ok para a conversa, mas atalho perdido
+    return {
+        "frases": len(frases),
+        "chamadas_llm_evitadas": atalhos,
+        "acerto_caminho_rapido": atalhos_corretos / atalhos if atalhos else 1.0,
+        "falsos_atalhos": falsos_atalhos,
+        "acerto_geral": corretas / len(frases),
+        "erros": erros,
+    }
+
+
+def main():
+    from app.core.config import AGENTE_LIMIAR_CONFIANCA_REGRAS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limiar", type=float, default=AGENTE_LIMIAR_CONFIANCA_REGRAS, help="Confiança mínima.")
+    args = parser.parse_args()
+
+    metricas = avaliar(carregar_frases(), vocabulario_do_csv(), args.limiar)
+    total = metricas["frases"]
+    print(f"Frases rotuladas:          {total}")
+    print(f"Chamadas ao LLM evitadas:  {metricas['chamadas_llm_evitadas']} ({metricas['chamadas_llm_evitadas'] / total:.0%})")
+    print(f"Acerto no caminho rápido:  {metricas['acerto_caminho_rapido']:.1%}")
+    print(f"Falsos atalhos:            {metricas['falsos_atalhos']}")
+    print(f"Acerto geral:              {metricas['acerto_geral']:.1%}")
+    for frase, esperado, resultado in metricas["erros"]:
+        print(f"  - {frase!r}: esperado {esperado}, obtido {resultado}")
+
+
+if __name__ == "__main__":
+    main()
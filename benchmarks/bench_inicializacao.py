@@ -0,0 +1,98 @@
+# benchmarks/bench_inicializacao.py
+"""
+Tempo de subida dos pontos de entrada, cada medição num processo Python novo (a
+importação dos módulos conta, como na vida real). Cenários:
+
+  * terminal (app/main.py) numa base já semeada: importação + conferência da semente;
+  * servidor MCP: importação de run_mcp_server e até a primeira busca respondida;
+  * serviço do agente: importação de run_agent_server.
+
+Com --comparar-com <ref git>, roda os mesmos cenários numa cópia (git worktree) do
+código naquela versão, para mostrar o ganho de uma mudança:
+
+    python benchmarks/bench_inicializacao.py --repeticoes 5 --comparar-com HEAD~1
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parent.parent
+
+# Código de cada cenário, executado com `python -c` a partir da raiz da árvore medida
+CENARIOS = {
+    "terminal: subida com base semeada": (
+        "import io, contextlib\n"
+        "import app.main as m\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    m.inicia_dados()\n"
+    ),
+    "servidor MCP: importação": "import run_mcp_server\n",
+    "servidor MCP: até a 1ª busca": (
+        "from fastapi.testclient import TestClient\n"
+        "import run_mcp_server\n"
+        "with TestClient(run_mcp_server.app) as cliente:\n"
+        "    cliente.post('/mcp/buscar_veiculos/', json={'marca': 'Toyota'}).raise_for_status()\n"
+    ),
+    "serviço do agente: importação": "import run_agent_server\n",
+}
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos por cenário (vale a mediana).")
+    parser.add_argument("--comparar-com", default=None, help="Ref git da versão de comparação (ex: HEAD~1).")
+    return parser.parse_args()
+
+
+def _rodar(arvore: Path, codigo: str, ambiente: dict) -> float:
+    inicio = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", codigo], cwd=arvore, env=ambiente, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - inicio
+
+
+def medir_arvore(arvore: Path, repeticoes: int) -> dict:
+    """Mediana (s) de cada cenário; a base SQLite é semeada uma vez antes das medições."""
+    diretorio = tempfile.mkdtemp(prefix="bench_inicio_")
+    ambiente = {
+        **os.environ,
+        "PYTHONPATH": str(arvore),
+        "DATABASE_URL": f"sqlite:///{diretorio}/inicio.db",
+        "AGENTE_CACHE_LLM": "false",
+    }
+    _rodar(arvore, CENARIOS["terminal: subida com base semeada"], ambiente) # Primeira carga da semente
+    return {
+        nome: statistics.median(_rodar(arvore, codigo, ambiente) for _ in range(repeticoes))
+        for nome, codigo in CENARIOS.items()
+    }
+
+
+def main():
+    args = _argumentos()
+    medicoes = {"atual": medir_arvore(RAIZ_DO_PROJETO, args.repeticoes)}
+
+    if args.comparar_com:
+        copia = Path(tempfile.mkdtemp(prefix="bench_inicio_ref_")) / "arvore"
+        subprocess.run(["git", "worktree", "add", "--detach", str(copia), args.comparar_com],
+                       cwd=RAIZ_DO_PROJETO, check=True, capture_output=True)
+        try:
+            medicoes[args.comparar_com] = medir_arvore(copia, args.repeticoes)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", str(copia)], cwd=RAIZ_DO_PROJETO, check=False)
+
+    versoes = list(medicoes)
+    print(f"Mediana de {args.repeticoes} processos por cenário (segundos, inclui subir o interpretador)\n")
+    print(f"{'cenário':<36}" + "".join(f"{v:>12}" for v in versoes))
+    for nome in CENARIOS:
+        print(f"{nome:<36}" + "".join(f"{medicoes[v][nome]:>12.3f}" for v in versoes))
+
+
+if __name__ == "__main__":
+    main()
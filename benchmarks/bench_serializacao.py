@@ -0,0 +1,127 @@
+# benchmarks/bench_serializacao.py
+"""
+Micro-benchmark do custo por linha para montar a resposta da busca, comparando:
+
+- ORM + Pydantic: `select(Veiculo)` hidrata objetos ORM, cada um validado por
+  `VeiculoResposta` e serializado com `VeiculoPagina.model_dump_json` (caminho padrão).
+- tuplas + JSON rápido: as mesmas 13 colunas lidas como tuplas e serializadas
+  direto por `serializar_pagina` (caminho de `campos` com todos os campos).
+- projeção + JSON rápido: só os campos exibidos pelo agente (`CAMPOS_EXIBIDOS`).
+
+Cada caminho é medido duas vezes: só a serialização (linhas já em memória) e a
+consulta completa (ler do banco + serializar). Roda sobre um SQLite temporário:
+
+    python benchmarks/bench_serializacao.py --linhas 50000 --repeticoes 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parent.parent
+if str(RAIZ_DO_PROJETO) not in sys.path:
+    sys.path.append(str(RAIZ_DO_PROJETO))
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=50_000, help="Quantidade de veículos sintéticos.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por caminho (vale a melhor).")
+    return parser.parse_args()
+
+
+def _popular_banco(quantidade: int):
+    """Gera `quantidade` veículos repetindo o CSV do projeto com modelos numerados."""
+    import pandas as pd
+    from sqlalchemy import insert
+    from app.database.models import Base, Veiculo
+    from app.database.session import engine
+    from scripts.populate_db import CHAVE_NATURAL
+
+    Base.metadata.create_all(bind=engine)
+    base = pd.read_csv(RAIZ_DO_PROJETO / "scripts" / "veiculos_fabricados_brasil_reais.csv")
+    # O CSV tem linhas repetidas pela chave natural (índice único): usa só uma de cada
+    base = base.drop_duplicates(subset=CHAVE_NATURAL)
+    base["transmissao_automatica"] = base["transmissao_automatica"].astype(bool)
+    registros = base.astype(object).where(base.notna(), None).to_dict("records")
+
+    lote = []
+    with engine.begin() as conexao:
+        for i in range(quantidade):
+            registro = dict(registros[i % len(registros)])
+            registro["modelo"] = f"{registro['modelo']} {i // len(registros)}"
+            lote.append(registro)
+        conexao.execute(insert(Veiculo), lote)
+
+
+def _melhor_tempo(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    args = _argumentos()
+    diretorio = tempfile.mkdtemp(prefix="bench_c2s_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{diretorio}/bench.db"
+
+    from sqlalchemy import select
+    from app.agent.conversa import CAMPOS_EXIBIDOS
+    from app.database.models import Veiculo
+    from app.database.session import SessionLocal
+    from app.mcp.indice_memoria import CAMPOS_VEICULO
+    from app.mcp.schemas import VeiculoPagina, VeiculoResposta
+    from app.mcp.server import serializar_pagina
+
+    print(f"Populando {args.linhas} veículos em {os.environ['DATABASE_URL']} ...")
+    _popular_banco(args.linhas)
+    campos_exibidos = ["id"] + CAMPOS_EXIBIDOS
+
+    def colunas(campos):
+        return [getattr(Veiculo, c) for c in campos]
+
+    def via_pydantic(veiculos):
+        itens = [VeiculoResposta.model_validate(v) for v in veiculos]
+        return VeiculoPagina(itens=itens).model_dump_json().encode()
+
+    def via_json_rapido(campos, linhas):
+        return serializar_pagina(campos, linhas, None)
+
+    with SessionLocal() as db:
+        objetos = db.execute(select(Veiculo)).scalars().all()
+        tuplas = db.execute(select(*colunas(CAMPOS_VEICULO))).all()
+        projetadas = db.execute(select(*colunas(campos_exibidos))).all()
+
+        caminhos = {
+            "ORM + Pydantic": (
+                lambda: via_pydantic(objetos),
+                lambda: via_pydantic(db.execute(select(Veiculo)).scalars().all()),
+            ),
+            "tuplas + JSON rápido": (
+                lambda: via_json_rapido(CAMPOS_VEICULO, tuplas),
+                lambda: via_json_rapido(CAMPOS_VEICULO, db.execute(select(*colunas(CAMPOS_VEICULO))).all()),
+            ),
+            f"projeção ({len(campos_exibidos)} campos)": (
+                lambda: via_json_rapido(campos_exibidos, projetadas),
+                lambda: via_json_rapido(campos_exibidos, db.execute(select(*colunas(campos_exibidos))).all()),
+            ),
+        }
+
+        print(f"\n{'caminho':<24} {'serialização':>16} {'consulta completa':>20}")
+        for nome, (serializar, consultar) in caminhos.items():
+            serializacao = _melhor_tempo(serializar, args.repeticoes)
+            # Sessão limpa a cada rodada: o caminho ORM não pode reaproveitar objetos do identity map
+            consulta = _melhor_tempo(lambda: (db.expunge_all(), consultar()), args.repeticoes)
+            print(
+                f"{nome:<24} {serializacao / args.linhas * 1e6:12.2f} µs/linha "
+                f"{consulta / args.linhas * 1e6:14.2f} µs/linha"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/bench_servico_agente.py
+"""
+Teste de carga do serviço do agente (run_agent_server.py) com um LLM falso.
+
+Cada usuário simulado abre uma sessão e conversa por alguns turnos, pensando um tempo
+entre eles. O LLM falso ocupa uma thread por `--latencia-llm` segundos (como o Ollama
+gerando em CPU) e a busca no MCP é simulada com alguns milissegundos. Parte das falas
+cai no caminho por regras e não passa pela fila do LLM.
+
+Para cada quantidade de sessões simultâneas, mostra a latência dos turnos (p50/p95),
+a vazão e quantos turnos falharam (503: fila do LLM cheia). Uma quantidade é
+"sustentada" quando o p95 fica abaixo de `--slo-s` sem recusas. Roda em processo (sem rede), via ASGI:
+
+    python benchmarks/bench_servico_agente.py --sessoes 5,10,20,40 --concorrentes 2
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parent.parent
+if str(RAIZ_DO_PROJETO) not in sys.path:
+    sys.path.append(str(RAIZ_DO_PROJETO))
+
+# Falas que vão para o LLM e falas que o extrator por regras resolve sozinho
+FALAS_LLM = ["olá, tudo bem?", "qual carro você recomenda para família?", "pode buscar", "e algo mais econômico?"]
+FALAS_REGRAS = ["quero um Toyota flex automático", "Fiat com 4 portas a partir de 2015"]
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessoes", default="5,10,20,40", help="Quantidades de sessões simultâneas a testar.")
+    parser.add_argument("--turnos", type=int, default=4, help="Turnos por sessão.")
+    parser.add_argument("--latencia-llm", type=float, default=0.5, help="Segundos por resposta do LLM falso.")
+    parser.add_argument("--pensar-s", type=float, default=2.0, help="Tempo médio do usuário entre turnos.")
+    parser.add_argument("--concorrentes", type=int, default=2, help="Chamadas simultâneas ao LLM (AGENTE_MAX_LLM_CONCORRENTES).")
+    parser.add_argument("--pendentes", type=int, default=64, help="Tamanho da fila do LLM (AGENTE_MAX_LLM_PENDENTES).")
+    parser.add_argument("--slo-s", type=float, default=3.0, help="p95 máximo aceitável por turno.")
+    return parser.parse_args()
+
+
+def _instalar_falsos(latencia_llm: float):
+    from app.agent import conversa
+    from app.agent.extrator_regras import VocabularioInventario
+
+    def llm_falso(mensagens, ao_receber_trecho=None):
+        time.sleep(latencia_llm)
+        return "Entendido!\nFILTROS_COLETADOS: combustivel=Flex"
+
+    def busca_falsa(filtros, limite=None, campos=None):
+        time.sleep(0.005)
+        return [{"marca": "Toyota", "modelo": "Corolla"}]
+
+    conversa.interagir_com_llm = llm_falso
+    conversa.consultar_veiculos_mcp = busca_falsa
+    conversa._vocabulario = VocabularioInventario.de_valores({"marca": ["Toyota", "Fiat"], "modelo": ["Corolla"]})
+
+
+async def _usuario(cliente, turnos: int, pensar_s: float, latencias: list, recusas: list):
+    sessao = (await cliente.post("/agente/sessoes/")).json()["sessao_id"]
+    for _ in range(turnos):
+        await asyncio.sleep(random.expovariate(1 / pensar_s))
+        fala = random.choice(FALAS_REGRAS if random.random() < 0.3 else FALAS_LLM)
+        inicio = time.perf_counter()
+        resposta = await cliente.post(f"/agente/sessoes/{sessao}/mensagens/", json={"texto": fala})
+        if resposta.status_code == 200:
+            latencias.append(time.perf_counter() - inicio)
+        else:
+            recusas.append(resposta.status_code)
+
+
+async def _rodada(app, quantidade: int, args) -> dict:
+    import httpx
+    from app.agent import servico
+    from app.agent.fila_llm import FilaLLMJusta
+    from app.agent.sessoes import ArmazemSessoesMemoria
+
+    fila = FilaLLMJusta(args.concorrentes, args.pendentes)
+    armazem = ArmazemSessoesMemoria(quantidade * 2, 3600)
+    app.dependency_overrides[servico.obter_fila] = lambda: fila
+    app.dependency_overrides[servico.obter_armazem] = lambda: armazem
+
+    latencias, recusas = [], []
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://agente", timeout=None) as cliente:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(_usuario(cliente, args.turnos, args.pensar_s, latencias, recusas) for _ in range(quantidade)))
+        duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    p95 = latencias[int(len(latencias) * 0.95) - 1] if latencias else float("nan")
+    return {
+        "sessoes": quantidade,
+        "p50": statistics.median(latencias) if latencias else float("nan"),
+        "p95": p95,
+        "turnos_s": len(latencias) / duracao,
+        "recusas": len(recusas),
+        "espera_fila_max": fila.estatisticas()["espera_max_s"],
+    }
+
+
+def main():
+    args = _argumentos()
+    random.seed(42)
+    _instalar_falsos(args.latencia_llm)
+    from run_agent_server import app
+
+    capacidade = args.concorrentes / args.latencia_llm
+    print(
+        f"LLM falso: {args.latencia_llm:.2f} s/resposta, {args.concorrentes} simultâneas "
+        f"(~{capacidade:.1f} turnos de LLM/s); pensar {args.pensar_s:.1f} s em média; SLO p95 {args.slo_s:.1f} s\n"
+    )
+    print(f"{'sessões':>8} {'p50 (s)':>9} {'p95 (s)':>9} {'turnos/s':>9} {'recusas':>8} {'fila máx (s)':>13}")
+    sustentadas = 0
+    for quantidade in (int(q) for q in args.sessoes.split(",")):
+        r = asyncio.run(_rodada(app, quantidade, args))
+        print(
+            f"{r['sessoes']:>8} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['turnos_s']:>9.1f} "
+            f"{r['recusas']:>8} {r['espera_fila_max']:>13.2f}"
+        )
+        if r["p95"] <= args.slo_s and not r["recusas"]:
+            sustentadas = max(sustentadas, quantidade)
+    print(f"\nMaior quantidade testada dentro do SLO: {sustentadas} sessões simultâneas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/bench_workers.py
+"""
+Compara a vazão do servidor MCP com 1 worker e com N workers (run_mcp_server.iniciar_com_workers),
+ambos servindo a partir do snapshot compartilhado do inventário (app/mcp/snapshot_inventario.py).
+
+Cada cenário sobe o servidor de verdade (uvicorn, processos separados) numa porta local,
+sobre um SQLite temporário com um catálogo sintético (benchmarks/catalogo.py). A carga vem de
+vários processos clientes, para o gerador não ser o gargalo. O cache de resultados fica
+desligado: toda requisição avalia os filtros no snapshot.
+
+    python benchmarks/bench_workers.py --linhas 100k --workers 4 --requisicoes 4000
+
+O ganho esperado é próximo de min(N, núcleos livres): com um único núcleo (ou com o
+gerador de carga disputando os mesmos núcleos) os dois cenários empatam.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parent.parent
+if str(RAIZ_DO_PROJETO) not in sys.path:
+    sys.path.append(str(RAIZ_DO_PROJETO))
+
+FILTROS = [
+    {"marca": "Toyota", "potencia_cv_min": 150},
+    {"combustivel": "Diesel", "transmissao_automatica": True},
+    {"ano_producao_inicial_min": 2015, "num_portas": 2},
+    {"modelo": "corolla"},
+]
+ESPERA_MAX_SUBIDA_S = 60
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", default="100k", help="Tamanho do catálogo sintético (ex: 10k, 1M).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Workers do cenário N.")
+    parser.add_argument("--requisicoes", type=int, default=4000, help="Requisições por cenário.")
+    parser.add_argument("--clientes", type=int, default=4, help="Processos geradores de carga.")
+    parser.add_argument("--concorrencia", type=int, default=16, help="Requisições em voo por processo cliente.")
+    return parser.parse_args()
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _subir_servidor(workers: int, porta: int, ambiente: dict) -> subprocess.Popen:
+    codigo = f"import run_mcp_server; run_mcp_server.iniciar_com_workers({workers}, '127.0.0.1', {porta})"
+    processo = subprocess.Popen(
+        [sys.executable, "-c", codigo], cwd=RAIZ_DO_PROJETO, env=ambiente,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    import httpx
+
+    limite = time.monotonic() + ESPERA_MAX_SUBIDA_S
+    while time.monotonic() < limite:
+        try:
+            # Uma busca por worker provável: o primeiro mapeamento do snapshot fica fora da medição
+            for _ in range(workers * 4):
+                httpx.post(f"http://127.0.0.1:{porta}/mcp/buscar_veiculos/", json=FILTROS[0], timeout=5).raise_for_status()
+            return processo
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError(f"O servidor com {workers} worker(s) não subiu em {ESPERA_MAX_SUBIDA_S} s.")
+
+
+def _gerar_carga(url: str, requisicoes: int, concorrencia: int) -> int:
+    """Processo cliente: dispara `requisicoes` buscas com `concorrencia` em voo."""
+    import httpx
+
+    async def executar():
+        semaforo = asyncio.Semaphore(concorrencia)
+        limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+        async with httpx.AsyncClient(base_url=url, limits=limites, timeout=30) as cliente:
+            async def uma(i: int):
+                async with semaforo:
+                    resposta = await cliente.post("/mcp/buscar_veiculos/", json=FILTROS[i % len(FILTROS)])
+                    resposta.raise_for_status()
+            await asyncio.gather(*(uma(i) for i in range(requisicoes)))
+        return requisicoes
+
+    return asyncio.run(executar())
+
+
+def medir(workers: int, args, ambiente: dict) -> float:
+    porta = _porta_livre()
+    servidor = _subir_servidor(workers, porta, ambiente)
+    try:
+        por_cliente = args.requisicoes // args.clientes
+        with ProcessPoolExecutor(args.clientes) as executor:
+            inicio = time.perf_counter()
+            futuros = [
+                executor.submit(_gerar_carga, f"http://127.0.0.1:{porta}", por_cliente, args.concorrencia)
+                for _ in range(args.clientes)
+            ]
+            total = sum(f.result() for f in futuros)
+            return total / (time.perf_counter() - inicio)
+    finally:
+        servidor.terminate()
+        servidor.wait(timeout=30)
+
+
+def main():
+    args = _argumentos()
+    diretorio = Path(tempfile.mkdtemp(prefix="bench_workers_"))
+    ambiente = {
+        **os.environ,
+        "PYTHONPATH": str(RAIZ_DO_PROJETO),
+        "DATABASE_URL": f"sqlite:///{diretorio / 'bench.db'}",
+        "MCP_SNAPSHOT_ARQUIVO": str(diretorio / "inventario.snapshot"),
+        "MCP_INDICE_MEMORIA": "true",
+        "MCP_SNAPSHOT_COMPARTILHADO": "true",
+        "MCP_CACHE_RESULTADOS": "false",
+        "LOG_TEMPOS_REQUISICOES": "false",
+        "DB_POOL_SIZE": "2",
+    }
+    os.environ.update(ambiente) # O loader abaixo roda neste processo (importado só agora)
+    from benchmarks.catalogo import gerar_catalogo, interpretar_quantidade
+    from scripts.populate_db import criar_tabelas_se_nao_existirem, popula_dados
+
+    linhas = interpretar_quantidade(args.linhas)
+    print(f"Gerando e carregando {linhas} veículos em {ambiente['DATABASE_URL']} ...")
+    csv = gerar_catalogo(diretorio / "catalogo.csv", linhas)
+    criar_tabelas_se_nao_existirem()
+    print(popula_dados(str(csv)))
+
+    print(f"Núcleos: {os.cpu_count()} | clientes: {args.clientes} x {args.concorrencia} em voo")
+    resultados = {}
+    for workers in sorted({1, args.workers}):
+        resultados[workers] = medir(workers, args, ambiente)
+        print(f"{workers:>2} worker(s): {resultados[workers]:8.1f} req/s")
+    if len(resultados) > 1:
+        print(f"Ganho com {args.workers} workers: {resultados[args.workers] / resultados[1]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
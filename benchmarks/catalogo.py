@@ -0,0 +1,97 @@
+# benchmarks/catalogo.py
+"""
+Gerador de catálogos sintéticos grandes a partir de scripts/veiculos_fabricados_brasil_reais.csv.
+
+Cada linha gerada é uma linha real do CSV numa "variante": o modelo ganha uma versão
+("Corolla XEi", "Corolla GLi 3", ...), os anos recuam até 4 anos e a potência sobe em
+passos de 5 cv, conforme a variante. Tanque, porta-malas, carga e autonomia variam ±10%.
+Dentro de uma variante o deslocamento é o mesmo para todas as linhas, e entre variantes o
+modelo muda: a chave natural (marca, modelo, ano, potência) nunca se repete, então
+`popula_dados` carrega exatamente `linhas` veículos.
+
+O arquivo é escrito em blocos (memória constante), e a mesma semente gera o mesmo catálogo:
+
+    python -m benchmarks.catalogo --linhas 1M --saida /tmp/catalogo_1M.csv
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parent.parent
+if str(RAIZ_DO_PROJETO) not in sys.path:
+    sys.path.append(str(RAIZ_DO_PROJETO))
+
+from scripts.populate_db import CHAVE_NATURAL
+
+CSV_BASE = RAIZ_DO_PROJETO / "scripts" / "veiculos_fabricados_brasil_reais.csv"
+VERSOES = ["", "LX", "EX", "XEi", "GLi", "Sport", "Comfort", "Highline", "Trend", "LTZ", "Attractive", "Titanium"]
+COLUNAS_COM_VARIACAO = ["porta_malas_litros", "capacidade_carga_kg", "tanque_litros", "autonomia_km_l"]
+TAMANHO_BLOCO = 100_000
+
+
+def interpretar_quantidade(texto: str) -> int:
+    """ "10k" -> 10_000, "1M" -> 1_000_000, "2500" -> 2500."""
+    texto = texto.strip().lower().replace("_", "")
+    multiplicador = {"k": 1_000, "m": 1_000_000}.get(texto[-1:], 1)
+    return int(float(texto.rstrip("km")) * multiplicador)
+
+
+def carregar_base(csv_base: Path = CSV_BASE) -> pd.DataFrame:
+    base = pd.read_csv(csv_base, dtype={"transmissao_automatica": str})
+    return base.drop_duplicates(subset=CHAVE_NATURAL).reset_index(drop=True)
+
+
+def gerar_bloco(base: pd.DataFrame, inicio: int, fim: int, semente: int) -> pd.DataFrame:
+    """Linhas [inicio, fim) do catálogo (cada bloco tem sua própria semente derivada)."""
+    indices = np.arange(inicio, fim)
+    variante = indices // len(base)
+    bloco = base.iloc[indices % len(base)].reset_index(drop=True)
+
+    versao = np.array(VERSOES, dtype=object)[variante % len(VERSOES)]
+    geracao = variante // len(VERSOES)
+    sufixo = pd.Series(versao).str.cat(
+        pd.Series(np.where(geracao > 0, geracao.astype(str), "")), sep=" "
+    ).str.strip()
+    bloco["modelo"] = bloco["modelo"].str.cat(sufixo, sep=" ").str.strip()
+
+    recuo = variante % 5
+    bloco["ano_producao_inicial"] = bloco["ano_producao_inicial"] - recuo
+    bloco["ano_producao_final"] = bloco["ano_producao_final"] - recuo
+    bloco["potencia_cv"] = bloco["potencia_cv"] + 5 * ((variante // 5) % 8)
+
+    gerador = np.random.default_rng([semente, inicio])
+    for coluna in COLUNAS_COM_VARIACAO:
+        fator = gerador.uniform(0.9, 1.1, size=len(bloco))
+        bloco[coluna] = (bloco[coluna] * fator).round(1 if coluna == "autonomia_km_l" else 0)
+    return bloco
+
+
+def gerar_catalogo(destino: Path, linhas: int, semente: int = 42, tamanho_bloco: int = TAMANHO_BLOCO) -> Path:
+    """Escreve um CSV com `linhas` veículos (mesmas colunas do CSV do projeto) em `destino`."""
+    base = carregar_base()
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with open(destino, "w", newline="") as arquivo:
+        for inicio in range(0, linhas, tamanho_bloco):
+            bloco = gerar_bloco(base, inicio, min(linhas, inicio + tamanho_bloco), semente)
+            bloco.to_csv(arquivo, index=False, header=(inicio == 0))
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", default="10k", help="Quantidade de veículos (ex: 10k, 1M, 10M).")
+    parser.add_argument("--saida", required=True, help="Arquivo CSV a gerar.")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    linhas = interpretar_quantidade(args.linhas)
+    destino = gerar_catalogo(Path(args.saida), linhas, args.semente)
+    print(f"{linhas} veículos gravados em {destino} ({destino.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
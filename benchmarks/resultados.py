@@ -0,0 +1,133 @@
+# benchmarks/resultados.py
+"""
+Arquivo de resultados dos benchmarks e comparação entre execuções.
+
+Formato (JSON):
+
+    {
+      "formato": "c2s-bench/1",
+      "criado_em": "2026-01-01T12:00:00",
+      "ambiente": {"python": "3.11.7", "plataforma": "...", "sqlite": "3.45.1", "commit": "abc1234"},
+      "parametros": {"linhas": 100000, ...},
+      "metricas": {
+        "busca.marca.p95_ms": {"valor": 3.2, "unidade": "ms", "melhor": "menor"},
+        "ingestao.linhas_por_s": {"valor": 81000.0, "unidade": "linhas/s", "melhor": "maior"}
+      }
+    }
+
+`melhor` diz a direção boa da métrica. Na comparação, uma métrica regrediu quando piorou
+mais que a tolerância relativa (padrão 15%). Só vale comparar execuções com os mesmos
+`parametros` e na mesma máquina:
+
+    python -m benchmarks.resultados base.json atual.json --tolerancia 0.15
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+FORMATO = "c2s-bench/1"
+TOLERANCIA_PADRAO = 0.15
+
+
+def metrica(valor: float, unidade: str, melhor: str) -> Dict[str, Any]:
+    if melhor not in ("menor", "maior"):
+        raise ValueError(f"'melhor' deve ser 'menor' ou 'maior', não {melhor!r}")
+    return {"valor": float(valor), "unidade": unidade, "melhor": melhor}
+
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def montar_resultados(parametros: Dict[str, Any], metricas: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "formato": FORMATO,
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "commit": _commit_atual(),
+        },
+        "parametros": parametros,
+        "metricas": metricas,
+    }
+
+
+def salvar(resultados: Dict[str, Any], caminho: Path) -> None:
+    Path(caminho).write_text(json.dumps(resultados, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def carregar(caminho: Path) -> Dict[str, Any]:
+    resultados = json.loads(Path(caminho).read_text(encoding="utf-8"))
+    if resultados.get("formato") != FORMATO:
+        raise ValueError(f"{caminho}: formato {resultados.get('formato')!r} não suportado (esperado {FORMATO}).")
+    return resultados
+
+
+@dataclass
+class Comparacao:
+    nome: str
+    base: float
+    atual: float
+    unidade: str
+    variacao: float      # Relativa, positiva = piorou
+    regrediu: bool
+
+
+def comparar(base: Dict[str, Any], atual: Dict[str, Any], tolerancia: float = TOLERANCIA_PADRAO) -> List[Comparacao]:
+    """Compara as métricas presentes nos dois resultados (as que só existem em um são ignoradas)."""
+    comparacoes = []
+    for nome in sorted(set(base["metricas"]) & set(atual["metricas"])):
+        antes, depois = base["metricas"][nome], atual["metricas"][nome]
+        if antes["valor"] == 0:
+            variacao = 0.0 if depois["valor"] == 0 else float("inf")
+        else:
+            variacao = (depois["valor"] - antes["valor"]) / abs(antes["valor"])
+        if antes["melhor"] == "maior":
+            variacao = -variacao
+        comparacoes.append(Comparacao(
+            nome, antes["valor"], depois["valor"], antes["unidade"], variacao, variacao > tolerancia,
+        ))
+    return comparacoes
+
+
+def imprimir_comparacao(comparacoes: List[Comparacao]) -> None:
+    print(f"{'métrica':<40} {'base':>12} {'atual':>12} {'variação':>10}")
+    for c in comparacoes:
+        marca = "  << REGRESSÃO" if c.regrediu else ""
+        print(f"{c.nome:<40} {c.base:>12.4g} {c.atual:>12.4g} {c.variacao:>+9.1%}{marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("atual", type=Path)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO, help="Piora relativa aceitável.")
+    args = parser.parse_args()
+
+    base, atual = carregar(args.base), carregar(args.atual)
+    if base["parametros"] != atual["parametros"]:
+        print("AVISO: os parâmetros das execuções diferem; a comparação pode não fazer sentido.")
+    comparacoes = comparar(base, atual, args.tolerancia)
+    imprimir_comparacao(comparacoes)
+    regressoes = [c for c in comparacoes if c.regrediu]
+    print(f"\n{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}.")
+    sys.exit(1 if regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
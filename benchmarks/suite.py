@@ -0,0 +1,211 @@
+# benchmarks/suite.py
+"""
+Suíte de benchmarks do projeto, totalmente offline (SQLite temporário e Ollama falso).
+
+Mede:
+  * ingestão: `popula_dados` carregando um catálogo sintético (benchmarks/catalogo.py), em linhas/s;
+  * busca: latência p50/p95/p99 de /mcp/buscar_veiculos/ por mistura de filtros (cache de
+    resultados desligado: toda requisição vai ao banco);
+  * parse: respostas/s de `parse_filtros_da_resposta_llm`;
+  * agente: latência de um turno pelo caminho do LLM com um `ollama.chat` falso, ou seja,
+    o custo do próprio agente (contexto, parse, busca) sem o tempo de geração.
+
+Grava um arquivo de resultados (benchmarks/resultados.py) e, com --comparar, compara com
+uma execução anterior e sai com código 1 se alguma métrica piorou além da tolerância:
+
+    python -m benchmarks.suite --linhas 100k --saida base.json
+    python -m benchmarks.suite --linhas 100k --saida atual.json --comparar base.json
+"""
+import argparse
+import asyncio
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parent.parent
+if str(RAIZ_DO_PROJETO) not in sys.path:
+    sys.path.append(str(RAIZ_DO_PROJETO))
+
+from benchmarks import resultados as arquivo_resultados
+
+# Misturas de filtros representativas do que o agente envia. Cada mistura alterna entre
+# algumas variações para não medir sempre a mesma consulta.
+MISTURAS_FILTROS = {
+    "sem_filtros": [{}],
+    "marca": [{"marca": "Toyota"}, {"marca": "Fiat"}, {"marca": "Volkswagen"}],
+    "marca_combustivel": [{"marca": "Chevrolet", "combustivel": "Flex"}, {"marca": "Toyota", "combustivel": "Híbrido"}],
+    "faixa_potencia": [{"potencia_cv_min": 150, "potencia_cv_max": 200}, {"potencia_cv_min": 300}],
+    "faixa_ano": [{"ano_producao_inicial_min": 2015, "ano_producao_inicial_max": 2018}],
+    "modelo_texto": [{"modelo": "corolla"}, {"modelo": "onix"}, {"modelo": "inexistente"}],
+    "combinado": [
+        {"marca": "Volkswagen", "combustivel": "Flex", "num_portas": 4, "transmissao_automatica": True,
+         "ano_producao_inicial_min": 2012},
+    ],
+}
+
+RESPOSTAS_LLM = [
+    "Ótimo! Vou procurar para você.\nFILTROS_COLETADOS: marca=Toyota, combustivel=Flex, ano_producao_inicial_min=2018",
+    "Entendi, algo econômico.\nFILTROS_COLETADOS: autonomia_km_l_min=12.5, transmissao_automatica=sim",
+    "Claro! Me diga a marca que prefere.\nFILTROS_COLETADOS: nenhum",
+    "Perfeito.\nFILTROS_COLETADOS: potencia_cv_min=150, potencia_cv_max=250, num_portas=4\n"
+    "Atualizando...\nFILTROS_COLETADOS: marca=Honda",
+]
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", default="100k", help="Tamanho do catálogo sintético (ex: 10k, 1M, 10M).")
+    parser.add_argument("--requisicoes", type=int, default=200, help="Requisições de busca por mistura de filtros.")
+    parser.add_argument("--parses", type=int, default=50_000, help="Respostas analisadas no benchmark de parse.")
+    parser.add_argument("--turnos", type=int, default=50, help="Turnos do agente com o Ollama falso.")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", type=Path, default=Path("resultados_bench.json"))
+    parser.add_argument("--comparar", type=Path, default=None, help="Resultados de uma execução anterior.")
+    parser.add_argument("--tolerancia", type=float, default=arquivo_resultados.TOLERANCIA_PADRAO)
+    return parser.parse_args()
+
+
+def percentil(valores, p: float) -> float:
+    """Percentil pelo posto mais próximo (valores não precisam estar ordenados)."""
+    ordenados = sorted(valores)
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+def _metricas_latencia(prefixo: str, latencias_s, metricas: dict) -> None:
+    for p in (50, 95, 99):
+        metricas[f"{prefixo}.p{p}_ms"] = arquivo_resultados.metrica(percentil(latencias_s, p) * 1000, "ms", "menor")
+
+
+def medir_ingestao(csv: Path, linhas: int, metricas: dict) -> None:
+    from scripts.populate_db import criar_tabelas_se_nao_existirem, popula_dados
+
+    criar_tabelas_se_nao_existirem()
+    inicio = time.perf_counter()
+    mensagem = popula_dados(str(csv))
+    duracao = time.perf_counter() - inicio
+    if mensagem.startswith("Erro"):
+        raise RuntimeError(mensagem)
+    metricas["ingestao.linhas_por_s"] = arquivo_resultados.metrica(linhas / duracao, "linhas/s", "maior")
+    metricas["ingestao.duracao_s"] = arquivo_resultados.metrica(duracao, "s", "menor")
+
+
+def medir_busca(cliente, requisicoes: int, metricas: dict) -> None:
+    for nome, variacoes in MISTURAS_FILTROS.items():
+        cliente.post("/mcp/buscar_veiculos/", json=variacoes[0]).raise_for_status() # Aquecimento
+        latencias = []
+        for i in range(requisicoes):
+            inicio = time.perf_counter()
+            cliente.post("/mcp/buscar_veiculos/", json=variacoes[i % len(variacoes)]).raise_for_status()
+            latencias.append(time.perf_counter() - inicio)
+        _metricas_latencia(f"busca.{nome}", latencias, metricas)
+
+
+def medir_parse(quantidade: int, metricas: dict) -> None:
+    from app.agent.conversa import parse_filtros_da_resposta_llm
+
+    inicio = time.perf_counter()
+    for i in range(quantidade):
+        parse_filtros_da_resposta_llm(RESPOSTAS_LLM[i % len(RESPOSTAS_LLM)])
+    metricas["parse_llm.respostas_por_s"] = arquivo_resultados.metrica(
+        quantidade / (time.perf_counter() - inicio), "respostas/s", "maior"
+    )
+
+
+def _instalar_ollama_falso(cliente) -> None:
+    """`ollama.chat` responde na hora, em trechos; a busca do agente vai ao servidor MCP em processo."""
+    import ollama
+    from app.agent import conversa
+    from app.agent.extrator_regras import VocabularioInventario
+
+    def chat_falso(model, messages, stream=True, options=None):
+        resposta = "Separei algumas opções para você!\nFILTROS_COLETADOS: marca=Toyota, combustivel=Flex"
+        for i in range(0, len(resposta), 8):
+            yield {"message": {"content": resposta[i:i + 8]}}
+
+    def consultar_falso(filtros, limite=None, campos=None):
+        parametros = {k: v for k, v in {"limite": limite, "campos": ",".join(campos) if campos else None}.items() if v}
+        resposta = cliente.post("/mcp/buscar_veiculos/", json=filtros, params=parametros)
+        resposta.raise_for_status()
+        return resposta.json()["itens"]
+
+    ollama.chat = chat_falso
+    conversa.consultar_veiculos_mcp = consultar_falso
+    conversa._vocabulario = VocabularioInventario.de_valores(cliente.get("/mcp/vocabulario/").json())
+
+
+def medir_turnos_agente(cliente, turnos: int, metricas: dict) -> None:
+    from app.agent.conversa import SessaoConversa, processar_turno
+
+    _instalar_ollama_falso(cliente)
+
+    async def rodar():
+        latencias, caminhos = [], set()
+        for _ in range(turnos):
+            sessao = SessaoConversa()
+            inicio = time.perf_counter()
+            resultado = await processar_turno(sessao, "me indica um carro bom pra família, pode buscar")
+            latencias.append(time.perf_counter() - inicio)
+            caminhos.add(resultado.caminho)
+        return latencias, caminhos
+
+    latencias, caminhos = asyncio.run(rodar())
+    if caminhos != {"llm"}:
+        raise RuntimeError(f"Os turnos do benchmark deveriam passar pelo LLM, mas seguiram {caminhos}.")
+    _metricas_latencia("agente.turno_llm", latencias, metricas)
+
+
+def main():
+    args = _argumentos()
+    diretorio = Path(tempfile.mkdtemp(prefix="bench_c2s_"))
+    # Antes de importar `app` (inclusive via benchmarks.catalogo): a configuração é lida na importação
+    os.environ["DATABASE_URL"] = f"sqlite:///{diretorio}/bench.db"
+    os.environ["MCP_CACHE_RESULTADOS"] = "false"
+    os.environ["AGENTE_CACHE_LLM"] = "false"
+    os.environ["AGENTE_LOG_NIVEL"] = "WARNING"
+    from benchmarks.catalogo import gerar_catalogo, interpretar_quantidade
+
+    linhas = interpretar_quantidade(args.linhas)
+
+    print(f"Gerando catálogo de {linhas} veículos em {diretorio} ...")
+    csv = gerar_catalogo(diretorio / "catalogo.csv", linhas, args.semente)
+
+    metricas = {}
+    medir_ingestao(csv, linhas, metricas)
+
+    from fastapi.testclient import TestClient
+    from run_mcp_server import app
+
+    with TestClient(app) as cliente:
+        medir_busca(cliente, args.requisicoes, metricas)
+        medir_turnos_agente(cliente, args.turnos, metricas)
+    medir_parse(args.parses, metricas)
+
+    parametros = {
+        "linhas": linhas, "requisicoes": args.requisicoes, "parses": args.parses,
+        "turnos": args.turnos, "semente": args.semente,
+    }
+    atual = arquivo_resultados.montar_resultados(parametros, metricas)
+    arquivo_resultados.salvar(atual, args.saida)
+
+    print(f"\n{'métrica':<40} {'valor':>12}")
+    for nome, dados in metricas.items():
+        print(f"{nome:<40} {dados['valor']:>12.4g} {dados['unidade']}")
+    print(f"\nResultados gravados em {args.saida}")
+
+    if args.comparar:
+        base = arquivo_resultados.carregar(args.comparar)
+        if base["parametros"] != atual["parametros"]:
+            print("AVISO: os parâmetros das execuções diferem; a comparação pode não fazer sentido.")
+        comparacoes = arquivo_resultados.comparar(base, atual, args.tolerancia)
+        print()
+        arquivo_resultados.imprimir_comparacao(comparacoes)
+        if any(c.regrediu for c in comparacoes):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# run_agent_server.py
+from contextlib import asynccontextmanager
+import logging
+from fastapi import FastAPI
+import uvicorn
+
+import sys
+from pathlib import Path
+project_root = Path(__file__).resolve().parent
+if str(project_root) not in sys.path: # Evita adicionar repetidamente se já estiver
+    sys.path.append(str(project_root))
+
+from app.agent.servico import router as agente_router
+from app.core.config import AGENTE_LOG_NIVEL, SERVIDOR_LOG_NIVEL
+from app.core.instrumentacao import instrumentar_app
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tempos por requisição ("app.tempos") e por etapa dos turnos ("app.agent")
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    logging.getLogger("app.tempos").setLevel(SERVIDOR_LOG_NIVEL)
+    logging.getLogger("app.agent").setLevel(AGENTE_LOG_NIVEL)
+    yield
+
+app = FastAPI(
+    title="Serviço do Agente Alfred - Desafio C2S Veículos",
+    description="Conversas com o agente (HTTP e WebSocket), várias sessões por processo.",
+    version="0.1.0",
+    lifespan=lifespan,
+)
+
+app.include_router(agente_router)
+instrumentar_app(app) # Métricas por rota, etapas dos turnos e GET /metrics (formato Prometheus)
+
+if __name__ == "__main__":
+    print("Iniciando o serviço do agente em http://localhost:8001 (o servidor MCP deve estar em execução)")
+    print("Documentação da API (Swagger UI): http://localhost:8001/docs")
+    # Um worker só: as sessões ficam na memória do processo
+    uvicorn.run(
+        "run_agent_server:app",
+        host="0.0.0.0",
+        port=8001,
+    )
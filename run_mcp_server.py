@@ -1,4 +1,9 @@
 # run_mcp_server.py
+from contextlib import asynccontextmanager, suppress
+import argparse
+import asyncio
+import logging
+import os
 from fastapi import FastAPI
 import uvicorn
 
@@ -9,22 +14,74 @@ if str(project_root) not in sys.path: # Evita adicionar repetidamente se já est
     sys.path.append(str(project_root))
 
 from app.mcp.server import router as mcp_router
+from app.database.session import aquecer_pool_async, descartar_engines_async
+from app.core.config import DB_AQUECER_POOL, SERVIDOR_LOG_NIVEL, SERVIDOR_WORKERS, MCP_SNAPSHOT_ARQUIVO
+from app.core.instrumentacao import instrumentar_app
+
+ESPERA_MAX_AQUECIMENTO_S = 5
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Log JSON de tempos por requisição (logger "app.tempos"); o resto da aplicação em WARNING
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    logging.getLogger("app.tempos").setLevel(SERVIDOR_LOG_NIVEL)
+    # As conexões do pool abrem em segundo plano: o servidor já aceita requisições, e um
+    # banco momentaneamente fora do ar não impede a subida
+    aquecimento = asyncio.create_task(aquecer_pool_async()) if DB_AQUECER_POOL else None
+    yield
+    if aquecimento is not None:
+        # Espera o aquecimento terminar (as conexões voltam ao pool antes do dispose)
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(aquecimento, ESPERA_MAX_AQUECIMENTO_S)
+    # Encerra as conexões do pool assíncrono ao desligar o servidor
+    await descartar_engines_async()
 
 app = FastAPI(
     title="Servidor MCP - Desafio C2S Veículos",
     description="Este servidor implementa o 'Model Context Protocol' para busca de veículos.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 app.include_router(mcp_router)
+instrumentar_app(app) # Métricas por rota e GET /metrics (formato Prometheus)
+
+
+def iniciar_com_workers(workers: int, host: str = "0.0.0.0", porta: int = 8000):
+    """
+    Modo de produção: `workers` processos, sem reload. Todos respondem a partir do mesmo
+    snapshot do inventário, mapeado em memória (app/mcp/snapshot_inventario.py), que é
+    publicado aqui antes de os workers subirem.
+    """
+    # Os workers são processos novos e leem a configuração do ambiente ao importar
+    os.environ.setdefault("MCP_INDICE_MEMORIA", "true")
+    os.environ.setdefault("MCP_SNAPSHOT_COMPARTILHADO", "true")
+    if os.environ["MCP_SNAPSHOT_COMPARTILHADO"].lower() in ("1", "true", "sim"):
+        from app.mcp.snapshot_inventario import publicar_snapshot_do_banco
+        try:
+            total = publicar_snapshot_do_banco(MCP_SNAPSHOT_ARQUIVO)
+            print(f"Snapshot do inventário publicado ({total} veículos) em {MCP_SNAPSHOT_ARQUIVO}")
+        except Exception as e:
+            # Banco fora do ar na subida: o primeiro worker que atender uma busca publica
+            print(f"Aviso: snapshot do inventário não publicado na subida: {e}")
+    uvicorn.run("run_mcp_server:app", host=host, port=porta, workers=workers)
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor MCP de busca de veículos.")
+    parser.add_argument("--workers", type=int, default=SERVIDOR_WORKERS,
+                        help="Processos do servidor (1 = desenvolvimento, com reload).")
+    args = parser.parse_args()
+
     print("Iniciando servidor MCP FastAPI em http://localhost:8000")
     print("Documentação da API (Swagger UI): http://localhost:8000/docs")
     print("Documentação alternativa (ReDoc): http://localhost:8000/redoc")
-    uvicorn.run(
-        "run_mcp_server:app", 
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
\ No newline at end of file
+    if args.workers > 1:
+        iniciar_com_workers(args.workers)
+    else:
+        uvicorn.run(
+            "run_mcp_server:app", 
+            host="0.0.0.0",
+            port=8000,
+            reload=True
+        )
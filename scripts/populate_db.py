@@ -1,111 +1,215 @@
-import pandas as pd
+import csv
+import hashlib
+import io
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import Session
-from app.database.session import SessionLocal, engine
-from app.database.models import Veiculo, Base
+from app.core.config import MCP_SNAPSHOT_ARQUIVO, MCP_SNAPSHOT_COMPARTILHADO
+from app.database.session import SessionLocal, obter_engine
+from app.database.models import Veiculo, Base, COLUNAS_DE_BUSCA, MetadadoSistema
+from app.database.texto import dobrar_texto
+from app.database.eventos import EscopoAlteracao, notificar_dados_alterados
+from app.database.migracoes import aplicar_migracoes
+from app.database.versao_dados import incrementar_versao_dados, registrar_escopo
+
+if TYPE_CHECKING:
+    import pandas as pd # Importado só na carga: quem apenas confere a semente não paga o pandas
+
+# Quantidade de linhas do CSV processadas por vez: a memória usada pelo loader
+# depende deste valor, e não do tamanho do arquivo.
+TAMANHO_LOTE_CSV = 50_000
+
+# Critério de duplicidade (coberto pelo índice único uq_veiculos_chave_natural)
+CHAVE_NATURAL = ["marca", "modelo", "ano_producao_inicial", "potencia_cv"]
+
+COLUNAS_INTEIRAS = [
+    "ano_producao_inicial", "ano_producao_final", "potencia_cv",
+    "num_portas", "porta_malas_litros", "tanque_litros",
+]
+COLUNAS_DECIMAIS = ["capacidade_carga_kg", "autonomia_km_l"]
+# Colunas vindas do CSV, na ordem do cabeçalho (são as que entram no hash da linha)
+COLUNAS_DADOS = [
+    "marca", "modelo", "ano_producao_inicial", "ano_producao_final", "potencia_cv",
+    "combustivel", "num_portas", "porta_malas_litros", "transmissao_automatica",
+    "capacidade_carga_kg", "tanque_litros", "autonomia_km_l",
+]
+COLUNAS_CARGA = [*COLUNAS_DADOS, *COLUNAS_DE_BUSCA.values(), "hash_linha"]
+
 
 def criar_tabelas_se_nao_existirem():
     """
     Cria todas as tabelas definidas nos modelos SQLAlchemy (herdadas de Base)
-    no banco de dados conectado pelo engine, caso ainda não existam.
+    no banco de dados conectado pelo engine, caso ainda não existam, e aplica as
+    migrações de esquema pendentes (app/database/migracoes.py).
     """
     try:
         print("Verificando e criando tabelas, se necessário...")
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=obter_engine())
+        aplicar_migracoes_pendentes()
         print("Tabelas prontas.")
     except Exception as e:
         print(f"Erro ao criar tabelas: {e}")        
         raise
 
-def popula_dados(csv_file_path: str) -> str:
+
+def aplicar_migracoes_pendentes():
+    """Aplica as migrações de esquema ainda não registradas no banco (app/database/migracoes.py)."""
+    for migracao in aplicar_migracoes(obter_engine()):
+        print(f"Migração {migracao.versao} aplicada: {migracao.descricao}.")
+
+
+def normalizar_lote(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Converte os tipos de um lote do CSV com operações vetorizadas do pandas,
+    descarta linhas sem os campos da chave natural e duplicatas dentro do lote.
     """
-    Popula o banco de dados com dados de veículos de um arquivo CSV.
-    Verifica a existência de veículos antes de inserir para evitar duplicatas.
+    import pandas as pd
+
+    # O CSV contém 'True'/'False' como strings
+    df["transmissao_automatica"] = df["transmissao_automatica"].astype(str).str.strip().str.lower().map(
+        {"true": True, "false": False}
+    ).astype(pd.BooleanDtype()) # Usa BooleanDtype para permitir <NA>
+
+    # Valores como "2021.0" ou "470.0" viram inteiros; vazios viram <NA>
+    for coluna in COLUNAS_INTEIRAS:
+        df[coluna] = pd.to_numeric(df[coluna], errors="coerce").round().astype("Int64")
+    for coluna in COLUNAS_DECIMAIS:
+        df[coluna] = pd.to_numeric(df[coluna], errors="coerce")
+    for coluna in ["marca", "modelo", "combustivel"]:
+        df[coluna] = df[coluna].astype("string").str.strip()
+
+    # Colunas de busca: dobrar_texto é aplicado uma vez por valor distinto e espalhado
+    # pelas linhas via códigos do factorize (o insert em lote não passa pelos eventos do ORM)
+    for original, sombra in COLUNAS_DE_BUSCA.items():
+        codigos, distintos = pd.factorize(df[original])
+        dobrados = pd.array([dobrar_texto(v) for v in distintos] + [pd.NA], dtype="string")
+        df[sombra] = dobrados[codigos] # código -1 (valor nulo) cai no <NA> do final
+
+    df = df.dropna(subset=CHAVE_NATURAL).drop_duplicates(subset=CHAVE_NATURAL)
+    df["hash_linha"] = [hash_registro(registro) for registro in _registros(df[COLUNAS_DADOS])]
+    return df[COLUNAS_CARGA]
+
+
+def _texto_canonico(valor: Any) -> str:
+    """Valor em texto estável entre o lote do pandas e a linha lida do banco (nulo vira "")."""
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return "1" if valor else "0"
+    if isinstance(valor, float):
+        return repr(valor)
+    return str(valor)
+
+
+def hash_registro(registro: Mapping[str, Any]) -> str:
+    """Hash (blake2b, 32 hex) dos valores de COLUNAS_DADOS de um veículo, já normalizados."""
+    conteudo = "\x1f".join(_texto_canonico(registro[coluna]) for coluna in COLUNAS_DADOS)
+    return hashlib.blake2b(conteudo.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _registros(lote: "pd.DataFrame") -> List[Dict[str, Any]]:
+    """Linhas do lote como dicts de tipos Python, com None no lugar de <NA>/NaN."""
+    return lote.astype(object).where(lote.notna(), None).to_dict("records")
+
+
+def _inserir_registros(db: Session, registros: List[Dict[str, Any]], dialeto) -> int:
+    """INSERT ... ON CONFLICT DO NOTHING em executemany (SQLite e demais bancos)."""
+    comando = dialeto.insert(Veiculo.__table__).on_conflict_do_nothing(index_elements=CHAVE_NATURAL)
+    return db.execute(comando, registros).rowcount
+
+
+def _inserir_com_executemany(db: Session, lote: "pd.DataFrame", dialeto) -> int:
+    return _inserir_registros(db, _registros(lote), dialeto)
+
+
+def _inserir_com_copy(db: Session, lote: "pd.DataFrame") -> int:
+    """
+    Postgres: COPY do lote para uma tabela temporária e um único
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING para a tabela definitiva.
+    """
+    colunas = ", ".join(COLUNAS_CARGA)
+    db.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS veiculos_carga AS SELECT {colunas} FROM veiculos WITH NO DATA"
+    ))
+    db.execute(text("TRUNCATE veiculos_carga"))
+
+    buffer = io.StringIO()
+    lote.to_csv(buffer, index=False, header=False, quoting=csv.QUOTE_MINIMAL)
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY veiculos_carga ({colunas}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+    resultado = db.execute(text(
+        f"INSERT INTO veiculos ({colunas}) SELECT {colunas} FROM veiculos_carga "
+        f"ON CONFLICT ({', '.join(CHAVE_NATURAL)}) DO NOTHING"
+    ))
+    return resultado.rowcount
+
+
+def popula_dados(csv_file_path: str, tamanho_lote: int = TAMANHO_LOTE_CSV) -> str:
+    """
+    Popula o banco de dados com dados de veículos de um arquivo CSV, em lotes.
+    Duplicatas (pela chave natural) são descartadas pelo próprio banco, via índice único.
 
     Args:
         csv_file_path (str): O caminho para o arquivo CSV contendo os dados dos veículos.
+        tamanho_lote (int): Quantidade de linhas do CSV lidas e gravadas por vez.
 
     Returns:
-        str: Mensagem indicando o resultado da operação.
+        str: Mensagem indicando o resultado da operação (com a vazão em linhas/s).
     """
+    import pandas as pd
+
     db: Session = SessionLocal()
     novos_veiculos_adicionados = 0
+    linhas_lidas = 0
+    inicio = time.perf_counter()
 
     try:
-        # Lê o arquivo CSV para um DataFrame do Pandas
+        nome_dialeto = db.get_bind().dialect.name
+        usar_copy = nome_dialeto == "postgresql" and db.get_bind().dialect.driver == "psycopg2"
+        dialeto = postgresql if nome_dialeto == "postgresql" else sqlite
+
+        # Lê o arquivo CSV em pedaços para manter a memória limitada
         # 'na_values' garante que strings vazias sejam tratadas como NaN (Not a Number)
-        # 'sep' especifica o delimitador do CSV
-        df = pd.read_csv(csv_file_path, sep=',', na_values=['', 'NA', 'N/A'])
-
-        # Converte a coluna 'transmissao_automatica' de string para booleanos
-        # O CSV contém 'True'/'False' como strings [cite: 1]
-        if 'transmissao_automatica' in df.columns:
-            df['transmissao_automatica'] = df['transmissao_automatica'].astype(str).str.strip().str.lower().map(
-                {'true': True, 'false': False, 'nan': None}
-            ).astype(pd.BooleanDtype()) # Usa BooleanDtype para permitir <NA>
-
-        for _, row in df.iterrows():
-            # Tratamento de valores que podem ser nulos ou precisam de conversão de tipo
-            marca_veiculo = row['marca']
-            modelo_veiculo = row['modelo']
-            ano_inicial_veiculo = int(row['ano_producao_inicial'])
-            potencia_veiculo = int(row['potencia_cv']) # O CSV parece ter CV como inteiro [cite: 1]
-
-            # Para ano_producao_final, que pode ser nulo ou um float como "2021.0" [cite: 1]
-            ano_final_val = row.get('ano_producao_final')
-            ano_final = None if pd.isna(ano_final_val) else int(float(ano_final_val))
-
-            # Para porta_malas_litros, que pode ser nulo ou float como "470.0" [cite: 1]
-            porta_malas_val = row.get('porta_malas_litros')
-            porta_malas = None if pd.isna(porta_malas_val) else int(float(porta_malas_val))
-
-            # Para capacidade_carga_kg, que pode ser nulo [cite: 1]
-            capacidade_carga_val = row.get('capacidade_carga_kg')
-            capacidade_carga = None if pd.isna(capacidade_carga_val) else float(capacidade_carga_val)
-            
-            # Para tanque_litros
-            tanque_val = row.get('tanque_litros')
-            tanque = None if pd.isna(tanque_val) else int(float(tanque_val))
-
-            # Para autonomia_km_l
-            autonomia_val = row.get('autonomia_km_l')
-            autonomia = None if pd.isna(autonomia_val) else float(autonomia_val)
-            
-            # Para transmissao_automatica (já convertida para Booleano ou pd.NA)
-            transmissao_auto_val = row.get('transmissao_automatica')
-            transmissao_auto = None if pd.isna(transmissao_auto_val) else bool(transmissao_auto_val)
-
-
-            # Critério de verificação de duplicidade: marca, modelo, ano_producao_inicial e potencia_cv
-            veiculo_existente = db.query(Veiculo).filter(
-                Veiculo.marca == marca_veiculo,
-                Veiculo.modelo == modelo_veiculo,
-                Veiculo.ano_producao_inicial == ano_inicial_veiculo,
-                Veiculo.potencia_cv == potencia_veiculo
-            ).first()
-
-            if not veiculo_existente:
-                novo_veiculo = Veiculo(
-                    marca=marca_veiculo,
-                    modelo=modelo_veiculo,
-                    ano_producao_inicial=ano_inicial_veiculo,
-                    ano_producao_final=ano_final,
-                    potencia_cv=potencia_veiculo,
-                    combustivel=row['combustivel'],
-                    num_portas=int(row['num_portas']), # O CSV parece ter num_portas como inteiro [cite: 1]
-                    porta_malas_litros=porta_malas,
-                    transmissao_automatica=transmissao_auto,
-                    capacidade_carga_kg=capacidade_carga,
-                    tanque_litros=tanque,
-                    autonomia_km_l=autonomia
-                )
-                db.add(novo_veiculo)
-                novos_veiculos_adicionados += 1
-        
+        leitor = pd.read_csv(
+            csv_file_path, sep=',', na_values=['', 'NA', 'N/A'],
+            chunksize=tamanho_lote, dtype={"transmissao_automatica": str},
+        )
+        for pedaco in leitor:
+            linhas_lidas += len(pedaco)
+            lote = normalizar_lote(pedaco)
+            if lote.empty:
+                continue
+            if usar_copy:
+                novos_veiculos_adicionados += _inserir_com_copy(db, lote)
+            else:
+                novos_veiculos_adicionados += _inserir_com_executemany(db, lote, dialeto)
+            decorrido = time.perf_counter() - inicio
+            print(f"Carga: {linhas_lidas} linhas lidas, {novos_veiculos_adicionados} novas "
+                  f"({linhas_lidas / decorrido:,.0f} linhas/s)")
+
+        vazao = linhas_lidas / max(time.perf_counter() - inicio, 1e-9)
         if novos_veiculos_adicionados > 0:
+            incrementar_versao_dados(db) # Caches e índices do servidor MCP percebem a mudança
             db.commit()
-            return f"{novos_veiculos_adicionados} novos veículos incluídos com sucesso."
+            notificar_dados_alterados() # Índices/caches em memória deste processo se atualizam
+            publicar_snapshot_se_compartilhado()
+            return (f"{novos_veiculos_adicionados} novos veículos incluídos com sucesso "
+                    f"({linhas_lidas} linhas lidas, {vazao:,.0f} linhas/s).")
         else:
-            return "Base já populada (nenhum novo veículo do CSV precisou ser adicionado)."
+            db.commit()
+            return (f"Base já populada (nenhum novo veículo do CSV precisou ser adicionado; "
+                    f"{linhas_lidas} linhas lidas, {vazao:,.0f} linhas/s).")
 
     except FileNotFoundError:
         return f"Erro: Arquivo CSV não encontrado em '{csv_file_path}'."
@@ -123,6 +227,282 @@ def popula_dados(csv_file_path: str) -> str:
     finally:
         db.close()
 
+ChaveNatural = Tuple[Any, ...] # Valores de CHAVE_NATURAL, na mesma ordem
+
+
+@dataclass
+class DiferencasSincronizacao:
+    """O que `sincronizar_dados` precisa gravar para o banco ficar igual ao CSV."""
+    inserir: List[Dict[str, Any]] = field(default_factory=list)    # Registros de COLUNAS_CARGA
+    atualizar: List[Dict[str, Any]] = field(default_factory=list)  # Idem, mais "id_veiculo"
+    remover: List[int] = field(default_factory=list)               # ids ausentes do CSV
+    # Linhas gravadas antes do hash existir e que não mudaram: só recebem o hash
+    preencher_hash: List[Dict[str, Any]] = field(default_factory=list)
+    inalterados: int = 0
+    linhas_lidas: int = 0
+
+    @property
+    def altera_dados(self) -> bool:
+        return bool(self.inserir or self.atualizar or self.remover)
+
+    def resumo(self) -> str:
+        return (f"{len(self.inserir)} inseridos, {len(self.atualizar)} atualizados, "
+                f"{len(self.remover)} removidos, {self.inalterados} inalterados")
+
+
+def _chave(registro: Mapping[str, Any]) -> ChaveNatural:
+    return tuple(registro[coluna] for coluna in CHAVE_NATURAL)
+
+
+def hashes_do_banco(db: Session) -> Dict[ChaveNatural, Tuple[int, str, bool]]:
+    """
+    Chave natural -> (id, hash da linha, se o hash já estava gravado). Lê só a chave e o
+    hash; as linhas sem hash (gravadas antes da coluna existir) têm o hash calculado a
+    partir dos valores gravados, como o CSV faria.
+    """
+    tabela = Veiculo.__table__
+    colunas_chave = [tabela.c[coluna] for coluna in CHAVE_NATURAL]
+    hashes = {}
+    for linha in db.execute(select(tabela.c.id, tabela.c.hash_linha, *colunas_chave)):
+        if linha.hash_linha is not None:
+            hashes[_chave(linha._mapping)] = (linha.id, linha.hash_linha, True)
+
+    sem_hash = select(tabela.c.id, *(tabela.c[c] for c in COLUNAS_DADOS)).where(tabela.c.hash_linha.is_(None))
+    for linha in db.execute(sem_hash):
+        hashes[_chave(linha._mapping)] = (linha.id, hash_registro(linha._mapping), False)
+    return hashes
+
+
+def calcular_diferencas(db: Session, csv_file_path: str, tamanho_lote: int = TAMANHO_LOTE_CSV) -> DiferencasSincronizacao:
+    """
+    Compara o CSV (lido em lotes) com o banco pela chave natural e pelo hash de cada linha.
+    Só as linhas que mudaram ficam em memória, além de chave/id/hash de cada veículo do banco.
+    Linhas repetidas no CSV valem pela primeira ocorrência, como em `popula_dados`.
+    """
+    import pandas as pd
+
+    banco = hashes_do_banco(db)
+    diferencas = DiferencasSincronizacao()
+    vistas = set()
+    leitor = pd.read_csv(
+        csv_file_path, sep=',', na_values=['', 'NA', 'N/A'],
+        chunksize=tamanho_lote, dtype={"transmissao_automatica": str},
+    )
+    for pedaco in leitor:
+        diferencas.linhas_lidas += len(pedaco)
+        for registro in _registros(normalizar_lote(pedaco)):
+            chave = _chave(registro)
+            if chave in vistas:
+                continue
+            vistas.add(chave)
+            atual = banco.get(chave)
+            if atual is None:
+                diferencas.inserir.append(registro)
+                continue
+            id_veiculo, hash_atual, hash_gravado = atual
+            if hash_atual != registro["hash_linha"]:
+                diferencas.atualizar.append({**registro, "id_veiculo": id_veiculo})
+                continue
+            diferencas.inalterados += 1
+            if not hash_gravado:
+                diferencas.preencher_hash.append({"id_veiculo": id_veiculo, "hash_linha": hash_atual})
+
+    diferencas.remover = [id_veiculo for chave, (id_veiculo, _, _) in banco.items() if chave not in vistas]
+    return diferencas
+
+
+def _em_lotes(itens: List[Any], tamanho: int):
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def escopo_das_diferencas(
+    db: Session, diferencas: DiferencasSincronizacao, tamanho_lote: int = TAMANHO_LOTE_CSV
+) -> EscopoAlteracao:
+    """
+    Marca, modelo e combustível (dobrados) dos veículos que as diferenças alteram: os
+    valores novos das linhas inseridas/atualizadas e os gravados das atualizadas/removidas,
+    lidos do banco antes de aplicar.
+    """
+    sombras = list(COLUNAS_DE_BUSCA.values())
+    linhas = {tuple(registro[sombra] for sombra in sombras) for registro in diferencas.inserir + diferencas.atualizar}
+    tabela = Veiculo.__table__
+    ids = [registro["id_veiculo"] for registro in diferencas.atualizar] + diferencas.remover
+    for lote in _em_lotes(ids, tamanho_lote):
+        consulta = select(*(tabela.c[sombra] for sombra in sombras)).where(tabela.c.id.in_(lote))
+        linhas.update(tuple(linha) for linha in db.execute(consulta))
+    return EscopoAlteracao(frozenset(linhas))
+
+
+def aplicar_diferencas(
+    db: Session,
+    diferencas: DiferencasSincronizacao,
+    tamanho_lote: int = TAMANHO_LOTE_CSV,
+    escopo: Optional[EscopoAlteracao] = None,
+) -> None:
+    """
+    Grava as diferenças em transações de até `tamanho_lote` linhas: remoções, atualizações
+    e inserções, nesta ordem. A versão dos dados é incrementada uma única vez, numa
+    transação final depois de todos os lotes (também quando um lote falha no meio, se
+    algum já foi confirmado): um leitor que guardou em cache um estado intermediário o
+    guardou sob a versão anterior, que deixa de valer ao fim.
+
+    Com `escopo` (ver `escopo_das_diferencas`), a mesma transação final o registra para a
+    nova versão, e os servidores descartam do cache de resultados só as entradas que ele
+    pode afetar. O índice em memória, o índice n-grama e o snapshot continuam sendo
+    reconstruídos por inteiro. O preenchimento de hash não muda nada visível e não mexe
+    na versão.
+    """
+    tabela = Veiculo.__table__
+    dialeto = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    por_id = tabela.c.id == bindparam("id_veiculo")
+
+    alterou = False
+    try:
+        for ids in _em_lotes(diferencas.remover, tamanho_lote):
+            db.execute(delete(tabela).where(tabela.c.id.in_(ids)))
+            db.commit()
+            alterou = True
+        for registros in _em_lotes(diferencas.atualizar, tamanho_lote):
+            db.execute(update(tabela).where(por_id), registros)
+            db.commit()
+            alterou = True
+        for registros in _em_lotes(diferencas.inserir, tamanho_lote):
+            _inserir_registros(db, registros, dialeto)
+            db.commit()
+            alterou = True
+    finally:
+        if alterou:
+            db.rollback() # Descarta o lote que falhou, se houver, antes de confirmar a versão
+            versao = incrementar_versao_dados(db)
+            if escopo is not None:
+                registrar_escopo(db, versao, escopo)
+            db.commit()
+    for registros in _em_lotes(diferencas.preencher_hash, tamanho_lote):
+        db.execute(update(tabela).where(por_id), registros)
+        db.commit()
+
+
+def sincronizar_dados(csv_file_path: str, tamanho_lote: int = TAMANHO_LOTE_CSV, aplicar: bool = True) -> str:
+    """
+    Deixa a tabela `veiculos` igual ao CSV, gravando só o que mudou: insere os veículos
+    novos, atualiza os que tiveram algum dado alterado e remove os que saíram do arquivo.
+    Sem diferenças, nada é gravado e a versão dos dados (e com ela os caches do servidor)
+    fica como está. Para a primeira carga de uma base vazia, `popula_dados` é mais econômico.
+
+    Args:
+        csv_file_path (str): O caminho para o arquivo CSV contendo os dados dos veículos.
+        tamanho_lote (int): Linhas do CSV lidas por vez e linhas gravadas por transação.
+        aplicar (bool): False só calcula e descreve as diferenças, sem gravar.
+
+    Returns:
+        str: Resumo das diferenças (inseridos, atualizados, removidos, inalterados).
+    """
+    import pandas as pd
+
+    db: Session = SessionLocal()
+    inicio = time.perf_counter()
+    diferencas = escopo = None
+    try:
+        diferencas = calcular_diferencas(db, csv_file_path, tamanho_lote)
+        resumo = f"{diferencas.resumo()} ({diferencas.linhas_lidas} linhas lidas"
+        if not aplicar:
+            return f"Simulação de sincronização: {resumo})."
+        escopo = escopo_das_diferencas(db, diferencas, tamanho_lote)
+        aplicar_diferencas(db, diferencas, tamanho_lote, escopo)
+        decorrido = time.perf_counter() - inicio
+        if not diferencas.altera_dados:
+            return f"Base já sincronizada com o CSV: {resumo}, {decorrido:.1f} s)."
+        return f"Sincronização concluída: {resumo}, {decorrido:.1f} s)."
+
+    except FileNotFoundError:
+        return f"Erro: Arquivo CSV não encontrado em '{csv_file_path}'."
+    except pd.errors.EmptyDataError:
+        return f"Erro: Arquivo CSV '{csv_file_path}' está vazio."
+    except KeyError as e:
+        db.rollback()
+        return f"Erro: Coluna esperada não encontrada no CSV: {e}. Verifique o cabeçalho do arquivo."
+    except Exception as e:
+        db.rollback()
+        print(f"Ocorreu um erro inesperado: {e}")
+        return f"Erro ao sincronizar dados: {e}"
+    finally:
+        db.close()
+        if aplicar and diferencas is not None and diferencas.altera_dados:
+            # Mesmo após uma falha no meio, os lotes já confirmados mudaram os dados
+            notificar_dados_alterados(escopo)
+            publicar_snapshot_se_compartilhado()
+
+
+def publicar_snapshot_se_compartilhado() -> None:
+    """
+    Com MCP_SNAPSHOT_COMPARTILHADO, publica o inventário recém-gravado no arquivo que os
+    workers do servidor mapeiam (app/mcp/snapshot_inventario.py). Uma falha aqui não
+    desfaz a carga: os workers republicam ao perceber a nova versão dos dados.
+    """
+    if not MCP_SNAPSHOT_COMPARTILHADO:
+        return
+    from app.mcp.snapshot_inventario import publicar_snapshot_do_banco
+
+    try:
+        total = publicar_snapshot_do_banco(MCP_SNAPSHOT_ARQUIVO)
+        print(f"Snapshot compartilhado publicado ({total} veículos) em {MCP_SNAPSHOT_ARQUIVO}.")
+    except Exception as e:
+        print(f"Aviso: snapshot compartilhado não publicado: {e}")
+
+# Impressão digital (sha256) do CSV da semente já carregado, em `metadados_sistema`
+CHAVE_IMPRESSAO_SEMENTE = "impressao_csv_semente"
+
+
+def impressao_csv(caminho_csv: str) -> str:
+    """sha256 do conteúdo do arquivo, lido em blocos (rápido e com memória constante)."""
+    resumo = hashlib.sha256()
+    with open(caminho_csv, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def ler_impressao_semente() -> Optional[str]:
+    """Impressão do último CSV semeado, ou None (nunca semeado ou tabelas ainda não criadas)."""
+    try:
+        with SessionLocal() as db:
+            registro = db.get(MetadadoSistema, CHAVE_IMPRESSAO_SEMENTE)
+            return registro.valor if registro is not None else None
+    except (OperationalError, ProgrammingError) as e:
+        # Tabela inexistente é o caso normal do primeiro uso; outros erros (ex: banco fora do ar) sobem
+        if "no such table" in str(e).lower() or "does not exist" in str(e).lower():
+            return None
+        raise
+
+
+def gravar_impressao_semente(impressao: str) -> None:
+    with SessionLocal() as db:
+        db.merge(MetadadoSistema(chave=CHAVE_IMPRESSAO_SEMENTE, valor=impressao))
+        db.commit()
+
+
+def semear_se_necessario(caminho_csv: str) -> str:
+    """
+    Cria as tabelas e carrega o CSV da semente só se ele mudou desde a última carga
+    (a impressão digital guardada no banco não confere). Com a base já semeada, custa
+    ler o arquivo para o hash e duas consultas (semente e versão do esquema): nem o
+    pandas é importado.
+    """
+    if not Path(caminho_csv).exists():
+        return f"Erro: Arquivo CSV não encontrado em '{caminho_csv}'."
+    impressao = impressao_csv(caminho_csv)
+    if ler_impressao_semente() == impressao:
+        # Sem carga, mas migrações novas (ex: índices) ainda chegam a bancos já semeados
+        aplicar_migracoes_pendentes()
+        return "Base já semeada com este CSV (impressão digital confere); carga ignorada."
+
+    criar_tabelas_se_nao_existirem()
+    mensagem = popula_dados(caminho_csv)
+    if not mensagem.startswith("Erro"):
+        gravar_impressao_semente(impressao)
+    return mensagem
+
 # Exemplo de como chamar esta função (pode ser de um script main.py ou para teste direto)
 if __name__ == "__main__":
     # Este bloco só será executado se o script populate_db.py for chamado diretamente.
@@ -145,6 +525,13 @@ if __name__ == "__main__":
     # caminho_do_csv = os.path.join(project_root, "veiculos_fabricados_brasil_reais.csv")
 
 
-    print(f"Tentando popular o banco de dados com o arquivo: {caminho_do_csv}")
-    resultado_populacao = popula_dados(caminho_do_csv)
-    print(resultado_populacao)
\ No newline at end of file
+    # 3. Com --sincronizar, aplica só as diferenças (inclusive atualizações e remoções);
+    #    com --simular, apenas mostra o resumo das diferenças, sem gravar.
+    import sys
+    if "--sincronizar" in sys.argv or "--simular" in sys.argv:
+        print(f"Sincronizando o banco de dados com o arquivo: {caminho_do_csv}")
+        print(sincronizar_dados(caminho_do_csv, aplicar="--simular" not in sys.argv))
+    else:
+        print(f"Tentando popular o banco de dados com o arquivo: {caminho_do_csv}")
+        resultado_populacao = popula_dados(caminho_do_csv)
+        print(resultado_populacao)
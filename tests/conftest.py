@@ -0,0 +1,34 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# O banco de testes é um SQLite temporário. A variável precisa ser definida antes
+# de qualquer import de `app`, pois a configuração é lida na importação.
+_DIRETORIO_TEMPORARIO = tempfile.mkdtemp(prefix="c2s_testes_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DIRETORIO_TEMPORARIO}/veiculos_teste.db")
+# O cache persistente do LLM fica desligado: cada teste decide se usa um cache próprio
+os.environ.setdefault("AGENTE_CACHE_LLM", "false")
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parent.parent
+CSV_VEICULOS = RAIZ_DO_PROJETO / "scripts" / "veiculos_fabricados_brasil_reais.csv"
+
+
+@pytest.fixture(scope="session")
+def banco_populado():
+    """Cria as tabelas e popula o banco de testes com o CSV do projeto (uma vez por sessão)."""
+    from scripts.populate_db import criar_tabelas_se_nao_existirem, popula_dados
+
+    criar_tabelas_se_nao_existirem()
+    popula_dados(str(CSV_VEICULOS))
+
+
+@pytest.fixture
+def cliente_api(banco_populado):
+    """Cliente HTTP de testes para o servidor MCP."""
+    from fastapi.testclient import TestClient
+    from run_mcp_server import app
+
+    with TestClient(app) as cliente:
+        yield cliente
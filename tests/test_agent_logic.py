@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import ollama
+
+from app.agent import conversa
+from app.agent.contexto import ContextoConversa, estimar_tokens
+from app.agent.conversa import interagir_com_llm
+from app.agent.terminal_agent import exibir_resumo
+
+
+def test_exibir_resumo_mostra_total_e_contagens(capsys):
+    exibir_resumo({
+        "total": 42,
+        "facetas": {
+            "marca": [{"valor": "Chevrolet", "quantidade": 20}, {"valor": "Fiat", "quantidade": 22}],
+            "combustivel": [{"valor": "Flex", "quantidade": 42}],
+            "transmissao_automatica": [{"valor": True, "quantidade": 30}, {"valor": False, "quantidade": 12}],
+        },
+        "histogramas": {},
+    })
+    saida = capsys.readouterr().out
+    assert "42 veículo(s)" in saida
+    assert "Marcas: Chevrolet (20), Fiat (22)" in saida
+    assert "Combustível" not in saida # Faceta com um único valor não é mostrada
+    assert "Transmissão automática: Sim (30), Não (12)" in saida
+
+
+def test_exibir_resumo_sem_resultados(capsys):
+    exibir_resumo({"total": 0, "facetas": {}, "histogramas": {}})
+    assert "nenhum veículo" in capsys.readouterr().out
+
+
+PROMPT_SISTEMA = "Você é Alfred. " * 100
+
+
+def _conversar(contexto, turnos):
+    for i in range(turnos):
+        contexto.adicionar("user", f"fala {i} do usuário: quero um carro com bastante espaço " * 3)
+        contexto.adicionar("assistant", f"resposta {i} " * 60 + "\nFILTROS_COLETADOS: combustivel=Flex")
+
+
+def test_contexto_respeita_o_orcamento_e_mantem_prompt_e_filtros():
+    contexto = ContextoConversa(PROMPT_SISTEMA, orcamento_tokens=1200)
+    _conversar(contexto, 20)
+    contexto.confirmar_filtros({"combustivel": "Flex", "transmissao_automatica": True})
+    contexto.adicionar("user", "e com 4 portas?")
+
+    mensagens = contexto.mensagens()
+    assert sum(estimar_tokens(m["content"]) for m in mensagens) <= 1200
+    assert mensagens[0] == {"role": "system", "content": PROMPT_SISTEMA}
+    assert "FILTROS_COLETADOS: combustivel=Flex, transmissao_automatica=true" in mensagens[1]["content"]
+    assert "fala 19 do usuário" in mensagens[1]["content"] or any("fala 19" in m["content"] for m in mensagens[2:])
+    assert mensagens[-1] == {"role": "user", "content": "e com 4 portas?"}
+
+
+def test_contexto_curto_vai_inteiro():
+    contexto = ContextoConversa(PROMPT_SISTEMA, orcamento_tokens=10_000)
+    _conversar(contexto, 2)
+    mensagens = contexto.mensagens()
+    assert len(mensagens) == 5 # Sistema + 4 turnos, sem mensagem de estado
+    assert [m["role"] for m in mensagens[1:]] == ["user", "assistant"] * 2
+
+
+def test_contexto_nao_cresce_com_a_conversa():
+    contexto = ContextoConversa(PROMPT_SISTEMA, orcamento_tokens=1500)
+    tamanhos = []
+    for _ in range(30):
+        _conversar(contexto, 1)
+        tamanhos.append(sum(estimar_tokens(m["content"]) for m in contexto.mensagens()))
+    assert max(tamanhos) <= 1500
+    assert tamanhos[-1] <= tamanhos[10] * 1.2
+
+
+def test_interagir_com_llm_repassa_trechos_e_registra_tempos(monkeypatch, caplog):
+    def chat_falso(model, messages, stream, options=None):
+        assert stream is True
+        for trecho in ["Olá", "", ", tudo", " bem?"]:
+            yield {"message": {"content": trecho}}
+
+    monkeypatch.setattr(ollama, "chat", chat_falso)
+    recebidos = []
+    with caplog.at_level(logging.INFO, logger="app.agent.conversa"):
+        resposta = interagir_com_llm([{"role": "user", "content": "oi"}], ao_receber_trecho=recebidos.append)
+    assert resposta == "Olá, tudo bem?"
+    assert recebidos == ["Olá", ", tudo", " bem?"]
+    assert "primeiro token em" in caplog.text and "total" in caplog.text
+
+
+def test_interagir_com_llm_falha_retorna_none(monkeypatch, caplog, capsys):
+    def chat_quebrado(**kwargs):
+        raise ConnectionError("ollama fora do ar")
+
+    monkeypatch.setattr(ollama, "chat", chat_quebrado)
+    with caplog.at_level(logging.ERROR, logger="app.agent.conversa"):
+        assert interagir_com_llm([{"role": "user", "content": "oi"}]) is None
+    assert "ollama fora do ar" in caplog.text
+    assert capsys.readouterr().out == "" # No serviço HTTP, nada vai para o stdout do servidor
+
+
+def test_resumo_com_erro_inesperado_vira_erro_do_turno(monkeypatch):
+    def resumir(filtros):
+        raise ValueError("resposta inválida do servidor")
+    monkeypatch.setattr(conversa, "resumir_veiculos_mcp", resumir)
+
+    resultado = conversa.ResultadoTurno()
+    asyncio.run(conversa._resumir(resultado, {"marca": "Fiat"}))
+    assert resultado.acao == "resumo" and resultado.resumo is None
+    assert "resposta inválida do servidor" in resultado.erro
@@ -0,0 +1,363 @@
+import json
+
+import pytest
+
+from app.core.config import MCP_TAMANHO_PAGINA_MAXIMO
+from app.mcp import client as cliente_mcp
+
+
+@pytest.fixture
+def cliente_sincrono(cliente_api, monkeypatch):
+    """ClienteMCP (padrão do módulo) cujas requisições vão para o TestClient; registra as chamadas."""
+    cliente = cliente_mcp.ClienteMCP(base_url="http://testserver")
+    cliente.chamadas = []
+
+    def post_falso(url, json=None, params=None, headers=None, timeout=None):
+        resposta = cliente_api.post(url, json=json, params=params, headers=headers)
+        cliente.chamadas.append((params, resposta.status_code))
+        return resposta
+
+    monkeypatch.setattr(cliente.session, "post", post_falso)
+    monkeypatch.setattr(cliente_mcp, "_cliente_padrao", cliente)
+    return cliente
+
+
+def _todos_os_ids(cliente_api, filtros, limite):
+    ids, cursor = [], None
+    while True:
+        params = {"limite": limite}
+        if cursor:
+            params["cursor"] = cursor
+        resposta = cliente_api.post("/mcp/buscar_veiculos/", json=filtros, params=params)
+        assert resposta.status_code == 200
+        pagina = resposta.json()
+        ids.extend(v["id"] for v in pagina["itens"])
+        cursor = pagina["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_busca_sem_filtros_retorna_pagina_padrao(cliente_api):
+    resposta = cliente_api.post("/mcp/buscar_veiculos/", json={})
+    assert resposta.status_code == 200
+    pagina = resposta.json()
+    assert len(pagina["itens"]) == 50
+    assert pagina["next_cursor"]
+
+
+def test_paginacao_percorre_tudo_em_ordem_estavel_sem_repeticao(cliente_api):
+    from sqlalchemy import func, select
+    from app.database.models import Veiculo
+    from app.database.session import SessionLocal
+
+    with SessionLocal() as db:
+        total = db.scalar(select(func.count(Veiculo.id)))
+    ids = _todos_os_ids(cliente_api, {}, limite=37)
+    assert ids == sorted(ids)
+    assert len(ids) == len(set(ids)) == total
+
+
+def test_paginacao_respeita_filtros(cliente_api):
+    ids_flex = _todos_os_ids(cliente_api, {"combustivel": "Flex"}, limite=10)
+    resposta = cliente_api.post("/mcp/buscar_veiculos/", json={"combustivel": "Flex"}, params={"limite": 1000})
+    assert ids_flex == [v["id"] for v in resposta.json()["itens"]]
+
+
+def test_limite_acima_do_maximo_e_truncado(cliente_api):
+    resposta = cliente_api.post("/mcp/buscar_veiculos/", json={}, params={"limite": MCP_TAMANHO_PAGINA_MAXIMO + 100})
+    assert resposta.status_code == 200
+    assert len(resposta.json()["itens"]) <= MCP_TAMANHO_PAGINA_MAXIMO
+
+
+@pytest.mark.parametrize("params", [{"cursor": "nao-e-um-cursor"}, {"limite": 0}])
+def test_parametros_de_paginacao_invalidos(cliente_api, params):
+    resposta = cliente_api.post("/mcp/buscar_veiculos/", json={}, params=params)
+    assert resposta.status_code in (400, 422)
+
+
+def test_cliente_itera_paginas_sob_demanda(cliente_sincrono):
+    iterador = cliente_mcp.iterar_veiculos_mcp({"combustivel": "Flex"}, tamanho_pagina=5)
+    primeiros = [next(iterador) for _ in range(5)]
+    assert len(cliente_sincrono.chamadas) == 1  # Ainda não pediu a segunda página
+    restantes = list(iterador)
+    assert len(cliente_sincrono.chamadas) > 1
+    assert all(v["combustivel"] == "Flex" for v in primeiros + restantes)
+
+    cliente_sincrono.chamadas.clear()
+    assert len(cliente_mcp.consultar_veiculos_mcp({}, limite=3)) == 3
+    assert len(cliente_sincrono.chamadas) == 1
+
+
+def test_cache_de_resultados_normaliza_filtros(cliente_api):
+    from app.mcp.server import cache_resultados
+
+    cache_resultados.limpar()
+    primeira = cliente_api.post("/mcp/buscar_veiculos/", json={"combustivel": "Flex", "marca": None})
+    segunda = cliente_api.post("/mcp/buscar_veiculos/", json={"combustivel": "FLEX"})
+    assert primeira.headers["X-Cache"] == "MISS"
+    assert segunda.headers["X-Cache"] == "HIT"
+    assert primeira.content == segunda.content
+    assert primeira.headers["ETag"] == segunda.headers["ETag"]
+
+    estatisticas = cliente_api.get("/mcp/cache/estatisticas/").json()
+    assert estatisticas["acertos"] >= 1 and estatisticas["faltas"] >= 1
+
+
+def test_if_none_match_responde_304(cliente_api):
+    resposta = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Toyota"})
+    etag = resposta.headers["ETag"]
+
+    nao_modificada = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Toyota"}, headers={"If-None-Match": etag})
+    assert nao_modificada.status_code == 304
+    assert nao_modificada.content == b""
+
+    outra_pagina = cliente_api.post(
+        "/mcp/buscar_veiculos/", json={"marca": "Toyota"}, params={"limite": 1}, headers={"If-None-Match": etag}
+    )
+    assert outra_pagina.status_code == 200
+
+
+def test_nova_versao_dos_dados_invalida_cache_e_etag(cliente_api, monkeypatch):
+    from app.database.session import SessionLocal
+    from app.database.versao_dados import incrementar_versao_dados
+    from app.mcp.server import monitor_versao_dados
+
+    monkeypatch.setattr(monitor_versao_dados, "intervalo_s", 0)
+    antes = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Honda"})
+    cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Honda"})
+
+    # Escrita feita por "outro processo": só o contador no banco muda
+    with SessionLocal() as db:
+        incrementar_versao_dados(db)
+        db.commit()
+
+    depois = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Honda"}, headers={"If-None-Match": antes.headers["ETag"]})
+    assert depois.status_code == 200
+    assert depois.headers["X-Cache"] == "MISS"
+    assert depois.headers["ETag"] != antes.headers["ETag"]
+
+
+def test_cliente_reaproveita_pagina_com_304(cliente_sincrono):
+    primeira = cliente_mcp.buscar_pagina_veiculos_mcp({"marca": "Jeep"})
+    segunda = cliente_mcp.buscar_pagina_veiculos_mcp({"marca": "Jeep"})
+    assert [status for _, status in cliente_sincrono.chamadas] == [200, 304]
+    assert segunda == primeira
+
+
+def _linhas_ndjson(resposta):
+    return [json.loads(linha) for linha in resposta.text.splitlines()]
+
+
+def test_stream_ndjson_traz_o_mesmo_conjunto_da_busca_paginada(cliente_api, monkeypatch):
+    from app.mcp import server
+
+    monkeypatch.setattr(server, "MCP_STREAM_TAMANHO_LOTE", 7) # Força vários lotes do cursor
+    for filtros in ({}, {"combustivel": "flex"}, {"marca": "CHEVROLET", "potencia_cv_min": 100}):
+        resposta = cliente_api.post("/mcp/buscar_veiculos/stream", json=filtros)
+        assert resposta.status_code == 200
+        assert resposta.headers["content-type"].startswith("application/x-ndjson")
+        veiculos = _linhas_ndjson(resposta)
+        assert [v["id"] for v in veiculos] == _todos_os_ids(cliente_api, filtros, limite=MCP_TAMANHO_PAGINA_MAXIMO)
+
+    pagina = cliente_api.post("/mcp/buscar_veiculos/", json={}, params={"limite": 5}).json()
+    assert _linhas_ndjson(cliente_api.post("/mcp/buscar_veiculos/stream", json={}))[:5] == pagina["itens"]
+
+
+@pytest.fixture
+def modelo_de_outro_processo(cliente_api, monkeypatch):
+    """
+    Insere um modelo novo como o loader rodando em outro processo faria (só o contador de
+    versão muda, sem notificar este processo) e o remove ao fim.
+    """
+    from sqlalchemy import delete
+    from app.database.eventos import notificar_dados_alterados
+    from app.database.models import Veiculo
+    from app.database.session import SessionLocal
+    from app.database.versao_dados import incrementar_versao_dados
+    from app.mcp.server import monitor_versao_dados
+
+    monkeypatch.setattr(monitor_versao_dados, "intervalo_s", 0)
+
+    def inserir():
+        with SessionLocal() as db:
+            db.add(Veiculo(marca="Fiat", modelo="Recem Chegado", ano_producao_inicial=2025, potencia_cv=75,
+                           combustivel="Flex", num_portas=4, transmissao_automatica=False))
+            incrementar_versao_dados(db)
+            db.commit()
+
+    yield inserir
+    with SessionLocal() as db:
+        db.execute(delete(Veiculo).where(Veiculo.modelo == "Recem Chegado"))
+        incrementar_versao_dados(db)
+        db.commit()
+    notificar_dados_alterados()
+
+
+def test_stream_ndjson_ve_modelo_gravado_por_outro_processo(cliente_api, modelo_de_outro_processo):
+    filtros = {"modelo": "recem chegado"}
+    assert cliente_api.post("/mcp/buscar_veiculos/stream", json=filtros).text == "" # Aquece o índice n-grama
+    modelo_de_outro_processo()
+    veiculos = _linhas_ndjson(cliente_api.post("/mcp/buscar_veiculos/stream", json=filtros))
+    assert [v["modelo"] for v in veiculos] == ["Recem Chegado"]
+
+
+def test_stream_ndjson_rejeita_filtros_desconhecidos(cliente_api):
+    assert cliente_api.post("/mcp/buscar_veiculos/stream", json={"cor": "azul"}).status_code == 422
+
+
+def test_campos_projeta_so_as_colunas_pedidas_com_o_mesmo_json(cliente_api):
+    filtros = {"combustivel": "Flex"}
+    completa = cliente_api.post("/mcp/buscar_veiculos/", json=filtros, params={"limite": 7}).json()
+    resposta = cliente_api.post(
+        "/mcp/buscar_veiculos/", json=filtros, params={"limite": 7, "campos": "modelo, marca,transmissao_automatica"}
+    )
+    assert resposta.status_code == 200
+    projetada = resposta.json()
+    # `id` sempre vem; a ordem dos campos segue VeiculoResposta
+    assert [list(v) for v in projetada["itens"]] == [["id", "marca", "modelo", "transmissao_automatica"]] * 7
+    assert projetada["itens"] == [
+        {c: v[c] for c in ("id", "marca", "modelo", "transmissao_automatica")} for v in completa["itens"]
+    ]
+    assert projetada["next_cursor"] == completa["next_cursor"]
+
+    # Todos os campos pelo caminho rápido produzem exatamente o mesmo corpo do caminho Pydantic
+    from app.mcp.indice_memoria import CAMPOS_VEICULO
+    todos = cliente_api.post(
+        "/mcp/buscar_veiculos/", json=filtros, params={"limite": 7, "campos": ",".join(CAMPOS_VEICULO)}
+    )
+    assert todos.json() == completa
+
+
+def test_campos_desconhecidos_retornam_400(cliente_api):
+    resposta = cliente_api.post("/mcp/buscar_veiculos/", json={}, params={"campos": "marca,cor"})
+    assert resposta.status_code == 400
+    assert "cor" in resposta.json()["detail"]
+
+
+def test_campos_entram_na_chave_do_cache(cliente_api):
+    params = {"limite": 3, "campos": "marca"}
+    cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Ford"}, params={"limite": 3})
+    resposta = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Ford"}, params=params)
+    assert resposta.headers["X-Cache"] == "MISS"
+    assert all(set(v) == {"id", "marca"} for v in resposta.json()["itens"])
+
+
+def test_cliente_repassa_campos(cliente_sincrono):
+    veiculos = cliente_mcp.consultar_veiculos_mcp({}, limite=4, campos=["modelo"])
+    assert len(veiculos) == 4 and all(set(v) == {"id", "modelo"} for v in veiculos)
+    assert cliente_sincrono.chamadas[-1][0]["campos"] == "modelo"
+
+
+def test_busca_em_lote_equivale_a_buscas_separadas(cliente_api):
+    buscas = [
+        {"marca": "fiat"},
+        {"combustivel": "Diesel", "potencia_cv_min": 150},
+        {"modelo": "inexistente"},
+        {"marca": "fiat"}, # Repetida de propósito: cada posição tem seu resultado
+    ]
+    resposta = cliente_api.post("/mcp/buscar_veiculos/lote/", json={"buscas": buscas}, params={"limite": 4})
+    assert resposta.status_code == 200
+    resultados = resposta.json()["resultados"]
+    assert len(resultados) == len(buscas)
+    for filtros, pagina in zip(buscas, resultados):
+        separada = cliente_api.post("/mcp/buscar_veiculos/", json=filtros, params={"limite": 4}).json()
+        assert pagina == separada
+
+
+def test_busca_em_lote_usa_uma_unica_consulta(cliente_api):
+    from sqlalchemy import event
+    from app.database.session import async_engine
+
+    cliente_api.post("/mcp/buscar_veiculos/lote/", json={"buscas": [{"marca": "Ford"}]}) # Aquece índices
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if "FROM veiculos" in statement:
+            consultas.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", registrar)
+    try:
+        buscas = [{"marca": "Ford"}, {"marca": "Honda"}, {"num_portas": 2}]
+        resposta = cliente_api.post("/mcp/buscar_veiculos/lote/", json={"buscas": buscas}, params={"campos": "marca"})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", registrar)
+    assert resposta.status_code == 200
+    assert len(consultas) == 1 and consultas[0].count("UNION ALL") == 2
+    assert all(set(v) == {"id", "marca"} for r in resposta.json()["resultados"] for v in r["itens"])
+
+
+def test_busca_em_lote_ve_modelo_gravado_por_outro_processo(cliente_api, modelo_de_outro_processo):
+    lote = {"buscas": [{"modelo": "recem chegado"}]}
+    assert cliente_api.post("/mcp/buscar_veiculos/lote/", json=lote).json()["resultados"][0]["itens"] == []
+    modelo_de_outro_processo()
+    itens = cliente_api.post("/mcp/buscar_veiculos/lote/", json=lote).json()["resultados"][0]["itens"]
+    assert [v["modelo"] for v in itens] == ["Recem Chegado"]
+
+
+def test_busca_em_lote_valida_o_tamanho(cliente_api, monkeypatch):
+    from app.mcp import server
+
+    assert cliente_api.post("/mcp/buscar_veiculos/lote/", json={"buscas": []}).status_code == 422
+    monkeypatch.setattr(server, "MCP_LOTE_MAX_BUSCAS", 2)
+    resposta = cliente_api.post("/mcp/buscar_veiculos/lote/", json={"buscas": [{}, {}, {}]})
+    assert resposta.status_code == 400
+
+
+def test_cliente_busca_em_lote(cliente_sincrono):
+    paginas = cliente_mcp.buscar_em_lote_mcp([{"marca": "Fiat"}, {"marca": "Toyota"}], limite=2, campos=["marca"])
+    assert [{v["marca"] for v in p["itens"]} for p in paginas] == [{"Fiat"}, {"Toyota"}]
+    assert cliente_sincrono.chamadas[-1][0] == {"limite": 2, "campos": "marca"}
+
+
+def test_facetas_batem_com_os_veiculos_filtrados(cliente_api):
+    filtros = {"combustivel": "flex", "potencia_cv_min": 90}
+    resposta = cliente_api.post("/mcp/facetas/", json=filtros)
+    assert resposta.status_code == 200
+    resumo = resposta.json()
+    veiculos = _linhas_ndjson(cliente_api.post("/mcp/buscar_veiculos/stream", json=filtros))
+    assert resumo["total"] == len(veiculos) > 0
+
+    from collections import Counter
+    for faceta in ("marca", "combustivel", "num_portas", "transmissao_automatica"):
+        esperado = Counter(v[faceta] for v in veiculos)
+        assert {c["valor"]: c["quantidade"] for c in resumo["facetas"][faceta]} == esperado
+        quantidades = [c["quantidade"] for c in resumo["facetas"][faceta]]
+        assert quantidades == sorted(quantidades, reverse=True)
+
+    for campo, largura in (("potencia_cv", 50), ("ano_producao_inicial", 10), ("autonomia_km_l", 2)):
+        faixas = resumo["histogramas"][campo]
+        assert sum(f["quantidade"] for f in faixas) == sum(v[campo] is not None for v in veiculos)
+        for faixa in faixas:
+            assert faixa["fim"] - faixa["inicio"] == largura
+            dentro = [v for v in veiculos if v[campo] is not None and faixa["inicio"] <= v[campo] < faixa["fim"]]
+            assert len(dentro) == faixa["quantidade"]
+
+
+def test_facetas_selecionadas_e_cache(cliente_api):
+    params = {"facetas": "num_portas"}
+    primeira = cliente_api.post("/mcp/facetas/", json={"marca": "Fiat"}, params=params)
+    segunda = cliente_api.post("/mcp/facetas/", json={"marca": "Fiat"}, params=params)
+    assert list(primeira.json()["facetas"]) == ["num_portas"]
+    assert (primeira.headers["X-Cache"], segunda.headers["X-Cache"]) == ("MISS", "HIT")
+    assert cliente_api.post("/mcp/facetas/", json={}, params={"facetas": "cor"}).status_code == 400
+
+
+def test_facetas_sem_resultados(cliente_api):
+    resumo = cliente_api.post("/mcp/facetas/", json={"modelo": "inexistente"}).json()
+    assert resumo["total"] == 0
+    assert all(v == [] for v in resumo["facetas"].values())
+    assert all(v == [] for v in resumo["histogramas"].values())
+
+
+def test_cliente_resume_sem_baixar_veiculos(cliente_sincrono):
+    resumo = cliente_mcp.resumir_veiculos_mcp({"marca": "Honda"}, facetas=["combustivel"])
+    assert resumo["total"] > 0 and list(resumo["facetas"]) == ["combustivel"]
+    assert cliente_sincrono.chamadas[-1][0] == {"facetas": "combustivel"}
+
+
+def test_cliente_busca_os_mais_proximos(cliente_sincrono):
+    proximos = cliente_mcp.buscar_proximos_mcp(
+        {"marca": "Fiat", "potencia_cv_min": 400}, pesos={"potencia_cv": 3}, limite=2, campos=["marca"]
+    )
+    assert [set(v) for v in proximos] == [{"id", "marca", "distancia"}] * 2
+    assert cliente_sincrono.chamadas[-1][0] == {"limite": 2, "campos": "marca"}
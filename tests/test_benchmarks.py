@@ -0,0 +1,40 @@
+import pandas as pd
+
+from benchmarks import resultados
+from benchmarks.catalogo import gerar_catalogo, interpretar_quantidade
+from benchmarks.suite import percentil
+from scripts.populate_db import CHAVE_NATURAL
+
+
+def test_catalogo_sintetico_tem_chaves_unicas_e_e_reprodutivel(tmp_path):
+    primeiro = gerar_catalogo(tmp_path / "a.csv", 2500, semente=7, tamanho_bloco=1000)
+    segundo = gerar_catalogo(tmp_path / "b.csv", 2500, semente=7, tamanho_bloco=1000)
+
+    catalogo = pd.read_csv(primeiro)
+    assert len(catalogo) == 2500
+    assert not catalogo.duplicated(subset=CHAVE_NATURAL).any()
+    assert primeiro.read_bytes() == segundo.read_bytes()
+    assert interpretar_quantidade("10k") == 10_000 and interpretar_quantidade("1M") == 1_000_000
+
+
+def test_comparacao_detecta_regressoes_pela_direcao_da_metrica():
+    base = resultados.montar_resultados({"linhas": 10}, {
+        "busca.p95_ms": resultados.metrica(10.0, "ms", "menor"),
+        "ingestao.linhas_por_s": resultados.metrica(1000.0, "linhas/s", "maior"),
+        "parse.respostas_por_s": resultados.metrica(500.0, "respostas/s", "maior"),
+    })
+    atual = resultados.montar_resultados({"linhas": 10}, {
+        "busca.p95_ms": resultados.metrica(12.0, "ms", "menor"),              # +20%: piorou
+        "ingestao.linhas_por_s": resultados.metrica(1500.0, "linhas/s", "maior"), # melhorou
+        "parse.respostas_por_s": resultados.metrica(450.0, "respostas/s", "maior"), # -10%: dentro da tolerância
+    })
+
+    regressoes = [c.nome for c in resultados.comparar(base, atual, tolerancia=0.15) if c.regrediu]
+    assert regressoes == ["busca.p95_ms"]
+
+
+def test_arquivo_de_resultados_ida_e_volta(tmp_path):
+    dados = resultados.montar_resultados({"linhas": 1}, {"x": resultados.metrica(1, "ms", "menor")})
+    resultados.salvar(dados, tmp_path / "r.json")
+    assert resultados.carregar(tmp_path / "r.json") == dados
+    assert percentil([5, 1, 4, 2, 3], 50) == 3 and percentil(range(1, 101), 99) == 99
@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+from app.agent import conversa
+from app.agent.busca_antecipada import BuscaAntecipada, chave_filtros, filtros_especulativos
+from app.agent.conversa import SessaoConversa
+from app.agent.extrator_regras import ResultadoExtracao, VocabularioInventario
+
+ATRASO_S = 0.3
+
+
+def _buscador(chamadas, falhar=False):
+    async def buscar(filtros):
+        chamadas.append(filtros)
+        await asyncio.sleep(ATRASO_S)
+        if falhar:
+            raise ConnectionError("servidor fora do ar")
+        return [{"id": 1, "marca": filtros.get("marca")}]
+    return buscar
+
+
+def test_mesmos_filtros_reaproveitam_a_busca():
+    chamadas = []
+
+    async def cenario():
+        antecipada = BuscaAntecipada(_buscador(chamadas))
+        antecipada.iniciar({"marca": "Fiat", "combustivel": "Flex"})
+        await asyncio.sleep(ATRASO_S) # "LLM" gerando a resposta
+        inicio = time.perf_counter()
+        # Ordem, acentos e maiúsculas não importam
+        resultados = await antecipada.obter({"combustivel": "flex", "marca": "FIAT"})
+        return resultados, time.perf_counter() - inicio, antecipada
+
+    resultados, espera, antecipada = asyncio.run(cenario())
+    assert resultados == [{"id": 1, "marca": "Fiat"}]
+    assert espera < ATRASO_S / 2
+    assert len(chamadas) == 1
+    assert (antecipada.iniciadas, antecipada.aproveitadas, antecipada.descartadas) == (1, 1, 0)
+
+
+def test_filtros_diferentes_descartam_a_busca():
+    chamadas = []
+
+    async def cenario():
+        antecipada = BuscaAntecipada(_buscador(chamadas))
+        antecipada.iniciar({"marca": "Fiat"})
+        return await antecipada.obter({"marca": "Fiat", "num_portas": 4}), antecipada
+
+    resultados, antecipada = asyncio.run(cenario())
+    assert resultados is None
+    assert (antecipada.aproveitadas, antecipada.descartadas) == (0, 1)
+
+
+def test_falha_da_busca_antecipada_devolve_none():
+    async def cenario():
+        antecipada = BuscaAntecipada(_buscador([], falhar=True))
+        antecipada.iniciar({"marca": "Fiat"})
+        return await antecipada.obter({"marca": "Fiat"})
+
+    assert asyncio.run(cenario()) is None
+
+
+def test_sem_filtros_nao_busca():
+    chamadas = []
+
+    async def cenario():
+        antecipada = BuscaAntecipada(_buscador(chamadas))
+        antecipada.iniciar({})
+        return await antecipada.obter({})
+
+    assert asyncio.run(cenario()) is None
+    assert chamadas == []
+
+
+def test_filtros_especulativos():
+    atuais = {"marca": "Fiat", "num_portas": 2}
+    extracao = ResultadoExtracao(filtros={"num_portas": 4}, confianca=0.5, conversacional=False)
+    assert filtros_especulativos(atuais, extracao) == {"marca": "Fiat", "num_portas": 4}
+    conversacional = ResultadoExtracao(filtros={"num_portas": 4}, confianca=0.5, conversacional=True)
+    assert filtros_especulativos(atuais, conversacional) == atuais
+    assert chave_filtros({"marca": "Citroën", "x": None}) == chave_filtros({"marca": "citroen"})
+
+
+def test_turno_do_agente_busca_enquanto_o_llm_responde(monkeypatch):
+    """A latência do turno com busca fica perto da do LLM, não da soma LLM + busca."""
+    buscas = []
+
+    async def llm_lento(mensagens, ao_receber_trecho=None):
+        await asyncio.to_thread(time.sleep, ATRASO_S)
+        return "Claro, vou buscar!\nFILTROS_COLETADOS: marca=Fiat, combustivel=Flex"
+
+    def consulta_lenta(filtros, limite=None, campos=None):
+        buscas.append(filtros)
+        time.sleep(ATRASO_S)
+        return [{"marca": "Fiat", "modelo": "Argo", "ano_producao_inicial": 2018}]
+
+    monkeypatch.setattr(conversa, "_vocabulario", VocabularioInventario.de_valores({"marca": ["Fiat"], "modelo": ["Argo"]}))
+    monkeypatch.setattr(conversa, "consultar_veiculos_mcp", consulta_lenta)
+
+    inicio = time.perf_counter()
+    resultado = asyncio.run(conversa.processar_turno(SessaoConversa(), "quero um Fiat flex, pode buscar", llm_lento))
+    duracao = time.perf_counter() - inicio
+
+    assert resultado.caminho == "llm" and resultado.acao == "busca"
+    assert resultado.veiculos[0]["modelo"] == "Argo"
+    assert buscas == [{"marca": "Fiat", "combustivel": "Flex"}]
+    assert duracao < ATRASO_S * 1.7
+
+
+def test_turno_sem_busca_descarta_a_antecipada_e_ela_pede_so_o_exibido(monkeypatch):
+    limites = []
+
+    async def llm_conversando(mensagens, ao_receber_trecho=None):
+        await asyncio.sleep(0.05) # A busca antecipada chega a rodar
+        return "Você quer um Fiat de 2015 em diante ou até 2015?\nFILTROS_COLETADOS: marca=Fiat"
+
+    def consulta(filtros, limite=None, campos=None):
+        limites.append(limite)
+        return []
+
+    monkeypatch.setattr(conversa, "_vocabulario", VocabularioInventario.de_valores({"marca": ["Fiat"], "modelo": []}))
+    monkeypatch.setattr(conversa, "consultar_veiculos_mcp", consulta)
+    sessao = SessaoConversa()
+
+    resultado = asyncio.run(conversa.processar_turno(sessao, "um Fiat 2015", llm_conversando))
+    assert resultado.acao is None
+    assert (sessao.antecipada.iniciadas, sessao.antecipada.descartadas) == (1, 1)
+    assert sessao.antecipada._tarefa is None
+    assert limites == [conversa.AGENTE_MAX_VEICULOS_EXIBIDOS] # Não pagina o resultado inteiro
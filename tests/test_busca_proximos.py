@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.agent import conversa, terminal_agent
+from app.agent.conversa import SessaoConversa
+from app.agent.extrator_regras import VocabularioInventario
+from app.mcp.indice_memoria import CAMPOS_VEICULO, IndiceInventario, menores_k
+from app.mcp.schemas import VeiculoFiltros
+
+
+def _veiculo(id, **valores):
+    return SimpleNamespace(**{**{campo: None for campo in CAMPOS_VEICULO}, "id": id, **valores})
+
+
+@pytest.fixture
+def indice_pequeno():
+    indice = IndiceInventario()
+    indice.carregar([
+        _veiculo(1, marca="Fiat", modelo="Uno", combustivel="Flex", potencia_cv=70, transmissao_automatica=False),
+        _veiculo(2, marca="Fiat", modelo="Toro", combustivel="Diesel", potencia_cv=170, transmissao_automatica=True),
+        _veiculo(3, marca="Ford", modelo="Ka", combustivel="Flex", potencia_cv=100, transmissao_automatica=False),
+        _veiculo(4, marca="Honda", modelo="Civic", combustivel="Flex", potencia_cv=170, transmissao_automatica=True),
+    ])
+    return indice
+
+
+def test_menores_k_equivale_a_ordenar_tudo():
+    aleatorio = np.random.default_rng(3)
+    valores = aleatorio.integers(0, 20, size=500).astype(float) # Muitos empates
+    ordem_completa = np.lexsort((np.arange(len(valores)), valores))
+    for k in (1, 7, 50, 500, 900):
+        assert menores_k(valores, k).tolist() == ordem_completa[:k].tolist()
+    assert menores_k(valores, 0).size == 0
+
+
+def test_distancia_e_pesos(indice_pequeno):
+    filtros = VeiculoFiltros(marca="fiat", potencia_cv_min=150)
+    ranking = [(r["id"], d) for r, d in indice_pequeno.mais_proximos(filtros, 4)]
+    assert ranking[0] == (2, 0.0) # Atende a tudo
+    assert [i for i, _ in ranking] == [2, 1, 4, 3] # Marca certa pesa mais que a potência
+
+    # Sem peso para a marca, a potência decide: o Civic empata com a Toro e o Uno vai para o fim
+    sem_marca = [r["id"] for r, _ in indice_pequeno.mais_proximos(filtros, 4, pesos={"marca": 0})]
+    assert sem_marca == [2, 4, 3, 1]
+
+    with pytest.raises(ValueError):
+        indice_pequeno.mais_proximos(filtros, 4, pesos={"cor": 1.0})
+
+
+def test_endpoint_devolve_os_mais_proximos_quando_a_busca_estrita_e_vazia(cliente_api):
+    filtros = {"marca": "Fiat", "potencia_cv_min": 400}
+    assert cliente_api.post("/mcp/buscar_veiculos/", json=filtros).json()["itens"] == []
+
+    resposta = cliente_api.post("/mcp/buscar_veiculos/proximos/", json={"filtros": filtros}, params={"limite": 5})
+    assert resposta.status_code == 200
+    itens = resposta.json()["itens"]
+    assert len(itens) == 5
+    assert [v["distancia"] for v in itens] == sorted(v["distancia"] for v in itens)
+    fiats = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Fiat"}, params={"limite": 500}).json()["itens"]
+    assert itens[0]["marca"] == "Fiat" and itens[0]["potencia_cv"] == max(v["potencia_cv"] for v in fiats)
+
+    ruim = cliente_api.post("/mcp/buscar_veiculos/proximos/", json={"filtros": filtros, "pesos": {"marca": -1}})
+    assert ruim.status_code == 400
+
+
+def test_agente_mostra_os_mais_proximos_como_aproximados(monkeypatch, capsys):
+    async def llm(mensagens, ao_receber_trecho=None):
+        return "Vou buscar!\nFILTROS_COLETADOS: marca=Fiat, potencia_cv_min=400"
+
+    proximos = [{"marca": "Fiat", "modelo": "Toro", "potencia_cv": 170, "distancia": 0.25}]
+    monkeypatch.setattr(conversa, "_vocabulario", VocabularioInventario.de_valores({"marca": ["Fiat"], "modelo": []}))
+    monkeypatch.setattr(conversa, "consultar_veiculos_mcp", lambda filtros, limite=None, campos=None: [])
+    monkeypatch.setattr(conversa, "buscar_proximos_mcp", lambda filtros, pesos=None, limite=None, campos=None: proximos)
+
+    resultado = asyncio.run(conversa.processar_turno(SessaoConversa(), "pode buscar um fiat bem forte", llm))
+    assert resultado.acao == "busca" and resultado.aproximados and resultado.veiculos == proximos
+
+    terminal_agent.exibir_resultados(resultado.veiculos, resultado.aproximados)
+    saida = capsys.readouterr().out
+    assert "mais próximos" in saida
+    assert "Veículo 1 (aproximado, 75% de semelhança)" in saida
@@ -0,0 +1,55 @@
+import random
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.database.models import Base, Veiculo
+from app.database.texto import dobrar_texto
+from app.mcp.busca_texto import IndiceNgramTexto, predicado_texto
+
+
+def test_dobrar_texto_remove_acentos_e_caixa():
+    assert dobrar_texto("Elétrico") == dobrar_texto("ELETRICO") == "eletrico"
+    assert dobrar_texto("Citroën Aircross") == "citroen aircross"
+    assert dobrar_texto(None) is None
+
+
+def test_indice_ngram_equivale_a_busca_por_substring():
+    aleatorio = random.Random(7)
+    valores = {"".join(aleatorio.choices("abcde ", k=aleatorio.randint(1, 9))) for _ in range(300)}
+    indice = IndiceNgramTexto()
+    indice.carregar({"modelo": valores})
+
+    for termo in ["a", "ab", "abc", "cab", "e d", "dddd", "zzz"] + [v[1:4] for v in list(valores)[:30]]:
+        assert indice.candidatos("modelo", termo) == {v for v in valores if termo in v}
+
+
+def test_predicado_texto_usa_in_com_candidatos_e_like_sem_eles():
+    com_candidatos = str(predicado_texto("marca", "Fiat", {"fiat"}).compile())
+    assert "marca_busca IN" in com_candidatos
+    sem_candidatos = predicado_texto("marca", "100%_", None).compile(compile_kwargs={"literal_binds": True})
+    assert "LIKE '%100\\%\\_%'" in str(sem_candidatos)
+
+
+def test_colunas_de_busca_sao_mantidas_na_gravacao_pelo_orm():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        veiculo = Veiculo(marca="Citroën", modelo="C4 Câctus", ano_producao_inicial=2018, potencia_cv=173, combustivel="Flex")
+        db.add(veiculo)
+        db.commit()
+        assert (veiculo.marca_busca, veiculo.modelo_busca) == ("citroen", "c4 cactus")
+
+        veiculo.combustivel = "Elétrico"
+        db.commit()
+        assert db.execute(select(Veiculo.combustivel_busca)).scalar_one() == "eletrico"
+
+
+def test_busca_ignora_acentos_e_caixa(cliente_api):
+    normal = cliente_api.post("/mcp/buscar_veiculos/", json={"modelo": "Civic"}, params={"limite": 500}).json()
+    acentuada = cliente_api.post("/mcp/buscar_veiculos/", json={"modelo": "CÍVIC"}, params={"limite": 500}).json()
+    assert normal["itens"]
+    assert acentuada["itens"] == normal["itens"]
+
+    parcial = cliente_api.post("/mcp/buscar_veiculos/", json={"combustivel": "ésel"}, params={"limite": 500}).json()
+    assert parcial["itens"] and all(v["combustivel"] == "Diesel" for v in parcial["itens"])
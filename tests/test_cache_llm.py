@@ -0,0 +1,134 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ollama
+import pytest
+
+from app.agent import conversa
+from app.agent.cache_llm import CacheRespostasLLM, chave_resposta
+from app.agent.conversa import interagir_com_llm
+
+
+class _OllamaFalso:
+    """Substituto local do Ollama: responde /api/chat em streaming (NDJSON) e conta as chamadas."""
+
+    def __init__(self, trechos=("Olá! ", "Procura um carro flex?\n", "FILTROS_COLETADOS: combustivel=Flex")):
+        self.trechos = list(trechos)
+        self.status = 200
+        self.chamadas = []
+        externo = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def do_POST(self):
+                externo.chamadas.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                if externo.status != 200:
+                    corpo = json.dumps({"error": "modelo indisponível"}).encode()
+                    self.send_response(externo.status)
+                    self.send_header("Content-Length", str(len(corpo)))
+                    self.end_headers()
+                    return self.wfile.write(corpo)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                partes = [{"content": t, "done": False} for t in externo.trechos] + [{"content": "", "done": True}]
+                for parte in partes:
+                    linha = {"model": "phi3:mini", "message": {"role": "assistant", "content": parte["content"]},
+                             "done": parte["done"]}
+                    self.wfile.write(json.dumps(linha).encode() + b"\n")
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manipulador)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+@pytest.fixture
+def ollama_falso(monkeypatch):
+    falso = _OllamaFalso()
+    monkeypatch.setattr(ollama, "chat", ollama.Client(host=falso.url).chat)
+    yield falso
+    falso.parar()
+
+
+@pytest.fixture
+def cache_llm(monkeypatch, tmp_path):
+    cache = CacheRespostasLLM(str(tmp_path / "respostas.sqlite3"), max_entradas=100, ttl_s=3600)
+    monkeypatch.setattr(conversa, "_cache_llm", cache)
+    yield cache
+    cache.fechar()
+
+
+def test_historico_repetido_nao_chama_o_ollama_de_novo(ollama_falso, cache_llm):
+    primeira = interagir_com_llm([{"role": "user", "content": "Olá,  quero um carro flex"}])
+    recebidos = []
+    # Espaços e maiúsculas diferentes: mesmo histórico normalizado
+    segunda = interagir_com_llm([{"role": "user", "content": "olá, quero um carro FLEX "}], recebidos.append)
+
+    assert primeira == segunda == "".join(ollama_falso.trechos)
+    assert recebidos == [segunda]
+    assert len(ollama_falso.chamadas) == 1
+    estatisticas = cache_llm.estatisticas()
+    assert (estatisticas["acertos"], estatisticas["faltas"], estatisticas["entradas"]) == (1, 1, 1)
+    assert estatisticas["taxa_acerto"] == 0.5
+
+
+def test_falha_do_ollama_nao_e_guardada(ollama_falso, cache_llm):
+    ollama_falso.status = 500
+    assert interagir_com_llm([{"role": "user", "content": "oi"}]) is None
+    ollama_falso.status = 200
+    assert interagir_com_llm([{"role": "user", "content": "oi"}]) == "".join(ollama_falso.trechos)
+    assert len(ollama_falso.chamadas) == 2
+
+
+def test_cache_desligado_sempre_chama_o_ollama(ollama_falso, monkeypatch):
+    monkeypatch.setattr(conversa, "_cache_llm", None)
+    monkeypatch.setattr(conversa, "AGENTE_CACHE_LLM", False)
+    for _ in range(2):
+        interagir_com_llm([{"role": "user", "content": "oi"}])
+    assert conversa.obter_cache_llm() is None
+    assert len(ollama_falso.chamadas) == 2
+
+
+def test_chave_depende_de_modelo_opcoes_e_historico():
+    historico = [{"role": "user", "content": "oi"}]
+    chave = chave_resposta("phi3:mini", {}, historico)
+    assert chave == chave_resposta("phi3:mini", None, [{"role": "user", "content": " OI "}])
+    assert chave != chave_resposta("llama3", {}, historico)
+    assert chave != chave_resposta("phi3:mini", {"temperature": 0.5}, historico)
+    assert chave != chave_resposta("phi3:mini", {}, historico + [{"role": "assistant", "content": "olá"}])
+
+
+def test_cache_persiste_entre_processos(tmp_path):
+    arquivo = str(tmp_path / "respostas.sqlite3")
+    cache = CacheRespostasLLM(arquivo, max_entradas=10, ttl_s=3600)
+    cache.guardar("a", "resposta A")
+    cache.fechar()
+
+    reaberto = CacheRespostasLLM(arquivo, max_entradas=10, ttl_s=3600)
+    assert reaberto.obter("a") == "resposta A"
+    reaberto.fechar()
+
+
+def test_evicao_por_limite_e_por_ttl(tmp_path):
+    cache = CacheRespostasLLM(str(tmp_path / "lru.sqlite3"), max_entradas=2, ttl_s=3600)
+    cache.guardar("a", "A")
+    cache.guardar("b", "B")
+    assert cache.obter("a") == "A" # "b" passa a ser a menos usada
+    cache.guardar("c", "C")
+    assert cache.obter("b") is None
+    assert cache.obter("a") == "A" and cache.obter("c") == "C"
+    assert cache.estatisticas()["remocoes"] == 1
+    cache.fechar()
+
+    expirado = CacheRespostasLLM(str(tmp_path / "ttl.sqlite3"), max_entradas=10, ttl_s=-1)
+    expirado.guardar("a", "A")
+    assert expirado.obter("a") is None
+    assert expirado.estatisticas()["entradas"] == 0
+    expirado.fechar()
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+
+from app.mcp.client import ClienteMCP, ClienteMCPAsync, ErroConexaoMCP
+
+
+class _ServidorFalso:
+    """Servidor HTTP/1.1 local que falha com 503 nas primeiras `falhas` requisições."""
+
+    def __init__(self, falhas=0):
+        self.falhas = falhas
+        self.requisicoes = []
+        externo = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Permite keep-alive
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                externo.requisicoes.append(self.client_address)
+                if self.path.endswith("/stream"):
+                    return self._responder_ndjson()
+                status, corpo = (503, b"{}") if len(externo.requisicoes) <= externo.falhas else (
+                    200, json.dumps({"itens": [{"id": 1}], "next_cursor": None}).encode()
+                )
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def _responder_ndjson(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i in range(1, 4): # Um bloco por linha, como o servidor envia em lotes
+                    linha = json.dumps({"id": i}).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(linha), linha))
+                self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manipulador)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+@pytest.fixture
+def servidor_falso():
+    servidores = []
+
+    def criar(falhas=0):
+        servidores.append(_ServidorFalso(falhas))
+        return servidores[-1]
+
+    yield criar
+    for servidor in servidores:
+        servidor.parar()
+
+
+def _porta_fechada():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_cliente_reutiliza_a_conexao_keep_alive(servidor_falso):
+    servidor = servidor_falso()
+    with ClienteMCP(base_url=servidor.url) as cliente:
+        for _ in range(5):
+            assert cliente.buscar_pagina({"marca": "Fiat"}) is not None
+    assert len(servidor.requisicoes) == 5
+    assert len(set(servidor.requisicoes)) == 1  # mesma porta de origem: uma única conexão TCP
+
+
+def test_cliente_tenta_de_novo_em_falha_transitoria(servidor_falso):
+    servidor = servidor_falso(falhas=2)
+    with ClienteMCP(base_url=servidor.url, max_tentativas=3, backoff_base_s=0) as cliente:
+        assert cliente.buscar_pagina({})["itens"] == [{"id": 1}]
+    assert len(servidor.requisicoes) == 3
+
+
+def test_cliente_desiste_apos_o_limite_de_tentativas(servidor_falso):
+    servidor = servidor_falso(falhas=10)
+    with ClienteMCP(base_url=servidor.url, max_tentativas=2, backoff_base_s=0) as cliente:
+        assert cliente.buscar_pagina({}) is None
+    assert len(servidor.requisicoes) == 2
+
+
+def test_cliente_levanta_erro_de_conexao_com_servidor_fora():
+    with ClienteMCP(base_url=f"http://127.0.0.1:{_porta_fechada()}", max_tentativas=2, backoff_base_s=0) as cliente:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            cliente.buscar_pagina({})
+
+
+def test_cliente_transmite_veiculos_linha_a_linha(servidor_falso):
+    servidor = servidor_falso()
+    with ClienteMCP(base_url=servidor.url) as cliente:
+        veiculos = cliente.transmitir_veiculos({"marca": "Fiat"})
+        assert next(veiculos) == {"id": 1}
+        assert list(veiculos) == [{"id": 2}, {"id": 3}]
+
+
+def test_cliente_assincrono_tenta_de_novo_e_busca_em_paralelo():
+    tentativas = {}
+
+    def responder(request: httpx.Request) -> httpx.Response:
+        filtros = json.loads(request.content)
+        tentativas[filtros["marca"]] = tentativas.get(filtros["marca"], 0) + 1
+        if tentativas[filtros["marca"]] == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"itens": [{"id": 1, "marca": filtros["marca"]}], "next_cursor": None})
+
+    async def cenario():
+        async with ClienteMCPAsync(backoff_base_s=0, transport=httpx.MockTransport(responder)) as cliente:
+            return await cliente.consultar_varios([{"marca": m} for m in ["Fiat", "Ford", "Honda"]])
+
+    resultados = asyncio.run(cenario())
+    assert [r[0]["marca"] for r in resultados] == ["Fiat", "Ford", "Honda"]
+    assert tentativas == {"Fiat": 2, "Ford": 2, "Honda": 2}
+
+
+def test_cliente_assincrono_levanta_erro_de_conexao():
+    async def cenario():
+        async with ClienteMCPAsync(
+            base_url=f"http://127.0.0.1:{_porta_fechada()}", max_tentativas=2, backoff_base_s=0
+        ) as cliente:
+            await cliente.buscar_pagina({})
+
+    with pytest.raises(ErroConexaoMCP):
+        asyncio.run(cenario())
+
+
+def test_cliente_assincrono_busca_em_lote():
+    def responder(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/mcp/buscar_veiculos/lote/"
+        buscas = json.loads(request.content)["buscas"]
+        return httpx.Response(200, json={"resultados": [{"itens": [b], "next_cursor": None} for b in buscas]})
+
+    async def cenario():
+        async with ClienteMCPAsync(transport=httpx.MockTransport(responder)) as cliente:
+            return await cliente.buscar_em_lote([{"marca": "Fiat"}, {"marca": "Ford"}])
+
+    assert [p["itens"][0]["marca"] for p in asyncio.run(cenario())] == ["Fiat", "Ford"]
@@ -0,0 +1,72 @@
+import pytest
+
+from app.agent.extrator_regras import VocabularioInventario, extrair_filtros_por_regras
+from app.core.config import AGENTE_LIMIAR_CONFIANCA_REGRAS
+from benchmarks.bench_extrator_regras import avaliar, carregar_frases, vocabulario_do_csv
+
+
+@pytest.fixture(scope="module")
+def vocabulario():
+    return vocabulario_do_csv()
+
+
+def test_frase_simples_dispensa_o_llm(vocabulario):
+    resultado = extrair_filtros_por_regras("quero um Toyota flex automático acima de 150 cv", vocabulario)
+    assert resultado.filtros == {
+        "marca": "Toyota", "combustivel": "Flex", "transmissao_automatica": True, "potencia_cv_min": 150,
+    }
+    assert resultado.confianca == 1.0
+    assert resultado.dispensa_llm(AGENTE_LIMIAR_CONFIANCA_REGRAS)
+
+
+@pytest.mark.parametrize("frase", [
+    "olá, tudo bem?",                      # Conversa
+    "quero um Toyota ou Honda flex",       # Dois valores para o mesmo filtro
+    "quero um BMW automático",             # Marca fora do inventário
+    "um carro 2015",                       # Ano solto: mínimo? máximo?
+])
+def test_frases_dificeis_vao_para_o_llm(vocabulario, frase):
+    assert not extrair_filtros_por_regras(frase, vocabulario).dispensa_llm(AGENTE_LIMIAR_CONFIANCA_REGRAS)
+
+
+@pytest.mark.parametrize("frase", [
+    "quero um toyota flex que nao seja automatico",
+    "toyota corolla flex sem ser automatico",
+    "toyota flex que não é automático acima de 100 cv",
+    "toyota flex nada de automatico",
+    "fiat uno flex que nao seja diesel",
+])
+def test_negacao_longe_do_valor_nao_vira_o_filtro_oposto(vocabulario, frase):
+    resultado = extrair_filtros_por_regras(frase, vocabulario)
+    assert "transmissao_automatica" not in resultado.filtros and resultado.filtros.get("combustivel") != "Diesel"
+    assert not resultado.dispensa_llm(AGENTE_LIMIAR_CONFIANCA_REGRAS)
+
+
+def test_negacao_colada_e_prefixo_de_maximo_seguem_nas_regras(vocabulario):
+    assert extrair_filtros_por_regras("Chevrolet não automático", vocabulario).filtros == {
+        "marca": "Chevrolet", "transmissao_automatica": False,
+    }
+    resultado = extrair_filtros_por_regras("fiat com menos de 100 cv", vocabulario)
+    assert resultado.filtros == {"marca": "Fiat", "potencia_cv_max": 100}
+    assert resultado.dispensa_llm(AGENTE_LIMIAR_CONFIANCA_REGRAS)
+
+
+def test_vocabulario_vem_do_inventario():
+    vocabulario = VocabularioInventario.de_valores({"marca": ["Citroën"], "modelo": ["C3"], "combustivel": []})
+    resultado = extrair_filtros_por_regras("citroen c3 hibrido", vocabulario)
+    assert resultado.filtros == {"marca": "Citroën", "modelo": "C3", "combustivel": "Híbrido"}
+    # Apelido só vale se a marca existe no inventário
+    assert "vw" not in vocabulario.marca
+
+
+def test_conjunto_rotulado(vocabulario):
+    metricas = avaliar(carregar_frases(), vocabulario, AGENTE_LIMIAR_CONFIANCA_REGRAS)
+    assert metricas["falsos_atalhos"] == 0
+    assert metricas["acerto_caminho_rapido"] == 1.0
+    assert metricas["chamadas_llm_evitadas"] >= metricas["frases"] * 0.5
+
+
+def test_endpoint_de_vocabulario(cliente_api):
+    vocabulario = cliente_api.get("/mcp/vocabulario/").json()
+    assert "Toyota" in vocabulario["marca"] and "Corolla" in vocabulario["modelo"]
+    assert vocabulario["combustivel"] == sorted(vocabulario["combustivel"])
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import select
+
+from app.database.models import Veiculo
+from app.database.session import SessionLocal
+from app.database.texto import dobrar_texto
+from app.mcp.filtros import REGRAS_FILTROS, compilar_filtros, consulta_compilada
+from app.mcp.indice_memoria import IndiceInventario
+from app.mcp.schemas import VeiculoFiltros
+
+# Um valor por campo de VeiculoFiltros e o que ele significa, escrito à parte das regras
+SEMANTICA_DOS_CAMPOS = {
+    "marca": ("VOLKS", lambda v: "volks" in dobrar_texto(v.marca)),
+    "modelo": ("cõrol", lambda v: "corol" in dobrar_texto(v.modelo)),
+    "ano_producao_inicial_min": (2000, lambda v: v.ano_producao_inicial >= 2000),
+    "ano_producao_inicial_max": (1995, lambda v: v.ano_producao_inicial <= 1995),
+    "ano_producao_final_especifico": (2020, lambda v: v.ano_producao_final == 2020),
+    "combustivel": ("diesel", lambda v: v.combustivel == "Diesel"),
+    "num_portas": (2, lambda v: v.num_portas == 2),
+    "transmissao_automatica": (False, lambda v: v.transmissao_automatica is False),
+    "potencia_cv_min": (150, lambda v: v.potencia_cv >= 150),
+    "potencia_cv_max": (100, lambda v: v.potencia_cv <= 100),
+    "porta_malas_litros_min": (400, lambda v: v.porta_malas_litros is not None and v.porta_malas_litros >= 400),
+    "autonomia_km_l_min": (13.0, lambda v: v.autonomia_km_l >= 13.0),
+}
+
+
+@pytest.fixture(scope="module")
+def inventario(banco_populado):
+    with SessionLocal() as db:
+        return db.execute(select(Veiculo).order_by(Veiculo.id)).scalars().all()
+
+
+def test_todo_campo_do_schema_tem_regra():
+    assert [regra.campo for regra in REGRAS_FILTROS] == list(VeiculoFiltros.model_fields)
+    assert set(SEMANTICA_DOS_CAMPOS) == set(VeiculoFiltros.model_fields)
+
+
+@pytest.mark.parametrize("campo", list(SEMANTICA_DOS_CAMPOS))
+def test_cada_campo_e_aplicado(cliente_api, inventario, campo):
+    valor, atende = SEMANTICA_DOS_CAMPOS[campo]
+    esperados = [v.id for v in inventario if atende(v)]
+    assert 0 < len(esperados) < len(inventario) # O valor escolhido precisa separar o inventário
+
+    for parametros in ({"limite": 500}, {"limite": 500, "campos": "marca"}):
+        resposta = cliente_api.post("/mcp/buscar_veiculos/", json={campo: valor}, params=parametros)
+        assert [v["id"] for v in resposta.json()["itens"]] == esperados, parametros
+
+    indice = IndiceInventario()
+    indice.carregar(inventario)
+    assert [v.id for v in indice.buscar(VeiculoFiltros(**{campo: valor}), quantidade=10_000)] == esperados
+
+
+def test_consulta_compilada_e_reaproveitada_por_forma():
+    forma_a, parametros_a = compilar_filtros(VeiculoFiltros(marca="fiat", potencia_cv_min=100), {"marca": {"fiat"}})
+    forma_b, parametros_b = compilar_filtros(
+        VeiculoFiltros(marca="o", potencia_cv_min=150), {"marca": {"ford", "toyota"}}
+    )
+    assert forma_a == forma_b == (("marca", "in"), ("potencia_cv_min", "minimo"))
+    assert parametros_a != parametros_b
+    assert consulta_compilada(forma_a) is consulta_compilada(forma_b)
+
+    sem_candidatos, _ = compilar_filtros(VeiculoFiltros(marca="fiat"), {"marca": set()})
+    assert sem_candidatos == (("marca", "nenhum"),)
+    assert consulta_compilada(sem_candidatos, None, True) is not consulta_compilada(sem_candidatos)
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import select
+
+from app.database.eventos import notificar_dados_alterados
+from app.database.models import Veiculo
+from app.database.session import SessionLocal
+from app.mcp import server
+from app.mcp.indice_memoria import IndiceInventario, indice_inventario
+from app.mcp.schemas import VeiculoFiltros
+from app.mcp.server import construir_consulta_veiculos
+
+FILTROS_DE_PARIDADE = [
+    {},
+    {"marca": "toyota"},
+    {"modelo": "ON"},
+    {"combustivel": "flex", "transmissao_automatica": False},
+    {"marca": "Chevrolet", "potencia_cv_min": 100, "potencia_cv_max": 200},
+    {"ano_producao_inicial_min": 2000, "ano_producao_inicial_max": 2010},
+    {"ano_producao_final_especifico": 2021},
+    {"num_portas": 2, "transmissao_automatica": True},
+    {"porta_malas_litros_min": 400, "autonomia_km_l_min": 11.5},
+    {"marca": "inexistente"},
+]
+
+
+@pytest.fixture
+def indice_carregado(banco_populado):
+    indice = IndiceInventario()
+    with SessionLocal() as db:
+        indice.carregar(db.execute(select(Veiculo)).scalars().all())
+    return indice
+
+
+@pytest.mark.parametrize("filtros", FILTROS_DE_PARIDADE)
+def test_indice_retorna_o_mesmo_que_o_sql(indice_carregado, filtros):
+    modelo_filtros = VeiculoFiltros(**filtros)
+    with SessionLocal() as db:
+        consulta = construir_consulta_veiculos(modelo_filtros).order_by(Veiculo.id)
+        esperados = [v.id for v in db.execute(consulta).scalars()]
+
+    obtidos = [v.id for v in indice_carregado.buscar(modelo_filtros, quantidade=10_000)]
+    assert obtidos == esperados
+
+
+def test_indice_pagina_por_keyset(indice_carregado):
+    filtros = VeiculoFiltros(combustivel="Flex")
+    todos = [v.id for v in indice_carregado.buscar(filtros, quantidade=10_000)]
+    primeira = indice_carregado.buscar(filtros, quantidade=5)
+    segunda = indice_carregado.buscar(filtros, quantidade=5, apos_id=primeira[-1].id)
+    assert [v.id for v in primeira + segunda] == todos[:10]
+
+
+def test_endpoint_usa_indice_e_e_invalidado_pelo_loader(cliente_api, monkeypatch):
+    monkeypatch.setattr(server, "MCP_INDICE_MEMORIA", True)
+    monkeypatch.setattr(server, "MCP_CACHE_RESULTADOS", False)
+    indice_inventario.invalidar()
+
+    via_indice = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Fiat"}, params={"limite": 500})
+    assert indice_inventario.carregado
+    monkeypatch.setattr(server, "MCP_INDICE_MEMORIA", False)
+    via_sql = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Fiat"}, params={"limite": 500})
+    assert via_indice.json() == via_sql.json()
+
+    notificar_dados_alterados()
+    assert not indice_inventario.carregado
+
+
+def test_endpoint_projeta_campos_tambem_pelo_indice(cliente_api, monkeypatch):
+    monkeypatch.setattr(server, "MCP_CACHE_RESULTADOS", False)
+    params = {"limite": 6, "campos": "modelo,potencia_cv"}
+    via_sql = cliente_api.post("/mcp/buscar_veiculos/", json={"combustivel": "Diesel"}, params=params)
+    monkeypatch.setattr(server, "MCP_INDICE_MEMORIA", True)
+    via_indice = cliente_api.post("/mcp/buscar_veiculos/", json={"combustivel": "Diesel"}, params=params)
+    assert via_indice.json() == via_sql.json()
+    assert set(via_indice.json()["itens"][0]) == {"id", "modelo", "potencia_cv"}
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import logging
+
+from app.agent import conversa
+from app.agent.conversa import DURACAO_ETAPA, SessaoConversa
+from app.agent.extrator_regras import VocabularioInventario
+from app.core.metricas import RegistroMetricas
+
+
+def test_exportacao_no_formato_prometheus():
+    registro = RegistroMetricas()
+    requisicoes = registro.contador("x_requisicoes_total", "Requisições.", ["rota"])
+    latencia = registro.histograma("x_duracao_segundos", "Duração.", ["rota"], buckets=(0.1, 1.0))
+    requisicoes.incrementar(rota='/a"b')
+    requisicoes.incrementar(2, rota='/a"b')
+    for valor in (0.05, 0.5, 3.0):
+        latencia.observar(valor, rota="/a")
+
+    texto = registro.exportar()
+    assert "# TYPE x_requisicoes_total counter" in texto
+    assert 'x_requisicoes_total{rota="/a\\"b"} 3' in texto
+    assert 'x_duracao_segundos_bucket{rota="/a",le="0.1"} 1' in texto
+    assert 'x_duracao_segundos_bucket{rota="/a",le="1"} 2' in texto
+    assert 'x_duracao_segundos_bucket{rota="/a",le="+Inf"} 3' in texto
+    assert 'x_duracao_segundos_count{rota="/a"} 3' in texto
+    # Registrar de novo devolve a mesma métrica
+    assert registro.contador("x_requisicoes_total", "Requisições.", ["rota"]) is requisicoes
+
+
+def test_metrics_do_servidor_mcp_e_log_por_requisicao(cliente_api, caplog):
+    filtros = {"marca": "Toyota", "potencia_cv_min": 1, "num_portas": 4} # Fora do cache dos outros testes
+    with caplog.at_level(logging.INFO, logger="app.tempos"):
+        assert cliente_api.post("/mcp/buscar_veiculos/", json=filtros).status_code == 200
+
+    registro_log = [json.loads(r.getMessage()) for r in caplog.records if r.name == "app.tempos"][-1]
+    assert registro_log["rota"] == "/mcp/buscar_veiculos/" and registro_log["status"] == 200
+    assert registro_log["consultas_sql"] >= 1 and registro_log["banco_ms"] > 0
+
+    texto = cliente_api.get("/metrics").text
+    assert 'http_requisicao_duracao_segundos_count{metodo="POST",rota="/mcp/buscar_veiculos/"}' in texto
+    assert 'http_requisicoes_em_andamento{metodo="POST",rota="/mcp/buscar_veiculos/"} 0' in texto
+    assert 'db_consulta_duracao_segundos_count{engine="assincrono",operacao="SELECT"}' in texto
+    assert 'db_pool_espera_checkout_segundos_count{engine="assincrono"}' in texto
+    assert 'db_pool_conexoes_em_uso{engine="sincrono"}' in texto
+
+
+def test_etapas_do_turno_do_agente(monkeypatch, caplog):
+    async def llm(mensagens, ao_receber_trecho=None):
+        return "Claro!\nFILTROS_COLETADOS: marca=Fiat"
+
+    monkeypatch.setattr(conversa, "_vocabulario", VocabularioInventario.de_valores({"marca": ["Fiat"], "modelo": []}))
+    monkeypatch.setattr(conversa, "consultar_veiculos_mcp", lambda filtros, limite=None, campos=None: [])
+    monkeypatch.setattr(conversa, "buscar_proximos_mcp", lambda filtros, pesos=None, limite=None, campos=None: [])
+    antes = {etapa: DURACAO_ETAPA.contagem(etapa=etapa) for etapa in ("regras", "llm", "parse", "mcp")}
+
+    with caplog.at_level(logging.INFO, logger="app.agent.conversa"):
+        asyncio.run(conversa.processar_turno(SessaoConversa(), "me ajuda a escolher um carro e pode buscar", llm))
+
+    for etapa, contagem in antes.items():
+        assert DURACAO_ETAPA.contagem(etapa=etapa) == contagem + 1, etapa
+    tempos = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Tempos do turno")][-1]
+    dados = json.loads(tempos.split(": ", 1)[1])
+    assert dados["caminho"] == "llm" and dados["acao"] == "busca"
+    assert set(dados["etapas_ms"]) == {"regras", "llm", "parse", "mcp"}
@@ -0,0 +1,73 @@
+"""
+Regressão de planos de execução: cada mistura representativa de filtros precisa continuar
+atendida por um índice. Se uma mudança na consulta (ou a remoção de um índice) fizer o banco
+voltar a varrer a tabela, o teste falha mostrando o plano.
+
+Intervalos abertos de um lado só (ex: apenas potencia_cv_min) ficam de fora de propósito:
+com ORDER BY id LIMIT, percorrer a tabela na ordem do id e parar no limite é a escolha
+do planejador, e é boa quando o filtro deixa passar muitas linhas.
+"""
+from typing import Any, Dict, List
+
+import pytest
+
+from app.core.config import DATABASE_URL
+from app.database.session import obter_engine
+from app.mcp.filtros import PARAMETRO_LIMITE, compilar_filtros, consulta_compilada
+from app.mcp.schemas import VeiculoFiltros
+
+pytestmark = pytest.mark.skipif(
+    not DATABASE_URL.startswith("sqlite"), reason="Os planos esperados são os do SQLite (EXPLAIN QUERY PLAN)."
+)
+
+# (filtros, candidatos do índice n-grama, índice que deve atender a consulta)
+CASOS = {
+    "faixa de ano": (
+        {"ano_producao_inicial_min": 2000, "ano_producao_inicial_max": 2010}, None, "ix_veiculos_ano_inicial_potencia"
+    ),
+    "faixa de ano e potência": (
+        {"ano_producao_inicial_min": 1995, "ano_producao_inicial_max": 2005, "potencia_cv_min": 120},
+        None, "ix_veiculos_ano_inicial_potencia",
+    ),
+    "faixa de potência": (
+        {"potencia_cv_min": 100, "potencia_cv_max": 150}, None, "ix_veiculos_potencia_ano_inicial"
+    ),
+    "portas e câmbio": (
+        {"num_portas": 4, "transmissao_automatica": False}, None, "ix_veiculos_portas_transmissao_potencia"
+    ),
+    "portas, câmbio e potência": (
+        {"num_portas": 2, "transmissao_automatica": True, "potencia_cv_min": 150},
+        None, "ix_veiculos_portas_transmissao_potencia",
+    ),
+    "câmbio e potência": (
+        {"transmissao_automatica": True, "potencia_cv_min": 150}, None, "ix_veiculos_transmissao_potencia"
+    ),
+    "ano final (índice parcial)": ({"ano_producao_final_especifico": 2020}, None, "ix_veiculos_ano_final"),
+    "combustível e ano": (
+        {"combustivel": "flex", "ano_producao_inicial_min": 2005},
+        {"combustivel": {"flex"}}, "ix_veiculos_combustivel_ano_inicial",
+    ),
+    "marca": ({"marca": "fiat"}, {"marca": {"fiat"}}, "ix_veiculos_marca_busca"),
+    "modelo": ({"modelo": "gol"}, {"modelo": {"gol", "gol g5"}}, "ix_veiculos_modelo_busca"),
+}
+
+
+def plano_de_execucao(consulta, parametros: Dict[str, Any]) -> List[str]:
+    """Linhas do EXPLAIN QUERY PLAN da consulta, executada com `parametros`."""
+    engine = obter_engine()
+    # render_postcompile expande o IN (...) em um parâmetro por valor, como na execução real
+    compilada = consulta.params(parametros).compile(engine, compile_kwargs={"render_postcompile": True})
+    valores = tuple(compilada.params[nome] for nome in compilada.positiontup)
+    with engine.connect() as conexao:
+        linhas = conexao.exec_driver_sql(f"EXPLAIN QUERY PLAN {compilada}", valores).all()
+    return [linha[-1] for linha in linhas]
+
+
+@pytest.mark.parametrize("filtros, candidatos, indice", CASOS.values(), ids=list(CASOS))
+def test_filtros_usam_indice(banco_populado, filtros, candidatos, indice):
+    # A consulta da busca paginada, como o servidor a executa (ver preparar_busca_compilada)
+    forma, parametros = compilar_filtros(VeiculoFiltros(**filtros), candidatos)
+    plano = plano_de_execucao(consulta_compilada(forma), {**parametros, PARAMETRO_LIMITE: 21})
+
+    assert not any(passo.startswith("SCAN veiculos") for passo in plano), plano
+    assert any(f"INDEX {indice} " in passo for passo in plano), plano
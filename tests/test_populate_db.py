@@ -0,0 +1,216 @@
+import pytest
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import session
+from app.database.migracoes import MIGRACOES, aplicar_migracoes, versao_esquema
+from app.database.models import Base, Veiculo
+from scripts import populate_db
+
+CABECALHO = (
+    "marca,modelo,ano_producao_inicial,ano_producao_final,potencia_cv,combustivel,num_portas,"
+    "porta_malas_litros,transmissao_automatica,capacidade_carga_kg,tanque_litros,autonomia_km_l\n"
+)
+
+
+@pytest.fixture
+def banco_isolado(tmp_path, monkeypatch):
+    """Engine SQLite próprio, para as cargas não interferirem no banco compartilhado dos testes."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'carga.db'}")
+    # O engine é criado sob demanda: trocá-lo troca também o das sessões de SessionLocal
+    monkeypatch.setattr(session, "_engine", engine)
+    return engine
+
+
+def _contar(engine):
+    with engine.connect() as conexao:
+        return conexao.scalar(select(func.count()).select_from(Veiculo.__table__))
+
+
+def test_carga_em_lotes_descarta_duplicatas_e_e_idempotente(banco_isolado, tmp_path):
+    linhas = [f"Marca{i % 7},Modelo{i},2000,,{100 + i % 3},Flex,4,300.0,True,,50,12.5\n" for i in range(250)]
+    linhas += linhas[:40]  # duplicatas espalhadas por lotes diferentes
+    linhas.append(",SemMarca,2000,,100,Flex,4,,False,,,\n")  # sem campo da chave natural
+    arquivo = tmp_path / "veiculos.csv"
+    arquivo.write_text(CABECALHO + "".join(linhas))
+
+    populate_db.criar_tabelas_se_nao_existirem()
+    mensagem = populate_db.popula_dados(str(arquivo), tamanho_lote=64)
+    assert mensagem.startswith("250 novos veículos")
+    assert "linhas/s" in mensagem
+    assert _contar(banco_isolado) == 250
+
+    assert populate_db.popula_dados(str(arquivo), tamanho_lote=64).startswith("Base já populada")
+    assert _contar(banco_isolado) == 250
+
+
+def test_tipos_sao_convertidos_no_lote(banco_isolado, tmp_path):
+    arquivo = tmp_path / "veiculos.csv"
+    arquivo.write_text(CABECALHO + "Ford,EcoSport,2003,2021.0,135,Flex,4,362.0,false,,52,10.9\n")
+
+    populate_db.criar_tabelas_se_nao_existirem()
+    populate_db.popula_dados(str(arquivo))
+    with sessionmaker(bind=banco_isolado)() as db:
+        veiculo = db.execute(select(Veiculo)).scalar_one()
+    assert (veiculo.ano_producao_final, veiculo.porta_malas_litros) == (2021, 362)
+    assert veiculo.transmissao_automatica is False
+    assert veiculo.capacidade_carga_kg is None
+
+
+def test_banco_antigo_com_duplicatas_recebe_indice_unico(banco_isolado):
+    Base.metadata.create_all(bind=banco_isolado)
+    with banco_isolado.begin() as conexao:
+        conexao.execute(text("DROP INDEX uq_veiculos_chave_natural"))
+        for autonomia in (12.0, 13.0):
+            conexao.execute(Veiculo.__table__.insert().values(
+                marca="Fiat", modelo="Uno", ano_producao_inicial=1990, potencia_cv=70, autonomia_km_l=autonomia
+            ))
+
+    populate_db.criar_tabelas_se_nao_existirem()
+    assert _contar(banco_isolado) == 1
+    with sessionmaker(bind=banco_isolado)() as db:
+        assert db.execute(select(Veiculo.autonomia_km_l)).scalar_one() == 12.0
+
+
+def test_banco_antigo_recebe_colunas_de_busca_preenchidas(banco_isolado):
+    with banco_isolado.begin() as conexao:
+        conexao.execute(text(
+            "CREATE TABLE veiculos (id INTEGER PRIMARY KEY, marca VARCHAR(100) NOT NULL, modelo VARCHAR(100) NOT NULL, "
+            "ano_producao_inicial INTEGER NOT NULL, ano_producao_final INTEGER, potencia_cv INTEGER, "
+            "combustivel VARCHAR(50), num_portas INTEGER, porta_malas_litros INTEGER, transmissao_automatica BOOLEAN, "
+            "capacidade_carga_kg FLOAT, tanque_litros INTEGER, autonomia_km_l FLOAT)"
+        ))
+        conexao.execute(text(
+            "INSERT INTO veiculos (marca, modelo, ano_producao_inicial, potencia_cv, combustivel) "
+            "VALUES ('Citroën', 'C3', 2015, 90, 'Elétrico')"
+        ))
+
+    populate_db.criar_tabelas_se_nao_existirem()
+    with banco_isolado.connect() as conexao:
+        linha = conexao.execute(text("SELECT marca_busca, modelo_busca, combustivel_busca FROM veiculos")).one()
+    assert tuple(linha) == ("citroen", "c3", "eletrico")
+
+
+def test_banco_antigo_recebe_indices_dos_filtros_por_migracao(banco_isolado):
+    Base.metadata.create_all(bind=banco_isolado) # Como um banco criado antes das migrações
+    indices = {i["name"] for i in inspect(banco_isolado).get_indexes("veiculos")}
+    assert "ix_veiculos_ano_inicial_potencia" not in indices
+
+    populate_db.criar_tabelas_se_nao_existirem()
+    indices = {i["name"] for i in inspect(banco_isolado).get_indexes("veiculos")}
+    assert {"ix_veiculos_ano_inicial_potencia", "ix_veiculos_ano_final"} <= indices
+    with banco_isolado.connect() as conexao:
+        assert versao_esquema(conexao) == MIGRACOES[-1].versao
+    assert aplicar_migracoes(banco_isolado) == [] # Já aplicadas: nada a fazer
+
+
+def _versao_dados(engine):
+    with engine.connect() as conexao:
+        return conexao.scalar(text("SELECT valor FROM metadados_sistema WHERE chave = 'versao_dados_veiculos'"))
+
+
+def test_sincronizacao_aplica_so_as_diferencas(banco_isolado, tmp_path):
+    linhas = [f"Marca{i},Modelo{i},2000,,{100 + i},Flex,4,300.0,True,,50,12.5\n" for i in range(10)]
+    arquivo = tmp_path / "veiculos.csv"
+    arquivo.write_text(CABECALHO + "".join(linhas))
+    populate_db.criar_tabelas_se_nao_existirem()
+    populate_db.popula_dados(str(arquivo))
+    with banco_isolado.connect() as conexao:
+        ids_antes = dict(conexao.execute(select(Veiculo.modelo, Veiculo.id)).all())
+    versao = _versao_dados(banco_isolado)
+
+    linhas[3] = "Marca3,Modelo3,2000,2012,103,Flex,4,300.0,True,,50,13.1\n" # Dados alterados
+    del linhas[5]                                                        # Saiu do feed
+    linhas.append("MarcaNova,ModeloNovo,2024,,90,Flex,4,,False,,,\n")     # Entrou no feed
+    arquivo.write_text(CABECALHO + "".join(linhas))
+
+    simulacao = populate_db.sincronizar_dados(str(arquivo), aplicar=False)
+    assert "1 inseridos, 1 atualizados, 1 removidos, 8 inalterados" in simulacao
+    assert _contar(banco_isolado) == 10 and _versao_dados(banco_isolado) == versao
+
+    mensagem = populate_db.sincronizar_dados(str(arquivo), tamanho_lote=4)
+    assert mensagem.startswith("Sincronização concluída: 1 inseridos, 1 atualizados, 1 removidos")
+    with sessionmaker(bind=banco_isolado)() as db:
+        veiculos = {v.modelo: v for v in db.execute(select(Veiculo)).scalars()}
+    assert set(veiculos) == {f"Modelo{i}" for i in range(10) if i != 5} | {"ModeloNovo"}
+    assert (veiculos["Modelo3"].ano_producao_final, veiculos["Modelo3"].autonomia_km_l) == (2012, 13.1)
+    assert veiculos["Modelo3"].id == ids_antes["Modelo3"] # Atualizado no lugar, não recriado
+    assert veiculos["ModeloNovo"].marca_busca == "marcanova" and veiculos["ModeloNovo"].hash_linha
+    assert int(_versao_dados(banco_isolado)) == int(versao) + 1
+
+    versao = _versao_dados(banco_isolado)
+    assert populate_db.sincronizar_dados(str(arquivo)).startswith("Base já sincronizada")
+    assert _versao_dados(banco_isolado) == versao # Nada mudou: caches continuam valendo
+
+
+def test_sincronizacao_em_varios_lotes_incrementa_a_versao_uma_vez(banco_isolado, tmp_path):
+    linhas = [f"Marca{i},Modelo{i},2000,,{100 + i},Flex,4,300.0,True,,50,12.5\n" for i in range(12)]
+    arquivo = tmp_path / "veiculos.csv"
+    arquivo.write_text(CABECALHO + "".join(linhas[:6]))
+    populate_db.criar_tabelas_se_nao_existirem()
+    populate_db.popula_dados(str(arquivo))
+    versao = int(_versao_dados(banco_isolado))
+
+    # Remove 3, atualiza 3 e insere 6: com lotes de 2, nove transações de dados
+    alteradas = [linha.replace(",12.5", ",9.9") for linha in linhas[3:6]]
+    arquivo.write_text(CABECALHO + "".join(alteradas + linhas[6:]))
+    mensagem = populate_db.sincronizar_dados(str(arquivo), tamanho_lote=2)
+    assert mensagem.startswith("Sincronização concluída: 6 inseridos, 3 atualizados, 3 removidos")
+    assert int(_versao_dados(banco_isolado)) == versao + 1
+
+
+def test_sincronizacao_preenche_hash_de_linhas_antigas_sem_alterar_dados(banco_isolado, tmp_path):
+    arquivo = tmp_path / "veiculos.csv"
+    arquivo.write_text(CABECALHO + "Ford,EcoSport,2003,2021.0,135,Flex,4,362.0,false,,52,10.9\n")
+    populate_db.criar_tabelas_se_nao_existirem()
+    populate_db.popula_dados(str(arquivo))
+    with banco_isolado.begin() as conexao:
+        hash_original = conexao.scalar(select(Veiculo.hash_linha))
+        conexao.execute(text("UPDATE veiculos SET hash_linha = NULL")) # Como uma linha carregada antes do hash
+    versao = _versao_dados(banco_isolado)
+
+    assert "0 atualizados, 0 removidos, 1 inalterados" in populate_db.sincronizar_dados(str(arquivo))
+    with banco_isolado.connect() as conexao:
+        assert conexao.scalar(select(Veiculo.hash_linha)) == hash_original
+    assert _versao_dados(banco_isolado) == versao
+
+
+def test_sincronizacao_invalida_so_o_cache_das_buscas_afetadas(banco_isolado, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.database.eventos import notificar_dados_alterados
+    from app.mcp import server
+    from run_mcp_server import app
+
+    monkeypatch.setattr(session, "_async_engine", create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'carga.db'}"))
+    monkeypatch.setattr(server, "MCP_INDICE_MEMORIA", False)
+    monkeypatch.setattr(server.monitor_versao_dados, "intervalo_s", 0)
+    # Sem o aviso em processo: o servidor só fica sabendo pelo banco, como outro worker
+    monkeypatch.setattr(populate_db, "notificar_dados_alterados", lambda escopo=None: None)
+    linhas = [f"Marca{i},Modelo{i},2000,,{100 + i},Flex,4,300.0,True,,50,12.5\n" for i in range(10)]
+    arquivo = tmp_path / "veiculos.csv"
+    arquivo.write_text(CABECALHO + "".join(linhas))
+    populate_db.criar_tabelas_se_nao_existirem()
+    populate_db.popula_dados(str(arquivo))
+    server.cache_resultados.limpar()
+    server.monitor_versao_dados.esquecer()
+
+    try:
+        with TestClient(app) as cliente:
+            cliente.post("/mcp/buscar_veiculos/", json={"marca": "Marca1"})
+            cliente.post("/mcp/buscar_veiculos/", json={"marca": "Marca3"})
+
+            linhas[3] = "Marca3,Modelo3,2000,2012,103,Flex,4,300.0,True,,50,13.1\n"
+            arquivo.write_text(CABECALHO + "".join(linhas))
+            assert populate_db.sincronizar_dados(str(arquivo)).startswith("Sincronização concluída")
+
+            nao_afetada = cliente.post("/mcp/buscar_veiculos/", json={"marca": "Marca1"})
+            afetada = cliente.post("/mcp/buscar_veiculos/", json={"marca": "Marca3"})
+    finally:
+        server.cache_resultados.limpar()
+        notificar_dados_alterados()
+        server.monitor_versao_dados.esquecer()
+
+    assert nao_afetada.headers["X-Cache"] == "HIT"
+    assert afetada.headers["X-Cache"] == "MISS"
+    assert [v["ano_producao_final"] for v in afetada.json()["itens"]] == [2012]
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app.core.config import DB_POOL_RECYCLE_S, DB_POOL_TIMEOUT_S
+from app.database import session
+from app.database.models import Base, Veiculo
+from app.mcp import server
+
+# Só existe na réplica: encontrar este veículo prova que a busca foi atendida por ela
+FILTRO_SO_NA_REPLICA = {"potencia_cv_min": 9000}
+
+
+@pytest.fixture
+def replica(tmp_path):
+    """Um segundo arquivo SQLite, com as tabelas e um único veículo, fazendo o papel da réplica."""
+    caminho = tmp_path / "replica.db"
+    engine = create_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conexao:
+        conexao.execute(Veiculo.__table__.insert().values(
+            marca="Replicada", modelo="R1", ano_producao_inicial=2020, potencia_cv=9999, combustivel="Flex",
+            num_portas=4, transmissao_automatica=True,
+        ))
+    engine.dispose()
+    return f"sqlite:///{caminho}"
+
+
+@pytest.fixture
+def usar_replicas(monkeypatch):
+    monkeypatch.setattr(server, "MCP_CACHE_RESULTADOS", False)
+    monkeypatch.setattr(server, "MCP_INDICE_MEMORIA", False)
+
+    def configurar(urls, quarentena_s=60.0):
+        seletor = session.criar_seletor_replicas(urls, quarentena_s)
+        monkeypatch.setattr(session, "_seletor_replicas", seletor)
+        return seletor
+
+    return configurar
+
+
+def _marcas(cliente_api, filtros):
+    resposta = cliente_api.post("/mcp/buscar_veiculos/", json=filtros, params={"limite": 500})
+    assert resposta.status_code == 200
+    return {v["marca"] for v in resposta.json()["itens"]}
+
+
+def test_buscas_vao_para_a_replica(cliente_api, replica, usar_replicas):
+    assert _marcas(cliente_api, FILTRO_SO_NA_REPLICA) == set() # Sem réplica: primário
+    usar_replicas([replica])
+    assert _marcas(cliente_api, FILTRO_SO_NA_REPLICA) == {"Replicada"}
+
+
+def test_replica_fora_do_ar_fica_em_quarentena_e_a_leitura_segue(cliente_api, replica, usar_replicas, tmp_path):
+    inacessivel = f"sqlite:///{tmp_path / 'nao' / 'existe' / 'replica.db'}" # Diretório inexistente: não abre
+    seletor = usar_replicas([inacessivel, replica])
+
+    assert _marcas(cliente_api, FILTRO_SO_NA_REPLICA) == {"Replicada"} # A segunda réplica atendeu
+    assert not seletor.disponivel(0) and seletor.disponivel(1)
+    metricas = cliente_api.get("/metrics").text
+    assert 'db_replica_disponivel{engine="replica_1"} 0' in metricas
+    assert 'db_replica_disponivel{engine="replica_2"} 1' in metricas
+    assert 'db_replica_falhas_total{engine="replica_1"} 1' in metricas
+
+
+def test_sem_replica_saudavel_a_leitura_cai_no_primario(cliente_api, usar_replicas, tmp_path):
+    seletor = usar_replicas([f"sqlite:///{tmp_path / 'nao' / 'existe' / 'replica.db'}"])
+    assert "Fiat" in _marcas(cliente_api, {"marca": "Fiat"})
+    assert seletor.candidatas() == [] # Em quarentena: nem é tentada nas próximas leituras
+    assert "Fiat" in _marcas(cliente_api, {"marca": "Fiat"})
+
+
+def test_pool_configurado_pelo_ambiente_e_exposto_nas_metricas(cliente_api):
+    pool = session.obter_engine().pool
+    assert (pool._recycle, pool._timeout) == (DB_POOL_RECYCLE_S, DB_POOL_TIMEOUT_S)
+    cliente_api.post("/mcp/buscar_veiculos/", json={})
+    metricas = cliente_api.get("/metrics").text
+    assert 'db_pool_utilizacao{engine="assincrono"}' in metricas
+    assert "db_pool_espera_checkout_segundos" in metricas
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.agent import conversa, servico, terminal_agent
+from app.agent.extrator_regras import VocabularioInventario
+from app.agent.fila_llm import FilaCheia, FilaLLMJusta
+from app.agent.sessoes import ArmazemSessoesMemoria
+from app.agent.conversa import SessaoConversa
+
+TRECHOS_LLM = ["Olá! ", "Que tipo de carro ", "você procura?\nFILTROS_COLETADOS: nenhum"]
+
+
+@pytest.fixture
+def llm_falso(monkeypatch):
+    chamadas = []
+
+    def interagir(mensagens, ao_receber_trecho=None):
+        chamadas.append(mensagens)
+        for trecho in TRECHOS_LLM:
+            if ao_receber_trecho:
+                ao_receber_trecho(trecho)
+        return "".join(TRECHOS_LLM)
+
+    monkeypatch.setattr(conversa, "interagir_com_llm", interagir)
+    monkeypatch.setattr(conversa, "_vocabulario", VocabularioInventario.de_valores({"marca": ["Toyota"], "modelo": []}))
+    monkeypatch.setattr(
+        conversa, "consultar_veiculos_mcp",
+        lambda filtros, limite=None, campos=None: [{"marca": "Toyota", "modelo": "Corolla", "combustivel": "Flex"}],
+    )
+    return chamadas
+
+
+@pytest.fixture
+def cliente_agente(llm_falso):
+    from run_agent_server import app
+
+    armazem = ArmazemSessoesMemoria(max_sessoes=10, ttl_s=60)
+    fila = FilaLLMJusta(max_concorrentes=2, max_pendentes=8)
+    app.dependency_overrides[servico.obter_armazem] = lambda: armazem
+    app.dependency_overrides[servico.obter_fila] = lambda: fila
+    with TestClient(app) as cliente:
+        cliente.armazem, cliente.fila = armazem, fila
+        yield cliente
+    app.dependency_overrides.clear()
+
+
+def _nova_sessao(cliente):
+    resposta = cliente.post("/agente/sessoes/")
+    assert resposta.status_code == 201
+    return resposta.json()["sessao_id"]
+
+
+def test_sessoes_tem_estado_proprio(cliente_agente, llm_falso):
+    sessao_a, sessao_b = _nova_sessao(cliente_agente), _nova_sessao(cliente_agente)
+
+    turno = cliente_agente.post(f"/agente/sessoes/{sessao_a}/mensagens/", json={"texto": "olá"}).json()
+    assert turno["caminho"] == "llm" and turno["resposta"] == "".join(TRECHOS_LLM)
+    assert turno["acao"] is None and turno["filtros"] == {}
+
+    # Caminho por regras: filtros da sessão B, busca sem chamar o LLM
+    turno = cliente_agente.post(
+        f"/agente/sessoes/{sessao_b}/mensagens/", json={"texto": "quero um Toyota flex automático"}
+    ).json()
+    assert turno["caminho"] == "regras" and turno["acao"] == "busca"
+    assert turno["filtros"] == {"marca": "Toyota", "combustivel": "Flex", "transmissao_automatica": True}
+    assert turno["veiculos"][0]["modelo"] == "Corolla"
+
+    assert cliente_agente.armazem.obter(sessao_a).filtros == {}
+    assert len(llm_falso) == 1
+    estatisticas = cliente_agente.get("/agente/estatisticas/").json()
+    assert estatisticas["sessoes"]["sessoes"] == 2
+    assert estatisticas["fila_llm"]["executadas"] == 1
+
+
+def test_stream_ndjson_envia_trechos_e_resultado(cliente_agente):
+    sessao = _nova_sessao(cliente_agente)
+    with cliente_agente.stream("POST", f"/agente/sessoes/{sessao}/mensagens/stream", json={"texto": "olá"}) as resposta:
+        assert resposta.headers["content-type"].startswith("application/x-ndjson")
+        eventos = [json.loads(linha) for linha in resposta.iter_lines() if linha]
+    assert [e["conteudo"] for e in eventos if e["tipo"] == "trecho"] == TRECHOS_LLM
+    assert eventos[-1]["tipo"] == "resultado" and eventos[-1]["caminho"] == "llm"
+
+
+def test_websocket_conversa(cliente_agente):
+    sessao = _nova_sessao(cliente_agente)
+    with cliente_agente.websocket_connect(f"/agente/sessoes/{sessao}/ws") as ws:
+        for texto in ["olá", "quero um Toyota flex"]:
+            ws.send_json({"texto": texto})
+            eventos = [ws.receive_json()]
+            while eventos[-1]["tipo"] == "trecho":
+                eventos.append(ws.receive_json())
+            assert eventos[-1]["tipo"] == "resultado"
+        assert eventos[-1]["filtros"] == {"marca": "Toyota", "combustivel": "Flex"}
+    assert cliente_agente.armazem.obter(sessao).turnos == 2
+
+
+def test_sessao_desconhecida_ou_encerrada(cliente_agente):
+    assert cliente_agente.post("/agente/sessoes/nao-existe/mensagens/", json={"texto": "oi"}).status_code == 404
+    sessao = _nova_sessao(cliente_agente)
+    assert cliente_agente.delete(f"/agente/sessoes/{sessao}").status_code == 204
+    assert cliente_agente.post(f"/agente/sessoes/{sessao}/mensagens/", json={"texto": "oi"}).status_code == 404
+
+
+def test_fila_cheia_responde_503(cliente_agente):
+    cliente_agente.fila.max_pendentes = 0
+    sessao = _nova_sessao(cliente_agente)
+    resposta = cliente_agente.post(f"/agente/sessoes/{sessao}/mensagens/", json={"texto": "olá"})
+    assert resposta.status_code == 503 and resposta.headers["retry-after"]
+    # A fala rejeitada não fica no contexto: o usuário pode repetir
+    assert cliente_agente.armazem.obter(sessao).turnos == 0
+
+
+def test_fila_admite_sessoes_em_rodizio_e_limita_concorrencia():
+    ordem, simultaneas = [], []
+
+    async def cenario():
+        fila = FilaLLMJusta(max_concorrentes=1, max_pendentes=10)
+        ativas = 0
+
+        def chamada(rotulo):
+            async def executar():
+                nonlocal ativas
+                ativas += 1
+                simultaneas.append(ativas)
+                ordem.append(rotulo)
+                await asyncio.sleep(0.01)
+                ativas -= 1
+            return executar
+
+        # A sessão "a" manda 3 mensagens antes de "b" e "c" mandarem uma cada
+        pedidos = [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("c", "c1")]
+        await asyncio.gather(*(fila.executar(sessao, chamada(rotulo)) for sessao, rotulo in pedidos))
+
+        fila.max_pendentes = 0
+        with pytest.raises(FilaCheia):
+            await fila.executar("d", chamada("d1"))
+        return fila.estatisticas()
+
+    estatisticas = asyncio.run(cenario())
+    # "a1" roda na hora e "a2" é a primeira da vez; "a3" chegou antes de "b1" e "c1",
+    # mas espera a vez delas (rodízio entre sessões, não ordem de chegada)
+    assert ordem == ["a1", "a2", "b1", "c1", "a3"]
+    assert max(simultaneas) == 1
+    assert estatisticas["executadas"] == 5 and estatisticas["rejeitadas"] == 1
+
+
+def test_armazem_remove_sessao_menos_usada_e_expirada(monkeypatch):
+    armazem = ArmazemSessoesMemoria(max_sessoes=2, ttl_s=60)
+    a, b, c = SessaoConversa(), SessaoConversa(), SessaoConversa()
+    armazem.guardar(a)
+    armazem.guardar(b)
+    assert armazem.obter(a.id) is a # "b" passa a ser a menos usada
+    armazem.guardar(c)
+    assert armazem.obter(b.id) is None and armazem.obter(c.id) is c
+
+    agora = time.monotonic()
+    monkeypatch.setattr("app.agent.sessoes.time.monotonic", lambda: agora + 61)
+    assert armazem.obter(a.id) is None
+    assert armazem.estatisticas()["expiradas"] == 1
+
+
+def test_armazem_descarta_a_busca_antecipada_das_sessoes_removidas(monkeypatch):
+    armazem = ArmazemSessoesMemoria(max_sessoes=1, ttl_s=60)
+    a, b = SessaoConversa(), SessaoConversa()
+    descartadas = []
+    for sessao in (a, b):
+        monkeypatch.setattr(sessao.antecipada, "descartar", lambda s=sessao: descartadas.append(s))
+
+    armazem.guardar(a)
+    armazem.guardar(b) # "a" sai pelo limite
+    assert descartadas == [a]
+
+    agora = time.monotonic()
+    monkeypatch.setattr("app.agent.sessoes.time.monotonic", lambda: agora + 61)
+    assert armazem.obter(b.id) is None # "b" expirou
+    assert descartadas == [a, b]
+
+
+def test_terminal_mostra_trechos_e_resultado(capsys):
+    class ClienteFalso:
+        def conversar(self, sessao_id, texto):
+            yield {"tipo": "trecho", "conteudo": "Aqui "}
+            yield {"tipo": "trecho", "conteudo": "estão!"}
+            yield {
+                "tipo": "resultado", "acao": "busca", "filtros": {"marca": "Fiat"}, "avisos": ["Filtros atuais: marca"],
+                "veiculos": [{"marca": "Fiat", "modelo": "Argo"}], "erro": None,
+            }
+
+    terminal_agent.conversar_um_turno(ClienteFalso(), "s1", "quero um fiat")
+    saida = capsys.readouterr().out
+    assert "ALFRED: Aqui estão!" in saida
+    assert "ALFRED (INFO): Filtros atuais: marca" in saida
+    assert "Modelo: Argo" in saida
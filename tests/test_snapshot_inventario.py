@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.database.models import Veiculo
+from app.database.session import SessionLocal
+from app.mcp import server
+from app.mcp.indice_memoria import IndiceInventario, extrair_registros, indice_inventario
+from app.mcp.schemas import VeiculoFiltros
+from app.mcp.snapshot_inventario import SnapshotCompartilhado, publicar_snapshot
+from tests.test_indice_memoria import FILTROS_DE_PARIDADE
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def registros(banco_populado):
+    with SessionLocal() as db:
+        return extrair_registros(db.execute(select(Veiculo)).scalars())
+
+
+def test_snapshot_mapeado_responde_como_o_indice_local(registros, tmp_path):
+    local = IndiceInventario()
+    local.carregar(SimpleNamespace(**r) for r in registros)
+    compartilhado = IndiceInventario()
+    compartilhado.usar_snapshot(SnapshotCompartilhado(str(tmp_path / "inventario.snapshot")))
+    assert not compartilhado.carregado # Nada publicado ainda
+
+    publicar_snapshot(registros, 7, str(tmp_path / "inventario.snapshot"))
+    assert compartilhado.carregado
+    for filtros in (VeiculoFiltros(**f) for f in FILTROS_DE_PARIDADE):
+        assert compartilhado.buscar(filtros, 10_000) == local.buscar(filtros, 10_000)
+    filtros = VeiculoFiltros(marca="Fiat", potencia_cv_min=400)
+    assert compartilhado.mais_proximos(filtros, 5) == local.mais_proximos(filtros, 5)
+
+
+def test_nova_publicacao_e_percebida_sem_reiniciar(registros, tmp_path):
+    caminho = str(tmp_path / "inventario.snapshot")
+    publicar_snapshot(registros, 1, caminho)
+    leitor = SnapshotCompartilhado(caminho)
+    antigas = leitor.colunas()
+    assert leitor.versao() == 1 and len(antigas.ids) == len(registros)
+
+    publicar_snapshot(registros[:10], 2, caminho)
+    assert leitor.versao() == 2 and len(leitor.colunas().ids) == 10
+    # Quem ainda segura o mapeamento anterior continua lendo-o normalmente
+    assert antigas.registros[len(registros) - 1] == registros[-1]
+    assert not [p for p in tmp_path.iterdir() if p.name != "inventario.snapshot"] # Sem temporários
+
+
+def test_outro_processo_mapeia_o_mesmo_arquivo(registros, tmp_path):
+    caminho = tmp_path / "inventario.snapshot"
+    publicar_snapshot(registros, 3, str(caminho))
+    codigo = (
+        "import sys\n"
+        "from app.mcp.snapshot_inventario import SnapshotCompartilhado\n"
+        "leitor = SnapshotCompartilhado(sys.argv[1])\n"
+        "print(leitor.versao(), len(leitor.colunas().ids), leitor.colunas().registros[0]['marca'])\n"
+    )
+    ambiente = {**os.environ, "PYTHONPATH": str(RAIZ_DO_PROJETO)}
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo, str(caminho)], cwd=RAIZ_DO_PROJETO, env=ambiente,
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+    assert saida == ["3", str(len(registros)), registros[0]["marca"]]
+
+
+def test_servidor_publica_o_snapshot_quando_ele_fica_para_tras(cliente_api, monkeypatch, tmp_path):
+    leitor = SnapshotCompartilhado(str(tmp_path / "inventario.snapshot"))
+    monkeypatch.setattr(server, "snapshot_inventario", leitor)
+    monkeypatch.setattr(server, "MCP_SNAPSHOT_COMPARTILHADO", True)
+    monkeypatch.setattr(server, "MCP_CACHE_RESULTADOS", False)
+    indice_inventario.usar_snapshot(leitor)
+    try:
+        via_sql = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Fiat"}, params={"limite": 500}).json()
+        monkeypatch.setattr(server, "MCP_INDICE_MEMORIA", True)
+        via_snapshot = cliente_api.post("/mcp/buscar_veiculos/", json={"marca": "Fiat"}, params={"limite": 500})
+        assert via_snapshot.json() == via_sql
+        assert leitor.versao() >= 0 # Publicado por este worker, que não achou o arquivo
+
+        # Recarregar republica o arquivo em vez de montar um índice só deste processo
+        (tmp_path / "inventario.snapshot").unlink()
+        resposta = cliente_api.post("/mcp/indice_memoria/recarregar/")
+        assert (tmp_path / "inventario.snapshot").exists()
+        assert resposta.json()["veiculos_carregados"] == len(leitor.colunas().ids)
+    finally:
+        indice_inventario.usar_snapshot(None)